@@ -21,6 +21,8 @@ VERBOSE=false
 vlog() { $VERBOSE && echo "[VERBOSE] $*" || true; }
 run() { if $DRY_RUN; then echo "[DRY-RUN] $*"; else eval "$@"; fi }
 info() { echo "[INFO] $(date +"${AUTOTEST_FORMAT_DATE:-%d-%m-%Y %H:%M:%S}") - $*"; }
+# --ring для сборщиков при AUTOTEST_RING=1 (кольцо рядом с логом, см. tsring.py)
+ring_arg() { [ "${AUTOTEST_RING:-0}" = "1" ] && echo "--ring" || true; }
 
 print_repo_banner() {
   echo "AutoTest Linux Framework"
@@ -63,18 +65,45 @@ Environment (can be set in .env):
   AUTOTEST_LOG_DIR              Base dir for logs (default: $HOME/AutoTest_Logs)
   AUTOTEST_GPU_LOG_DIR          GPU logs dir (default: $HOME/gpu_burn_logs)
   AUTOTEST_ARCHIVE_DIR          Reports/archives dir (default: $HOME/AutoTest_Archives)
-  AUTOTEST_RETENTION_DAYS       Default retention for clean (default: 14)
+  AUTOTEST_RETENTION_DAYS       Max log age for retention (daily timer) and clean (default: 14)
+  AUTOTEST_RETENTION_KEEP_RUNS  retention: keep only the last N runs of each log kind (default: 0 = off)
+  AUTOTEST_RETENTION_MAX_MB     retention: size budget per log dir, MiB; oldest runs go first (default: 0 = off)
+  AUTOTEST_RETENTION_POLICY     retention: JSON with per-kind/per-dir policies (see retention.py)
+  AUTOTEST_ROTATE_MB            rotate/retention: compress logs larger than N MiB (default: 5)
   AUTOTEST_FORMAT_DATE          Date format for timestamps (default: %d-%m-%Y %H:%M:%S)
+  AUTOTEST_GPU_SAMPLE_MS        gpuburn: nvidia-smi sampling interval, ms (default: 1000, min 100)
+  AUTOTEST_GPU_LOG_FORMAT       gpuburn: query (CSV collector, default) or table (nvidia-smi every 10s)
+  AUTOTEST_NVIDIA_SMI           nvidia-smi binary for the collector (default: nvidia-smi)
+  AUTOTEST_MONITOR_IMPL         monitor-once/loop: python (sysmonitor.py, default) or sh (monitor.sh)
+  AUTOTEST_DISKSTATS_INTERVAL   disk-fio: diskstats sampling interval, s (default: 0.1, 0 = off)
+  AUTOTEST_RING                 1 = sysmonitor, disksampler and the GPU collector also write .ring files
+                                (memory-mapped, read by the GUI; tsring.py export converts them to logs)
+  AUTOTEST_IPERF3               iperf3 binary for net-iperf3-client (default: iperf3)
+  AUTOTEST_IPERF_IMPL           net-iperf3-client: python (netperf.py, default) or sh (text parsing, one host)
 
 Commands:
   install                       Install common packages and enable SSH
   monitor-once                  Append one row of system metrics to log
-  monitor-loop <seconds>        Log system metrics every N seconds
+  monitor-loop <seconds>        Log system metrics every N seconds (fractions allowed)
   htop-snapshot                 Save HTML snapshot of top+sensors via aha
   stress-ram [duration_s]       Run RAM stress (~90% of RAM) for duration (default 28800s)
   iostat <device> [interval]    Log iostat for device every 5 min (default) or custom interval
+  diskstats [interval] [dur]    Sample /proc/diskstats for all block devices (IOPS, MB/s, await,
+                                %util, queue depth) into diskstats_<date>.csv, down to 0.1s
   gpuburn <duration_s>          Run gpu_burn for all GPUs and log nvidia-smi
-  parse-nvidia <log> [xlsx]     Parse nvidia-smi log to Excel (requires Python deps)
+  parse-nvidia <log|dir|glob> [xlsx|store_dir] [--resume|--follow] [--jobs N]
+               [--format xlsx|parquet|feather|csv] [--engine regex|fast]
+                                Parse nvidia-smi log(s) to Excel (requires Python deps).
+                                parquet/feather/csv: long schema partitioned by run_id/date,
+                                appendable; query with: parse-nvidia <store_dir> --query
+                                Several/large logs are parsed in parallel (--jobs, default: all cores).
+                                --engine fast: mmap-based parser for multi-GB logs, same rows
+                                Collector CSV logs (nvidia-smi_*.csv) are read directly
+                                --summary FILE.xlsx|json [--summary-only]: per-GPU per-minute/per-run
+                                min/max/mean/p95 and power-cap/utilization-drop episodes, same pass
+                                --resume parses only new bytes since the last checkpoint
+                                --profile: per-stage time/CPU, rows/s, peak RSS, GC -> <log>.profile.json
+                                (--profile-stacks FILE.prof|FILE.folded for cProfile/flamegraph)
   list                          List available tasks (commands) and plugins
   run <task> [args]             Run any task by name (includes plugins)
   status                        Show runtime status (gpu-burn, cron)
@@ -82,28 +111,56 @@ Commands:
   tail <task>                   Tail log (monitor-once|htop-snapshot|gpuburn-smi)
   cpu-stress [duration_s]       CPU stress via stress-ng with countdown, logs
   ram-memtest <MB> <loops>      RAM test via memtester, logs
-  disk-fio <dir> <duration_s>   Disk test via fio randrw, logs
+  disk-fio <dir> <duration_s>   Disk test via fio randrw, logs + diskstats_<date>.csv alongside
   net-iperf3-server             Run iperf3 server
-  net-iperf3-client <host> <t>  Run iperf3 client to host for t seconds
-  task run <4h|8h|24h|48h|gpu_only|cpu_only>
+  net-iperf3-client <host[,host2:port]> [t] [runs] [netperf.py opts]
+                                Run iperf3 client (default 10 runs of 10s); several hosts run
+                                concurrently, results in iperf3_<date>.json.
+                                Options: -P N streams, --direction up|down|both|bidir, --udp -b RATE
+  task run <4h|8h|24h|48h|gpu_only|cpu_only|file.json> [--fresh] [--sequential|--max-parallel N]
+                                Campaign from campaigns/<name>.json: stages on different resources
+                                (cpu, gpu, ram, disk, net) run concurrently; progress is saved in
+                                $LOG_DIR/campaigns and an interrupted run continues where it stopped
+  task resume [name]            Continue an interrupted campaign (default: the latest)
+  task plan <name>              Show the estimated schedule
+  task status [name] | task list
+  fleet -i <hosts.txt>|--hosts <h1,h2> [-j N] [--collect] [--detach] -- <command> [args]
+                                Run a command or campaign on many hosts over ssh (one connection
+                                per host, N at once), output prefixed [host]; --collect pulls the
+                                archives into $ARCHIVE_DIR/fleet_<date> with summary.json.
+                                --transport local simulates hosts on this machine
 
 Scheduling:
   setup-cron                    Register cron jobs for monitor-once and htop-snapshot (every 5 min)
+                                and a daily retention run
   setup-systemd                 Register systemd user timers (falls back to cron)
   remove-systemd                Remove systemd user timers
 
 Logs and reports:
-  collect                       Collect logs into timestamped tar.gz in archive dir
+  collect [--full]              Archive all log dirs into archive dir (logarchive.py: threaded, only new or
+                                changed blocks; --full stores everything; list/restore: logarchive.py)
   clean [--only sys|gpu|htop|ram|iostat|all] [--older N|--all]
                                 Clean logs. By default removes ALL autotest logs now.
                                 Use --older N to keep recent logs.
-  rotate                        Gzip/compress large logs (>5M) in log dirs
-  report                        Build a single HTML with key logs and summary
+  rotate                        Compress large logs (>5M) in log dirs into indexed .gz blocks
+  retention [--dry-run] [--policy FILE] [--jobs N]
+                                Apply retention policies to all log dirs in one pass: max age, last N runs,
+                                dir size budget, compression at low CPU/IO priority (retention.py)
+  report [--since T] [--until T] [--run ID]
+                                Build an HTML report with summary tables over all logs
+                                (or only logs of a time range / run from the catalog)
+  catalog [update|runs|query ...]
+                                SQLite catalog of runs and log files ($ARCHIVE_DIR/catalog.sqlite):
+                                  catalog runs
+                                  catalog query --kind fio --since 2025-10-14 --format paths
 
 Tooling:
   deps-all                      Install all dependencies required by tasks
   doctor                        Check dependencies, permissions and environment
   config-show                   Show effective configuration values
+  bench [--quick] [--sizes 1h,24h,48h] [--gpus 1,4,8] [--cases ...] [--compare OLD NEW]
+                                Benchmark log parsing/export on synthetic logs (no GPU needed),
+                                results as JSON in $AUTOTEST_ARCHIVE_DIR/bench
   help-en                       Show this help in English
   help-ru                       Show help in Russian
 
@@ -134,41 +191,93 @@ cat <<'USAGE_RU'
   AUTOTEST_LOG_DIR              База логов (по умолчанию: $HOME/AutoTest_Logs)
   AUTOTEST_GPU_LOG_DIR          Логи GPU (по умолчанию: $HOME/gpu_burn_logs)
   AUTOTEST_ARCHIVE_DIR          Папка отчетов/архивов (по умолчанию: $HOME/AutoTest_Archives)
-  AUTOTEST_RETENTION_DAYS       Ретенция по умолчанию для clean (по умолчанию: 14)
+  AUTOTEST_RETENTION_DAYS       Срок хранения логов для retention (ежедневный таймер) и clean (по умолчанию: 14)
+  AUTOTEST_RETENTION_KEEP_RUNS  retention: хранить N последних прогонов каждого вида логов (по умолчанию: 0 = выкл.)
+  AUTOTEST_RETENTION_MAX_MB     retention: бюджет каталога логов, МиБ; удаляются самые старые (по умолчанию: 0 = выкл.)
+  AUTOTEST_RETENTION_POLICY     retention: JSON с политиками по видам и каталогам (см. retention.py)
+  AUTOTEST_ROTATE_MB            rotate/retention: сжимать логи больше N МиБ (по умолчанию: 5)
   AUTOTEST_FORMAT_DATE          Формат даты/времени (по умолчанию: %d-%m-%Y %H:%M:%S)
+  AUTOTEST_GPU_SAMPLE_MS        gpuburn: шаг опроса nvidia-smi, мс (по умолчанию: 1000, минимум 100)
+  AUTOTEST_GPU_LOG_FORMAT       gpuburn: query (CSV-сборщик, по умолчанию) или table (nvidia-smi раз в 10 с)
+  AUTOTEST_NVIDIA_SMI           Бинарь nvidia-smi для сборщика (по умолчанию: nvidia-smi)
+  AUTOTEST_MONITOR_IMPL         monitor-once/loop: python (sysmonitor.py, по умолчанию) или sh (monitor.sh)
+  AUTOTEST_DISKSTATS_INTERVAL   disk-fio: интервал замеров diskstats, с (по умолчанию: 0.1, 0 — выкл.)
+  AUTOTEST_RING                 1 — sysmonitor, disksampler и сборщик GPU пишут ещё и кольца .ring
+                                (отображаются в память, их читает GUI; в логи — tsring.py export)
+  AUTOTEST_IPERF3               Бинарь iperf3 для net-iperf3-client (по умолчанию: iperf3)
+  AUTOTEST_IPERF_IMPL           net-iperf3-client: python (netperf.py, по умолчанию) или sh (разбор текста, один хост)
 
 Команды:
   install                       Установка пакетов и включение SSH
   monitor-once                  Одна строка метрик в лог
-  monitor-loop <секунды>        Писать метрики каждые N секунд
+  monitor-loop <секунды>        Писать метрики каждые N секунд (можно дробное)
   htop-snapshot                 HTML-снимок top+sensors через aha
   stress-ram [секунды]          Стресс RAM (~90% ОЗУ) указанное время
   iostat <устройство> [инт]     Лог iostat для устройства
+  diskstats [инт] [длит]        Замеры /proc/diskstats всех блочных устройств (IOPS, МБ/с, await,
+                                %util, очередь) в diskstats_<дата>.csv, интервал от 0.1 с
   gpuburn <секунды>             Запуск gpu_burn на все GPU + лог nvidia-smi
-  parse-nvidia <лог> [xlsx]     Парсинг nvidia-smi лога в Excel
+  parse-nvidia <лог|папка|glob> [xlsx|папка_хранилища] [--resume|--follow] [--jobs N]
+               [--format xlsx|parquet|feather|csv] [--engine regex|fast]
+                                Парсинг nvidia-smi логов в Excel.
+                                parquet/feather/csv: длинная схема с партициями run_id/date,
+                                дописывается между прогонами; выборка: parse-nvidia <папка> --query
+                                Несколько/крупные логи разбираются параллельно (--jobs, по умолчанию все ядра).
+                                --engine fast: разбор через mmap для многогигабайтных логов, те же строки
+                                CSV-логи сборщика (nvidia-smi_*.csv) читаются напрямую
+                                --summary ФАЙЛ.xlsx|json [--summary-only]: min/max/mean/p95 по GPU за минуту
+                                и за прогон, эпизоды упора в предел мощности и провалов загрузки
+                                --resume разбирает только новые байты с последнего чекпоинта
+                                --profile: время/CPU по этапам, строк/с, пик RSS, GC -> <лог>.profile.json
+                                (--profile-stacks ФАЙЛ.prof|ФАЙЛ.folded для cProfile/flamegraph)
   list                          Список задач (включая плагины)
   run <задача> [арг]            Запуск задачи по имени (включая плагины)
   status                        Статус (gpu-burn, cron)
   stop <задача>                 Остановить задачу (поддержка: gpuburn)
   tail <задача>                 Просмотр лога (monitor-once|htop-snapshot|gpuburn-smi)
+  task run <4h|8h|24h|48h|gpu_only|cpu_only|файл.json> [--fresh] [--sequential|--max-parallel N]
+                                Кампания из campaigns/<имя>.json: этапы на разных ресурсах
+                                (cpu, gpu, ram, disk, net) идут одновременно; ход сохраняется в
+                                $LOG_DIR/campaigns, прерванный прогон продолжается с места остановки
+  task resume [имя]             Продолжить прерванную кампанию (по умолчанию — последнюю)
+  task plan <имя>               Расчётное расписание этапов
+  task status [имя] | task list
+  fleet -i <hosts.txt>|--hosts <h1,h2> [-j N] [--collect] [--detach] -- <команда> [арг]
+                                Команда или кампания на многих хостах по ssh (одно соединение на
+                                хост, N одновременно), вывод с префиксом [хост]; --collect забирает
+                                архивы в $ARCHIVE_DIR/fleet_<дата> с итогом summary.json.
+                                --transport local имитирует хосты на этой машине
 
 Планировщик:
-  setup-cron                    Добавить задания cron (каждые 5 минут)
+  setup-cron                    Добавить задания cron (каждые 5 минут) и ежедневный retention
   setup-systemd                 Добавить systemd user timers (если недоступно — fallback на cron)
   remove-systemd                Удалить systemd user timers
 
 Логи и отчеты:
-  collect                       Сбор логов в tar.gz в папку архива
+  collect [--full]              Сбор логов в архив (logarchive.py: сжатие в потоках, только новые и
+                                изменённые блоки; --full — всё; список и восстановление: logarchive.py)
   clean [--only sys|gpu|htop|ram|iostat|all] [--older N|--all]
                                 Очистка логов. По умолчанию удаляет ВСЕ логи автотеста сейчас.
                                 С ключом --older N сохраняет свежие логи.
-  rotate                        Сжатие больших логов (>5M)
-  report                        HTML-отчёт с краткими итогами и хвостами логов
+  rotate                        Сжатие больших логов (>5M) в блочный .gz с индексом
+  retention [--dry-run] [--policy FILE] [--jobs N]
+                                Политики хранения за один обход всех каталогов логов: срок, N последних
+                                прогонов, бюджет каталога, сжатие с низким приоритетом CPU/IO (retention.py)
+  report [--since T] [--until T] [--run ID]
+                                HTML-отчёт со сводными таблицами по всем логам
+                                (или только за интервал / прогон из каталога)
+  catalog [update|runs|query ...]
+                                SQLite-каталог прогонов и логов ($ARCHIVE_DIR/catalog.sqlite):
+                                  catalog runs
+                                  catalog query --kind fio --since 2025-10-14 --format paths
 
 Сервисные команды:
   deps-all                      Установить все зависимости
   doctor                        Проверка зависимостей и окружения
   config-show                   Показать активную конфигурацию
+  bench [--quick] [--sizes 1h,24h,48h] [--gpus 1,4,8] [--cases ...] [--compare OLD NEW]
+                                Бенчмарк разбора/выгрузки логов на синтетических логах (GPU не нужен),
+                                результаты в JSON в $AUTOTEST_ARCHIVE_DIR/bench
   help-en                       Показать справку на английском
   help-ru                       Показать справку на русском
 
@@ -235,21 +344,26 @@ TASK_DESC[run]="Run task by name"
 TASK_DESC[status]="Show runtime status (gpu-burn, cron)"
 TASK_DESC[stop]="Stop a running task"
 TASK_DESC[tail]="Tail known task log"
-TASK_DESC[collect]="Archive logs into tar.gz"
+TASK_DESC[collect]="Archive logs (incremental, deduplicated)"
 TASK_DESC[clean]="Delete logs older than N days"
 TASK_DESC[rotate]="Compress large logs to save space"
+TASK_DESC[retention]="Apply log retention policies (age, runs, size budget)"
 TASK_DESC[deps-all]="Install all framework dependencies"
 TASK_DESC[config-show]="Print current configuration"
+TASK_DESC[bench]="Benchmark log parsing/export on synthetic logs"
 TASK_DESC[doctor]="Check dependencies, permissions and environment"
-TASK_DESC[report]="Build HTML report with summaries and recent logs"
+TASK_DESC[report]="Build HTML report with summary tables over all logs"
+TASK_DESC[catalog]="Query the SQLite catalog of runs and log files"
 TASK_DESC[setup-systemd]="Register systemd user timers (fallback to cron)"
 TASK_DESC[remove-systemd]="Remove systemd user timers"
 TASK_DESC[cpu-stress]="CPU stress test via stress-ng"
 TASK_DESC[ram-memtest]="RAM test via memtester"
 TASK_DESC[disk-fio]="Disk test via fio"
+TASK_DESC[diskstats]="Sample /proc/diskstats for all block devices"
 TASK_DESC[net-iperf3-server]="Run iperf3 server"
 TASK_DESC[net-iperf3-client]="Run iperf3 client"
 TASK_DESC[task]="Run predefined test tasks"
+TASK_DESC[fleet]="Run a command or campaign on many hosts"
 
 # Plugin registry
 declare -A PLUGIN_PATH
@@ -305,13 +419,22 @@ cmd_install() {
 
 cmd_monitor_once() {
   info "Monitor once"
-  bash "$SCRIPT_DIR/monitor.sh"
+  # sysmonitor.py читает /proc и /sys напрямую; monitor.sh — запасной вариант без python3
+  if [ "${AUTOTEST_MONITOR_IMPL:-python}" != "sh" ] && command -v python3 >/dev/null 2>&1; then
+    python3 "$SCRIPT_DIR/sysmonitor.py" $(ring_arg)
+  else
+    bash "$SCRIPT_DIR/monitor.sh"
+  fi
   echo "Appended metrics to $HOME/AutoTest_Logs/sysmonitor/sysmonitor.log"
 }
 
 cmd_monitor_loop() {
   local interval="${1:-10}"
   info "Monitor loop every ${interval}s"
+  if [ "${AUTOTEST_MONITOR_IMPL:-python}" != "sh" ] && command -v python3 >/dev/null 2>&1; then
+    # один процесс на весь цикл, интервал может быть дробным (0.5)
+    exec python3 "$SCRIPT_DIR/sysmonitor.py" --interval "$interval" $(ring_arg)
+  fi
   ensure_cmd awk
   ensure_cmd sensors || true
   while true; do
@@ -392,12 +515,20 @@ cmd_gpuburn() {
   nohup "$bin" "$duration" "${gpu_idx[@]}" > "$burn_log" 2>&1 &
   local pid=$!
   echo $pid > "$LOGDIR/gpu_burn.pid"
-  (
-    while kill -0 $pid 2>/dev/null; do
-      nvidia-smi
-      sleep 10
-    done
-  ) >> "$smi_log" 2>&1 &
+  if [ "${AUTOTEST_GPU_LOG_FORMAT:-query}" != "table" ] && command -v python3 >/dev/null 2>&1; then
+    # Один долгоживущий nvidia-smi --query-gpu -lms: шаг до 100 мс, частоты,
+    # P-state, причины троттлинга, ECC. Сборщик завершится вместе с gpu_burn.
+    smi_log="${smi_log%.log}.csv"
+    nohup python3 "$SCRIPT_DIR/gpuburn/nvidia-smi_collector.py" -o "$smi_log" \
+      --interval-ms "${AUTOTEST_GPU_SAMPLE_MS:-1000}" --pid "$pid" $(ring_arg) > "$LOGDIR/nvidia-smi_collector.log" 2>&1 &
+  else
+    (
+      while kill -0 $pid 2>/dev/null; do
+        nvidia-smi
+        sleep 10
+      done
+    ) >> "$smi_log" 2>&1 &
+  fi
   echo "Логи: $burn_log, $smi_log"
 }
 
@@ -467,7 +598,7 @@ cmd_tail() {
       tail -f "$LOG_DIR/htop-snapshot.log" ;;
     gpuburn-smi)
       local LOGDIR="$HOME/gpu_burn_logs"; local last
-      last=$(ls -1t "$LOGDIR"/nvidia-smi_*.log 2>/dev/null | head -n1)
+      last=$(ls -1t "$LOGDIR"/nvidia-smi_*.log "$LOGDIR"/nvidia-smi_*.csv 2>/dev/null | head -n1)
       [ -n "$last" ] && tail -f "$last" || { echo "No nvidia-smi logs found"; exit 1; }
       ;;
     *) echo "Unknown task for tail: $task" >&2; exit 1 ;;
@@ -515,15 +646,38 @@ cmd_collect() {
   ts=$(date +"${AUTOTEST_FORMAT_DATE:-%d-%m-%Y %H:%M:%S}")
   info "Collect logs"
   mkdir -p "$ARCHIVE_DIR"
-  archive="$ARCHIVE_DIR/autotest_logs_$ts.tar.gz"
-  echo "Collecting logs to $archive"
-  run tar -czf "$archive" -C "$HOME" \
-    "${LOG_DIR#${HOME}/}" 2>/dev/null || true
-  run tar -rzf "$archive" -C "$HOME" \
-    "${GPU_LOG_DIR#${HOME}/}" 2>/dev/null || true
+  # run делает eval: пути экранируются, иначе дата с пробелом режет имя архива
+  if command -v python3 >/dev/null 2>&1; then
+    # logarchive.py: все корни логов за проход, сжатие в потоках, в архив
+    # попадают только блоки, которых нет в прошлых архивах (--full — все)
+    archive="$ARCHIVE_DIR/autotest_logs_$ts.tar"
+    echo "Collecting logs to $archive"
+    run python3 "$(printf %q "$SCRIPT_DIR/logarchive.py")" create -o "$(printf %q "$archive")" \
+      --log-dir "$(printf %q "$LOG_DIR")" --gpu-log-dir "$(printf %q "$GPU_LOG_DIR")" ${1:+$(printf '%q ' "$@")} || return 1
+  else
+    # одним tar: к сжатому архиву tar -r дописать не может
+    archive="$ARCHIVE_DIR/autotest_logs_$ts.tar.gz"
+    echo "Collecting logs to $archive"
+    run tar -czf "$(printf %q "$archive")" -C "$(printf %q "$HOME")" \
+      "$(printf %q "${LOG_DIR#${HOME}/}")" "$(printf %q "${GPU_LOG_DIR#${HOME}/}")" 2>/dev/null || true
+  fi
   echo "Saved: $archive"
 }
 
+catalog_py() {
+  # catalog.py с каталогами из конфигурации; каталог — $ARCHIVE_DIR/catalog.sqlite
+  AUTOTEST_FORMAT_DATE="${AUTOTEST_FORMAT_DATE:-%d-%m-%Y %H:%M:%S}" python3 "$SCRIPT_DIR/catalog.py" \
+    --log-dir "$LOG_DIR" --gpu-log-dir "$GPU_LOG_DIR" --archive-dir "$ARCHIVE_DIR" "$@"
+}
+
+cmd_catalog() {
+  if ! command -v python3 >/dev/null 2>&1; then
+    echo "python3 is required for catalog" >&2; return 1
+  fi
+  if [ -z "${1:-}" ]; then set -- runs; fi
+  catalog_py "$@"
+}
+
 cmd_clean() {
   local only="all"; local older=""; local mode="all_now"
   info "Clean logs"
@@ -555,15 +709,32 @@ cmd_clean() {
 
   echo "Cleaning logs (only=$only, mode=$mode${older:+, older=$older d})"
 
+  # Отбор по каталогу catalog.py (без повторного обхода find по каждому шаблону);
+  # find -mtime +N = старше N+1 суток
+  if command -v python3 >/dev/null 2>&1; then
+    case "$only" in
+      sys|gpu|htop|ram|iostat|all) ;;
+      *) echo "Unknown --only value: $only" >&2; exit 1 ;;
+    esac
+    if [ "$DRY_RUN" = true ]; then
+      catalog_py clean --only "$only" ${older:+--older-days "$((older + 1))"} --dry-run
+      return 0
+    fi
+    if catalog_py clean --only "$only" ${older:+--older-days "$((older + 1))"}; then
+      return 0
+    fi
+    echo "catalog.py failed, falling back to find" >&2
+  fi
+
   case "$only" in
     sys|all)
       for d in "${sys_dirs[@]}"; do
-        clean_dir "$d" "*.log"; clean_dir "$d" "*.csv"; clean_dir "$d" "*.html"; clean_dir "$d" "*.log.gz"; clean_dir "$d" "*.csv.gz"; clean_dir "$d" "*.html.gz"
+        clean_dir "$d" "*.log"; clean_dir "$d" "*.csv"; clean_dir "$d" "*.html"; clean_dir "$d" "*.ring"; clean_dir "$d" "*.log.gz"; clean_dir "$d" "*.csv.gz"; clean_dir "$d" "*.html.gz"; clean_dir "$d" "*.gz.idx"
       done
       ;;&
     gpu|all)
       for d in "${gpu_dirs[@]}"; do
-        clean_dir "$d" "*.log"; clean_dir "$d" "*.csv"; clean_dir "$d" "*.gz"; clean_dir "$d" "*.pid"
+        clean_dir "$d" "*.log"; clean_dir "$d" "*.csv"; clean_dir "$d" "*.ring"; clean_dir "$d" "*.gz"; clean_dir "$d" "*.gz.idx"; clean_dir "$d" "*.pid"
       done
       ;;&
     htop|all)
@@ -573,23 +744,49 @@ cmd_clean() {
       ;;&
     ram|all)
       for d in "${ram_dirs[@]}"; do
-        clean_dir "$d" "*.log"; clean_dir "$d" "*.log.gz"
+        clean_dir "$d" "*.log"; clean_dir "$d" "*.log.gz"; clean_dir "$d" "*.log.gz.idx"
       done
       ;;&
     iostat|all)
       for d in "${iostat_dirs[@]}"; do
-        clean_dir "$d" "*_iostat.csv"; clean_dir "$d" "*_iostat.csv.gz"
+        clean_dir "$d" "*_iostat.csv"; clean_dir "$d" "*_iostat.csv.gz"; clean_dir "$d" "*_iostat.csv.gz.idx"
       done
       ;;
     *) echo "Unknown --only value: $only" >&2; exit 1 ;;
   esac
 }
 
+retention_py() {
+  # retention.py с каталогами и политиками из конфигурации (.env не экспортируется)
+  AUTOTEST_RETENTION_DAYS="$RETENTION_DAYS" AUTOTEST_RETENTION_KEEP_RUNS="${AUTOTEST_RETENTION_KEEP_RUNS:-}" \
+  AUTOTEST_RETENTION_MAX_MB="${AUTOTEST_RETENTION_MAX_MB:-}" AUTOTEST_RETENTION_POLICY="${AUTOTEST_RETENTION_POLICY:-}" \
+  AUTOTEST_ROTATE_MB="${AUTOTEST_ROTATE_MB:-}" python3 "$SCRIPT_DIR/retention.py" \
+    --log-dir "$LOG_DIR" --gpu-log-dir "$GPU_LOG_DIR" --archive-dir "$ARCHIVE_DIR" "$@"
+}
+
 cmd_rotate() {
-  info "Rotate logs (>5M)"
-  echo "Compressing large logs (>5M) in $LOG_DIR and $GPU_LOG_DIR"
-  find "$LOG_DIR" -type f \( -name '*.log' -o -name '*.html' -o -name '*.csv' \) -size +5M -not -name '*.gz' -print -exec gzip -f {} + 2>/dev/null || true
-  find "$GPU_LOG_DIR" -type f \( -name '*.log' -o -name '*.csv' \) -size +5M -not -name '*.gz' -print -exec gzip -f {} + 2>/dev/null || true
+  local mb="${AUTOTEST_ROTATE_MB:-5}"
+  info "Rotate logs (>${mb}M)"
+  echo "Compressing large logs (>${mb}M) in $LOG_DIR and $GPU_LOG_DIR"
+  # retention.py --compress-only: один обход всех каталогов, gzlog.py (блочный
+  # .gz с индексом <file>.gz.idx — парсеры читают его без распаковки и по
+  # интервалу времени) в пуле с низким приоритетом; без python3 — обычный gzip
+  if command -v python3 >/dev/null 2>&1; then
+    if [ "$DRY_RUN" = true ]; then set -- --dry-run "$@"; fi
+    retention_py --compress-only "$@"
+    return
+  fi
+  find "$LOG_DIR" -type f \( -name '*.log' -o -name '*.html' -o -name '*.csv' \) -size +"${mb}"M -not -name '*.gz' -print -exec gzip -f {} + 2>/dev/null || true
+  find "$GPU_LOG_DIR" -type f \( -name '*.log' -o -name '*.csv' \) -size +"${mb}"M -not -name '*.gz' -print -exec gzip -f {} + 2>/dev/null || true
+}
+
+cmd_retention() {
+  if ! command -v python3 >/dev/null 2>&1; then
+    echo "python3 is required for retention (use clean --older N)" >&2; return 1
+  fi
+  info "Retention (max age ${RETENTION_DAYS}d)"
+  if [ "$DRY_RUN" = true ]; then set -- --dry-run "$@"; fi
+  retention_py "$@"
 }
 
 cmd_deps_all() {
@@ -601,6 +798,8 @@ cmd_deps_all() {
   # Python libs for parsers
   run python3 -m pip install --user --upgrade pip
   run python3 -m pip install --user pandas openpyxl
+  # Optional: columnar GPU metrics store (parse-nvidia --format parquet|feather)
+  run python3 -m pip install --user pyarrow || true
   # gpu_burn build
   if [ ! -x "$SCRIPT_DIR/gpu_burn" ]; then
     run git clone https://github.com/wilicc/gpu-burn.git "$SCRIPT_DIR/gpu-burn-src" || true
@@ -667,10 +866,35 @@ cmd_disk_fio() {
   logfile="$LOG_DIR/fio_${ts}.log"
   local file="$dir/fio_testfile"
   echo "fio randrw ${duration}s on $file" | tee -a "$logfile"
+  # Ряды /proc/diskstats всех устройств на время fio (IOPS, МБ/с, await,
+  # %util, очередь) — в diskstats_<ts>.csv с той же меткой, что и лог fio
+  local sampler_pid=""
+  if command -v python3 >/dev/null 2>&1 && [ "${AUTOTEST_DISKSTATS_INTERVAL:-0.1}" != "0" ]; then
+    local stats="$LOG_DIR/diskstats_${ts}.csv"
+    python3 "$SCRIPT_DIR/disksampler.py" --interval "${AUTOTEST_DISKSTATS_INTERVAL:-0.1}" -o "$stats" $(ring_arg) >/dev/null &
+    sampler_pid=$!
+    trap '[ -n "$sampler_pid" ] && kill "$sampler_pid" 2>/dev/null' EXIT
+    echo "diskstats: $stats" | tee -a "$logfile"
+  fi
   fio --name=autotest --filename="$file" --size=1G --bs=128k --rw=randrw --rwmixread=50 --ioengine=libaio --iodepth=32 --direct=1 --runtime="$duration" --time_based --group_reporting 2>&1 | tee -a "$logfile"
+  if [ -n "$sampler_pid" ]; then
+    kill "$sampler_pid" 2>/dev/null || true
+    wait "$sampler_pid" 2>/dev/null || true
+    trap - EXIT
+  fi
   rm -f "$file"
 }
 
+cmd_diskstats() {
+  local interval="${1:-1}"; local duration="${2:-}"
+  require_cmd python3 python3
+  local ts
+  ts=$(date +"${AUTOTEST_FORMAT_DATE:-%d-%m-%Y %H:%M:%S}")
+  info "diskstats every ${interval}s${duration:+ for ${duration}s}"
+  python3 "$SCRIPT_DIR/disksampler.py" --interval "$interval" ${duration:+--duration "$duration"} \
+    -o "$LOG_DIR/diskstats_${ts}.csv" $(ring_arg)
+}
+
 cmd_net_iperf3_server() {
   require_cmd iperf3 iperf3
   local bind_ip="${AUTOTEST_IPERF_BIND:-192.168.10.18}"
@@ -681,11 +905,23 @@ cmd_net_iperf3_server() {
 
 cmd_net_iperf3_client() {
   local host="${1:-}"; local duration="${2:-10}"; local runs="${3:-10}"
-  info "iperf3 client to ${host} runs=${runs} duration=${duration}s"
+  shift $(( $# < 3 ? $# : 3 ))
+  info "iperf3 client to ${host} runs=${runs} duration=${duration}s${*:+ $*}"
   if [ -z "$host" ]; then echo "Specify host for iperf3 client" >&2; exit 1; fi
-  require_cmd iperf3 iperf3
+  local iperf3_bin="${AUTOTEST_IPERF3:-iperf3}"
+  [ "$iperf3_bin" = "iperf3" ] && require_cmd iperf3 iperf3
   local ts logfile
   ts=$(date +"${AUTOTEST_FORMAT_DATE:-%d-%m-%Y %H:%M:%S}")
+  # netperf.py: все хосты (через запятую) одновременно, разбор iperf3 --json,
+  # итоги в iperf3_<дата>.json; дополнительные аргументы — опции netperf.py
+  if [ "${AUTOTEST_IPERF_IMPL:-python}" != "sh" ] && command -v python3 >/dev/null 2>&1; then
+    python3 "$SCRIPT_DIR/netperf.py" -t "$duration" -n "$runs" --iperf3 "$iperf3_bin" \
+      -o "$LOG_DIR/iperf3_${ts}.json" "$@" "$host"
+    return
+  fi
+  if [ "$host" != "${host%%,*}" ] || [ $# -gt 0 ]; then
+    echo "Several hosts and netperf.py options need python3" >&2; exit 1
+  fi
   logfile="$LOG_DIR/iperf3_${ts}.log"
   echo "iperf3 to $host, duration=${duration}s, runs=${runs}" | tee -a "$logfile"
 
@@ -705,7 +941,7 @@ cmd_net_iperf3_client() {
     echo "Run $i/$runs" | tee -a "$logfile"
     # text output parsing: take receiver summary line
     local line
-    line=$(iperf3 -c "$host" -t "$duration" 2>&1 | tee -a "$logfile" | awk '/receiver$/ {last=$0} END{print last}')
+    line=$("$iperf3_bin" -c "$host" -t "$duration" 2>&1 | tee -a "$logfile" | awk '/receiver$/ {last=$0} END{print last}')
     # extract bandwidth number and unit (e.g., 945 Mbits/sec)
     local bw_num bw_unit
     bw_num=$(echo "$line" | awk '{for(i=1;i<=NF;i++) if ($i ~ /bits\/sec$/) {print $(i-1); exit}}')
@@ -730,23 +966,44 @@ cmd_net_iperf3_client() {
   fi
 }
 
+cmd_fleet() {
+  info "Fleet: ${*}"
+  if ! command -v python3 >/dev/null 2>&1; then
+    echo "python3 is required for fleet" >&2; return 1
+  fi
+  # fleet.py: инвентарь хостов, ssh с мультиплексированием, архивы и итог — в $ARCHIVE_DIR/fleet_<дата>
+  AUTOTEST_FORMAT_DATE="${AUTOTEST_FORMAT_DATE:-%d-%m-%Y %H:%M:%S}" python3 "$SCRIPT_DIR/fleet.py" \
+    --archive-dir "$ARCHIVE_DIR" "$@"
+}
+
 cmd_task() {
   local action="${1:-}"; shift || true
-  info "Run task preset: ${*}"
-  if [ "$action" != "run" ]; then
-    echo "Usage: autotest.sh task run <4h|8h|24h|48h|gpu_only|cpu_only>" >&2
-    exit 1
+  info "Task ${action}: ${*}"
+  case "$action" in
+    run|resume|plan|status|list) ;;
+    *)
+      echo "Usage: autotest.sh task run|plan <4h|8h|24h|48h|gpu_only|cpu_only|file.json> | resume|status [name] | list" >&2
+      exit 1 ;;
+  esac
+  local iperf_host="${AUTOTEST_IPERF_HOST:-${AUTOTEST_IPERF_BIND:-192.168.10.18}}"
+  local work_dir="${AUTOTEST_FIO_DIR:-$HOME}"
+
+  # campaign.py: пресеты из campaigns/*.json, этапы на разных ресурсах идут
+  # одновременно, ход сохраняется в $LOG_DIR/campaigns и продолжается после сбоя
+  if command -v python3 >/dev/null 2>&1; then
+    python3 "$SCRIPT_DIR/campaign.py" --log-dir "$LOG_DIR" --autotest "$SCRIPT_DIR/autotest.sh" \
+      ${CONFIG_PATH:+--config "$CONFIG_PATH"} --set iperf_host="$iperf_host" --set fio_dir="$work_dir" \
+      --set gpu_log_dir="$GPU_LOG_DIR" --set hours="${AUTOTEST_CAMPAIGN_DURATION_H:-4}" "$action" "$@"
+    return
   fi
+  if [ "$action" != "run" ]; then echo "task $action needs python3" >&2; exit 1; fi
   local preset="${1:-}"; shift || true
   if [ -z "$preset" ]; then echo "Specify campaign preset" >&2; exit 1; fi
 
-  # Helpers
+  # Без python3 — прежний последовательный прогон
   run_step() { echo "[Campaign] $*"; "$@"; }
   seconds_for_hours() { echo $(( $1 * 3600 )); }
 
-  local iperf_host="${AUTOTEST_IPERF_HOST:-${AUTOTEST_IPERF_BIND:-192.168.10.18}}"
-  local work_dir="${AUTOTEST_FIO_DIR:-$HOME}"
-
   case "$preset" in
     4h)
       run_step "$SCRIPT_DIR/autotest.sh" cpu-stress $(seconds_for_hours 1)
@@ -819,6 +1076,7 @@ cmd_doctor() {
   check "pip3" command -v pip3
   check "pandas (python)" python3 -c "import pandas"
   check "openpyxl (python)" python3 -c "import openpyxl"
+  check "pyarrow (python, optional)" python3 -c "import pyarrow" || true
   check "nvidia-smi (optional)" command -v nvidia-smi || true
   echo "- Directories"
   for d in "$LOG_DIR" "$GPU_LOG_DIR" "$ARCHIVE_DIR"; do
@@ -842,6 +1100,27 @@ cmd_report() {
   out="$ARCHIVE_DIR/report_$ts.html"
   mkdir -p "$ARCHIVE_DIR"
   echo "Generating report: $out"
+  if command -v python3 >/dev/null 2>&1; then
+    # Сводные таблицы по всем логам; разобранные файлы берутся из кеша
+    # $ARCHIVE_DIR/.report_digests.json, пока не изменились
+    # Список логов — из каталога catalog.py; --since/--until/--run сужают отчёт
+    if AUTOTEST_RETENTION_DAYS="$RETENTION_DAYS" AUTOTEST_FORMAT_DATE="${AUTOTEST_FORMAT_DATE:-%d-%m-%Y %H:%M:%S}" \
+        python3 "$SCRIPT_DIR/report.py" -o "$out" \
+        --log-dir "$LOG_DIR" --gpu-log-dir "$GPU_LOG_DIR" --archive-dir "$ARCHIVE_DIR" "$@"; then
+      return 0
+    fi
+    echo "report.py failed, falling back to log tails" >&2
+  fi
+  # Хвосты логов не умеют выбирать прогон: с фильтрами отчёт был бы не тем,
+  # что просили, поэтому лучше ошибка
+  local arg
+  for arg in "$@"; do
+    case "$arg" in
+      --since|--since=*|--until|--until=*|--run|--run=*)
+        echo "--since/--until/--run need report.py (python3); the log-tail fallback cannot filter, no report written" >&2
+        return 1 ;;
+    esac
+  done
   {
     echo "<html><head><meta charset=\"utf-8\"><title>AutoTest Report $ts</title>"
     echo "<style>body{font-family:Segoe UI,Arial,sans-serif;margin:20px}h1,h2{margin:8px 0}pre{background:#111;color:#eee;padding:10px;overflow:auto} .kv{font-family:monospace} .ok{color:#2ecc71}.fail{color:#e74c3c}.warn{color:#f1c40f} table{border-collapse:collapse} td,th{border:1px solid #ddd;padding:6px}</style>"
@@ -875,6 +1154,7 @@ cmd_report() {
     print_section "IOStat csv" "*_iostat.csv" "$LOG_DIR" 40
     print_section "GPU burn log" "gpu_burn_*.log" "$GPU_LOG_DIR" 80
     print_section "nvidia-smi log" "nvidia-smi_*.log" "$GPU_LOG_DIR" 80
+    print_section "nvidia-smi query log" "nvidia-smi_*.csv" "$GPU_LOG_DIR" 40
 
     echo "</body></html>"
   } > "$out"
@@ -882,17 +1162,26 @@ cmd_report() {
 }
 
 cmd_parse_nvidia() {
-  local in_log="${1:-}"
-  local out_xlsx="${2:-gpu_metrics.xlsx}"
+  local in_log="${1:-}"; shift || true
+  # optional second positional arg is the output (.xlsx or store dir)
+  local out_args=()
+  if [ -n "${1:-}" ] && [[ "$1" != --* ]]; then out_args=(-o "$1"); shift; fi
   if [ -z "$in_log" ]; then
-    echo "Specify nvidia-smi log path" >&2
+    echo "Specify nvidia-smi log path (file, directory or glob)" >&2
     exit 1
   fi
   require_cmd python3 python3
   require_cmd pip3 python3-pip
   run python3 -m pip install --user --upgrade pip
-  run python3 -m pip install --user pandas openpyxl
-  python3 "$SCRIPT_DIR/gpuburn/nvidia-smi_table-parser.py" "$in_log" -o "$out_xlsx"
+  run python3 -m pip install --user openpyxl
+  # extra args are passed to the parser (e.g. --resume, --follow, --format parquet)
+  python3 "$SCRIPT_DIR/gpuburn/nvidia-smi_table-parser.py" "$in_log" ${out_args[@]+"${out_args[@]}"} "$@"
+}
+
+cmd_bench() {
+  require_cmd python3 python3
+  # sizes/cases/--compare are passed to the runner as is
+  python3 "$SCRIPT_DIR/bench/run_bench.py" --out-dir "$ARCHIVE_DIR/bench" "$@"
 }
 
 cmd_setup_cron() {
@@ -900,9 +1189,12 @@ cmd_setup_cron() {
   mkdir -p "$LOG_DIR"
   local CRON_MONITOR="*/5 * * * * /bin/bash $AUTOTEST monitor-once >> $LOG_DIR/monitor-once.log 2>&1"
   local CRON_HTOP="*/5 * * * * /bin/bash $AUTOTEST htop-snapshot >> $LOG_DIR/htop-snapshot.log 2>&1"
+  # retention сам понижает приоритет и не запускается дважды (flock)
+  local CRON_RETENTION="30 3 * * * /bin/bash $AUTOTEST retention >> $LOG_DIR/retention.log 2>&1"
   (crontab -l 2>/dev/null | grep -F "autotest monitor-once") || (crontab -l 2>/dev/null; echo "$CRON_MONITOR") | crontab -
   (crontab -l 2>/dev/null | grep -F "autotest htop-snapshot") || (crontab -l 2>/dev/null; echo "$CRON_HTOP") | crontab -
-  echo "Cron jobs registered: monitor-once and htop-snapshot (every 5 min)"
+  (crontab -l 2>/dev/null | grep -F "autotest.sh retention") || (crontab -l 2>/dev/null; echo "$CRON_RETENTION") | crontab -
+  echo "Cron jobs registered: monitor-once and htop-snapshot (every 5 min), retention (daily at 03:30)"
 }
 
 have_systemd() {
@@ -959,6 +1251,31 @@ Description=Run AutoTest htop-snapshot every 5 minutes
 OnCalendar=*:0/5
 Persistent=true
 
+[Install]
+WantedBy=timers.target
+EOF
+
+  # retention service/timer: раз в сутки, с низким приоритетом CPU и I/O
+  cat > "$user_dir/autotest-retention.service" <<EOF
+[Unit]
+Description=AutoTest log retention
+
+[Service]
+Type=oneshot
+Nice=19
+IOSchedulingClass=idle
+ExecStart=/bin/bash $AUTOTEST retention
+EOF
+
+  cat > "$user_dir/autotest-retention.timer" <<EOF
+[Unit]
+Description=Run AutoTest log retention daily
+
+[Timer]
+OnCalendar=daily
+RandomizedDelaySec=30min
+Persistent=true
+
 [Install]
 WantedBy=timers.target
 EOF
@@ -966,7 +1283,8 @@ EOF
   systemctl --user daemon-reload || true
   systemctl --user enable --now autotest-monitor-once.timer || true
   systemctl --user enable --now autotest-htop-snapshot.timer || true
-  echo "Systemd user timers enabled: autotest-monitor-once.timer, autotest-htop-snapshot.timer"
+  systemctl --user enable --now autotest-retention.timer || true
+  echo "Systemd user timers enabled: autotest-monitor-once.timer, autotest-htop-snapshot.timer, autotest-retention.timer"
   echo "Tip: use 'systemctl --user list-timers' to view timers."
 }
 
@@ -977,10 +1295,13 @@ cmd_remove_systemd() {
   fi
   systemctl --user disable --now autotest-monitor-once.timer 2>/dev/null || true
   systemctl --user disable --now autotest-htop-snapshot.timer 2>/dev/null || true
+  systemctl --user disable --now autotest-retention.timer 2>/dev/null || true
   rm -f "$HOME/.config/systemd/user/autotest-monitor-once.timer" \
         "$HOME/.config/systemd/user/autotest-monitor-once.service" \
         "$HOME/.config/systemd/user/autotest-htop-snapshot.timer" \
-        "$HOME/.config/systemd/user/autotest-htop-snapshot.service"
+        "$HOME/.config/systemd/user/autotest-htop-snapshot.service" \
+        "$HOME/.config/systemd/user/autotest-retention.timer" \
+        "$HOME/.config/systemd/user/autotest-retention.service"
   systemctl --user daemon-reload || true
   echo "Systemd user timers removed (if existed)."
 }
@@ -1026,12 +1347,16 @@ case "${1:-help}" in
     shift; cmd_ram_memtest "$@" ;;
   disk-fio)
     shift; cmd_disk_fio "$@" ;;
+  diskstats)
+    shift; cmd_diskstats "$@" ;;
   net-iperf3-server)
     shift; cmd_net_iperf3_server "$@" ;;
   net-iperf3-client)
     shift; cmd_net_iperf3_client "$@" ;;
   task)
     shift; cmd_task "$@" ;;
+  fleet)
+    shift; cmd_fleet "$@" ;;
   parse-nvidia)
     shift; cmd_parse_nvidia "$@" ;;
   setup-cron)
@@ -1056,12 +1381,18 @@ case "${1:-help}" in
     shift; cmd_clean "$@" ;;
   rotate)
     shift; cmd_rotate "$@" ;;
+  retention)
+    shift; cmd_retention "$@" ;;
   doctor)
     shift; cmd_doctor "$@" ;;
   report)
     shift; cmd_report "$@" ;;
+  catalog)
+    shift; cmd_catalog "$@" ;;
   deps-all)
     shift; cmd_deps_all "$@" ;;
+  bench)
+    shift; cmd_bench "$@" ;;
   config-show)
     shift; cmd_config_show "$@" ;;
   help-en)
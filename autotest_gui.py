@@ -1,13 +1,43 @@
 #!/usr/bin/env python3
 
+import bisect
+import codecs
+import glob
+import json
 import os
+import queue
+import re
+import signal
 import sys
 import threading
 import subprocess
 import time
 import tkinter as tk
+from collections import deque
+from datetime import datetime
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 
+import perfstats
+import tsring
+
+# Output pane refresh period (ms) and default scrollback (lines)
+FRAME_MS = 50
+DEFAULT_SCROLLBACK = 5000
+READ_CHUNK = 65536
+# Jobs running at once (more are queued) and SIGTERM -> SIGKILL delay on Stop
+DEFAULT_MAX_JOBS = 4
+STOP_GRACE_MS = 3000
+# Dashboard: redraw period (ms), log poll period (s), buckets kept per series,
+# bytes read from one log per step while catching up, time windows (s)
+DASH_REFRESH_MS = 1000
+DASH_POLL_S = 1.0
+DASH_CAPACITY = 2048
+DASH_READ_BYTES = 8 * 1024 * 1024
+DASH_WINDOWS = [('10m', 600), ('1h', 3600), ('6h', 6 * 3600), ('all', None)]
+DASH_PANELS = ['temp', 'load', 'power', 'memory', 'disk']
+DASH_COLORS = ['#e74c3c', '#2e86de', '#27ae60', '#f39c12', '#8e44ad', '#16a085', '#d35400', '#7f8c8d',
+               '#c0392b', '#2980b9']
+
 
 def find_autotest_script() -> str:
     here = os.path.abspath(os.path.dirname(__file__))
@@ -17,6 +47,610 @@ def find_autotest_script() -> str:
     return filedialog.askopenfilename(title='Select autotest.sh', filetypes=[('Shell script', '*.sh'), ('All files', '*')])
 
 
+def collapse_cr(line: str) -> str:
+    # Carriage-return progress updates ("\rRemaining 10s") overwrite the line,
+    # as in a terminal: keep only the text after the last bare \r
+    line = line.rstrip('\r')
+    i = line.rfind('\r')
+    return line[i + 1:] if i >= 0 else line
+
+
+class OutputPump:
+    # Feed command output into a Text widget from any thread.
+    # Writers only put chunks into a queue; the Tk main loop drains it every
+    # FRAME_MS via after() and renders the whole batch with one delete/insert.
+    # \r progress updates are collapsed into one line and the widget keeps at
+    # most max_lines lines.
+
+    def __init__(self, widget, max_lines: int = DEFAULT_SCROLLBACK, frame_ms: int = FRAME_MS):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.frame_ms = frame_ms
+        self.queue = queue.SimpleQueue()
+        # Last line without \n (already collapsed; trailing \r kept so that a
+        # following \n is read as CRLF and anything else overwrites the line)
+        self._open = ''
+        self._job = None
+
+    def write(self, text: str):
+        self.queue.put((None, text))
+
+    def post(self, callback, *args):
+        # Run callback in the Tk thread after the output queued before it
+        self.queue.put((callback, args))
+
+    def start(self):
+        if self._job is None:
+            self._job = self.widget.after(self.frame_ms, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+
+    def _tick(self):
+        try:
+            self.drain()
+        finally:
+            self._job = self.widget.after(self.frame_ms, self._tick)
+
+    def drain(self) -> int:
+        # Render everything queued so far; returns the number of items taken
+        with perfstats.stage('output.drain', unit='items'):
+            taken = self._drain()
+        perfstats.tally('output.drain', taken, 'items')
+        return taken
+
+    def _drain(self) -> int:
+        parts = []
+        taken = 0
+        while True:
+            try:
+                callback, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            taken += 1
+            if callback is None:
+                parts.append(payload)
+                continue
+            if parts:
+                self._render(''.join(parts))
+                parts = []
+            callback(*payload)
+        if parts:
+            self._render(''.join(parts))
+        return taken
+
+    def _render(self, text: str):
+        with perfstats.stage('output.render', text.count('\n'), 'lines'):
+            self._render_text(text)
+
+    def _render_text(self, text: str):
+        lines = (self._open + text).split('\n')
+        tail = lines.pop()
+        shown = collapse_cr(tail)
+        self._open = shown + ('\r' if tail.endswith('\r') else '')
+        done = [collapse_cr(line) for line in lines]
+
+        w = self.widget
+        follow = w.yview()[1] >= 0.999
+        if len(done) >= self.max_lines:
+            # The batch alone fills the scrollback: older text is not needed
+            w.delete('1.0', tk.END)
+            done = done[-(self.max_lines - 1):] if self.max_lines > 1 else []
+        else:
+            # Replace the unfinished last line with its updated version
+            w.delete('end-1c linestart', 'end-1c')
+        w.insert(tk.END, ''.join(line + '\n' for line in done) + shown)
+        count = int(w.index('end-1c').split('.')[0])
+        if count > self.max_lines:
+            w.delete('1.0', f'{count - self.max_lines + 1}.0')
+        if follow:
+            w.see(tk.END)
+
+
+class Job:
+    # One autotest.sh command: output tab, process group, state and timing.
+
+    def __init__(self, job_id: int, args, cmd, log_path: str):
+        self.id = job_id
+        self.args = args
+        self.cmd = cmd
+        self.log_path = log_path
+        self.proc = None
+        self.state = 'queued'  # queued, running, done, failed, stopped
+        self.started = None
+        self.ended = None
+        self.returncode = None
+        self.stop_requested = False
+        self.env = None  # None: inherit the GUI environment
+        # Widgets, created by AutotestGUI._add_job_tab
+        self.frame = None
+        self.pump = None
+        self.status_var = None
+        self.btn_stop = None
+        self.btn_close = None
+
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.ended or time.monotonic()) - self.started
+
+    def describe(self) -> str:
+        e = int(self.elapsed())
+        text = f'{self.state.upper()}  {e // 3600:02d}:{e % 3600 // 60:02d}:{e % 60:02d}'
+        if self.returncode is not None:
+            text += f'  exit {self.returncode}'
+        return f'{text}  |  {" ".join(self.args)}  |  {self.log_path}'
+
+    def tab_title(self) -> str:
+        mark = {'queued': '…', 'running': '▶', 'done': '✓', 'failed': '✗', 'stopped': '■'}[self.state]
+        return f'{mark} #{self.id} {self.args[0] if self.args else ""}'
+
+
+class LogTail:
+    # Read only the bytes appended to a log since the previous call.
+    # The file is reopened from the start when its inode changes or it
+    # shrinks (rotation, truncation); an unfinished last line waits for the
+    # next read. state holds per-file parser state (header, current GPU).
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+        self.inode = None
+        self.pending = b''
+        self.state = {}
+
+    def read_lines(self, limit: int = DASH_READ_BYTES):
+        # Returns (lines, more): more is True when the limit cut the read short
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return [], False
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            self.inode = st.st_ino
+            self.offset = 0
+            self.pending = b''
+            self.state = {}
+        if st.st_size == self.offset:
+            return [], False
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read(min(limit, st.st_size - self.offset))
+        except OSError:
+            return [], False
+        self.offset += len(data)
+        lines = (self.pending + data).split(b'\n')
+        self.pending = lines.pop()
+        return [line.decode('utf-8', errors='replace').rstrip('\r') for line in lines], self.offset < st.st_size
+
+
+class SeriesBuffer:
+    # Fixed-size buffer of (time, min, max) buckets for one chart series.
+    # Samples go into the last bucket while it spans less than span seconds.
+    # When all capacity buckets are used, neighbours are merged pairwise and
+    # span doubles, so memory and redraw cost stay the same for a 10 minute
+    # and a 48 hour run while the whole run remains visible.
+
+    def __init__(self, capacity: int = DASH_CAPACITY):
+        self.capacity = capacity
+        self.t = [0.0] * capacity
+        self.lo = [0.0] * capacity
+        self.hi = [0.0] * capacity
+        self.n = 0
+        self.span = 0.0
+        self.last = None
+
+    def add(self, t: float, v: float):
+        self.last = v
+        n = self.n
+        if n and t - self.t[n - 1] < self.span or n and t < self.t[n - 1]:
+            self.lo[n - 1] = min(self.lo[n - 1], v)
+            self.hi[n - 1] = max(self.hi[n - 1], v)
+            return
+        if n == self.capacity:
+            self._compact()
+            n = self.n
+        self.t[n], self.lo[n], self.hi[n] = t, v, v
+        self.n = n + 1
+
+    def _compact(self):
+        t, lo, hi, n = self.t, self.lo, self.hi, self.n
+        half = n // 2
+        for i in range(half):
+            j = 2 * i
+            t[i] = t[j]
+            lo[i] = min(lo[j], lo[j + 1])
+            hi[i] = max(hi[j], hi[j + 1])
+        if n % 2:
+            t[half], lo[half], hi[half] = t[n - 1], lo[n - 1], hi[n - 1]
+            half += 1
+        self.n = half
+        self.span = self.span * 2 if self.span else 2 * (t[half - 1] - t[0]) / max(1, half - 1)
+
+    def first(self):
+        return self.t[0] if self.n else None
+
+    def columns(self, t0: float, t1: float, width: int):
+        # Min/max decimation: one (x, min, max) per pixel column in [t0, t1]
+        if not self.n or t1 <= t0 or width < 2:
+            return []
+        i = bisect.bisect_left(self.t, t0, 0, self.n)
+        j = bisect.bisect_right(self.t, t1, i, self.n)
+        scale = (width - 1) / (t1 - t0)
+        cols = []
+        for k in range(i, j):
+            x = int((self.t[k] - t0) * scale)
+            if cols and cols[-1][0] == x:
+                _, lo, hi = cols[-1]
+                cols[-1] = (x, min(lo, self.lo[k]), max(hi, self.hi[k]))
+            else:
+                cols.append((x, self.lo[k], self.hi[k]))
+        return cols
+
+
+_NUM_RE = re.compile(r'-?\d+(?:\.\d+)?')
+_SMI_TS_RE = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$')
+_SMI_GPU_RE = re.compile(r'^\|\s+(\d+)\s+\S')
+_SMI_METRICS_RE = re.compile(r'(\d+)C\s+\S+\s+(\d+)W\s*/\s*\d+W\s*\|\s*(\d+)MiB\s*/\s*\d+MiB\s*\|\s*(\d+)%')
+# Query log fields (gpuburn/nvidia-smi_collector.py) -> dashboard panel
+_QUERY_PANELS = {'temperature.gpu': 'temp', 'utilization.gpu': 'load', 'power.draw': 'power', 'memory.used': 'memory'}
+# Ring fields (tsring.py) -> series per ring kind: (field, panel, label); {} in
+# the label is the record's _RING_TAG field (GPU index, block device)
+_RING_SERIES = {
+    'sysmon': [('cpu_temp_c', 'temp', 'CPU'), ('cpu_load_pct', 'load', 'CPU'), ('ram_used_mb', 'memory', 'RAM')],
+    'gpu': [(f, panel, 'GPU{}') for f, panel in _QUERY_PANELS.items()],
+    'disk': [('r_mb_s', 'disk', '{} read'), ('w_mb_s', 'disk', '{} write')],
+}
+_RING_TAG = {'gpu': 'index', 'disk': 'device'}
+# Records read per lock hold, so the Tk thread is not starved on a full ring
+RING_CHUNK = 4096
+# A ring this much older than its text log is stale (written without --ring since)
+RING_STALE_S = 60
+
+
+def _number(text: str):
+    m = _NUM_RE.search(text)
+    return float(m.group()) if m else None
+
+
+class MetricsFeed:
+    # Tail monitoring logs in a background thread into SeriesBuffers.
+    # Sources: sysmonitor.log (CPU temperature/load, RAM), the newest
+    # nvidia-smi_* log in the GPU log dir (table or query CSV), every
+    # *_iostat.csv in the log dir and the newest diskstats_*.ring. Where a
+    # collector also writes a tsring ring next to its log, the ring is read
+    # instead: fixed records from the mapped file, no text parsing. Series
+    # are keyed (panel, label); the Tk thread reads them and the tails and
+    # rings under lock and checks version for changes. config is replaced
+    # from the Tk thread (paths come from .env there).
+
+    def __init__(self, poll_s: float = DASH_POLL_S, capacity: int = DASH_CAPACITY):
+        self.poll_s = poll_s
+        self.capacity = capacity
+        self.config = {}
+        self.series = {}
+        self.lock = threading.Lock()
+        self.version = 0
+        self.tails = {}
+        self.rings = {}
+        self.gpu_path = None
+        self._times = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                pass  # a malformed line must not stop the dashboard
+            if self._stop.wait(self.poll_s):
+                return
+
+    @staticmethod
+    def _ring_for(log_path, ring_path):
+        # The ring next to a log, unless it went stale while the log kept growing
+        try:
+            ring_mtime = os.path.getmtime(ring_path)
+        except OSError:
+            return log_path
+        try:
+            if os.path.getmtime(log_path) > ring_mtime + RING_STALE_S:
+                return log_path
+        except OSError:
+            pass
+        return ring_path
+
+    def sources(self):
+        cfg = self.config
+        paths = {}
+        if cfg.get('sysmon'):
+            path = self._ring_for(cfg['sysmon'], os.path.join(os.path.dirname(cfg['sysmon']), 'sysmonitor.ring'))
+            if os.path.isfile(path):
+                paths[path] = 'sysmon'
+        gpu_dir = cfg.get('gpu_dir', '')
+        gpu_logs = glob.glob(os.path.join(gpu_dir, 'nvidia-smi_*.log')) + \
+            glob.glob(os.path.join(gpu_dir, 'nvidia-smi_*.csv')) + glob.glob(os.path.join(gpu_dir, 'nvidia-smi_*.ring'))
+        gpu_logs = [p for p in gpu_logs if not p.endswith('_collector.log')]
+        if gpu_logs:
+            newest = max(gpu_logs, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+            if not newest.endswith('.ring'):
+                newest = self._ring_for(newest, os.path.splitext(newest)[0] + '.ring')
+            paths[newest] = 'gpu'
+            if newest != self.gpu_path:
+                # New run: drop the previous run's GPU curves
+                if self.gpu_path is not None:
+                    self._close_ring(self.gpu_path)
+                    with self.lock:
+                        self.tails.pop(self.gpu_path, None)
+                        for key in [k for k in self.series if k[1].startswith('GPU')]:
+                            del self.series[key]
+                        self.version += 1
+                self.gpu_path = newest
+        for path in glob.glob(os.path.join(cfg.get('log_dir', ''), '*_iostat.csv')):
+            paths[path] = 'iostat'
+        disk_rings = glob.glob(os.path.join(cfg.get('log_dir', ''), 'diskstats_*.ring'))
+        if disk_rings:
+            paths[max(disk_rings, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)] = 'disk'
+        return paths
+
+    def _close_ring(self, path):
+        with self.lock:
+            entry = self.rings.pop(path, None)
+        if entry is not None:
+            entry[0].close()
+
+    def poll(self):
+        with perfstats.stage('feed.poll', unit='points'):
+            self._poll()
+
+    def _poll(self):
+        for path, kind in self.sources().items():
+            if path.endswith('.ring'):
+                self._poll_ring(path, kind)
+                continue
+            tail = self.tails.get(path)
+            if tail is None:
+                tail = LogTail(path)
+                with self.lock:
+                    self.tails[path] = tail
+            more = True
+            while more and not self._stop.is_set():
+                lines, more = tail.read_lines()
+                if not lines:
+                    continue
+                points = []
+                parse = getattr(self, f'_parse_{kind}')
+                for line in lines:
+                    parse(tail, line, points)
+                perfstats.tally('feed.poll', len(points), 'points')
+                if points:
+                    with self.lock:
+                        for key, t, v in points:
+                            buf = self.series.get(key)
+                            if buf is None:
+                                buf = self.series[key] = SeriesBuffer(self.capacity)
+                            buf.add(t, v)
+                        self.version += 1
+
+    def _poll_ring(self, path, kind):
+        # New records since the last poll, straight from the mapped ring
+        entry = self.rings.get(path)
+        if entry is None:
+            try:
+                ring = tsring.Ring.open(path)
+            except (OSError, ValueError, tsring.RingError):
+                return  # not initialized yet or not a ring
+            entry = [ring, 0]
+            with self.lock:
+                self.rings[path] = entry
+        ring = entry[0]
+        columns = [(ring.index[f], panel, label) for f, panel, label in _RING_SERIES[kind] if f in ring.index]
+        tag = ring.index.get(_RING_TAG.get(kind))
+        end = ring.cursor
+        while entry[1] < end and not self._stop.is_set():
+            stop = min(end, entry[1] + RING_CHUNK)
+            points = []
+            for _, t, values in ring.read(entry[1], stop):
+                name = '' if tag is None else values[tag]
+                for i, panel, label in columns:
+                    if values[i] is not None:
+                        points.append(((panel, label.format(name)), t, values[i]))
+            entry[1] = stop
+            perfstats.tally('feed.poll', len(points), 'points')
+            if points:
+                with self.lock:
+                    for key, t, v in points:
+                        buf = self.series.get(key)
+                        if buf is None:
+                            buf = self.series[key] = SeriesBuffer(self.capacity)
+                        buf.add(t, v)
+                    self.version += 1
+
+    def _time(self, text: str, fmt: str = None):
+        # Log timestamps -> epoch seconds; arrival time if they do not parse
+        text = text.strip()
+        t = self._times.get(text)
+        if t is not None:
+            return t
+        try:
+            if fmt is None:
+                t = datetime.fromisoformat(text).timestamp()
+            else:
+                t = datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            return time.time()
+        if len(self._times) > 4096:
+            self._times.clear()
+        self._times[text] = t
+        return t
+
+    def _parse_sysmon(self, tail, line, points):
+        parts = line.split('|')
+        if len(parts) < 17 or parts[0].startswith('Timestamp'):
+            return
+        t = self._time(parts[0], self.config.get('date_format'))
+        for panel, label, i in (('temp', 'CPU', 3), ('load', 'CPU', 4), ('memory', 'RAM', 7)):
+            v = _number(parts[i])
+            if v is not None:
+                points.append(((panel, label), t, v))
+
+    def _parse_gpu(self, tail, line, points):
+        st = tail.state
+        if line.startswith('#'):
+            st['query'] = True
+            return
+        if st.get('query'):
+            if 'fields' not in st:
+                fields = line.split(',')
+                st['fields'] = len(fields)
+                st['columns'] = [(i, _QUERY_PANELS[f]) for i, f in enumerate(fields) if f in _QUERY_PANELS]
+                return
+            values = line.split(',')
+            if len(values) != st['fields']:
+                return
+            t = self._time(values[0])
+            label = 'GPU' + values[1]
+            for i, panel in st['columns']:
+                try:
+                    points.append(((panel, label), t, float(values[i])))
+                except ValueError:
+                    pass  # [N/A]
+            return
+        if _SMI_TS_RE.match(line):
+            st['t'] = self._time(line)
+            return
+        m = _SMI_GPU_RE.match(line)
+        if m:
+            st['gpu'] = m.group(1)
+            return
+        m = _SMI_METRICS_RE.search(line)
+        if m and 'gpu' in st:
+            t = st.get('t') or time.time()
+            label = f'GPU{st.pop("gpu")}'
+            temp, power, mem, util = (float(g) for g in m.groups())
+            points += [(('temp', label), t, temp), (('power', label), t, power),
+                       (('memory', label), t, mem), (('load', label), t, util)]
+
+    def _parse_iostat(self, tail, line, points):
+        values = line.split(',')
+        if len(values) != 3 or values[0] == 'Timestamp':
+            return
+        dev = os.path.basename(tail.path)[:-len('_iostat.csv')]
+        t = self._time(values[0], self.config.get('date_format'))
+        for name, v in (('read', values[1]), ('write', values[2])):
+            num = _number(v)
+            if num is not None:
+                points.append((('disk', f'{dev} {name}'), t, num))
+
+
+class Dashboard:
+    # Live charts on one Canvas, one panel per DASH_PANELS entry.
+    # Every DASH_REFRESH_MS the Tk loop redraws if the feed changed, the
+    # canvas was resized or the window changed, and only while the tab is
+    # shown. Each series is drawn as a single line through per-pixel min/max
+    # columns, so the number of canvas items does not depend on run length.
+
+    def __init__(self, parent, feed: MetricsFeed, visible, titles):
+        self.feed = feed
+        self.visible = visible
+        self.titles = titles
+        self.window = tk.StringVar(value='all')
+        self.frame = ttk.Frame(parent)
+        bar = ttk.Frame(self.frame)
+        bar.pack(fill=tk.X)
+        self.lbl_window = ttk.Label(bar, text='Window:')
+        self.lbl_window.pack(side=tk.LEFT, padx=6, pady=4)
+        ttk.Combobox(bar, textvariable=self.window, values=[w for w, _ in DASH_WINDOWS], state='readonly',
+                     width=6).pack(side=tk.LEFT)
+        self.sources_var = tk.StringVar(value='')
+        ttk.Label(bar, textvariable=self.sources_var).pack(side=tk.LEFT, padx=12)
+        self.canvas = tk.Canvas(self.frame, background='white', height=240, highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.colors = {}
+        self._drawn = None
+        self.window.trace_add('write', lambda *_: self.redraw(force=True))
+        self.canvas.bind('<Configure>', lambda e: self.redraw(force=True))
+
+    def tick(self):
+        if self.visible():
+            with perfstats.stage('dashboard.redraw', unit='frames'):
+                self.redraw()
+        self.frame.after(DASH_REFRESH_MS, self.tick)
+
+    def _color(self, label: str) -> str:
+        if label not in self.colors:
+            self.colors[label] = DASH_COLORS[len(self.colors) % len(DASH_COLORS)]
+        return self.colors[label]
+
+    def redraw(self, force: bool = False):
+        c = self.canvas
+        width, height = c.winfo_width(), c.winfo_height()
+        key = (self.feed.version, width, height, self.window.get(), self.titles['temp'])
+        if key == self._drawn and not force:
+            return
+        self._drawn = key
+        c.delete('all')
+        with self.feed.lock:
+            series = {k: v for k, v in self.feed.series.items() if v.n}
+            panels = [p for p in DASH_PANELS if any(k[0] == p for k in series)]
+            self.sources_var.set('  '.join(os.path.basename(p) for p in sorted([*self.feed.tails, *self.feed.rings])))
+            if not panels:
+                c.create_text(width // 2, height // 2, text=self.titles['empty'], fill='#7f8c8d')
+                return
+            t1 = max(buf.t[buf.n - 1] for buf in series.values())
+            span = dict(DASH_WINDOWS).get(self.window.get())
+            t0 = t1 - span if span else min(buf.first() for buf in series.values())
+            if t1 <= t0:
+                t0 = t1 - 1
+            left, right, top_pad = 56, 8, 16
+            ph = max(40, height // len(panels))
+            plot_w = max(2, width - left - right)
+            for i, panel in enumerate(panels):
+                y0 = i * ph + top_pad
+                y1 = (i + 1) * ph - 14
+                keys = sorted(k for k in series if k[0] == panel)
+                cols = {k: series[k].columns(t0, t1, plot_w) for k in keys}
+                values = [v for cs in cols.values() for _, lo, hi in cs for v in (lo, hi)]
+                vmin, vmax = (min(values), max(values)) if values else (0.0, 1.0)
+                if vmax - vmin < 1e-9:
+                    vmin, vmax = vmin - 1, vmax + 1
+                scale = (y1 - y0) / (vmax - vmin)
+                c.create_rectangle(left, y0, left + plot_w, y1, outline='#bdc3c7')
+                c.create_text(left - 4, y0, text=f'{vmax:g}', anchor='ne', fill='#555')
+                c.create_text(left - 4, y1, text=f'{vmin:g}', anchor='se', fill='#555')
+                legend = [self.titles[panel]]
+                for k in keys:
+                    points = []
+                    for x, lo, hi in cols[k]:
+                        px = left + x
+                        points += [px, y1 - (hi - vmin) * scale, px, y1 - (lo - vmin) * scale]
+                    if len(points) == 2:
+                        points += points
+                    if points:
+                        c.create_line(*points, fill=self._color(k[1]))
+                    last = series[k].last
+                    legend.append(f'{k[1]} {last:g}' if last is not None else k[1])
+                x = left
+                for j, text in enumerate(legend):
+                    item = c.create_text(x, y0 - 2, text=text, anchor='sw',
+                                         fill='#222' if j == 0 else self._color(keys[j - 1][1]))
+                    x = c.bbox(item)[2] + 10
+            c.create_text(left, height - 2, text=time.strftime('%H:%M:%S', time.localtime(t0)), anchor='sw', fill='#555')
+            c.create_text(left + plot_w, height - 2, text=time.strftime('%H:%M:%S', time.localtime(t1)), anchor='se',
+                          fill='#555')
+
+
 class AutotestGUI(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -38,11 +672,23 @@ class AutotestGUI(tk.Tk):
         self.mem_loops = tk.StringVar(value='1')
         self.disk_dir = tk.StringVar(value=os.path.expanduser('~'))
         self.preset = tk.StringVar(value='4h')
+        self.task_parallel = tk.BooleanVar(value=True)
+        self.profile = tk.BooleanVar(value=os.environ.get('AUTOTEST_PROFILE') == '1')
+        self.profiler = None
+        self.campaign_mtime = None
+        self.scrollback = tk.StringVar(value=os.environ.get('AUTOTEST_GUI_SCROLLBACK', str(DEFAULT_SCROLLBACK)))
+        self.max_jobs = tk.StringVar(value=os.environ.get('AUTOTEST_GUI_MAX_JOBS', str(DEFAULT_MAX_JOBS)))
+        self.jobs = {}
+        self.pending = deque()
+        self.job_seq = 0
+        self.feed = MetricsFeed()
 
         self.lang = tk.StringVar(value='ru')
-        self._build_ui()
         self._build_i18n()
+        self._build_ui()
         self._apply_language()
+        self.protocol('WM_DELETE_WINDOW', self._on_close)
+        self._tick_jobs()
 
     def _build_ui(self):
         top = ttk.Frame(self)
@@ -75,6 +721,7 @@ class AutotestGUI(tk.Tk):
         self.tab_tasks = self._tab_tasks()
         self.tab_scheduling = self._tab_scheduling()
         self.tab_reports = self._tab_reports()
+        self.tab_dashboard = self._tab_dashboard()
 
         self.nb.add(self.tab_common, text='Common')
         self.nb.add(self.tab_tests, text='Tests')
@@ -82,12 +729,15 @@ class AutotestGUI(tk.Tk):
         self.nb.add(self.tab_tasks, text='Tasks')
         self.nb.add(self.tab_scheduling, text='Scheduling')
         self.nb.add(self.tab_reports, text='Reports')
+        self.nb.add(self.tab_dashboard, text='Dashboard')
+        self.nb.bind('<<NotebookTabChanged>>', lambda e: self._on_tab_changed())
+        self.env_path.trace_add('write', lambda *_: self._update_feed_config())
 
-        # Output
-        out_frame = ttk.LabelFrame(self, text='Output')
-        out_frame.pack(fill=tk.BOTH, expand=True, padx=8, pady=(0, 8))
-        self.output = scrolledtext.ScrolledText(out_frame, height=12, wrap=tk.WORD)
-        self.output.pack(fill=tk.BOTH, expand=True)
+        # Output: one tab per job
+        self.out_frame = ttk.LabelFrame(self, text='Output')
+        self.out_frame.pack(fill=tk.BOTH, expand=True, padx=8, pady=(0, 8))
+        self.jobs_nb = ttk.Notebook(self.out_frame)
+        self.jobs_nb.pack(fill=tk.BOTH, expand=True)
 
         # Footer
         footer = ttk.Frame(self)
@@ -97,8 +747,10 @@ class AutotestGUI(tk.Tk):
         self.lbl_status = ttk.Label(footer, textvariable=self.status_var, foreground='#2e86de')
         self.lbl_status.pack(side=tk.LEFT, padx=(4, 12))
         self.btn_stop = ttk.Button(footer, text='Stop', command=self._stop_proc)
-        self.btn_stop.pack(side=tk.LEFT, padx=(0, 12))
-        self.btn_stop.state(['disabled'])
+        self.btn_stop.pack(side=tk.LEFT)
+        self.btn_stop_all = ttk.Button(footer, text='Stop All', command=self._stop_all)
+        self.btn_stop_all.pack(side=tk.LEFT, padx=(4, 12))
+        self.btn_stop_all.state(['disabled'])
 
         self.btn_doctor = ttk.Button(footer, text='Doctor', command=lambda: self.run_cmd(['doctor']))
         self.btn_doctor.pack(side=tk.LEFT)
@@ -107,6 +759,21 @@ class AutotestGUI(tk.Tk):
         self.btn_help = ttk.Button(footer, text='Help', command=self._run_help)
         self.btn_help.pack(side=tk.LEFT, padx=6)
 
+        self.lbl_scrollback = ttk.Label(footer, text='Scrollback (lines):')
+        self.lbl_scrollback.pack(side=tk.LEFT, padx=(12, 4))
+        ttk.Spinbox(footer, from_=100, to=1000000, increment=1000, width=8,
+                    textvariable=self.scrollback).pack(side=tk.LEFT)
+        self.scrollback.trace_add('write', lambda *_: self._set_scrollback())
+        self.lbl_max_jobs = ttk.Label(footer, text='Max parallel jobs:')
+        self.lbl_max_jobs.pack(side=tk.LEFT, padx=(12, 4))
+        ttk.Spinbox(footer, from_=1, to=64, width=4, textvariable=self.max_jobs).pack(side=tk.LEFT)
+        self.max_jobs.trace_add('write', lambda *_: self._schedule_jobs())
+        self.chk_profile = ttk.Checkbutton(footer, text='Profile', variable=self.profile)
+        self.chk_profile.pack(side=tk.LEFT, padx=(12, 0))
+        self.profile.trace_add('write', lambda *_: self._toggle_profile())
+        # AUTOTEST_PROFILE=1 turns the checkbox on before the trace exists
+        self._toggle_profile()
+
     def _tab_common(self):
         f = ttk.Frame()
         self.btn_install = ttk.Button(f, text='Install', command=lambda: self.run_cmd(['install']))
@@ -167,12 +834,73 @@ class AutotestGUI(tk.Tk):
         f = ttk.Frame()
         self.lbl_preset = ttk.Label(f, text='Preset:')
         self.lbl_preset.grid(row=0, column=0, sticky='e', padx=6, pady=6)
-        presets = ['4h', '8h', '24h', '48h', 'gpu_only', 'cpu_only']
-        ttk.Combobox(f, textvariable=self.preset, values=presets, state='readonly', width=12).grid(row=0, column=1, sticky='w')
-        self.btn_run_task = ttk.Button(f, text='Run Task', command=lambda: self.run_cmd(['task', 'run', self.preset.get()]))
+        ttk.Combobox(f, textvariable=self.preset, values=self._campaign_presets(), state='readonly',
+                     width=12).grid(row=0, column=1, sticky='w')
+        self.btn_run_task = ttk.Button(f, text='Run Task', command=lambda: self.run_cmd(['task', 'run', self.preset.get()] + self._task_opts()))
         self.btn_run_task.grid(row=0, column=2, padx=6)
+        self.btn_resume_task = ttk.Button(f, text='Resume', command=lambda: self.run_cmd(['task', 'resume', self.preset.get()] + self._task_opts()))
+        self.btn_resume_task.grid(row=0, column=3, padx=6)
+        self.btn_plan_task = ttk.Button(f, text='Plan', command=lambda: self.run_cmd(['task', 'plan', self.preset.get()] + self._task_opts()))
+        self.btn_plan_task.grid(row=0, column=4, padx=6)
+        self.chk_task_parallel = ttk.Checkbutton(f, text='Parallel stages', variable=self.task_parallel)
+        self.chk_task_parallel.grid(row=0, column=5, padx=6)
+        # Stage progress from <AUTOTEST_LOG_DIR>/campaigns/<preset>.state.json
+        cols = ('task', 'resources', 'status', 'started', 'finished', 'planned')
+        self.task_tree = ttk.Treeview(f, columns=cols, height=7)
+        self.task_tree.column('#0', width=90)
+        for c, w in zip(cols, (140, 110, 80, 150, 150, 80)):
+            self.task_tree.column(c, width=w)
+        self.task_tree.grid(row=1, column=0, columnspan=7, sticky='nsew', padx=6, pady=(0, 6))
+        self.lbl_task_state = ttk.Label(f, text='')
+        self.lbl_task_state.grid(row=2, column=0, columnspan=7, sticky='w', padx=6)
+        f.columnconfigure(6, weight=1)
+        f.rowconfigure(1, weight=1)
+        self.preset.trace_add('write', lambda *_: self._refresh_campaign())
         return f
 
+    def _campaign_presets(self):
+        d = os.path.join(os.path.dirname(self.autotest_path), 'campaigns')
+        try:
+            names = sorted(n[:-5] for n in os.listdir(d) if n.endswith('.json'))
+        except OSError:
+            names = []
+        return names or ['4h', '8h', '24h', '48h', 'gpu_only', 'cpu_only']
+
+    def _task_opts(self):
+        return [] if self.task_parallel.get() else ['--sequential']
+
+    def _refresh_campaign(self):
+        # Re-read the campaign state file; cheap, so done every tick while the
+        # Tasks tab is open
+        path = os.path.join(self._env_value('AUTOTEST_LOG_DIR', '~/AutoTest_Logs'), 'campaigns',
+                            f'{self.preset.get()}.state.json')
+        T = self.i18n['task'][self.lang.get()]
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                state = json.load(fh)
+            mtime = os.path.getmtime(path)
+        except (OSError, ValueError):
+            state, mtime = None, None
+        if (path, mtime) == self.campaign_mtime:
+            return
+        self.campaign_mtime = (path, mtime)
+        self.task_tree.delete(*self.task_tree.get_children())
+        if state is None:
+            self.lbl_task_state.config(text=T['none'])
+            return
+        for st in state.get('stages', []):
+            s = state.get('status', {}).get(st['id'], {})
+            d = int(st.get('duration_s', 0))
+            self.task_tree.insert('', tk.END, text=st['id'], values=(
+                ' '.join([st['task']] + st.get('args', [])), ','.join(st.get('resources', [])),
+                T.get(s.get('status'), s.get('status', '')), s.get('started') or '', s.get('finished') or '',
+                f'{d // 3600}:{d % 3600 // 60:02d}:{d % 60:02d}'))
+        done = sum(1 for s in state.get('status', {}).values() if s.get('status') == 'done')
+        when = state.get('finished') or state.get('updated') or ''
+        self.lbl_task_state.config(text=T['summary'].format(done=done, total=len(state.get('stages', [])),
+                                                            state=T['finished'] if state.get('finished') else T['open'],
+                                                            when=when))
+
     def _tab_scheduling(self):
         f = ttk.Frame()
         self.btn_setup_cron = ttk.Button(f, text='Setup Cron', command=lambda: self.run_cmd(['setup-cron']))
@@ -191,12 +919,38 @@ class AutotestGUI(tk.Tk):
         self.btn_collect.grid(row=0, column=1, padx=6)
         self.btn_rotate = ttk.Button(f, text='Rotate Logs', command=lambda: self.run_cmd(['rotate']))
         self.btn_rotate.grid(row=0, column=2, padx=6)
+        self.btn_retention = ttk.Button(f, text='Apply Retention', command=lambda: self.run_cmd(['retention']))
+        self.btn_retention.grid(row=0, column=3, padx=6)
         self.btn_clean = ttk.Button(f, text='Clean Logs (ALL)', command=lambda: self.run_cmd(['clean', '--all']))
-        self.btn_clean.grid(row=0, column=3, padx=6)
+        self.btn_clean.grid(row=0, column=4, padx=6)
         self.btn_open_report = ttk.Button(f, text='Open Last Report', command=self._open_last_report)
-        self.btn_open_report.grid(row=0, column=4, padx=6)
+        self.btn_open_report.grid(row=0, column=5, padx=6)
         return f
 
+    def _tab_dashboard(self):
+        self.dashboard = Dashboard(self.nb, self.feed, self._dashboard_visible,
+                                   self.i18n['dash'][self.lang.get()])
+        self.dashboard.tick()
+        return self.dashboard.frame
+
+    def _dashboard_visible(self) -> bool:
+        return self.nb.select() == str(self.tab_dashboard)
+
+    def _on_tab_changed(self):
+        # Logs are tailed only once the dashboard has been opened
+        if self._dashboard_visible():
+            self._update_feed_config()
+            self.feed.start()
+            self.dashboard.redraw(force=True)
+
+    def _update_feed_config(self):
+        self.feed.config = {
+            'sysmon': os.path.expanduser('~/AutoTest_Logs/sysmonitor/sysmonitor.log'),
+            'gpu_dir': self._env_value('AUTOTEST_GPU_LOG_DIR', '~/gpu_burn_logs'),
+            'log_dir': self._env_value('AUTOTEST_LOG_DIR', '~/AutoTest_Logs'),
+            'date_format': self._env_value('AUTOTEST_FORMAT_DATE', '%d-%m-%Y %H:%M:%S'),
+        }
+
     def _browse_env(self):
         path = filedialog.askopenfilename(title='Select .env', filetypes=[('Env', '*.env'), ('All files', '*')])
         if path:
@@ -230,21 +984,49 @@ class AutotestGUI(tk.Tk):
     def _build_i18n(self):
         self.i18n = {
             'tabs': {
-                'ru': ['Общее', 'Тесты', 'Сеть', 'Задачи', 'Планировщик', 'Отчёты'],
-                'en': ['Common', 'Tests', 'Network', 'Tasks', 'Scheduling', 'Reports'],
+                'ru': ['Общее', 'Тесты', 'Сеть', 'Задачи', 'Планировщик', 'Отчёты', 'Мониторинг'],
+                'en': ['Common', 'Tests', 'Network', 'Tasks', 'Scheduling', 'Reports', 'Dashboard'],
+            },
+            'dash': {
+                'ru': {
+                    'temp': 'Температура, °C', 'load': 'Загрузка, %', 'power': 'Мощность GPU, Вт',
+                    'memory': 'Память, МиБ', 'disk': 'Диск, МБ/с', 'window': 'Окно:',
+                    'empty': 'Нет данных: запустите monitor-loop, gpuburn или iostat',
+                },
+                'en': {
+                    'temp': 'Temperature, °C', 'load': 'Load, %', 'power': 'GPU power, W',
+                    'memory': 'Memory, MiB', 'disk': 'Disk, MB/s', 'window': 'Window:',
+                    'empty': 'No data yet: start monitor-loop, gpuburn or iostat',
+                },
+            },
+            'task': {
+                'ru': {
+                    'columns': ['Этап', 'Задача', 'Ресурсы', 'Статус', 'Начат', 'Завершён', 'План'],
+                    'pending': 'ожидает', 'running': 'идёт', 'done': 'готово', 'failed': 'ошибка', 'skipped': 'пропущен',
+                    'none': 'Кампания ещё не запускалась', 'finished': 'завершена', 'open': 'не завершена',
+                    'summary': 'Этапов выполнено: {done}/{total}, кампания {state} ({when})',
+                },
+                'en': {
+                    'columns': ['Stage', 'Task', 'Resources', 'Status', 'Started', 'Finished', 'Planned'],
+                    'pending': 'pending', 'running': 'running', 'done': 'done', 'failed': 'failed', 'skipped': 'skipped',
+                    'none': 'Campaign has not been run yet', 'finished': 'finished', 'open': 'not finished',
+                    'summary': 'Stages done: {done}/{total}, campaign {state} ({when})',
+                },
             },
             'labels': {
                 'ru': {
                     'autotest': 'autotest.sh:', 'change': 'Выбрать...', 'env': '.env:', 'browse': 'Обзор',
                     'config_show': 'Показать конфиг', 'language': 'Язык:', 'loop': 'Период (сек):',
                     'duration': 'Длительность (сек):', 'ram_mb': 'ОЗУ (МБ):', 'loops': 'Повторы:', 'fio_dir': 'Папка FIO:',
-                    'server_host': 'Сервер:', 'preset': 'Пресет:',
+                    'server_host': 'Сервер:', 'preset': 'Пресет:', 'scrollback': 'Буфер вывода (строк):', 'max_jobs': 'Задач параллельно:',
+                    'output': 'Вывод',
                 },
                 'en': {
                     'autotest': 'autotest.sh:', 'change': 'Change...', 'env': '.env:', 'browse': 'Browse',
                     'config_show': 'Config Show', 'language': 'Language:', 'loop': 'Loop (sec):',
                     'duration': 'Duration (sec):', 'ram_mb': 'RAM MB:', 'loops': 'Loops:', 'fio_dir': 'FIO dir:',
-                    'server_host': 'Server host:', 'preset': 'Preset:',
+                    'server_host': 'Server host:', 'preset': 'Preset:', 'scrollback': 'Scrollback (lines):', 'max_jobs': 'Max parallel jobs:',
+                    'output': 'Output',
                 }
             },
             'buttons': {
@@ -252,17 +1034,23 @@ class AutotestGUI(tk.Tk):
                     'install': 'Установка', 'monitor_once': 'Разовый мониторинг', 'monitor_loop': 'Циклический мониторинг',
                     'htop': 'HTOP снимок', 'cpu': 'CPU стресс', 'gpu': 'GPU тест', 'memtest': 'RAM тест', 'browse': 'Обзор',
                     'fio': 'Диск (FIO)', 'iperf_srv': 'Сервер iperf3', 'iperf_cli': 'Клиент iperf3 (10×10с)',
-                    'run_task': 'Запустить задачу', 'setup_cron': 'Настроить Cron', 'setup_systemd': 'Настроить systemd',
+                    'run_task': 'Запустить задачу', 'resume_task': 'Продолжить', 'plan_task': 'План',
+                    'task_parallel': 'Этапы параллельно', 'setup_cron': 'Настроить Cron', 'setup_systemd': 'Настроить systemd',
                     'remove_systemd': 'Удалить systemd', 'report': 'Отчёт (HTML)', 'collect': 'Собрать логи', 'rotate': 'Сжать логи',
-                    'clean': 'Очистить логи (ВСЕ)', 'open_report': 'Открыть отчёт', 'doctor': 'Проверка', 'deps': 'Зависимости', 'help': 'Справка'
+                    'retention': 'Хранение логов',
+                    'clean': 'Очистить логи (ВСЕ)', 'open_report': 'Открыть отчёт', 'doctor': 'Проверка', 'deps': 'Зависимости', 'help': 'Справка',
+                    'stop': 'Стоп', 'stop_all': 'Остановить все', 'close': 'Закрыть', 'profile': 'Профилирование'
                 },
                 'en': {
                     'install': 'Install', 'monitor_once': 'Monitor Once', 'monitor_loop': 'Monitor Loop',
                     'htop': 'HTOP Snapshot', 'cpu': 'CPU Stress', 'gpu': 'GPU Burn', 'memtest': 'RAM Memtest', 'browse': 'Browse',
                     'fio': 'Disk FIO', 'iperf_srv': 'Start iperf3 Server', 'iperf_cli': 'Run iperf3 Client (10x10s avg)',
-                    'run_task': 'Run Task', 'setup_cron': 'Setup Cron', 'setup_systemd': 'Setup systemd',
+                    'run_task': 'Run Task', 'resume_task': 'Resume', 'plan_task': 'Plan',
+                    'task_parallel': 'Parallel stages', 'setup_cron': 'Setup Cron', 'setup_systemd': 'Setup systemd',
                     'remove_systemd': 'Remove systemd', 'report': 'Report (HTML)', 'collect': 'Collect Logs', 'rotate': 'Rotate Logs',
-                    'clean': 'Clean Logs (ALL)', 'open_report': 'Open Last Report', 'doctor': 'Doctor', 'deps': 'Deps All', 'help': 'Help'
+                    'retention': 'Apply Retention',
+                    'clean': 'Clean Logs (ALL)', 'open_report': 'Open Last Report', 'doctor': 'Doctor', 'deps': 'Deps All', 'help': 'Help',
+                    'stop': 'Stop', 'stop_all': 'Stop All', 'close': 'Close', 'profile': 'Profile'
                 }
             }
         }
@@ -277,6 +1065,9 @@ class AutotestGUI(tk.Tk):
         self.nb.tab(self.tab_tasks, text=titles[3])
         self.nb.tab(self.tab_scheduling, text=titles[4])
         self.nb.tab(self.tab_reports, text=titles[5])
+        self.nb.tab(self.tab_dashboard, text=titles[6])
+        self.dashboard.titles = self.i18n['dash'][lang]
+        self.dashboard.lbl_window.config(text=self.dashboard.titles['window'])
         # Labels
         L = self.i18n['labels'][lang]
         self.lbl_autotest.config(text=L['autotest'])
@@ -292,6 +1083,9 @@ class AutotestGUI(tk.Tk):
         self.lbl_fio_dir.config(text=L['fio_dir'])
         self.lbl_server.config(text=L['server_host'])
         self.lbl_preset.config(text=L['preset'])
+        self.lbl_scrollback.config(text=L['scrollback'])
+        self.lbl_max_jobs.config(text=L['max_jobs'])
+        self.out_frame.config(text=L['output'])
         # Buttons
         B = self.i18n['buttons'][lang]
         self.btn_install.config(text=B['install'])
@@ -306,90 +1100,298 @@ class AutotestGUI(tk.Tk):
         self.btn_iperf_srv.config(text=B['iperf_srv'])
         self.btn_iperf_cli.config(text=B['iperf_cli'])
         self.btn_run_task.config(text=B['run_task'])
+        self.btn_resume_task.config(text=B['resume_task'])
+        self.btn_plan_task.config(text=B['plan_task'])
+        self.chk_task_parallel.config(text=B['task_parallel'])
+        self.chk_profile.config(text=B['profile'])
+        T = self.i18n['task'][lang]
+        for col, title in zip(['#0', 'task', 'resources', 'status', 'started', 'finished', 'planned'], T['columns']):
+            self.task_tree.heading(col, text=title)
+        self.campaign_mtime = None
+        self._refresh_campaign()
         self.btn_setup_cron.config(text=B['setup_cron'])
         self.btn_setup_systemd.config(text=B['setup_systemd'])
         self.btn_remove_systemd.config(text=B['remove_systemd'])
         self.btn_report.config(text=B['report'])
         self.btn_collect.config(text=B['collect'])
         self.btn_rotate.config(text=B['rotate'])
+        self.btn_retention.config(text=B['retention'])
         self.btn_clean.config(text=B['clean'])
         self.btn_open_report.config(text=B['open_report'])
         self.btn_doctor.config(text=B['doctor'])
         self.btn_deps.config(text=B['deps'])
         self.btn_help.config(text=B['help'])
+        self.btn_stop.config(text=B['stop'])
+        self.btn_stop_all.config(text=B['stop_all'])
+        for job in self.jobs.values():
+            job.btn_stop.config(text=B['stop'])
+            job.btn_close.config(text=B['close'])
 
     def run_cmd(self, args):
-        if getattr(self, 'current_proc', None) is not None:
-            messagebox.showwarning('Busy', 'Another command is running. Stop it first.')
-            return
+        # Every command becomes a job with its own output tab; it starts now
+        # or waits in the queue until a slot under the concurrency limit frees
         cmd = [self.autotest_path]
         if self.env_path.get():
             cmd += ['--config', self.env_path.get()]
         cmd += args
-        self._append(f'$ {" ".join(cmd)}\n')
+        self.job_seq += 1
+        job = Job(self.job_seq, args, cmd, self._output_log_path(args))
+        if self.profile.get():
+            # parse-nvidia and other python tools write their own <log>.profile.json
+            job.env = dict(os.environ, AUTOTEST_PROFILE='1')
+        self._add_job_tab(job)
+        job.pump.write(f'$ {" ".join(cmd)}\n[log: {job.log_path}]\n')
+        self.jobs[job.id] = job
+        self.pending.append(job)
+        self._schedule_jobs()
+        self._refresh_jobs()
+
+    def _add_job_tab(self, job):
+        frame = ttk.Frame(self.jobs_nb)
+        bar = ttk.Frame(frame)
+        bar.pack(fill=tk.X)
+        job.status_var = tk.StringVar(value=job.describe())
+        ttk.Label(bar, textvariable=job.status_var).pack(side=tk.LEFT, padx=4)
+        B = self.i18n['buttons'][self.lang.get()]
+        job.btn_close = ttk.Button(bar, text=B['close'], command=lambda: self._close_job(job))
+        job.btn_close.pack(side=tk.RIGHT, padx=2)
+        job.btn_stop = ttk.Button(bar, text=B['stop'], command=lambda: self._stop_job(job))
+        job.btn_stop.pack(side=tk.RIGHT, padx=2)
+        output = scrolledtext.ScrolledText(frame, height=12, wrap=tk.WORD)
+        output.pack(fill=tk.BOTH, expand=True)
+        job.frame = frame
+        job.pump = OutputPump(output, self._scrollback_lines())
+        job.pump.start()
+        self.jobs_nb.add(frame, text=job.tab_title())
+        self.jobs_nb.select(frame)
+
+    def _max_jobs(self) -> int:
+        try:
+            return max(1, int(self.max_jobs.get()))
+        except ValueError:
+            return DEFAULT_MAX_JOBS
+
+    def _running_jobs(self):
+        return [j for j in self.jobs.values() if j.state == 'running']
+
+    def _schedule_jobs(self):
+        while self.pending and len(self._running_jobs()) < self._max_jobs():
+            self._start_job(self.pending.popleft())
+
+    def _start_job(self, job):
+        job.state = 'running'
+        job.started = time.monotonic()
 
         def worker():
+            # Reads raw chunks (not lines) so \r progress updates arrive as they
+            # are printed; the full stream is saved to log_path, the widget gets
+            # it through the pump. No Tk calls from this thread.
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            returncode = None
             try:
-                self.status_var.set(f'RUNNING: {" ".join(args)}')
-                self.btn_stop.state(['!disabled'])
-                proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
-                self.current_proc = proc
-                for line in proc.stdout:
-                    self._append(line)
-                proc.wait()
-                self._append(f"\n[exit {proc.returncode}]\n")
+                with open(job.log_path, 'ab') as log:
+                    log.write(f'$ {" ".join(job.cmd)}\n'.encode())
+                    # Own session/process group: Stop signals the whole tree
+                    # (stress-ng, gpu_burn, background loggers of autotest.sh)
+                    job.proc = subprocess.Popen(job.cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                                start_new_session=True, env=job.env)
+                    while True:
+                        chunk = job.proc.stdout.read1(READ_CHUNK)
+                        if not chunk:
+                            break
+                        log.write(chunk)
+                        log.flush()
+                        job.pump.write(decoder.decode(chunk))
+                    returncode = job.proc.wait()
+                    job.pump.write(decoder.decode(b'', final=True) + f'\n[exit {returncode}]\n')
+                    log.write(f'\n[exit {returncode}]\n'.encode())
             except Exception as e:
-                self._append(f"\n[error] {e}\n")
+                job.pump.write(f'\n[error] {e}\n')
             finally:
-                self.current_proc = None
-                self.status_var.set('IDLE')
-                self.btn_stop.state(['disabled'])
+                job.pump.post(self._job_finished, job, returncode)
 
         threading.Thread(target=worker, daemon=True).start()
 
-    def _append(self, text: str):
-        self.output.insert(tk.END, text)
-        self.output.see(tk.END)
+    def _job_finished(self, job, returncode):
+        job.returncode = returncode
+        job.ended = time.monotonic()
+        if job.stop_requested:
+            job.state = 'stopped'
+        else:
+            job.state = 'done' if returncode == 0 else 'failed'
+        self._schedule_jobs()
+        self._refresh_jobs()
 
-    def _stop_proc(self):
-        proc = getattr(self, 'current_proc', None)
-        if not proc:
+    def _stop_job(self, job):
+        if job.state == 'queued':
+            self.pending.remove(job)
+            job.stop_requested = True
+            job.state = 'stopped'
+            self._refresh_jobs()
+            return
+        if job.proc is None:
             return
+        # The group outlives autotest.sh when it leaves background workers
+        # (gpuburn, iostat), so Stop also works on a job that has exited
+        job.stop_requested = True
+        job.pump.write('\n[stopping]\n')
+        if self._signal_job(job, signal.SIGTERM):
+            self.after(STOP_GRACE_MS, lambda: self._signal_job(job, signal.SIGKILL))
+
+    def _signal_job(self, job, sig) -> bool:
         try:
-            self._append('\n[stopping]\n')
-            proc.terminate()
-            # wait a bit then kill if needed
-            for _ in range(10):
-                ret = proc.poll()
-                if ret is not None:
-                    break
-                time.sleep(0.2)
-            if proc.poll() is None:
-                proc.kill()
+            os.killpg(job.proc.pid, sig)
+            return True
+        except ProcessLookupError:
+            return False
         except Exception as e:
-            self._append(f'\n[stop error] {e}\n')
+            job.pump.write(f'\n[stop error] {e}\n')
+            return False
 
-    def _get_archive_dir(self) -> str:
+    def _stop_proc(self):
+        # Footer Stop: the job in the selected tab
+        selected = self.jobs_nb.select()
+        for job in self.jobs.values():
+            if str(job.frame) == selected:
+                self._stop_job(job)
+                return
+
+    def _stop_all(self):
+        for job in list(self.jobs.values()):
+            if job.state in ('queued', 'running'):
+                self._stop_job(job)
+
+    def _close_job(self, job):
+        if job.state in ('queued', 'running'):
+            messagebox.showwarning('Busy', 'The job is still running. Stop it first.')
+            return
+        job.pump.stop()
+        self.jobs_nb.forget(job.frame)
+        job.frame.destroy()
+        del self.jobs[job.id]
+        self._refresh_jobs()
+
+    def _refresh_jobs(self):
+        for job in self.jobs.values():
+            job.status_var.set(job.describe())
+            self.jobs_nb.tab(job.frame, text=job.tab_title())
+            job.btn_close.state(['disabled'] if job.state in ('queued', 'running') else ['!disabled'])
+        running = len(self._running_jobs())
+        if running or self.pending:
+            self.status_var.set(f'RUNNING {running}/{self._max_jobs()}, QUEUED {len(self.pending)}')
+        else:
+            self.status_var.set('IDLE')
+        self.btn_stop_all.state(['!disabled'] if running or self.pending else ['disabled'])
+
+    def _tick_jobs(self):
+        # Elapsed time in job status lines, campaign progress on the Tasks tab
+        self._refresh_jobs()
+        if self.nb.select() == str(self.tab_tasks):
+            self._refresh_campaign()
+        self.after(1000, self._tick_jobs)
+
+    def _on_close(self):
+        if self._running_jobs() or self.pending:
+            if not messagebox.askyesno('Exit', 'Jobs are still running. Stop them and exit?'):
+                return
+            self.pending.clear()
+            # The window goes away with the event loop, so the SIGKILL after
+            # the grace period cannot be scheduled with after() as on Stop
+            jobs = [job for job in self._running_jobs() if job.proc is not None and self._signal_job(job, signal.SIGTERM)]
+            deadline = time.monotonic() + STOP_GRACE_MS / 1000
+            while jobs and time.monotonic() < deadline:
+                time.sleep(0.1)
+                for job in jobs:
+                    job.proc.poll()  # a zombie leader still counts as a group member
+                jobs = [job for job in jobs if self._signal_job(job, 0)]
+            for job in jobs:
+                self._signal_job(job, signal.SIGKILL)
+        self.feed.stop()
+        if self.profiler is not None:
+            self._save_profile(show=False)
+        self.destroy()
+
+    def _toggle_profile(self):
+        # On: time the output pumps, dashboard redraws and log polling, sample
+        # stacks of all threads; off: save <AUTOTEST_LOG_DIR>/gui/profile_<time>.json
+        # (+ .folded stacks for flamegraph) and show the summary
+        if self.profile.get() and self.profiler is None:
+            base = os.path.join(self._env_value('AUTOTEST_LOG_DIR', '~/AutoTest_Logs'), 'gui',
+                                f'profile_{time.strftime("%Y%m%d-%H%M%S")}')
+            os.makedirs(os.path.dirname(base), exist_ok=True)
+            self.profile_path = base + '.json'
+            self.profiler = perfstats.Profiler('autotest_gui', stacks=base + '.folded')
+            perfstats.activate(self.profiler)
+        elif not self.profile.get() and self.profiler is not None:
+            self._save_profile(show=True)
+
+    def _save_profile(self, show: bool):
+        profiler, self.profiler = self.profiler, None
+        perfstats.activate(None)
+        profiler.stop()
+        try:
+            data = profiler.write(self.profile_path)
+        except OSError as e:
+            messagebox.showerror('Profile', str(e))
+            return
+        if show:
+            messagebox.showinfo('Profile', f'{perfstats.format_report(data)}\n\n{self.profile_path}')
+
+    def _scrollback_lines(self) -> int:
+        try:
+            return max(100, int(self.scrollback.get()))
+        except ValueError:
+            return DEFAULT_SCROLLBACK
+
+    def _set_scrollback(self):
+        lines = self._scrollback_lines()
+        for job in self.jobs.values():
+            job.pump.max_lines = lines
+
+    def _output_log_path(self, args) -> str:
+        # Full command output goes to <AUTOTEST_LOG_DIR>/gui/<time>_<command>.log
+        log_dir = os.path.join(self._env_value('AUTOTEST_LOG_DIR', '~/AutoTest_Logs'), 'gui')
+        os.makedirs(log_dir, exist_ok=True)
+        name = (args[0] if args else 'cmd').replace(os.sep, '_')
+        return os.path.join(log_dir, f'{time.strftime("%Y%m%d-%H%M%S")}_{self.job_seq}_{name}.log')
+
+    def _env_value(self, key: str, default: str) -> str:
         # Try to read from .env; else default
-        default = os.path.expanduser('~/AutoTest_Archives')
         envp = self.env_path.get()
         if envp and os.path.isfile(envp):
             try:
                 with open(envp, 'r', encoding='utf-8') as f:
                     for line in f:
                         line = line.strip()
-                        if line.startswith('AUTOTEST_ARCHIVE_DIR'):
+                        if line.startswith(key):
                             val = line.split('=', 1)[1].strip().strip('"')
                             return os.path.expanduser(val)
             except Exception:
                 pass
-        return default
+        return os.path.expanduser(default)
+
+    def _get_archive_dir(self) -> str:
+        return self._env_value('AUTOTEST_ARCHIVE_DIR', '~/AutoTest_Archives')
 
     def _open_last_report(self):
         import glob, webbrowser
         arch = self._get_archive_dir()
-        pattern = os.path.join(arch, 'report_*.html')
-        files = sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
+        files = []
+        try:
+            # Newest report from the catalog; the archive dir is only rescanned incrementally
+            import catalog
+            roots = dict(catalog.default_roots(), archive=arch)
+            conn = catalog.open_catalog(catalog.default_path(roots))
+            try:
+                catalog.update(conn, {'archive': arch})
+                files = [r['path'] for r in catalog.query(conn, kinds=['report'], latest=True)]
+            finally:
+                conn.close()
+        except Exception:
+            pass
+        if not files:
+            pattern = os.path.join(arch, 'report_*.html')
+            files = sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
         if not files:
             messagebox.showinfo('Report', 'No report files found')
             return
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# Генератор синтетических логов для бенчмарков: таблицы nvidia-smi (как их
+# пишет gpuburn: строка с меткой времени + вывод nvidia-smi), CSV-лог
+# сборщика nvidia-smi --query-gpu и sysmonitor.log в формате monitor.sh. Вывод детерминирован при одинаковом --seed.
+
+import argparse
+import datetime
+import math
+import random
+import sys
+from typing import Iterator, List, Optional, TextIO
+
+# Варианты вывода разных поколений драйверов
+VARIANTS = ("550", "470", "geforce")
+TAILS = ("clean", "truncated", "corrupt")
+
+GPU_MODELS = {
+    "550": ("NVIDIA A100-SXM4-80GB", 400, 81920),
+    "470": ("NVIDIA A100-SXM...", 400, 81920),
+    "geforce": ("NVIDIA GeForce RTX 3090", 350, 24576),
+}
+
+SYSMONITOR_HEADER = (
+    "Timestamp           | Top_Process  | CPU_Freq  | CPU_Temp | CPU_Load | GPU_Freq | GPU_Temp | RAM_Used | "
+    "RAM_Total | RAM_Free | Net_If | Net_Link | Net_RxB | Net_TxB | NVMe_Temp | NVMe_Err | Disk_Health\n"
+    "--------------------+--------------+-----------+----------+----------+----------+----------+----------+"
+    "-----------+---------+--------+----------+---------+---------+-----------+----------+------------\n"
+)
+# Тот же printf, что в monitor.sh
+SYSMONITOR_ROW = ("%-19s | %-12s | %-8s | %-8s | %-8s | %-8s | %-8s | %-10s | %-10s | %-8s | %-6s | %-8s | "
+                  "%-7s | %-7s | %-9s | %-8s | %-10s\n")
+
+class GpuState:
+    # Нагрузка gpu_burn: прогрев до рабочей температуры, мощность у предела,
+    # редкие провалы (троттлинг)
+    def __init__(self, rnd: random.Random, cap: int, mem_total: int):
+        self.rnd = rnd
+        self.cap = cap
+        self.mem_total = mem_total
+        self.temp = rnd.uniform(30, 38)
+        self.target = rnd.uniform(72, 84)
+
+    def sample(self, elapsed: float) -> tuple:
+        rnd = self.rnd
+        self.temp += (self.target - self.temp) * 0.02 + rnd.gauss(0, 0.4)
+        throttled = self.temp > 83 or rnd.random() < 0.01
+        util = 100 if not throttled else rnd.randint(60, 99)
+        power = int(self.cap * (0.97 if not throttled else rnd.uniform(0.6, 0.9)) + rnd.gauss(0, 3))
+        power = max(20, min(self.cap, power))
+        mem_used = int(self.mem_total * 0.92) + rnd.randint(-64, 64) if elapsed > 5 else rnd.randint(0, 512)
+        return int(round(self.temp)), power, mem_used, util
+
+def _ts(t: datetime.datetime) -> str:
+    return t.strftime("%Y-%m-%d %H:%M:%S")
+
+def nvidia_smi_snapshot(t: datetime.datetime, states: List[GpuState], elapsed: float,
+                        variant: str, processes: bool = True) -> str:
+    # Один снапшот: метка времени (её пишет цикл логирования) и вывод nvidia-smi
+    name = GPU_MODELS[variant][0]
+    out = [_ts(t), t.strftime("%a %b %d %H:%M:%S %Y")]
+    if variant == "470":
+        out += [
+            "+-----------------------------------------------------------------------------+",
+            "| NVIDIA-SMI 470.182.03   Driver Version: 470.182.03   CUDA Version: 11.4     |",
+            "|-------------------------------+----------------------+----------------------+",
+            "| GPU  Name        Persistence-M| Bus-Id        Disp.A | Volatile Uncorr. ECC |",
+            "| Fan  Temp  Perf  Pwr:Usage/Cap|         Memory-Usage | GPU-Util  Compute M. |",
+            "|                               |                      |               MIG M. |",
+            "|===============================+======================+======================|",
+        ]
+    else:
+        out += [
+            "+-----------------------------------------------------------------------------------------+",
+            "| NVIDIA-SMI 550.54.15              Driver Version: 550.54.15      CUDA Version: 12.4     |",
+            "|-----------------------------------------+------------------------+----------------------+",
+            "| GPU  Name                 Persistence-M | Bus-Id          Disp.A | Volatile Uncorr. ECC |",
+            "| Fan  Temp   Perf          Pwr:Usage/Cap |           Memory-Usage | GPU-Util  Compute M. |",
+            "|                                         |                        |               MIG M. |",
+            "|=========================================+========================+======================|",
+        ]
+    for i, st in enumerate(states):
+        temp, power, mem_used, util = st.sample(elapsed)
+        bus = f"00000000:{0x07 + i * 0x10:02X}:00.0"
+        if variant == "470":
+            out += [
+                f"|  {i:2d}  {name:<19} On   | {bus} Off |                    0 |",
+                f"| N/A   {temp:2d}C    P0   {power:3d}W / {st.cap:3d}W |{mem_used:7d}MiB / {st.mem_total:5d}MiB |"
+                f"    {util:3d}%      Default |",
+                "|                               |                      |             Disabled |",
+                "+-------------------------------+----------------------+----------------------+",
+            ]
+        else:
+            fan = "N/A" if variant == "550" else f"{min(100, 30 + temp // 2):2d}%"
+            ecc = "0" if variant == "550" else "N/A"
+            out += [
+                f"| {i:3d}  {name:<30} On  |   {bus} Off | {ecc:>20} |",
+                f"| {fan:>3}   {temp:2d}C    P2           {power:4d}W / {st.cap:4d}W | "
+                f"{mem_used:7d}MiB / {st.mem_total:6d}MiB | {util:6d}%      Default |",
+                "|                                         |                        |                  N/A |",
+                "+-----------------------------------------+------------------------+----------------------+",
+            ]
+    if variant == "470":
+        sep = "+-----------------------------------------------------------------------------+"
+        out += ["", sep, "| Processes:                                                                  |",
+                "|  GPU   GI   CI        PID   Type   Process name                  GPU Memory |",
+                "|        ID   ID                                                   Usage      |",
+                "|=============================================================================|"]
+        if processes:
+            for i, st in enumerate(states):
+                out.append(f"|  {i:3d}   N/A  N/A   {12340 + i:8d}      C   ./gpu_burn                  "
+                           f"{st.mem_total - 2000:8d}MiB |")
+        else:
+            out.append("|  No running processes found                                                 |")
+    else:
+        sep = "+-----------------------------------------------------------------------------------------+"
+        out += ["", sep, "| Processes:                                                                              |",
+                "|  GPU   GI   CI        PID   Type   Process name                              GPU Memory |",
+                "|        ID   ID                                                               Usage      |",
+                "|=========================================================================================|"]
+        if processes:
+            for i, st in enumerate(states):
+                out.append(f"|  {i:3d}   N/A  N/A   {12340 + i:8d}      C   ./gpu_burn                              "
+                           f"{st.mem_total - 2000:8d}MiB |")
+        else:
+            out.append("|  No running processes found                                                             |")
+    out.append(sep)
+    return "\n".join(out) + "\n"
+
+def iter_nvidia_smi(gpus: int, duration: int, interval: float, variant: str = "550",
+                    seed: int = 1, start: Optional[datetime.datetime] = None) -> Iterator[str]:
+    if variant not in GPU_MODELS:
+        raise ValueError(f"unknown variant: {variant}")
+    rnd = random.Random(seed)
+    _, cap, mem_total = GPU_MODELS[variant]
+    states = [GpuState(rnd, cap, mem_total) for _ in range(gpus)]
+    start = start or datetime.datetime(2025, 10, 14, 12, 0, 0)
+    count = max(1, math.ceil(duration / interval))
+    for n in range(count):
+        elapsed = n * interval
+        t = start + datetime.timedelta(seconds=elapsed)
+        yield nvidia_smi_snapshot(t, states, elapsed, variant, processes=n > 0)
+
+def corrupt_tail(rnd: random.Random, last_snapshot: str, mode: str) -> str:
+    # Хвост лога после аварийной остановки: снапшот, оборванный посередине
+    # строки, или мусор (обрывки таблицы, NUL-байты, невалидный UTF-8)
+    if mode == "truncated":
+        return last_snapshot[:rnd.randint(len(last_snapshot) // 4, len(last_snapshot) - 2)]
+    if mode == "corrupt":
+        cut = last_snapshot[:rnd.randint(len(last_snapshot) // 3, len(last_snapshot) - 2)]
+        junk = "".join(rnd.choice("|+-=0123456789 CWMiB%/\x00�°") for _ in range(rnd.randint(64, 512)))
+        return cut + "\n" + junk + "\n| N/A   4"
+    return last_snapshot
+
+def write_nvidia_smi(out: TextIO, gpus: int, duration: int, interval: float = 10.0,
+                     variant: str = "550", tail: str = "clean", seed: int = 1) -> int:
+    # Возвращает число полных снапшотов
+    rnd = random.Random(seed ^ 0x5EED)
+    count = 0
+    prev: Optional[str] = None
+    for snap in iter_nvidia_smi(gpus, duration, interval, variant, seed):
+        if prev is not None:
+            out.write(prev)
+            count += 1
+        prev = snap
+    if prev is not None:
+        out.write(corrupt_tail(rnd, prev, tail))
+        count += tail == "clean"
+    return count
+
+# Заголовок CSV-лога gpuburn/nvidia-smi_collector.py
+QUERY_HEADER = (
+    "# autotest nvidia-smi query log v1; interval_ms={interval_ms}; started={started}\n"
+    "timestamp,index,temperature.gpu,power.draw,power.limit,memory.used,memory.total,utilization.gpu,"
+    "clocks.sm,clocks.mem,pstate,clocks_event_reasons.active,ecc.errors.corrected.volatile.total,"
+    "ecc.errors.uncorrected.volatile.total\n"
+)
+
+def write_query(out: TextIO, gpus: int, duration: int, interval: float = 1.0, variant: str = "550",
+                seed: int = 1, start: Optional[datetime.datetime] = None) -> int:
+    # CSV-лог сборщика: строка на GPU в каждом замере
+    rnd = random.Random(seed)
+    _, cap, mem_total = GPU_MODELS[variant]
+    states = [GpuState(rnd, cap, mem_total) for _ in range(gpus)]
+    start = start or datetime.datetime(2025, 10, 14, 12, 0, 0)
+    count = max(1, math.ceil(duration / interval))
+    ecc = "[N/A]" if variant == "geforce" else "0"
+    out.write(QUERY_HEADER.format(interval_ms=int(interval * 1000), started=start.isoformat()))
+    for n in range(count):
+        elapsed = n * interval
+        t = start + datetime.timedelta(seconds=elapsed)
+        ts = t.strftime("%Y-%m-%d %H:%M:%S.") + f"{t.microsecond // 1000:03d}"
+        for i, st in enumerate(states):
+            temp, power, mem_used, util = st.sample(elapsed)
+            throttled = util < 100
+            out.write(f"{ts},{i},{temp},{power + rnd.random():.2f},{cap:.2f},{mem_used},{mem_total},{util},"
+                      f"{1275 if throttled else 1410},1593,P0,0x{4 if throttled else 0:016x},{ecc},{ecc}\n")
+    return count
+
+def write_sysmonitor(out: TextIO, duration: int, interval: float = 10.0, seed: int = 1,
+                     start: Optional[datetime.datetime] = None,
+                     date_format: str = "%d-%m-%Y %H:%M:%S") -> int:
+    rnd = random.Random(seed)
+    start = start or datetime.datetime(2025, 10, 14, 12, 0, 0)
+    rx = rnd.randint(10 ** 9, 10 ** 10)
+    tx = rnd.randint(10 ** 8, 10 ** 9)
+    cpu_temp = 45.0
+    count = max(1, math.ceil(duration / interval))
+    out.write(SYSMONITOR_HEADER)
+    for n in range(count):
+        t = start + datetime.timedelta(seconds=n * interval)
+        cpu_temp += (78 - cpu_temp) * 0.05 + rnd.gauss(0, 0.8)
+        rx += rnd.randint(10 ** 4, 10 ** 7)
+        tx += rnd.randint(10 ** 4, 10 ** 6)
+        mem_used = 61000 + rnd.randint(-800, 800)
+        mem_total = 257652
+        out.write(SYSMONITOR_ROW % (
+            t.strftime(date_format), rnd.choice(["gpu_burn", "stress-ng", "python3", "Xorg"]),
+            f"{rnd.randint(2200, 3500)} MHz", f"{int(cpu_temp)}°C", f"{rnd.uniform(60, 100):.1f}%",
+            f"{rnd.choice([1410, 1395, 1380, 1275])} MHz", f"{rnd.randint(68, 84)}°C", f"{mem_used} MB",
+            f"{mem_total} MB", f"{mem_total - mem_used - 40000} MB", "eno1", "UP", rx, tx,
+            f"{rnd.randint(38, 55)} C", "0", "PASSED"))
+    return count
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate synthetic nvidia-smi / sysmonitor logs for benchmarks.")
+    sub = ap.add_subparsers(dest="kind", required=True)
+    smi = sub.add_parser("nvidia-smi", help="nvidia-smi table log as written by gpuburn")
+    smi.add_argument("--gpus", type=int, default=8)
+    smi.add_argument("--variant", choices=VARIANTS, default="550", help="Driver output format")
+    smi.add_argument("--tail", choices=TAILS, default="clean", help="Clean end, truncated or corrupt last snapshot")
+    query = sub.add_parser("query", help="CSV log as written by gpuburn/nvidia-smi_collector.py")
+    query.add_argument("--gpus", type=int, default=8)
+    query.add_argument("--variant", choices=VARIANTS, default="550", help="geforce: no ECC ([N/A])")
+    sysmon = sub.add_parser("sysmonitor", help="sysmonitor.log as written by monitor.sh")
+    for p in (smi, query, sysmon):
+        p.add_argument("--hours", type=float, default=1.0, help="Logged duration")
+        p.add_argument("--interval", type=float, default=10.0, help="Seconds between samples")
+        p.add_argument("--seed", type=int, default=1)
+        p.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = ap.parse_args()
+
+    duration = int(args.hours * 3600)
+    out = open(args.output, "w", encoding="utf-8", newline="\n") if args.output else sys.stdout
+    try:
+        if args.kind == "nvidia-smi":
+            n = write_nvidia_smi(out, args.gpus, duration, args.interval, args.variant, args.tail, args.seed)
+        elif args.kind == "query":
+            n = write_query(out, args.gpus, duration, args.interval, args.variant, args.seed)
+        else:
+            n = write_sysmonitor(out, duration, args.interval, args.seed)
+    finally:
+        if args.output:
+            out.close()
+    if args.output:
+        print(f"Wrote {n} samples to {args.output}")
+
+if __name__ == "__main__":
+    main()
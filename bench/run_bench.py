@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# Бенчмарки разбора и выгрузки логов на синтетических данных (GPU не нужен).
+# Каждый случай запускается отдельным процессом: замеряются время, пиковая
+# память (ru_maxrss дочернего процесса) и пропускная способность; результаты
+# сохраняются в JSON для сравнения прогонов (--compare old.json new.json).
+
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.dirname(HERE)
+PARSER = os.path.join(REPO, "gpuburn", "nvidia-smi_table-parser.py")
+sys.path.insert(0, HERE)
+
+import gen_logs  # noqa: E402
+
+SIZES = {"1h": 3600, "24h": 86400, "48h": 172800}
+GPU_COUNTS = [1, 4, 8]
+# Случай -> вид входного лога: smi (таблицы nvidia-smi), query (CSV-лог
+# сборщика nvidia-smi --query-gpu) или sysmon (monitor.sh)
+CASES = {
+    "parse-regex": "smi",
+    "parse-fast": "smi",
+    "parse-query": "query",
+    "xlsx": "smi",
+    "csv-store": "smi",
+    "parquet-store": "smi",
+    "gui-append": "smi",
+    "gui-append-sysmon": "sysmon",
+}
+
+def load_parser():
+    spec = importlib.util.spec_from_file_location("nvidia_smi_table_parser", PARSER)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def ensure_log(workdir: str, kind: str, size: str, gpus: int, args) -> str:
+    # Логи кешируются в workdir: генерация детерминирована параметрами в имени
+    if kind == "smi":
+        name = f"nvidia-smi_{size}_{gpus}gpu_{args.variant}_{args.tail}_i{args.interval:g}_s{args.seed}.log"
+    elif kind == "query":
+        name = f"nvidia-smi_{size}_{gpus}gpu_{args.variant}_i{args.interval:g}_s{args.seed}.csv"
+    else:
+        name = f"sysmonitor_{size}_i{args.interval:g}_s{args.seed}.log"
+    path = os.path.join(workdir, name)
+    if os.path.exists(path):
+        return path
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        if kind == "smi":
+            gen_logs.write_nvidia_smi(f, gpus, SIZES[size], args.interval, args.variant, args.tail, args.seed)
+        elif kind == "query":
+            gen_logs.write_query(f, gpus, SIZES[size], args.interval, args.variant, args.seed)
+        else:
+            gen_logs.write_sysmonitor(f, SIZES[size], args.interval, args.seed)
+    os.replace(tmp, path)
+    return path
+
+def count_lines(path: str) -> int:
+    n = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            n += block.count(b"\n")
+    return n
+
+def run_measured(cmd: List[str]) -> Dict[str, Any]:
+    # wait4 отдаёт rusage именно этого процесса, а не максимум по всем детям
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    out = proc.stdout.read()
+    proc.stdout.close()
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.perf_counter() - t0
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss в Linux — в КиБ
+    return {"returncode": proc.returncode, "wall_s": wall, "max_rss_mb": usage.ru_maxrss / 1024,
+            "cpu_s": usage.ru_utime + usage.ru_stime, "output": out}
+
+def case_command(case: str, log: str, tmpdir: str, args) -> Optional[List[str]]:
+    out = os.path.join(tmpdir, case)
+    if case in ("parse-regex", "parse-fast"):
+        return [sys.executable, __file__, "--worker", "parse", "--engine", case.split("-")[1], log]
+    if case == "parse-query":
+        return [sys.executable, __file__, "--worker", "parse", log]
+    if case in ("gui-append", "gui-append-sysmon"):
+        return [sys.executable, __file__, "--worker", "gui", log]
+    common = ["-j", str(args.jobs), "--engine", args.engine]
+    if case == "xlsx":
+        return [sys.executable, PARSER, log, "-o", out + ".xlsx"] + common
+    if case in ("csv-store", "parquet-store"):
+        fmt = case.split("-")[0]
+        return [sys.executable, PARSER, log, "-o", out, "--format", fmt, "--run-id", "bench"] + common
+    return None
+
+def skip_reason(case: str) -> Optional[str]:
+    if case == "parquet-store" and importlib.util.find_spec("pyarrow") is None:
+        return "pyarrow not installed"
+    if case == "xlsx" and importlib.util.find_spec("openpyxl") is None:
+        return "openpyxl not installed"
+    return None
+
+def run_case(case: str, size: str, gpus: Optional[int], log: str, args) -> Dict[str, Any]:
+    size_bytes = os.path.getsize(log)
+    lines = count_lines(log)
+    result: Dict[str, Any] = {
+        "case": case, "size": size, "gpus": gpus, "variant": args.variant if gpus else None,
+        "log_bytes": size_bytes, "log_lines": lines, "status": "ok",
+    }
+    reason = skip_reason(case)
+    if reason:
+        result.update(status="skipped", reason=reason)
+        return result
+    runs = []
+    for _ in range(args.repeat):
+        tmpdir = tempfile.mkdtemp(prefix="autotest-bench-")
+        try:
+            runs.append(run_measured(case_command(case, log, tmpdir, args)))
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        if runs[-1]["returncode"] != 0:
+            break
+    last = runs[-1]
+    if last["returncode"] != 0:
+        result.update(status="failed", reason=last["output"].strip()[-2000:])
+        return result
+    extras = [json.loads(m.group(1)) for r in runs
+              for m in [re.search(r"^BENCH (\{.*\})$", r["output"], re.M)] if m]
+    extra = extras[-1] if extras else {}
+    if extra.get("skipped"):
+        result.update(status="skipped", reason=extra["skipped"])
+        return result
+    m = re.search(r"Saved (\d+) rows", last["output"])
+    rows = extra.pop("rows", int(m.group(1)) if m else None)
+    # лучшее время из повторов, память — максимум
+    wall = min(r["wall_s"] for r in runs)
+    result.update(
+        rows=rows,
+        wall_s=round(wall, 4),
+        cpu_s=round(min(r["cpu_s"] for r in runs), 4),
+        max_rss_mb=round(max(r["max_rss_mb"] for r in runs), 1),
+        lines_per_s=round(lines / wall),
+        mb_per_s=round(size_bytes / wall / 2 ** 20, 2),
+        repeats=len(runs),
+    )
+    # inner_s — время без запуска интерпретатора и импортов (для --worker)
+    if extras and "inner_s" in extra:
+        result["inner_s"] = min(e["inner_s"] for e in extras)
+    return result
+
+# --- режим дочернего процесса ---
+
+def worker_parse(log: str, engine: str) -> Dict[str, Any]:
+    parser = load_parser()
+    t0 = time.perf_counter()
+    rows = sum(1 for _ in parser.iter_inputs([log], jobs=1, engine=engine))
+    return {"rows": rows, "inner_s": round(time.perf_counter() - t0, 4)}
+
+def worker_gui(log: str) -> Dict[str, Any]:
+    # Путь вывода GUI: поток чтения кладёт куски вывода в OutputPump, главный
+    # цикл Tk отрисовывает накопленное (здесь — после каждого куска, т. е.
+    # худший случай: кадр на каждое чтение)
+    import tkinter as tk
+    from tkinter import scrolledtext
+    sys.path.insert(0, REPO)
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return {"skipped": f"no display ({e})"}
+    root.withdraw()
+    from autotest_gui import READ_CHUNK, OutputPump
+    pump = OutputPump(scrolledtext.ScrolledText(root))
+    t0 = time.perf_counter()
+    lines = 0
+    with open(log, "r", encoding="utf-8", errors="replace") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK), ""):
+            pump.write(chunk)
+            pump.drain()
+            lines += chunk.count("\n")
+    root.update()
+    inner = time.perf_counter() - t0
+    root.destroy()
+    return {"rows": lines, "inner_s": round(inner, 4)}
+
+def worker_main(args) -> None:
+    if args.worker == "parse":
+        extra = worker_parse(args.log, args.engine)
+    else:
+        extra = worker_gui(args.log)
+    print("BENCH " + json.dumps(extra))
+
+# --- сравнение результатов ---
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path, encoding="utf-8") as f:
+        old = {(r["case"], r["size"], r["gpus"], r["variant"]): r for r in json.load(f)["results"]}
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+    print(f"{'case':<18} {'size':>4} {'gpus':>4} {'wall old':>9} {'wall new':>9} {'speedup':>8} "
+          f"{'rss old':>8} {'rss new':>8}")
+    for r in new:
+        o = old.get((r["case"], r["size"], r["gpus"], r["variant"]))
+        if not o or r["status"] != "ok" or o["status"] != "ok":
+            continue
+        print(f"{r['case']:<18} {r['size']:>4} {r['gpus'] or '-':>4} {o['wall_s']:>9.3f} {r['wall_s']:>9.3f} "
+              f"{o['wall_s'] / r['wall_s']:>7.2f}x {o['max_rss_mb']:>8.1f} {r['max_rss_mb']:>8.1f}")
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "-C", REPO, "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark nvidia-smi log parsing/export and GUI output on synthetic logs.")
+    ap.add_argument("--sizes", default="1h,24h,48h", help=f"Comma-separated log durations ({', '.join(SIZES)})")
+    ap.add_argument("--gpus", default=",".join(map(str, GPU_COUNTS)), help="Comma-separated GPU counts")
+    ap.add_argument("--cases", default=",".join(CASES), help="Comma-separated cases")
+    ap.add_argument("--quick", action="store_true", help="Only 1h logs")
+    ap.add_argument("--variant", choices=gen_logs.VARIANTS, default="550", help="nvidia-smi output format")
+    ap.add_argument("--tail", choices=gen_logs.TAILS, default="clean", help="End of the generated nvidia-smi log")
+    ap.add_argument("--interval", type=float, default=10.0, help="Sample interval of generated logs (sec)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--repeat", type=int, default=1, help="Runs per case (best wall time is reported)")
+    ap.add_argument("-j", "--jobs", type=int, default=1, help="Parser worker processes for export cases")
+    ap.add_argument("--engine", choices=["regex", "fast"], default="regex", help="Parser engine for export cases")
+    ap.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "autotest-bench"),
+                    help="Cache for generated logs")
+    ap.add_argument("--out-dir", default=os.path.join(
+        os.path.expanduser(os.environ.get("AUTOTEST_ARCHIVE_DIR", "~/AutoTest_Archives")), "bench"),
+        help="Where to save the JSON results")
+    ap.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files and exit")
+    ap.add_argument("--worker", choices=["parse", "gui"], help=argparse.SUPPRESS)
+    ap.add_argument("log", nargs="?", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        worker_main(args)
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    sizes = ["1h"] if args.quick else [s for s in args.sizes.split(",") if s]
+    gpu_counts = [int(g) for g in args.gpus.split(",") if g]
+    cases = [c for c in args.cases.split(",") if c]
+    unknown = [s for s in sizes if s not in SIZES] + [c for c in cases if c not in CASES]
+    if unknown:
+        ap.error(f"unknown size/case: {', '.join(unknown)}")
+    os.makedirs(args.workdir, exist_ok=True)
+
+    results = []
+    for size in sizes:
+        for case in cases:
+            kind = CASES[case]
+            for gpus in (gpu_counts if kind != "sysmon" else [None]):
+                log = ensure_log(args.workdir, kind, size, gpus or 0, args)
+                r = run_case(case, size, gpus, log, args)
+                results.append(r)
+                if r["status"] == "ok":
+                    print(f"{case:<18} {size:>4} {gpus or '-':>3} GPU  {r['wall_s']:8.3f}s  "
+                          f"{r['max_rss_mb']:7.1f} MB  {r['lines_per_s']:>10} lines/s  {r['mb_per_s']:7.2f} MB/s")
+                else:
+                    print(f"{case:<18} {size:>4} {gpus or '-':>3} GPU  {r['status']}: {r['reason'].splitlines()[-1]}")
+
+    now = datetime.datetime.now()
+    report = {
+        "meta": {
+            "timestamp": now.isoformat(timespec="seconds"),
+            "host": socket.gethostname(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "commit": git_commit(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("worker", "log", "compare")},
+        },
+        "results": results,
+    }
+    os.makedirs(args.out_dir, exist_ok=True)
+    out = os.path.join(args.out_dir, f"bench_{socket.gethostname()}_{now:%Y%m%d-%H%M%S}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Results saved: {out}")
+
+if __name__ == "__main__":
+    main()
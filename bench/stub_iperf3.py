@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Заглушка iperf3 для проверки netperf.py без сети и сервера:
+#   AUTOTEST_IPERF3=bench/stub_iperf3.py python3 netperf.py -t 2 -n 2 host1 host2:5202
+# Понимает -c HOST, -p PORT, -t SEC, -P N, -R, --bidir, -u, -b RATE, -J/--json
+# и печатает JSON того же вида, что iperf3 3.9+ (start/intervals/end,
+# суммы и потоки, для UDP — jitter и потери). Тест длится STUB_IPERF_SLEEP
+# секунд (по умолчанию 0.2), а не -t.
+# Переменные окружения:
+#   STUB_IPERF_MBPS  — средняя скорость, Мбит/с (940)
+#   STUB_IPERF_FAIL  — хосты через запятую, для которых iperf3 завершается
+#                      ошибкой "unable to connect to server"
+#   STUB_IPERF_SLEEP — длительность теста, с (0.2)
+#   STUB_SEED        — seed генератора (1)
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+def interval_sum(start: float, bps: float, udp: bool, sender: bool, rnd: random.Random) -> dict:
+    d = {"start": start, "end": start + 1, "seconds": 1.0, "bytes": int(bps / 8), "bits_per_second": bps,
+         "omitted": False, "sender": sender}
+    if udp:
+        d["packets"] = int(bps / 8 / 1448)
+    else:
+        d["retransmits"] = rnd.choice([0, 0, 0, 1, 3])
+    return d
+
+def main():
+    ap = argparse.ArgumentParser(description="iperf3 stub emitting canned --json output.")
+    ap.add_argument("-c", "--client", required=True)
+    ap.add_argument("-p", "--port", type=int, default=5201)
+    ap.add_argument("-t", "--time", type=int, default=10)
+    ap.add_argument("-P", "--parallel", type=int, default=1)
+    ap.add_argument("-R", "--reverse", action="store_true")
+    ap.add_argument("--bidir", action="store_true")
+    ap.add_argument("-u", "--udp", action="store_true")
+    ap.add_argument("-b", "--bitrate")
+    ap.add_argument("-J", "--json", action="store_true")
+    ap.add_argument("--connect-timeout", type=int)
+    args = ap.parse_args()
+
+    rnd = random.Random(f"{os.environ.get('STUB_SEED', '1')}:{args.client}:{args.port}:{time.time_ns()}")
+    time.sleep(float(os.environ.get("STUB_IPERF_SLEEP", "0.2")))
+    start = {"connecting_to": {"host": args.client, "port": args.port}, "version": "iperf 3.9 (stub)",
+             "timestamp": {"time": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime()),
+                           "timesecs": int(time.time())},
+             "test_start": {"protocol": "UDP" if args.udp else "TCP", "num_streams": args.parallel,
+                            "duration": args.time, "reverse": int(args.reverse), "bidir": int(args.bidir)}}
+    if args.client in os.environ.get("STUB_IPERF_FAIL", "").split(","):
+        print(json.dumps({"start": start, "intervals": [], "end": {},
+                          "error": "unable to connect to server: Connection refused"}, indent="\t"))
+        sys.exit(1)
+
+    mbps = float(os.environ.get("STUB_IPERF_MBPS", "940"))
+    if args.udp:
+        # как iperf3: по умолчанию UDP 1 Мбит/с, суффиксы K/M/G
+        rate = (args.bitrate or "1M").upper()
+        scale = {"K": 1e-3, "M": 1.0, "G": 1e3}
+        mbps = min(mbps, float(rate[:-1]) * scale[rate[-1]] if rate[-1] in scale else float(rate) / 1e6)
+    directions = [False, True] if args.bidir else [args.reverse]
+    intervals = []
+    totals = {d: [] for d in directions}
+    for sec in range(args.time):
+        entry = {}
+        for reverse in directions:
+            per_stream = [mbps * 1e6 / args.parallel * rnd.uniform(0.9, 1.05) for _ in range(args.parallel)]
+            streams = [dict(interval_sum(sec, bps, args.udp, not reverse, rnd), socket=5 + i)
+                       for i, bps in enumerate(per_stream)]
+            s = interval_sum(sec, sum(per_stream), args.udp, not reverse, rnd)
+            if not args.udp:
+                s["retransmits"] = sum(st["retransmits"] for st in streams)
+            entry.setdefault("streams", []).extend(streams)
+            entry["sum_bidir_reverse" if reverse and args.bidir else "sum"] = s
+            totals[reverse].append(s)
+        intervals.append(entry)
+
+    def total(items, sender):
+        bits = sum(i["bits_per_second"] for i in items)
+        d = {"start": 0, "end": args.time, "seconds": float(args.time), "bytes": int(bits / 8),
+             "bits_per_second": bits / max(1, len(items)), "sender": sender}
+        if not args.udp:
+            d["retransmits"] = sum(i["retransmits"] for i in items)
+        return d
+
+    end = {"streams": []}
+    for reverse in directions:
+        # "sender" в итогах — роль этой стороны: с -R и в обратном потоке --bidir клиент принимает
+        sent, received = total(totals[reverse], not reverse), total(totals[reverse], not reverse)
+        suffix = "_bidir_reverse" if reverse and args.bidir else ""
+        if args.udp:
+            lost = rnd.randint(0, 20)
+            packets = int(received["bytes"] / 1448)
+            end["sum" + suffix] = dict(received, jitter_ms=round(rnd.uniform(0.005, 0.05), 3), lost_packets=lost,
+                                       packets=packets, lost_percent=100 * lost / max(1, packets))
+        end["sum_sent" + suffix] = sent
+        received["bits_per_second"] *= rnd.uniform(0.97, 1.0)
+        received.pop("retransmits", None)
+        end["sum_received" + suffix] = received
+        for i in range(args.parallel):
+            share = 1 / args.parallel
+            stream = {"sender": dict(sent, socket=5 + i, bits_per_second=sent["bits_per_second"] * share),
+                      "receiver": dict(received, socket=5 + i, bits_per_second=received["bits_per_second"] * share)}
+            if not args.udp:
+                stream["sender"].update(retransmits=sent["retransmits"] // args.parallel, mean_rtt=rnd.randint(150, 400))
+            end["streams"].append(stream)
+    end["cpu_utilization_percent"] = {"host_total": round(rnd.uniform(5, 30), 2),
+                                      "remote_total": round(rnd.uniform(5, 30), 2)}
+    print(json.dumps({"start": start, "intervals": intervals, "end": end}, indent="\t"))
+
+if __name__ == "__main__":
+    main()
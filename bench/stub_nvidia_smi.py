@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# Заглушка nvidia-smi для машин без GPU: проверка сборщика
+# (gpuburn/nvidia-smi_collector.py) и табличного цикла gpuburn.
+#   AUTOTEST_NVIDIA_SMI=bench/stub_nvidia_smi.py python3 gpuburn/nvidia-smi_collector.py --duration 5
+# Поддерживает вывод таблицы (без аргументов), --query-gpu=... --format=csv[,noheader][,nounits]
+# и повтор -l SEC / -lms MS. Значения — модель нагрузки из gen_logs.py.
+# Переменные окружения:
+#   STUB_GPUS        — число GPU (8)
+#   STUB_VARIANT     — формат таблицы: 550, 470, geforce (550)
+#   STUB_UNSUPPORTED — поля через запятую, на которые заглушка отвечает ошибкой,
+#                      как драйвер, который их не знает
+#   STUB_SEED        — seed генератора (1)
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from gen_logs import GPU_MODELS, GpuState, nvidia_smi_snapshot  # noqa: E402
+
+KNOWN_FIELDS = {
+    "timestamp", "index", "name", "temperature.gpu", "power.draw", "power.limit", "memory.used",
+    "memory.total", "utilization.gpu", "clocks.sm", "clocks.mem", "pstate",
+    "clocks_event_reasons.active", "clocks_throttle_reasons.active",
+    "ecc.errors.corrected.volatile.total", "ecc.errors.uncorrected.volatile.total",
+}
+# Единицы для вывода без nounits
+UNITS = {"temperature.gpu": "", "power.draw": " [W]", "power.limit": " [W]", "memory.used": " [MiB]",
+         "memory.total": " [MiB]", "utilization.gpu": " [%]", "clocks.sm": " [MHz]", "clocks.mem": " [MHz]"}
+
+def field_values(now: datetime.datetime, index: int, st: GpuState, elapsed: float,
+                 variant: str) -> dict:
+    temp, power, mem_used, util = st.sample(elapsed)
+    throttled = util < 100
+    return {
+        "timestamp": now.strftime("%Y/%m/%d %H:%M:%S.") + f"{now.microsecond // 1000:03d}",
+        "index": str(index),
+        "name": GPU_MODELS[variant][0],
+        "temperature.gpu": str(temp),
+        "power.draw": f"{power + st.rnd.random():.2f}",
+        "power.limit": f"{st.cap:.2f}",
+        "memory.used": str(mem_used),
+        "memory.total": str(st.mem_total),
+        "utilization.gpu": str(util),
+        "clocks.sm": str(1410 if not throttled else st.rnd.choice([1275, 1305, 1350])),
+        "clocks.mem": "1593",
+        "pstate": "P0",
+        "clocks_event_reasons.active": "0x0000000000000004" if throttled else "0x0000000000000000",
+        "clocks_throttle_reasons.active": "0x0000000000000004" if throttled else "0x0000000000000000",
+        # GeForce не поддерживает ECC
+        "ecc.errors.corrected.volatile.total": "[N/A]" if variant == "geforce" else "0",
+        "ecc.errors.uncorrected.volatile.total": "[N/A]" if variant == "geforce" else "0",
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="nvidia-smi stub for tests without a GPU.")
+    ap.add_argument("--query-gpu", dest="query")
+    ap.add_argument("--format", default="csv")
+    ap.add_argument("-l", "--loop", type=float)
+    ap.add_argument("-lms", "--loop-ms", dest="loop_ms", type=int)
+    args = ap.parse_args()
+
+    gpus = int(os.environ.get("STUB_GPUS", "8"))
+    variant = os.environ.get("STUB_VARIANT", "550")
+    unsupported = set(filter(None, os.environ.get("STUB_UNSUPPORTED", "").split(",")))
+    rnd = random.Random(int(os.environ.get("STUB_SEED", "1")))
+    _, cap, mem_total = GPU_MODELS[variant]
+    states = [GpuState(rnd, cap, mem_total) for _ in range(gpus)]
+
+    fields = args.query.split(",") if args.query else []
+    for field in fields:
+        if field not in KNOWN_FIELDS or field in unsupported:
+            print(f'Field "{field}" is not a valid field to query.', file=sys.stderr)
+            sys.exit(2)
+    fmt = set(args.format.split(","))
+    interval = args.loop_ms / 1000 if args.loop_ms else args.loop
+
+    started = time.monotonic()
+    try:
+        while True:
+            now = datetime.datetime.now()
+            elapsed = time.monotonic() - started
+            if fields:
+                out = []
+                if "noheader" not in fmt:
+                    out.append(", ".join(f + ("" if "nounits" in fmt else UNITS.get(f, "")) for f in fields))
+                for i, st in enumerate(states):
+                    values = field_values(now, i, st, elapsed, variant)
+                    out.append(", ".join(values[f] for f in fields))
+                sys.stdout.write("\n".join(out) + "\n")
+            else:
+                # табличный вывод без строки с меткой времени (её пишет цикл gpuburn)
+                sys.stdout.write(nvidia_smi_snapshot(now, states, elapsed, variant).split("\n", 1)[1])
+            sys.stdout.flush()
+            if not interval:
+                return
+            time.sleep(max(0.0, interval - (time.monotonic() - started - elapsed)))
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,589 @@
+#!/usr/bin/env python3
+# campaign.py — движок кампаний (autotest.sh task run <пресет>).
+# Кампания описывается декларативно в campaigns/<имя>.json: этапы с задачей
+# autotest.sh и её аргументами, длительностью, метками ресурсов (cpu, gpu,
+# ram, disk, net) и зависимостями (after). Этапы без общих ресурсов и с
+# выполненными зависимостями идут одновременно: 4h-прогон не ждёт конца
+# gpu_burn, чтобы начать fio. Ход кампании пишется в
+# <log-dir>/campaigns/<имя>.state.json после каждого перехода этапа, поэтому
+# после перезагрузки или остановки кампания продолжается с незавершённых
+# этапов (прерванный этап запускается заново целиком).
+# В аргументах и длительностях подставляются {hours}, {half_hours},
+# {iperf_host}, {fio_dir}, {gpu_log_dir} (--set имя=значение) и {duration_s}
+# самого этапа. wait_pidfile — этап не завершён, пока жив процесс из файла
+# (gpuburn запускает gpu_burn в фоне и сразу возвращается).
+#   campaign.py plan 48h
+#   campaign.py --set fio_dir=/mnt/nvme run 4h
+#   campaign.py resume
+#   campaign.py status 4h
+
+import argparse
+import hashlib
+import json
+import os
+import queue
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CAMPAIGN_DIR = os.path.join(HERE, "campaigns")
+STATE_VERSION = 1
+RESOURCES = ("cpu", "gpu", "ram", "disk", "net")
+DEFAULT_VARS = {
+    "hours": "4",
+    "iperf_host": "192.168.10.18",
+    "fio_dir": os.path.expanduser("~"),
+    "gpu_log_dir": os.path.expanduser("~/gpu_burn_logs"),
+}
+# Опрос процесса из wait_pidfile и пауза между SIGTERM и SIGKILL при остановке
+PID_POLL_S = 2.0
+STOP_GRACE_S = 5.0
+DURATION_RE = re.compile(r"^\s*([0-9]+(?:\.[0-9]+)?)\s*([smhd]?)\s*$")
+UNIT_S = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+class CampaignError(Exception):
+    pass
+
+def parse_duration(text: str) -> int:
+    m = DURATION_RE.match(str(text))
+    if not m:
+        raise CampaignError(f"bad duration: {text!r} (expected e.g. 90, 30m, 1.5h)")
+    return int(float(m.group(1)) * UNIT_S[m.group(2)])
+
+def fmt_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def now_text() -> str:
+    return datetime.now().isoformat(sep=" ", timespec="seconds")
+
+# --- определения ---
+
+def definition_path(name: str, campaign_dir: str = CAMPAIGN_DIR) -> str:
+    if name.endswith(".json") or os.sep in name:
+        return name
+    return os.path.join(campaign_dir, name + ".json")
+
+def campaign_name(name: str) -> str:
+    return os.path.splitext(os.path.basename(name))[0]
+
+def list_definitions(campaign_dir: str = CAMPAIGN_DIR) -> List[str]:
+    try:
+        return sorted(f[:-5] for f in os.listdir(campaign_dir) if f.endswith(".json"))
+    except OSError:
+        return []
+
+def template_vars(overrides: Dict[str, str]) -> Dict[str, str]:
+    values = dict(DEFAULT_VARS, **overrides)
+    try:
+        values.setdefault("half_hours", str(max(1, int(float(values["hours"])) // 2)))
+    except ValueError:
+        raise CampaignError(f"hours must be a number: {values['hours']!r}")
+    return values
+
+def substitute(text: str, values: Dict[str, str]) -> str:
+    try:
+        return str(text).format(**values)
+    except (KeyError, IndexError, ValueError) as e:
+        raise CampaignError(f"cannot substitute {text!r}: unknown or bad placeholder {e}")
+
+def load_definition(path: str, overrides: Dict[str, str]) -> Dict[str, Any]:
+    # Определение с подставленными значениями: аргументы и длительности
+    # фиксируются в state-файле, продолжение идёт с теми же значениями
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except OSError as e:
+        raise CampaignError(f"cannot read campaign {path}: {e.strerror}")
+    except ValueError as e:
+        raise CampaignError(f"{path}: {e}")
+    values = template_vars(overrides)
+    stages = []
+    ids: Set[str] = set()
+    for i, st in enumerate(raw.get("stages") or []):
+        sid = st.get("id") or f"stage{i + 1}"
+        if sid in ids:
+            raise CampaignError(f"{path}: duplicate stage id {sid!r}")
+        if not st.get("task"):
+            raise CampaignError(f"{path}: stage {sid!r} has no task")
+        resources = list(st.get("resources") or [])
+        unknown = [r for r in resources if r not in RESOURCES]
+        if unknown:
+            raise CampaignError(f"{path}: stage {sid!r}: unknown resources {unknown} (known: {', '.join(RESOURCES)})")
+        duration_s = parse_duration(substitute(st.get("duration", "0"), values))
+        stage_values = dict(values, duration_s=str(duration_s))
+        stages.append({
+            "id": sid,
+            "task": st["task"],
+            "args": [substitute(a, stage_values) for a in st.get("args") or []],
+            "duration_s": duration_s,
+            "resources": resources,
+            "after": list(st.get("after") or []),
+            "wait_pidfile": substitute(st["wait_pidfile"], stage_values) if st.get("wait_pidfile") else None,
+        })
+        ids.add(sid)
+    if not stages:
+        raise CampaignError(f"{path}: no stages")
+    for st in stages:
+        missing = [d for d in st["after"] if d not in ids]
+        if missing:
+            raise CampaignError(f"{path}: stage {st['id']!r} depends on unknown stages {missing}")
+    check_cycles(stages)
+    return {"name": campaign_name(path), "description": substitute(raw.get("description", ""), values),
+            "stages": stages}
+
+def check_cycles(stages: List[Dict[str, Any]]) -> None:
+    deps = {st["id"]: st["after"] for st in stages}
+    state: Dict[str, int] = {}
+
+    def visit(sid: str, chain: List[str]) -> None:
+        if state.get(sid) == 2:
+            return
+        if state.get(sid) == 1:
+            raise CampaignError(f"dependency cycle: {' -> '.join(chain + [sid])}")
+        state[sid] = 1
+        for d in deps[sid]:
+            visit(d, chain + [sid])
+        state[sid] = 2
+
+    for sid in deps:
+        visit(sid, [])
+
+def definition_hash(defn: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(defn["stages"], sort_keys=True).encode()).hexdigest()[:12]
+
+# --- планирование ---
+
+def ready_stages(stages: List[Dict[str, Any]], status: Dict[str, str], busy: Set[str],
+                 slots: int) -> List[Dict[str, Any]]:
+    # Этапы, которые можно запустить сейчас, в порядке определения: все
+    # зависимости выполнены, ресурсы не заняты другими этапами, есть слот
+    out = []
+    busy = set(busy)
+    for st in stages:
+        if len(out) >= slots:
+            break
+        if status[st["id"]] != "pending":
+            continue
+        if any(status[d] != "done" for d in st["after"]):
+            continue
+        if busy.intersection(st["resources"]):
+            continue
+        busy.update(st["resources"])
+        out.append(st)
+    return out
+
+def blocked_stages(stages: List[Dict[str, Any]], status: Dict[str, str]) -> List[str]:
+    # Ожидающие этапы, зависимость которых провалена (или пропущена)
+    out = []
+    changed = True
+    while changed:
+        changed = False
+        for st in stages:
+            if status[st["id"]] == "pending" and any(status[d] in ("failed", "skipped") for d in st["after"]):
+                status[st["id"]] = "skipped"
+                out.append(st["id"])
+                changed = True
+    return out
+
+def simulate(stages: List[Dict[str, Any]], max_parallel: int = 0,
+             status: Optional[Dict[str, str]] = None) -> Dict[str, Tuple[int, int]]:
+    # Расчётное расписание (начало, конец в секундах от старта) по
+    # длительностям этапов, по тем же правилам, что и запуск
+    # выполненные и проваленные этапы уже не планируются
+    status = dict(status or {st["id"]: "pending" for st in stages})
+    for sid, s in status.items():
+        if s not in ("done", "failed"):
+            status[sid] = "pending"
+    by_id = {st["id"]: st for st in stages}
+    running: Dict[str, int] = {}
+    plan: Dict[str, Tuple[int, int]] = {}
+    t = 0
+    while True:
+        busy = {r for sid in running for r in by_id[sid]["resources"]}
+        slots = (max_parallel or len(stages)) - len(running)
+        for st in ready_stages(stages, status, busy, slots):
+            status[st["id"]] = "running"
+            running[st["id"]] = t + st["duration_s"]
+            plan[st["id"]] = (t, t + st["duration_s"])
+        if not running:
+            return plan
+        sid = min(running, key=lambda k: (running[k], k))
+        t = running.pop(sid)
+        status[sid] = "done"
+
+# --- состояние ---
+
+def state_path(log_dir: str, name: str) -> str:
+    return os.path.join(log_dir, "campaigns", f"{name}.state.json")
+
+def load_state(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get("version") == STATE_VERSION else None
+
+def save_state(path: str, state: Dict[str, Any]) -> None:
+    # Через временный файл: при сбое питания остаётся прежняя версия целиком
+    state["updated"] = now_text()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(path + ".tmp", path)
+
+def pid_alive(pid: Optional[int], marker: Optional[str] = None) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+        if stat[stat.rfind(b")") + 2:][:1] == b"Z":
+            return False  # зомби: процесс завершён, родитель его ещё не забрал
+        if marker is not None:
+            # после перезагрузки pid мог достаться другому процессу
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                return marker.encode() in f.read()
+    except OSError:
+        pass
+    return True
+
+def read_pidfile(path: Optional[str]) -> Optional[int]:
+    if not path:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0) or None
+    except (OSError, ValueError):
+        return None
+
+def new_state(defn: Dict[str, Any], values: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "version": STATE_VERSION,
+        "campaign": defn["name"],
+        "description": defn["description"],
+        "hash": definition_hash(defn),
+        "vars": values,
+        "created": now_text(),
+        "finished": None,
+        "pid": None,
+        "stages": defn["stages"],
+        "status": {st["id"]: {"status": "pending", "attempts": 0} for st in defn["stages"]},
+    }
+
+# --- запуск ---
+
+class Runner:
+    def __init__(self, state: Dict[str, Any], path: str, autotest: str, config: Optional[str],
+                 log_dir: str, max_parallel: int = 0):
+        self.state = state
+        self.path = path
+        self.autotest = autotest
+        self.config = config
+        self.max_parallel = max_parallel
+        self.stage_log_dir = os.path.join(log_dir, "campaigns", state["campaign"])
+        self.stages: List[Dict[str, Any]] = state["stages"]
+        self.events: "queue.Queue[Tuple[str, int]]" = queue.Queue()
+        self.procs: Dict[str, subprocess.Popen] = {}
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+
+    def status(self) -> Dict[str, str]:
+        return {sid: s["status"] for sid, s in self.state["status"].items()}
+
+    def command(self, st: Dict[str, Any]) -> List[str]:
+        cmd = ["bash", self.autotest]
+        if self.config:
+            cmd += ["--config", self.config]
+        return cmd + [st["task"]] + st["args"]
+
+    def run_stage(self, st: Dict[str, Any]) -> None:
+        # Поток этапа: вывод задачи — в лог этапа и на экран с префиксом [id]
+        rc = 1
+        log_path = os.path.join(self.stage_log_dir, f"{st['id']}.log")
+        try:
+            with open(log_path, "a", encoding="utf-8", errors="replace") as log:
+                log.write(f"--- {now_text()} $ {' '.join(self.command(st))}\n")
+                log.flush()
+                # своя группа процессов: остановка снимает и дочерние stress-ng/fio
+                proc = subprocess.Popen(self.command(st), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                        start_new_session=True, text=True, errors="replace")
+                with self.lock:
+                    self.procs[st["id"]] = proc
+                for line in proc.stdout:
+                    log.write(line)
+                    log.flush()
+                    print(f"[{st['id']}] {line.rstrip()}", flush=True)
+                rc = proc.wait()
+                pid = read_pidfile(st["wait_pidfile"])
+                if rc == 0 and pid:
+                    print(f"[{st['id']}] waiting for pid {pid} ({st['wait_pidfile']})", flush=True)
+                    while pid_alive(pid) and not self.stopping.wait(PID_POLL_S):
+                        pass
+                log.write(f"--- {now_text()} exit {rc}\n")
+        except OSError as e:
+            print(f"[{st['id']}] {e}", file=sys.stderr, flush=True)
+        finally:
+            self.events.put((st["id"], rc))
+
+    def start(self, st: Dict[str, Any]) -> None:
+        s = self.state["status"][st["id"]]
+        s.update(status="running", started=now_text(), finished=None, rc=None, attempts=s.get("attempts", 0) + 1)
+        save_state(self.path, self.state)
+        print(f"[Campaign] start {st['id']}: {st['task']} {' '.join(st['args'])} "
+              f"(~{fmt_duration(st['duration_s'])}, {','.join(st['resources']) or '-'})", flush=True)
+        threading.Thread(target=self.run_stage, args=(st,), daemon=True).start()
+
+    def stop(self) -> None:
+        # SIGTERM группам процессов этапов и процессам из wait_pidfile,
+        # через STOP_GRACE_S — SIGKILL
+        self.stopping.set()
+        with self.lock:
+            procs = list(self.procs.items())
+        pids = [read_pidfile(st["wait_pidfile"]) for st in self.stages
+                if self.state["status"][st["id"]]["status"] == "running"]
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            for _, proc in procs:
+                try:
+                    os.killpg(proc.pid, sig)
+                except (ProcessLookupError, PermissionError):
+                    pass
+            for pid in pids:
+                if pid_alive(pid):
+                    try:
+                        os.kill(pid, sig)
+                    except (ProcessLookupError, PermissionError):
+                        pass
+            if sig == signal.SIGTERM:
+                deadline = time.monotonic() + STOP_GRACE_S
+                while time.monotonic() < deadline and (any(p.poll() is None for _, p in procs)
+                                                       or any(pid_alive(p) for p in pids)):
+                    time.sleep(0.2)
+
+    def run(self) -> int:
+        self.state["pid"] = os.getpid()
+        self.state["finished"] = None
+        os.makedirs(self.stage_log_dir, exist_ok=True)
+        save_state(self.path, self.state)
+        running: Set[str] = set()
+        by_id = {st["id"]: st for st in self.stages}
+        try:
+            while True:
+                status = self.status()
+                for sid in blocked_stages(self.stages, status):
+                    self.state["status"][sid]["status"] = "skipped"
+                    print(f"[Campaign] skip {sid}: a dependency failed", flush=True)
+                busy = {r for sid in running for r in by_id[sid]["resources"]}
+                slots = (self.max_parallel or len(self.stages)) - len(running)
+                for st in ready_stages(self.stages, status, busy, slots):
+                    running.add(st["id"])
+                    self.start(st)
+                if not running:
+                    break
+                sid, rc = self.events.get()
+                running.discard(sid)
+                with self.lock:
+                    self.procs.pop(sid, None)
+                s = self.state["status"][sid]
+                s.update(status="done" if rc == 0 else "failed", finished=now_text(), rc=rc)
+                save_state(self.path, self.state)
+                print(f"[Campaign] {sid}: {s['status']} (exit {rc})", flush=True)
+        except KeyboardInterrupt:
+            # повторный сигнал (двойной Ctrl+C, timeout шлёт его всей группе)
+            # не должен оборвать остановку этапов до сохранения состояния
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            print("[Campaign] stopping: running stages will be restarted on resume", flush=True)
+            try:
+                self.stop()
+            finally:
+                for sid in running:
+                    self.state["status"][sid].update(status="pending", finished=now_text(), rc=None)
+                self.state["pid"] = None
+                save_state(self.path, self.state)
+            return 130
+        self.state["pid"] = None
+        self.state["finished"] = now_text()
+        save_state(self.path, self.state)
+        counts: Dict[str, int] = {}
+        for s in self.status().values():
+            counts[s] = counts.get(s, 0) + 1
+        print(f"[Campaign] {self.state['campaign']} finished: "
+              + ", ".join(f"{n} {s}" for s, n in sorted(counts.items())), flush=True)
+        return 0 if set(counts) == {"done"} else 1
+
+# --- вывод ---
+
+def print_plan(stages: List[Dict[str, Any]], max_parallel: int, status: Optional[Dict[str, str]] = None) -> None:
+    plan = simulate(stages, max_parallel, status)
+    seq = sum(st["duration_s"] for st in stages if st["id"] in plan)
+    total = max((end for _, end in plan.values()), default=0)
+    print(f"{'Stage':<12} {'Task':<18} {'Resources':<12} {'Start':>9} {'End':>9}  Args")
+    for st in sorted(stages, key=lambda s: plan.get(s["id"], (-1, -1))):
+        start, end = plan.get(st["id"], (None, None))
+        # не в плане: уже выполнен, провален или не дождётся проваленной зависимости
+        label = (status or {}).get(st["id"], "-")
+        when = (f"{fmt_duration(start):>9} {fmt_duration(end):>9}" if start is not None
+                else f"{'skipped' if label == 'pending' else label:>9} {'':>9}")
+        print(f"{st['id']:<12} {st['task']:<18} {','.join(st['resources']) or '-':<12} {when}  {' '.join(st['args'])}")
+    print(f"Estimated: {fmt_duration(total)} (sequential: {fmt_duration(seq)})")
+
+def print_status(state: Dict[str, Any]) -> None:
+    running = state.get("pid") and pid_alive(state["pid"], "campaign.py")
+    print(f"Campaign {state['campaign']}: "
+          + ("running (pid %d)" % state["pid"] if running
+             else "finished " + state["finished"] if state.get("finished") else "interrupted, resumable"))
+    print(f"{'Stage':<12} {'Task':<18} {'Status':<9} {'Started':<20} {'Finished':<20} {'Planned':>9}  Exit")
+    for st in state["stages"]:
+        s = state["status"][st["id"]]
+        print(f"{st['id']:<12} {st['task']:<18} {s['status']:<9} {s.get('started') or '-':<20} "
+              f"{s.get('finished') or '-':<20} {fmt_duration(st['duration_s']):>9}  "
+              f"{'-' if s.get('rc') is None else s['rc']}")
+
+def latest_state(log_dir: str, unfinished: bool = True) -> Optional[str]:
+    # Имя кампании с самым свежим state-файлом (для resume — незавершённой)
+    d = os.path.join(log_dir, "campaigns")
+    best = None
+    try:
+        names = os.listdir(d)
+    except OSError:
+        return None
+    for f in names:
+        if not f.endswith(".state.json"):
+            continue
+        st = load_state(os.path.join(d, f))
+        if st and not (unfinished and st.get("finished")):
+            mtime = os.path.getmtime(os.path.join(d, f))
+            if best is None or mtime > best[0]:
+                best = (mtime, st["campaign"])
+    return best[1] if best else None
+
+def prepare_resume(state: Dict[str, Any], retry_failed: bool) -> None:
+    # Этапы, прерванные на ходу (running в файле), и пропущенные из-за
+    # проваленной зависимости запускаются заново; проваленные — с --retry-failed
+    for s in state["status"].values():
+        if s["status"] in ("running", "skipped") or (retry_failed and s["status"] == "failed"):
+            s["status"] = "pending"
+
+def main():
+    ap = argparse.ArgumentParser(description="Run declarative test campaigns: concurrent stages on "
+                                             "independent resources, checkpointed and resumable.")
+    ap.add_argument("--log-dir", default=os.environ.get("AUTOTEST_LOG_DIR", os.path.expanduser("~/AutoTest_Logs")))
+    ap.add_argument("--campaign-dir", default=CAMPAIGN_DIR, help="Directory with <name>.json definitions")
+    ap.add_argument("--autotest", default=os.path.join(HERE, "autotest.sh"), help="autotest.sh that runs the stages")
+    ap.add_argument("--config", help="Passed to autotest.sh --config")
+    ap.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                    help="Template value: hours, iperf_host, fio_dir, gpu_log_dir")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="Run a campaign; an interrupted run of the same definition is resumed")
+    r.add_argument("name", help="Campaign name (campaigns/<name>.json) or path to a .json")
+    r.add_argument("--fresh", action="store_true", help="Discard saved progress and start over")
+    r.add_argument("--max-parallel", type=int, default=0, help="Stages running at once (default: as resources allow)")
+    r.add_argument("--sequential", action="store_true", help="One stage at a time (same as --max-parallel 1)")
+    r.add_argument("--retry-failed", action="store_true", help="On resume, also rerun failed stages")
+    rs = sub.add_parser("resume", help="Resume a campaign from its saved state (default: the latest unfinished)")
+    rs.add_argument("name", nargs="?")
+    rs.add_argument("--max-parallel", type=int, default=0)
+    rs.add_argument("--sequential", action="store_true")
+    rs.add_argument("--retry-failed", action="store_true")
+    p = sub.add_parser("plan", help="Show the estimated schedule")
+    p.add_argument("name")
+    p.add_argument("--max-parallel", type=int, default=0)
+    p.add_argument("--sequential", action="store_true")
+    s = sub.add_parser("status", help="Show progress of a campaign (default: the latest)")
+    s.add_argument("name", nargs="?")
+    sub.add_parser("list", help="List campaign definitions and saved progress")
+    args = ap.parse_args()
+
+    overrides = {}
+    for item in args.set:
+        key, sep, value = item.partition("=")
+        if not sep:
+            ap.error(f"--set expects NAME=VALUE: {item}")
+        overrides[key] = value
+    max_parallel = 1 if getattr(args, "sequential", False) else max(0, getattr(args, "max_parallel", 0))
+
+    try:
+        if args.cmd == "list":
+            for name in list_definitions(args.campaign_dir):
+                defn = load_definition(definition_path(name, args.campaign_dir), overrides)
+                total = max((e for _, e in simulate(defn["stages"]).values()), default=0)
+                st = load_state(state_path(args.log_dir, name))
+                progress = ""
+                if st:
+                    done = sum(1 for s in st["status"].values() if s["status"] == "done")
+                    progress = f"  [{done}/{len(st['stages'])} done{'' if st.get('finished') else ', resumable'}]"
+                print(f"{name:<10} ~{fmt_duration(total):>9}  {defn['description']}{progress}")
+            return
+        if args.cmd == "plan":
+            defn = load_definition(definition_path(args.name, args.campaign_dir), overrides)
+            print(f"{defn['name']}: {defn['description']}")
+            print_plan(defn["stages"], max_parallel)
+            return
+        if args.cmd == "status":
+            name = campaign_name(args.name) if args.name else latest_state(args.log_dir, unfinished=False)
+            state = load_state(state_path(args.log_dir, name)) if name else None
+            if state is None:
+                print("No saved campaign progress" + (f" for {name}" if name else ""))
+                return
+            print_status(state)
+            return
+
+        if args.cmd == "resume":
+            name = campaign_name(args.name) if args.name else latest_state(args.log_dir)
+            if not name:
+                raise CampaignError("no unfinished campaign to resume")
+            path = state_path(args.log_dir, name)
+            state = load_state(path)
+            if state is None:
+                raise CampaignError(f"no saved progress for {name}")
+        else:
+            defn = load_definition(definition_path(args.name, args.campaign_dir), overrides)
+            path = state_path(args.log_dir, defn["name"])
+            state = None if args.fresh else load_state(path)
+            if state is not None and state.get("finished"):
+                state = None
+            if state is not None and state.get("hash") != definition_hash(defn):
+                raise CampaignError(f"{defn['name']} has unfinished progress from a different definition or "
+                                    f"values ({path}); use 'resume' to continue it or --fresh to start over")
+            if state is None:
+                state = new_state(defn, template_vars(overrides))
+        if state.get("pid") and pid_alive(state["pid"], "campaign.py") and state["pid"] != os.getpid():
+            raise CampaignError(f"campaign {state['campaign']} is already running (pid {state['pid']})")
+        prepare_resume(state, args.retry_failed)
+        done = [sid for sid, s in state["status"].items() if s["status"] in ("done", "failed")]
+        if done:
+            print(f"[Campaign] resuming {state['campaign']}: {len(done)}/{len(state['stages'])} stages already "
+                  f"completed ({', '.join(done)})", flush=True)
+        print_plan(state["stages"], max_parallel, {sid: s["status"] for sid, s in state["status"].items()})
+    except CampaignError as e:
+        print(f"campaign: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    # autotest.sh stop / Stop в GUI шлют SIGTERM: этапы останавливаются, как по Ctrl+C
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    runner = Runner(state, path, args.autotest, args.config, args.log_dir, max_parallel)
+    sys.exit(runner.run())
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        sys.exit(0)
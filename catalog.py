@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# catalog.py — SQLite-каталог логов и прогонов AutoTest.
+# Индексирует каталоги логов (AUTOTEST_LOG_DIR, AUTOTEST_GPU_LOG_DIR,
+# ~/htop-res, ~/ram_stress_logs, AUTOTEST_ARCHIVE_DIR) и содержимое архивов
+# collect: вид лога, хост, время начала/конца, размер, сжат ли файл, путь
+# внутри архива. Время берётся из метки в имени файла (AUTOTEST_FORMAT_DATE —
+# в локальном формате, который не сортируется), первой строки лога и mtime.
+# Обновление инкрементальное: перечитываются только файлы с изменившимися
+# (inode, size, mtime). Файлы, перекрывающиеся по времени, объединяются в
+# прогоны (runs). Запросы по виду/времени/прогону — из report, clean и GUI
+# вместо повторного обхода каталогов.
+#   catalog.py update
+#   catalog.py query --kind cpu_stress --since "2025-10-14" --until "2025-10-15"
+#   catalog.py query --kind report --latest --format paths
+#   catalog.py runs
+#   catalog.py clean --only gpu --older-days 14
+
+import argparse
+import json
+import os
+import re
+import socket
+import sqlite3
+import sys
+import tarfile
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import gzlog
+
+CATALOG_NAME = "catalog.sqlite"
+# Файлы ближе друг к другу по времени, чем RUN_GAP_S, считаются одним прогоном
+RUN_GAP_S = 3600
+# Логи, которые дописываются всё время работы мониторинга: их конец — всегда
+# «сейчас», и в прогонах они склеили бы все тесты в один
+APPENDED_KINDS = ("sysmonitor", "iostat")
+HEAD_BYTES = 4096
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    member TEXT NOT NULL DEFAULT '',
+    root TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    host TEXT NOT NULL,
+    start REAL,
+    end REAL,
+    size INTEGER NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0,
+    inode INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    run_id INTEGER,
+    UNIQUE (path, member)
+);
+CREATE INDEX IF NOT EXISTS files_time ON files (start, end);
+CREATE INDEX IF NOT EXISTS files_kind ON files (kind, end);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    host TEXT NOT NULL,
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    files INTEGER NOT NULL,
+    kinds TEXT NOT NULL
+);
+"""
+
+# Вид лога по имени файла (без .gz); первое совпадение
+KINDS: List[Tuple[str, re.Pattern]] = [(k, re.compile(p)) for k, p in [
+    ("sysmonitor", r"^sysmonitor\.(log|csv|ring)$"),
+    ("iostat", r"_iostat\.csv$"),
+    ("diskstats", r"^diskstats_.*\.(csv|ring)$"),
+    ("nvidia-smi", r"^nvidia-smi_.*\.(log|csv|ring)$"),
+    ("gpu_burn", r"^gpu_burn_.*\.log$"),
+    ("cpu_stress", r"^cpu_stress_.*\.log$"),
+    ("ram_stress", r"^ram_stress_.*\.log$"),
+    ("memtest", r"^memtest_.*\.log$"),
+    ("fio", r"^fio_.*\.log$"),
+    ("iperf3", r"^iperf3_.*\.(log|json)$"),
+    ("htop", r"^htop-.*\.html$"),
+    ("report", r"^report_.*\.html$"),
+    ("archive", r"^autotest_logs_.*\.tar(\.gz)?$"),
+    ("gui", r"^\d{8}-\d{6}_\d+_.*\.log$"),
+]]
+# Префиксы перед меткой времени в имени файла
+STAMP_PREFIX = re.compile(r"^(nvidia-smi|diskstats|gpu_burn|cpu_stress|ram_stress|memtest|fio|iperf3|htop|report|autotest_logs)[_-]")
+EXTENSIONS = (".gz", ".tar", ".log", ".csv", ".html", ".ring")
+
+# Группы clean --only: (корни, допустимые окончания имени) — как в cmd_clean
+CLEAN_GROUPS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "sys": (("log", "sysmon"), (".log", ".csv", ".html", ".ring", ".log.gz", ".csv.gz", ".html.gz")),
+    "gpu": (("gpu",), (".log", ".csv", ".ring", ".gz", ".pid")),
+    "htop": (("htop",), (".html", ".html.gz")),
+    "ram": (("ram",), (".log", ".log.gz")),
+    "iostat": (("log",), ("_iostat.csv", "_iostat.csv.gz")),
+}
+
+def default_roots() -> Dict[str, str]:
+    home = os.path.expanduser("~")
+    return {
+        "log": os.environ.get("AUTOTEST_LOG_DIR", os.path.join(home, "AutoTest_Logs")),
+        "sysmon": os.path.join(home, "AutoTest_Logs", "sysmonitor"),
+        "gpu": os.environ.get("AUTOTEST_GPU_LOG_DIR", os.path.join(home, "gpu_burn_logs")),
+        "htop": os.path.join(home, "htop-res"),
+        "ram": os.path.join(home, "ram_stress_logs"),
+        "archive": os.environ.get("AUTOTEST_ARCHIVE_DIR", os.path.join(home, "AutoTest_Archives")),
+    }
+
+def default_path(roots: Dict[str, str]) -> str:
+    return os.path.join(roots["archive"], CATALOG_NAME)
+
+def date_format() -> str:
+    return os.environ.get("AUTOTEST_FORMAT_DATE", "%d-%m-%Y %H:%M:%S")
+
+# --- разбор имени и содержимого ---
+
+def classify(name: str) -> str:
+    base = name[:-3] if name.endswith(".gz") and not name.endswith(".tar.gz") else name
+    for kind, pattern in KINDS:
+        if pattern.search(base):
+            return kind
+    return "other"
+
+def parse_time(text: str, fmt: str) -> Optional[float]:
+    # Метка в формате AUTOTEST_FORMAT_DATE, ISO или nvidia-smi (2025/10/14 ...)
+    text = text.strip()
+    for f in (fmt, "%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S", "%Y%m%d-%H%M%S"):
+        try:
+            return datetime.strptime(text, f).timestamp()
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        return None
+
+def stamp_from_name(name: str, fmt: str) -> Optional[float]:
+    stem = os.path.basename(name)
+    changed = True
+    while changed:
+        changed = False
+        for ext in EXTENSIONS:
+            if stem.endswith(ext):
+                stem, changed = stem[:-len(ext)], True
+    m = STAMP_PREFIX.match(stem)
+    if m:
+        return parse_time(stem[m.end():], fmt)
+    m = re.match(r"^(\d{8}-\d{6})_", stem)  # журналы GUI
+    if m:
+        return parse_time(m.group(1), fmt)
+    return None
+
+def first_line_time(path: str, kind: str, fmt: str) -> Optional[float]:
+    # Начало для логов без метки в имени: первая строка с данными
+    if kind not in ("sysmonitor", "iostat"):
+        return None
+    try:
+        with gzlog.open_log(path, "r") as f:
+            head = f.read(HEAD_BYTES)
+    except (OSError, EOFError):
+        return None
+    for line in head.splitlines():
+        cell = re.split(r"[|,]", line, maxsplit=1)[0]
+        t = parse_time(cell, fmt) if cell and cell[0].isdigit() else None
+        if t is not None:
+            return t
+    return None
+
+def archive_members(path: str, fmt: str) -> Iterator[Dict[str, Any]]:
+    # Содержимое архива collect; mtime и размер — из заголовков tar, у
+    # архивов logarchive.py — из манифеста (все файлы снимка, в том числе
+    # лежащие в прежних архивах цепочки)
+    if path.endswith(".tar"):
+        import logarchive
+        try:
+            manifest = logarchive.read_manifest(path)
+        except logarchive.ArchiveError:
+            manifest = None
+        if manifest is not None:
+            for e in manifest["files"]:
+                mtime = e["mtime_ns"] / 1e9
+                yield {"member": e["path"], "kind": classify(os.path.basename(e["path"])),
+                       "start": stamp_from_name(e["path"], fmt) or mtime, "end": mtime,
+                       "size": e["size"], "compressed": 1}
+            return
+    with tarfile.open(path, "r:*") as tar:
+        for info in tar:
+            if not info.isfile():
+                continue
+            kind = classify(os.path.basename(info.name))
+            stamp = stamp_from_name(info.name, fmt)
+            yield {"member": info.name, "kind": kind, "start": stamp or info.mtime, "end": info.mtime,
+                   "size": info.size, "compressed": 1}
+
+# --- каталог ---
+
+def open_catalog(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def walk(roots: Dict[str, str]) -> Iterator[Tuple[str, str, os.stat_result]]:
+    # (корень, путь, stat) для каждого файла; вложенный корень (sysmonitor
+    # внутри AUTOTEST_LOG_DIR) получает свой ярлык, файлы не дублируются
+    real = {label: os.path.realpath(p) for label, p in roots.items() if p and os.path.isdir(p)}
+    seen = set()
+    for label, base in sorted(real.items(), key=lambda kv: -len(kv[1])):
+        stack = [base]
+        while stack:
+            d = stack.pop()
+            if d in seen:
+                continue
+            seen.add(d)
+            try:
+                it = os.scandir(d)
+            except OSError:
+                continue
+            with it:
+                for e in it:
+                    if (e.name.startswith(".") or e.name.startswith(CATALOG_NAME)
+                            or e.name.endswith(".gz" + gzlog.INDEX_SUFFIX)):
+                        continue
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            stack.append(e.path)
+                        elif e.is_file(follow_symlinks=False):
+                            yield label, e.path, e.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+
+def update(conn: sqlite3.Connection, roots: Dict[str, str], host: Optional[str] = None,
+           fmt: Optional[str] = None) -> Dict[str, int]:
+    # Возвращает счётчики added/changed/removed/unchanged. Пропавшими
+    # считаются только файлы обойдённых корней: update(conn, {"archive": d})
+    # не трогает записи о логах.
+    host = host or socket.gethostname()
+    fmt = fmt or date_format()
+    labels = list(roots)
+    known = {r["path"]: (r["inode"], r["size"], r["mtime_ns"])
+             for r in conn.execute("SELECT path, inode, size, mtime_ns FROM files WHERE member = '' AND root IN"
+                                   f" ({','.join('?' * len(labels))})", labels)}
+    counts = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+    present = set()
+    with conn:
+        for label, path, st in walk(roots):
+            present.add(path)
+            key = (st.st_ino, st.st_size, st.st_mtime_ns)
+            old = known.get(path)
+            if old == key:
+                counts["unchanged"] += 1
+                continue
+            counts["changed" if old else "added"] += 1
+            conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            name = os.path.basename(path)
+            kind = classify(name)
+            start = stamp_from_name(name, fmt) or first_line_time(path, kind, fmt) or st.st_mtime
+            conn.execute("INSERT INTO files (path, member, root, kind, host, start, end, size, compressed, inode, mtime_ns)"
+                         " VALUES (?, '', ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (path, label, kind, host, min(start, st.st_mtime), st.st_mtime, st.st_size,
+                          int(name.endswith(".gz")), st.st_ino, st.st_mtime_ns))
+            if kind == "archive":
+                try:
+                    rows = [(path, m["member"], label, m["kind"], host, m["start"], m["end"], m["size"],
+                             st.st_ino, st.st_mtime_ns) for m in archive_members(path, fmt)]
+                except (OSError, tarfile.TarError, EOFError):
+                    rows = []
+                conn.executemany("INSERT OR REPLACE INTO files (path, member, root, kind, host, start, end, size,"
+                                 " compressed, inode, mtime_ns) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)", rows)
+        gone = [p for p in known if p not in present]
+        for i in range(0, len(gone), 500):
+            chunk = gone[i:i + 500]
+            conn.execute(f"DELETE FROM files WHERE path IN ({','.join('?' * len(chunk))})", chunk)
+        counts["removed"] = len(gone)
+        if counts["added"] or counts["changed"] or counts["removed"]:
+            rebuild_runs(conn)
+    return counts
+
+def rebuild_runs(conn: sqlite3.Connection, gap: float = RUN_GAP_S) -> None:
+    # Прогон — цепочка файлов одного хоста, где следующий начинается не позже
+    # чем через gap после конца предыдущих. Отчёты и архивы collect не
+    # образуют прогонов (они о прогонах, а не их часть), постоянно
+    # дописываемые логи мониторинга (APPENDED_KINDS) — тоже: query(run_id)
+    # находит их по времени прогона.
+    # Номер прогона не меняется между обновлениями (report --run N указывает
+    # на тот же прогон): прогон сохраняет прежний номер своих файлов, а если их
+    # записи перечитаны — прогона того же хоста с тем же началом. Новые прогоны
+    # получают следующие номера (AUTOINCREMENT: номера удалённых не занимаются).
+    excluded = ("report", "archive", "other") + APPENDED_KINDS
+    rows = conn.execute("SELECT id, host, start, end, kind, run_id FROM files WHERE member = '' AND kind NOT IN"
+                        f" ({','.join('?' * len(excluded))}) ORDER BY host, start", excluded).fetchall()
+    by_start = {(r["host"], r["start"]): r["id"] for r in conn.execute("SELECT id, host, start FROM runs")}
+    conn.execute("DELETE FROM runs")
+    conn.execute("UPDATE files SET run_id = NULL")
+    taken = set()
+    run: Optional[Dict[str, Any]] = None
+
+    def flush():
+        if run is None:
+            return
+        run_id = min(run["old"] - taken, default=by_start.get((run["host"], run["start"])))
+        cur = conn.execute("INSERT INTO runs (id, host, start, end, files, kinds) VALUES (?, ?, ?, ?, ?, ?)",
+                           (None if run_id in taken else run_id, run["host"], run["start"], run["end"],
+                            len(run["ids"]), ",".join(sorted(run["kinds"]))))
+        taken.add(cur.lastrowid)
+        conn.executemany("UPDATE files SET run_id = ? WHERE id = ?", [(cur.lastrowid, i) for i in run["ids"]])
+
+    for r in rows:
+        if run is None or r["host"] != run["host"] or r["start"] > run["end"] + gap:
+            flush()
+            run = {"host": r["host"], "start": r["start"], "end": r["end"], "ids": [], "kinds": set(), "old": set()}
+        run["end"] = max(run["end"], r["end"])
+        run["ids"].append(r["id"])
+        if r["run_id"] is not None:
+            run["old"].add(r["run_id"])
+        run["kinds"].add(r["kind"])
+    flush()
+
+def query(conn: sqlite3.Connection, kinds: Optional[Sequence[str]] = None, since: Optional[float] = None,
+          until: Optional[float] = None, run_id: Optional[int] = None, host: Optional[str] = None,
+          roots: Optional[Sequence[str]] = None, older_than: Optional[float] = None,
+          archived: Optional[bool] = False, latest: bool = False) -> List[sqlite3.Row]:
+    # Файлы, пересекающиеся с [since, until]; archived=False — только файлы на
+    # диске, True — только содержимое архивов, None — всё. Сортировка по началу.
+    where, args = [], []
+    if kinds:
+        where.append(f"kind IN ({','.join('?' * len(kinds))})")
+        args += list(kinds)
+    if roots:
+        where.append(f"root IN ({','.join('?' * len(roots))})")
+        args += list(roots)
+    if since is not None:
+        where.append("end >= ?")
+        args.append(since)
+    if until is not None:
+        where.append("start <= ?")
+        args.append(until)
+    if older_than is not None:
+        where.append("end < ?")
+        args.append(older_than)
+    if run_id is not None:
+        # логи мониторинга в прогон не входят — берутся по его времени
+        where.append(f"(run_id = ? OR (kind IN ({','.join('?' * len(APPENDED_KINDS))})"
+                     " AND end >= (SELECT start FROM runs WHERE id = ?) AND start <= (SELECT end FROM runs WHERE id = ?)))")
+        args += [run_id, *APPENDED_KINDS, run_id, run_id]
+    if host is not None:
+        where.append("host = ?")
+        args.append(host)
+    if archived is not None:
+        where.append("member != ''" if archived else "member = ''")
+    sql = "SELECT * FROM files" + (" WHERE " + " AND ".join(where) if where else "")
+    sql += " ORDER BY end DESC LIMIT 1" if latest else " ORDER BY start, path, member"
+    return conn.execute(sql, args).fetchall()
+
+def runs(conn: sqlite3.Connection, since: Optional[float] = None, until: Optional[float] = None) -> List[sqlite3.Row]:
+    sql, args = "SELECT * FROM runs WHERE 1", []
+    if since is not None:
+        sql += " AND end >= ?"
+        args.append(since)
+    if until is not None:
+        sql += " AND start <= ?"
+        args.append(until)
+    return conn.execute(sql + " ORDER BY start", args).fetchall()
+
+def clean(conn: sqlite3.Connection, group: str, older_days: Optional[float] = None,
+          dry_run: bool = False) -> List[str]:
+    # Удаление по группам cmd_clean (--only) с отбором по возрасту из каталога
+    groups = CLEAN_GROUPS if group == "all" else {group: CLEAN_GROUPS[group]}
+    older = None if older_days is None else time.time() - older_days * 86400
+    removed: List[str] = []
+    for roots, suffixes in groups.values():
+        for r in query(conn, roots=roots, older_than=older):
+            if r["path"].endswith(suffixes):
+                removed.append(r["path"])
+    removed = list(dict.fromkeys(removed))
+    if not dry_run:
+        with conn:
+            for path in removed:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"{path}: {e}", file=sys.stderr)
+                    continue
+                conn.execute("DELETE FROM files WHERE path = ?", (path,))
+                # индекс блочного .gz (gzlog.py) удаляется вместе с ним
+                idx = gzlog.index_path(path)
+                if os.path.exists(idx):
+                    os.remove(idx)
+                    conn.execute("DELETE FROM files WHERE path = ?", (idx,))
+            rebuild_runs(conn)
+    return removed
+
+# --- CLI ---
+
+def parse_when(text: Optional[str], end: bool = False) -> Optional[float]:
+    # "2025-10-14", "2025-10-14 12:00", AUTOTEST_FORMAT_DATE; дата без времени
+    # в --until означает конец дня
+    if text is None:
+        return None
+    for f in ("%Y-%m-%d", "%d-%m-%Y"):
+        try:
+            t = datetime.strptime(text, f).timestamp()
+            return t + 86400 - 1e-3 if end else t
+        except ValueError:
+            continue
+    for f in ("%Y-%m-%d %H:%M",):
+        try:
+            return datetime.strptime(text, f).timestamp()
+        except ValueError:
+            continue
+    t = parse_time(text, date_format())
+    if t is None:
+        raise SystemExit(f"Cannot parse time: {text}")
+    return t
+
+def fmt_time(t: Optional[float]) -> str:
+    return "-" if t is None else datetime.fromtimestamp(t).strftime("%Y-%m-%d %H:%M:%S")
+
+def print_rows(rows: List[sqlite3.Row], fmt: str) -> None:
+    if fmt == "paths":
+        for r in rows:
+            print(r["path"] if not r["member"] else f"{r['path']}::{r['member']}")
+    elif fmt == "json":
+        print(json.dumps([dict(r) for r in rows], ensure_ascii=False, indent=1))
+    else:
+        for r in rows:
+            where = r["path"] + (f" :: {r['member']}" if r["member"] else "")
+            print(f"{fmt_time(r['start'])}  {fmt_time(r['end'])}  {r['kind']:<11} {r['size']:>12}"
+                  f"{'  gz' if r['compressed'] else '    '}  run {r['run_id'] if r['run_id'] else '-':<4} {where}")
+
+def main():
+    roots = default_roots()
+    ap = argparse.ArgumentParser(description="SQLite catalog of AutoTest runs and log files.")
+    ap.add_argument("--catalog", help=f"Catalog file (default: <archive-dir>/{CATALOG_NAME})")
+    ap.add_argument("--log-dir", default=roots["log"])
+    ap.add_argument("--gpu-log-dir", default=roots["gpu"])
+    ap.add_argument("--archive-dir", default=roots["archive"])
+    ap.add_argument("--host", help="Host recorded for indexed files (default: this host)")
+    ap.add_argument("--no-update", action="store_true", help="Query without rescanning the log directories")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("update", help="Index new/changed files, drop removed ones")
+    q = sub.add_parser("query", help="List files by kind/time/run")
+    q.add_argument("--kind", action="append", help="Log kind (repeatable): " + ", ".join(k for k, _ in KINDS))
+    q.add_argument("--since", help="Files ending after this time (YYYY-MM-DD[ HH:MM] or AUTOTEST_FORMAT_DATE)")
+    q.add_argument("--until", help="Files starting before this time")
+    q.add_argument("--run", type=int, help="Run id (see runs)")
+    q.add_argument("--older-days", type=float, help="Files last written more than N days ago")
+    q.add_argument("--archived", choices=["no", "yes", "all"], default="no",
+                   help="Files on disk (no), inside collect archives (yes) or both")
+    q.add_argument("--latest", action="store_true", help="Only the most recently written match")
+    q.add_argument("--format", choices=["table", "paths", "json"], default="table")
+    r = sub.add_parser("runs", help="List runs (files grouped by overlapping time)")
+    r.add_argument("--since")
+    r.add_argument("--until")
+    c = sub.add_parser("clean", help="Delete indexed logs like autotest.sh clean")
+    c.add_argument("--only", choices=["all"] + list(CLEAN_GROUPS), default="all")
+    c.add_argument("--older-days", type=float)
+    c.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args()
+
+    roots.update(log=args.log_dir, gpu=args.gpu_log_dir, archive=args.archive_dir)
+    conn = open_catalog(args.catalog or default_path(roots))
+    if args.cmd == "update" or not args.no_update:
+        started = time.monotonic()
+        counts = update(conn, roots, args.host)
+        if args.cmd == "update":
+            print(", ".join(f"{k} {v}" for k, v in counts.items()) + f" ({time.monotonic() - started:.2f}s)")
+    if args.cmd == "query":
+        archived = {"no": False, "yes": True, "all": None}[args.archived]
+        older = None if args.older_days is None else time.time() - args.older_days * 86400
+        print_rows(query(conn, args.kind, parse_when(args.since), parse_when(args.until, end=True), args.run,
+                         older_than=older, archived=archived, latest=args.latest), args.format)
+    elif args.cmd == "runs":
+        for row in runs(conn, parse_when(args.since), parse_when(args.until, end=True)):
+            print(f"run {row['id']:<4} {row['host']}  {fmt_time(row['start'])} — {fmt_time(row['end'])}"
+                  f"  {row['files']:>4} files  {row['kinds']}")
+    elif args.cmd == "clean":
+        for path in clean(conn, args.only, args.older_days, args.dry_run):
+            print(path)
+    conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# disksampler.py — частые замеры всех блочных устройств по /proc/diskstats
+# (вместо iostat -dx на одно устройство раз в 5 минут).
+# Один pread файла на замер; по разнице счётчиков между замерами считаются
+# IOPS чтения/записи, МБ/с (1 МБ = 2^20 байт, как iostat -m), средняя
+# задержка операции (await, мс), загрузка устройства (%util) и средняя
+# глубина очереди (aqu-sz), плюс мгновенное число операций в работе.
+# Все устройства пишутся в один CSV (строка на устройство в каждом замере),
+# метка времени — с миллисекундами, как в sysmonitor.csv, чтобы ряды
+# совпадали по времени с логом fio. Корень /proc и /sys задаётся --root
+# (проверка на синтетическом diskstats). --ring пишет замеры ещё и в кольцо
+# tsring.py (запись фиксированного размера на устройство, без форматирования
+# CSV; --format ring — только кольцо, CSV выгружается: tsring.py export).
+#   disksampler.py --interval 0.1 -o ~/AutoTest_Logs/diskstats_run.csv
+#   disksampler.py --interval 0.1 --format ring --ring ~/AutoTest_Logs/diskstats_run.ring
+#   disksampler.py --root /tmp/fake --interval 0.1 --count 20 --stdout
+
+import argparse
+import csv
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, TextIO
+
+import tsring
+
+CSV_FIELDS = ["timestamp", "device", "r_iops", "w_iops", "r_mb_s", "w_mb_s", "r_await_ms", "w_await_ms",
+              "util_pct", "queue", "inflight"]
+SECTOR_BYTES = 512
+# Виртуальные устройства без реального ввода-вывода (пишутся только с --all)
+SKIP_PREFIXES = ("loop", "ram", "zram")
+# Схема кольца: поля CSV_FIELDS (кроме timestamp) и их struct-типы; при
+# замере раз в 0.1 с кольца по умолчанию хватает на ~7 ч одного устройства
+RING_FIELDS = [("device", "32s"), ("r_iops", "d"), ("w_iops", "d"), ("r_mb_s", "d"), ("w_mb_s", "d"),
+               ("r_await_ms", "d"), ("w_await_ms", "d"), ("util_pct", "d"), ("queue", "d"), ("inflight", "q")]
+RING_CAPACITY = 1 << 18
+
+class Counters(NamedTuple):
+    # Поля /proc/diskstats (Documentation/admin-guide/iostats.rst)
+    reads: int
+    read_sectors: int
+    read_ms: int
+    writes: int
+    write_sectors: int
+    write_ms: int
+    inflight: int
+    io_ms: int
+    queue_ms: int
+
+def parse_diskstats(text: str) -> Dict[str, Counters]:
+    stats: Dict[str, Counters] = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 14:
+            continue
+        try:
+            v = [int(x) for x in parts[3:14]]
+        except ValueError:
+            continue
+        stats[parts[2]] = Counters(v[0], v[2], v[3], v[4], v[6], v[7], v[8], v[9], v[10])
+    return stats
+
+def delta_row(prev: Counters, cur: Counters, dt: float) -> Dict[str, float]:
+    # Счётчики 32-битные на старых ядрах: при переполнении разность
+    # отрицательная — такой интервал считается нулевым
+    d = [max(0, c - p) for c, p in zip(cur, prev)]
+    reads, rsec, rms, writes, wsec, wms, _, io_ms, queue_ms = d
+    return {
+        "r_iops": reads / dt,
+        "w_iops": writes / dt,
+        "r_mb_s": rsec * SECTOR_BYTES / 2**20 / dt,
+        "w_mb_s": wsec * SECTOR_BYTES / 2**20 / dt,
+        "r_await_ms": rms / reads if reads else 0.0,
+        "w_await_ms": wms / writes if writes else 0.0,
+        "util_pct": min(100.0, io_ms / (dt * 10)),
+        "queue": queue_ms / (dt * 1000),
+        "inflight": cur.inflight,
+    }
+
+class DiskSampler:
+    def __init__(self, root: str = "/", devices: Optional[Sequence[str]] = None, all_devices: bool = False):
+        self.root = root
+        self.devices = list(devices) if devices else None
+        self.all_devices = all_devices
+        self._fd: Optional[int] = None
+        self._prev: Dict[str, Counters] = {}
+        self._prev_t = 0.0
+        self._whole = self.whole_disks()
+
+    def path(self, rel: str) -> str:
+        return os.path.join(self.root, rel.lstrip("/"))
+
+    def whole_disks(self) -> Optional[set]:
+        # Устройства целиком — каталоги /sys/block (разделы туда не входят)
+        try:
+            return set(os.listdir(self.path("/sys/block")))
+        except OSError:
+            return None
+
+    def wanted(self, name: str) -> bool:
+        if self.devices is not None:
+            return name in self.devices
+        if self.all_devices:
+            return True
+        if name.startswith(SKIP_PREFIXES):
+            return False
+        return self._whole is None or name in self._whole
+
+    def read(self) -> Dict[str, Counters]:
+        # Файл открыт всё время: pread с нуля отдаёт свежие счётчики
+        if self._fd is None:
+            self._fd = os.open(self.path("/proc/diskstats"), os.O_RDONLY)
+        chunks = []
+        offset = 0
+        while True:
+            data = os.pread(self._fd, 1 << 16, offset)
+            if not data:
+                break
+            chunks.append(data)
+            offset += len(data)
+        stats = parse_diskstats(b"".join(chunks).decode("ascii", errors="replace"))
+        return {k: v for k, v in stats.items() if self.wanted(k)}
+
+    def prime(self) -> None:
+        self._prev = self.read()
+        self._prev_t = time.monotonic()
+
+    def sample(self) -> List[Dict[str, object]]:
+        # Строки по устройствам за интервал с прошлого замера
+        now = time.monotonic()
+        ts = datetime.now()
+        cur = self.read()
+        dt = now - self._prev_t
+        rows = []
+        if dt > 0:
+            for dev, counters in cur.items():
+                prev = self._prev.get(dev)
+                if prev is None:
+                    continue  # устройство появилось — ряд начнётся со следующего замера
+                rows.append(dict(delta_row(prev, counters, dt), timestamp=ts, device=dev))
+        self._prev, self._prev_t = cur, now
+        return rows
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+def is_idle(row: Dict[str, object]) -> bool:
+    return not row["inflight"] and not row["r_iops"] and not row["w_iops"]
+
+def format_value(v: object) -> object:
+    return f"{v:.2f}".rstrip("0").rstrip(".") if isinstance(v, float) else v
+
+class DiskstatsWriter:
+    # CSV открыт всё время работы; замер (строки всех устройств) пишется
+    # одним блоком и сразу сбрасывается на диск
+    def __init__(self, out: TextIO, skip_idle: bool = False, header: bool = True):
+        self.out = out
+        self.skip_idle = skip_idle
+        self.writer = csv.writer(out)
+        if header:
+            self.writer.writerow(CSV_FIELDS)
+
+    def write(self, rows: List[Dict[str, object]]) -> None:
+        for row in rows:
+            if self.skip_idle and is_idle(row):
+                continue
+            values = dict(row, timestamp=row["timestamp"].isoformat(sep=" ", timespec="milliseconds"))
+            self.writer.writerow([format_value(values[k]) for k in CSV_FIELDS])
+        self.out.flush()
+
+def main():
+    ap = argparse.ArgumentParser(description="Sample /proc/diskstats for all block devices into one CSV "
+                                             "(IOPS, MB/s, await, %util, queue depth).")
+    ap.add_argument("--interval", type=float, default=1.0, help="Seconds between samples (down to 0.1)")
+    ap.add_argument("--count", type=int, help="Stop after N samples")
+    ap.add_argument("--duration", type=float, help="Stop after N seconds")
+    ap.add_argument("-o", "--output", help="CSV file, appended (default: <log-dir>/diskstats_<date>.csv)")
+    ap.add_argument("--log-dir", default=os.environ.get("AUTOTEST_LOG_DIR", os.path.expanduser("~/AutoTest_Logs")))
+    ap.add_argument("--devices", help="Comma-separated device names (default: all whole disks)")
+    ap.add_argument("--all", action="store_true", help="Also partitions and loop/ram/zram devices")
+    ap.add_argument("--skip-idle", action="store_true", help="Do not write rows of devices without I/O")
+    ap.add_argument("--root", default="/", help="Root of the proc/sys tree (tests)")
+    ap.add_argument("--stdout", action="store_true", help="Print CSV to stdout instead of a file")
+    ap.add_argument("--format", choices=["csv", "ring"], default="csv",
+                    help="csv: CSV file (plus the ring with --ring); ring: only the ring")
+    ap.add_argument("--ring", nargs="?", const="", default=None, metavar="PATH",
+                    help="Also append to a memory-mapped ring (default: the CSV path with .ring)")
+    ap.add_argument("--ring-capacity", type=int, default=RING_CAPACITY, help="Records kept in a new ring")
+    args = ap.parse_args()
+    if args.interval < 0.1:
+        ap.error("--interval must be at least 0.1")
+    if args.format == "ring" and args.stdout:
+        ap.error("--stdout writes CSV; it cannot be combined with --format ring")
+
+    sampler = DiskSampler(args.root, args.devices.split(",") if args.devices else None, args.all)
+    path = args.output
+    if path is None:
+        stamp = datetime.now().strftime(os.environ.get("AUTOTEST_FORMAT_DATE", "%d-%m-%Y %H:%M:%S"))
+        path = os.path.join(args.log_dir, f"diskstats_{stamp}.csv")
+    ring_path = args.ring
+    if args.format == "ring" and ring_path is None:
+        ring_path = ""
+    if ring_path == "":
+        ring_path = (os.path.splitext(path)[0] if not args.stdout else os.path.join(args.log_dir, "diskstats")) + ".ring"
+    ring = None
+    if ring_path:
+        try:
+            ring = tsring.Ring.create(ring_path, "diskstats", RING_FIELDS, args.ring_capacity)
+        except tsring.RingError as e:
+            raise SystemExit(str(e))
+    out = writer = None
+    if args.stdout:
+        out = sys.stdout
+    elif args.format == "csv":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        out = open(path, "a", encoding="utf-8", newline="")
+    if out is not None:
+        # при дозаписи в существующий файл заголовок не повторяется
+        writer = DiskstatsWriter(out, args.skip_idle, header=out is sys.stdout or out.tell() == 0)
+    if not args.stdout:
+        targets = ([path] if out is not None else []) + ([ring_path] if ring is not None else [])
+        print(f"Sampling /proc/diskstats every {args.interval}s -> {', '.join(targets)}", flush=True)
+
+    # autotest.sh disk-fio останавливает замеры через SIGTERM: файл
+    # закрывается так же, как по Ctrl+C
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    sampler.prime()
+    start = time.monotonic()
+    n = 0
+    try:
+        while True:
+            # шаг без накопления сдвига: следующий замер — на сетке interval
+            elapsed = time.monotonic() - start
+            time.sleep(max(0.0, args.interval - elapsed % args.interval))
+            rows = sampler.sample()
+            if writer is not None:
+                writer.write(rows)
+            if ring is not None:
+                for row in rows:
+                    if not (args.skip_idle and is_idle(row)):
+                        ring.append_row(row["timestamp"].timestamp(), row)
+            n += 1
+            if args.count and n >= args.count:
+                break
+            if args.duration is not None and time.monotonic() - start >= args.duration:
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+        if ring is not None:
+            ring.close()
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        sys.exit(0)
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+# fleet.py — запуск команд и кампаний autotest.sh на многих хостах сразу.
+# Хосты берутся из файла инвентаря (или --hosts), команда выполняется на
+# --parallel хостах одновременно; вывод каждого хоста идёт на экран с
+# префиксом [хост] и в <out>/<хост>/output.log. Транспорт подключаемый:
+#   ssh   — одно мультиплексированное соединение на хост (ControlMaster):
+#           команда, config-show, collect и выгрузка архива идут по нему же;
+#   local — «хост» как отдельный HOME на этой машине (проверка без сети).
+# С --collect (или командой collect) на каждом хосте собирается архив логов
+# и параллельно выгружается в <out>/<хост>/ (--collect собирает полный архив;
+# для инкрементального от collect забираются и архивы, на которые он
+# ссылается). После task run/resume с хоста
+# забирается state-файл кампании. Итог по всем хостам — таблица на экране и
+# <out>/summary.json (код выхода, время, архив, этапы кампании).
+# Инвентарь: строка на хост — цель и необязательные ключ=значение:
+#   root@10.0.0.11           name=node01 dir=/opt/linux_scripts config=/opt/linux_scripts/.env
+#   10.0.0.12:2222           name=node02
+#   local:sim1
+#   fleet.py -i racks/r12.txt --parallel 16 --detach -- task run 24h
+#   fleet.py -i racks/r12.txt -- collect
+#   fleet.py --transport local --hosts sim1,sim2,sim3 --collect -- monitor-once
+
+import argparse
+import json
+import os
+import re
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Type
+
+import logarchive
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Каталог репозитория на удалённом хосте (относительно домашнего), если в
+# инвентаре нет dir=
+DEFAULT_REMOTE_DIR = "linux_scripts"
+SSH_CONNECT_TIMEOUT_S = 10
+SSH_PERSIST_S = 600
+SAVED_RE = re.compile(r"^Saved: (.+)$", re.M)
+CONFIG_RE = re.compile(r"^\s*([A-Z_]+)=(.*)$", re.M)
+
+class Host(NamedTuple):
+    name: str
+    target: str              # user@host для ssh, имя для local
+    port: Optional[int]
+    transport: str
+    dir: Optional[str]       # каталог с autotest.sh на хосте
+    config: Optional[str]    # --config для autotest.sh на хосте
+
+class TransportError(Exception):
+    pass
+
+def parse_host(line: str, default_transport: str = "ssh") -> Host:
+    parts = shlex.split(line)
+    target, opts = parts[0], {}
+    for item in parts[1:]:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"expected key=value: {item}")
+        opts[key] = value
+    transport = opts.get("transport", default_transport)
+    if target.startswith("local:"):
+        transport, target = "local", target[len("local:"):]
+    port = None
+    if transport == "ssh" and target.count(":") == 1:
+        target, p = target.split(":")
+        port = int(p)
+    name = opts.get("name") or target.rsplit("@", 1)[-1]
+    if not name:
+        raise ValueError(f"no host name in: {line}")
+    return Host(name, target, port, transport, opts.get("dir"), opts.get("config"))
+
+def load_inventory(path: Optional[str], hosts: Optional[str], default_transport: str) -> List[Host]:
+    lines: List[str] = []
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            lines += [ln.split("#", 1)[0].strip() for ln in f]
+    if hosts:
+        lines += [h.strip() for h in hosts.split(",")]
+    out: List[Host] = []
+    seen = set()
+    for ln in lines:
+        if not ln:
+            continue
+        h = parse_host(ln, default_transport)
+        if h.name in seen:
+            raise ValueError(f"duplicate host name: {h.name}")
+        seen.add(h.name)
+        out.append(h)
+    return out
+
+# --- транспорты ---
+
+class Transport(ABC):
+    # Выполнение команд и выгрузка файлов на одном хосте. Наследники задают
+    # local_argv() — как запустить строку команды на хосте (ssh ... -- cmd
+    # или bash -c cmd), fetch() и при необходимости open()/close(); потоковый
+    # вывод общий.
+    name = ""
+
+    def __init__(self, host: Host, opts: argparse.Namespace):
+        self.host = host
+        self.opts = opts
+        self.procs: List[subprocess.Popen] = []
+        self.terminated = False
+
+    @abstractmethod
+    def autotest(self) -> str:
+        ...
+
+    @abstractmethod
+    def local_argv(self, cmdline: str) -> List[str]:
+        ...
+
+    def env(self) -> Optional[Dict[str, str]]:
+        return None
+
+    def cwd(self) -> Optional[str]:
+        return None
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def fetch(self, remote: str, local: str) -> None:
+        ...
+
+    def run(self, cmdline: str, on_line: Optional[Callable[[str], None]] = None) -> int:
+        proc = subprocess.Popen(self.local_argv(cmdline), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                stdin=subprocess.DEVNULL, env=self.env(), cwd=self.cwd(), text=True,
+                                errors="replace", start_new_session=True)
+        self.procs.append(proc)
+        if self.terminated:
+            # terminate() пришёл между запуском и регистрацией процесса
+            self.kill(proc)
+        try:
+            for line in proc.stdout:
+                if on_line is not None:
+                    on_line(line.rstrip("\n"))
+            return proc.wait()
+        finally:
+            self.procs.remove(proc)
+
+    def capture(self, cmdline: str) -> str:
+        lines: List[str] = []
+        rc = self.run(cmdline, lines.append)
+        if rc != 0:
+            raise TransportError(f"{cmdline!r} exited with {rc}: {' / '.join(lines[-3:])}")
+        return "\n".join(lines)
+
+    def kill(self, proc: subprocess.Popen) -> None:
+        # вся группа: у local дочерние процессы autotest.sh держат вывод открытым
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def terminate(self) -> None:
+        self.terminated = True
+        for proc in list(self.procs):
+            self.kill(proc)
+
+class SSHTransport(Transport):
+    name = "ssh"
+
+    def __init__(self, host: Host, opts: argparse.Namespace):
+        super().__init__(host, opts)
+        # %C — хеш адреса: путь сокета короткий при любых именах хостов
+        self.control = os.path.join(opts.control_dir, "%C")
+
+    def ssh_opts(self) -> List[str]:
+        out = ["-o", "BatchMode=yes", "-o", f"ConnectTimeout={SSH_CONNECT_TIMEOUT_S}",
+               "-o", f"ControlPath={self.control}"]
+        if self.host.port:
+            out += ["-p", str(self.host.port)]
+        return out + list(self.opts.ssh_opt or [])
+
+    def autotest(self) -> str:
+        return f"{self.host.dir or DEFAULT_REMOTE_DIR}/autotest.sh"
+
+    def open(self) -> None:
+        # Мастер-соединение живёт в фоне SSH_PERSIST_S; все следующие ssh
+        # к хосту идут по нему без нового рукопожатия
+        cmd = ["ssh", "-o", "ControlMaster=auto", "-o", f"ControlPersist={SSH_PERSIST_S}"] + self.ssh_opts()
+        r = subprocess.run(cmd + [self.host.target, "true"], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.PIPE, text=True, errors="replace")
+        if r.returncode != 0:
+            raise TransportError((r.stderr.strip().splitlines() or [f"ssh exited with {r.returncode}"])[-1])
+
+    def local_argv(self, cmdline: str) -> List[str]:
+        return ["ssh", "-o", "ControlMaster=no"] + self.ssh_opts() + [self.host.target, "--", cmdline]
+
+    def fetch(self, remote: str, local: str) -> None:
+        with open(local + ".part", "wb") as f:
+            r = subprocess.run(self.local_argv("cat -- " + shlex.quote(remote)), stdout=f, stderr=subprocess.PIPE,
+                               stdin=subprocess.DEVNULL)
+        if r.returncode != 0:
+            os.remove(local + ".part")
+            raise TransportError(f"fetch {remote}: {r.stderr.decode(errors='replace').strip()}")
+        os.replace(local + ".part", local)
+
+    def close(self) -> None:
+        subprocess.run(["ssh"] + self.ssh_opts() + ["-O", "exit", self.host.target], stdin=subprocess.DEVNULL,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+class LocalTransport(Transport):
+    # «Хост» — отдельный HOME в --local-root: свои AutoTest_Logs, архивы и
+    # состояние кампаний, autotest.sh — из этого репозитория (или dir=)
+    name = "local"
+
+    def home(self) -> str:
+        return os.path.join(self.opts.local_root, self.host.target)
+
+    def autotest(self) -> str:
+        return os.path.join(self.host.dir or HERE, "autotest.sh")
+
+    def open(self) -> None:
+        os.makedirs(self.home(), exist_ok=True)
+
+    def env(self) -> Dict[str, str]:
+        # Каталоги логов из окружения fleet.py указывали бы на общий HOME
+        home = self.home()
+        return dict(os.environ, HOME=home, AUTOTEST_FLEET_HOST=self.host.name,
+                    AUTOTEST_LOG_DIR=os.path.join(home, "AutoTest_Logs"),
+                    AUTOTEST_GPU_LOG_DIR=os.path.join(home, "gpu_burn_logs"),
+                    AUTOTEST_ARCHIVE_DIR=os.path.join(home, "AutoTest_Archives"))
+
+    def cwd(self) -> str:
+        return self.home()
+
+    def local_argv(self, cmdline: str) -> List[str]:
+        return ["bash", "-c", cmdline]
+
+    def fetch(self, remote: str, local: str) -> None:
+        try:
+            shutil.copy2(remote, local)
+        except OSError as e:
+            raise TransportError(f"fetch {remote}: {e}")
+
+TRANSPORTS: Dict[str, Type[Transport]] = {"ssh": SSHTransport, "local": LocalTransport}
+
+# --- прогон на хосте ---
+
+class Fleet:
+    def __init__(self, hosts: List[Host], command: List[str], opts: argparse.Namespace, out_dir: str):
+        self.hosts = hosts
+        self.command = command
+        self.opts = opts
+        self.out_dir = out_dir
+        self.print_lock = threading.Lock()
+        self.transports: Dict[str, Transport] = {}
+        # Ctrl+C: потоки хостов не начинают следующих шагов (collect и выгрузку)
+        self.stopping = threading.Event()
+        width = max(len(h.name) for h in hosts)
+        self.prefix = {h.name: f"[{h.name:<{width}}] " for h in hosts}
+
+    def emit(self, host: Host, line: str, log=None) -> None:
+        if log is not None:
+            log.write(line + "\n")
+            log.flush()
+        if not self.opts.quiet:
+            with self.print_lock:
+                print(self.prefix[host.name] + line, flush=True)
+
+    def autotest_cmd(self, t: Transport, args: List[str]) -> str:
+        cmd = ["bash", t.autotest()]
+        if t.host.config:
+            cmd += ["--config", t.host.config]
+        return shlex.join(cmd + args)
+
+    def remote_config(self, t: Transport) -> Dict[str, str]:
+        # LOG_DIR/ARCHIVE_DIR хоста — из autotest.sh config-show
+        return dict(CONFIG_RE.findall(t.capture(self.autotest_cmd(t, ["config-show"]))))
+
+    def check_stop(self) -> None:
+        if self.stopping.is_set():
+            raise TransportError("interrupted")
+
+    def campaign_name(self) -> Optional[str]:
+        c = self.command
+        if len(c) >= 3 and c[0] == "task" and c[1] in ("run", "resume") and not c[2].startswith("-"):
+            return os.path.splitext(os.path.basename(c[2]))[0]
+        return None
+
+    def run_host(self, host: Host) -> Dict[str, Any]:
+        res: Dict[str, Any] = {"host": host.name, "target": host.target, "transport": host.transport,
+                               "command": self.command, "status": "ok", "rc": None, "started": None,
+                               "elapsed_s": None, "archive": None, "campaign": None, "error": None}
+        host_dir = os.path.join(self.out_dir, host.name)
+        os.makedirs(host_dir, exist_ok=True)
+        res["log"] = os.path.join(host_dir, "output.log")
+        if self.stopping.is_set():
+            res.update(status="failed", error="interrupted")
+            return res
+        t = TRANSPORTS[host.transport](host, self.opts)
+        self.transports[host.name] = t
+        t0 = time.monotonic()
+        res["started"] = datetime.now().isoformat(sep=" ", timespec="seconds")
+        with open(res["log"], "a", encoding="utf-8") as log:
+            try:
+                t.open()
+            except (TransportError, OSError) as e:
+                res.update(status="unreachable", error=str(e))
+                self.emit(host, f"unreachable: {e}", log)
+                return res
+            try:
+                self.run_steps(t, host, host_dir, res, log)
+            except (TransportError, OSError) as e:
+                res.update(status="failed", error=str(e))
+                self.emit(host, f"error: {e}", log)
+            finally:
+                res["elapsed_s"] = round(time.monotonic() - t0, 1)
+                t.close()
+        return res
+
+    def run_steps(self, t: Transport, host: Host, host_dir: str, res: Dict[str, Any], log) -> None:
+        on_line = lambda line: self.emit(host, line, log)
+        output: List[str] = []
+        if self.command:
+            self.check_stop()
+            cmd = self.autotest_cmd(t, self.command)
+            if self.opts.detach:
+                # Команда переживает обрыв соединения (кампании на сутки);
+                # её вывод — в ~/autotest_fleet.log на хосте
+                cmd = f"nohup {cmd} > autotest_fleet.log 2>&1 < /dev/null & echo \"detached, pid $!\""
+            self.emit(host, f"$ {cmd}", log)
+
+            def collect_line(line: str) -> None:
+                output.append(line)
+                on_line(line)
+            res["rc"] = t.run(cmd, collect_line)
+            if res["rc"] != 0:
+                res["status"] = "failed"
+        name = self.campaign_name()
+        wants_archive = self.opts.collect or self.command[:1] == ["collect"]
+        if self.command[:1] == ["collect"] and res["rc"] != 0:
+            return
+        if not wants_archive and (name is None or self.opts.detach):
+            return
+        self.check_stop()
+        config = self.remote_config(t)
+        if name and not self.opts.detach and config.get("LOG_DIR"):
+            self.check_stop()
+            state = os.path.join(host_dir, f"{name}.state.json")
+            try:
+                t.fetch(f"{config['LOG_DIR']}/campaigns/{name}.state.json", state)
+                res["campaign"] = campaign_summary(state)
+            except (TransportError, OSError, ValueError) as e:
+                self.emit(host, f"no campaign state: {e}", log)
+        if wants_archive:
+            if self.command[:1] != ["collect"]:
+                self.check_stop()
+                output = []
+                # полный архив: в <out>/<хост>/ нет прежних архивов цепочки
+                rc = t.run(self.autotest_cmd(t, ["collect", "--full"]),
+                           lambda line: (output.append(line), on_line(line)))
+                if rc != 0:
+                    raise TransportError(f"collect exited with {rc}")
+            m = SAVED_RE.search("\n".join(output))
+            if not m:
+                raise TransportError("collect did not report an archive")
+            remote = m.group(1).strip()
+            local = os.path.join(host_dir, os.path.basename(remote))
+            self.check_stop()
+            t.fetch(remote, local)
+            size = os.path.getsize(local)
+            if local.endswith(".tar"):
+                # инкрементальный архив logarchive.py: архивы, на которые он ссылается
+                try:
+                    depends = logarchive.missing_depends(logarchive.read_manifest(local), host_dir)
+                except logarchive.ArchiveError:
+                    depends = []
+                for name in depends:
+                    t.fetch(f"{os.path.dirname(remote)}/{name}", os.path.join(host_dir, name))
+                    size += os.path.getsize(os.path.join(host_dir, name))
+            res["archive"] = {"remote": remote, "local": local, "bytes": size}
+            self.emit(host, f"archive -> {local} ({size / 2**20:.1f} MiB)", log)
+
+    def run(self) -> List[Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+        with ThreadPoolExecutor(max_workers=max(1, self.opts.parallel)) as pool:
+            futures = {pool.submit(self.run_host, h): h for h in self.hosts}
+            try:
+                for fut, h in futures.items():
+                    results[h.name] = fut.result()
+            except KeyboardInterrupt:
+                self.stopping.set()
+                for fut in futures:
+                    fut.cancel()
+                for t in list(self.transports.values()):
+                    t.terminate()
+                raise
+        return [results[h.name] for h in self.hosts]
+
+def campaign_summary(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    counts: Dict[str, int] = {}
+    failed = []
+    for sid, s in state.get("status", {}).items():
+        counts[s["status"]] = counts.get(s["status"], 0) + 1
+        if s["status"] == "failed":
+            failed.append(sid)
+    return {"name": state.get("campaign"), "finished": state.get("finished"), "stages": counts, "failed": failed}
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    status: Dict[str, int] = {}
+    stages: Dict[str, int] = {}
+    for r in results:
+        status[r["status"]] = status.get(r["status"], 0) + 1
+        for k, n in ((r.get("campaign") or {}).get("stages") or {}).items():
+            stages[k] = stages.get(k, 0) + n
+    return {"hosts": len(results), "status": status, "campaign_stages": stages,
+            "archive_bytes": sum((r.get("archive") or {}).get("bytes", 0) for r in results)}
+
+def print_summary(results: List[Dict[str, Any]], totals: Dict[str, Any]) -> None:
+    width = max([4] + [len(r["host"]) for r in results])
+    print(f"\n{'Host':<{width}}  {'Status':<11} {'Exit':>4} {'Elapsed':>8}  {'Campaign':<24} Archive / error")
+    for r in results:
+        c = r.get("campaign")
+        camp = ", ".join(f"{n} {k}" for k, n in sorted(c["stages"].items())) if c else "-"
+        tail = r["error"] or ((r.get("archive") or {}).get("local") or "")
+        if c and c["failed"]:
+            tail = f"failed stages: {', '.join(c['failed'])} {tail}".strip()
+        elapsed = "-" if r["elapsed_s"] is None else f"{r['elapsed_s']:.0f}s"
+        rc = "-" if r["rc"] is None else r["rc"]
+        print(f"{r['host']:<{width}}  {r['status']:<11} {rc:>4} {elapsed:>8}  {camp:<24} {tail}")
+    print(f"Hosts: {totals['hosts']} (" + ", ".join(f"{n} {k}" for k, n in sorted(totals["status"].items())) + ")"
+          + (", stages: " + ", ".join(f"{n} {k}" for k, n in sorted(totals["campaign_stages"].items()))
+             if totals["campaign_stages"] else "")
+          + (f", archives: {totals['archive_bytes'] / 2**20:.1f} MiB" if totals["archive_bytes"] else ""))
+
+def main():
+    ap = argparse.ArgumentParser(description="Run an autotest.sh command or campaign on many hosts concurrently.",
+                                 usage="%(prog)s [options] -- <autotest.sh command> [args]")
+    ap.add_argument("-i", "--inventory", help="Hosts file: one 'target [name=] [dir=] [config=]' per line")
+    ap.add_argument("--hosts", help="Comma-separated targets (user@host[:port] or local:NAME)")
+    ap.add_argument("--transport", choices=sorted(TRANSPORTS), default="ssh", help="Default transport")
+    ap.add_argument("-j", "--parallel", type=int, default=8, help="Hosts at once")
+    ap.add_argument("--collect", action="store_true", help="Run collect afterwards and pull the archive")
+    ap.add_argument("--detach", action="store_true", help="Start the command with nohup and return (long campaigns)")
+    ap.add_argument("-o", "--out", help="Output directory (default: <archive-dir>/fleet_<date>)")
+    ap.add_argument("--archive-dir", default=os.environ.get("AUTOTEST_ARCHIVE_DIR",
+                                                            os.path.expanduser("~/AutoTest_Archives")))
+    ap.add_argument("--local-root", help="local transport: directory with one HOME per host (default: <out>/hosts)")
+    ap.add_argument("--ssh-opt", action="append", help="Extra ssh argument (repeatable), e.g. --ssh-opt=-i --ssh-opt=key")
+    ap.add_argument("-q", "--quiet", action="store_true", help="Only the summary, no host output")
+    ap.add_argument("command", nargs=argparse.REMAINDER, help="autotest.sh command and its arguments")
+    args = ap.parse_args()
+    if args.command[:1] == ["--"]:
+        args.command = args.command[1:]
+    if not args.command and not args.collect:
+        ap.error("no command (use -- <command> or --collect)")
+    try:
+        hosts = load_inventory(args.inventory, args.hosts, args.transport)
+    except (OSError, ValueError) as e:
+        ap.error(str(e))
+    if not hosts:
+        ap.error("no hosts (use -i FILE or --hosts)")
+
+    out_dir = args.out
+    if out_dir is None:
+        stamp = datetime.now().strftime(os.environ.get("AUTOTEST_FORMAT_DATE", "%d-%m-%Y %H:%M:%S"))
+        out_dir = os.path.join(args.archive_dir, f"fleet_{stamp}")
+    os.makedirs(out_dir, exist_ok=True)
+    args.local_root = os.path.abspath(args.local_root or os.path.join(out_dir, "hosts"))
+    args.control_dir = tempfile.mkdtemp(prefix="fleet-")
+
+    print(f"Fleet: {len(hosts)} hosts, {args.parallel} at once, command: {shlex.join(args.command) or '-'}"
+          f"{' + collect' if args.collect else ''} -> {out_dir}", flush=True)
+    started = datetime.now()
+    fleet = Fleet(hosts, args.command, args, out_dir)
+    try:
+        results = fleet.run()
+    except KeyboardInterrupt:
+        print("Interrupted", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        shutil.rmtree(args.control_dir, ignore_errors=True)
+    totals = summarize(results)
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump({"started": started.isoformat(sep=" ", timespec="seconds"), "command": args.command,
+                   "totals": totals, "hosts": results}, f, indent=1)
+    print_summary(results, totals)
+    print(f"Summary: {os.path.join(out_dir, 'summary.json')}")
+    sys.exit(0 if all(r["status"] == "ok" for r in results) else 1)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        sys.exit(0)
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# Сборщик метрик GPU: один долгоживущий процесс
+#   nvidia-smi --query-gpu=... --format=csv,noheader,nounits -lms N
+# вместо запуска полного nvidia-smi каждые 10 секунд. Вывод пишется в
+# компактный CSV-лог (строка на GPU в каждом замере) с шагом от 100 мс и
+# дополнительными полями (частоты, P-state, причины троттлинга, ECC).
+# Лог читается nvidia-smi_table-parser.py наравне с табличным.
+# С --ring замеры дописываются ещё и в кольцо tsring.py (для GUI без разбора
+# лога); --no-csv — только кольцо, лог для парсера: tsring.py export.
+
+import argparse
+import os
+import selectors
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, List, Optional, TextIO, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tsring  # noqa: E402
+
+# Первая строка лога: по ней парсер отличает CSV-лог от табличного
+MAGIC = "# autotest nvidia-smi query log v1"
+
+# Поля запроса по порядку; timestamp и index обязательны. Для причин
+# троттлинга новые драйверы используют clocks_event_reasons.*, старые —
+# clocks_throttle_reasons.*: берётся первое поддерживаемое имя.
+QUERY_FIELDS = [
+    "timestamp",
+    "index",
+    "temperature.gpu",
+    "power.draw",
+    "power.limit",
+    "memory.used",
+    "memory.total",
+    "utilization.gpu",
+    "clocks.sm",
+    "clocks.mem",
+    "pstate",
+    ("clocks_event_reasons.active", "clocks_throttle_reasons.active"),
+    "ecc.errors.corrected.volatile.total",
+    "ecc.errors.uncorrected.volatile.total",
+]
+REQUIRED_FIELDS = ("timestamp", "index")
+# Типы полей в кольце (остальные — float64); P-state хранится номером,
+# причины троттлинга — битовой маской
+RING_CODES = {
+    "index": "h",
+    "pstate": "b",
+    "clocks_event_reasons.active": "q",
+    "clocks_throttle_reasons.active": "q",
+}
+RING_CAPACITY = 1 << 18
+
+def nvidia_smi_binary(path: Optional[str] = None) -> str:
+    # AUTOTEST_NVIDIA_SMI позволяет подставить заглушку (машины без GPU)
+    return path or os.environ.get("AUTOTEST_NVIDIA_SMI") or "nvidia-smi"
+
+def query_ok(smi: str, fields: List[str]) -> bool:
+    try:
+        res = subprocess.run([smi, f"--query-gpu={','.join(fields)}", "--format=csv,noheader,nounits"],
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return res.returncode == 0
+
+def probe_fields(smi: str) -> List[str]:
+    # Поля, которые поддерживает драйвер: сначала весь набор одним запросом,
+    # при ошибке — по одному (неизвестное поле валит весь запрос)
+    candidates = [f if isinstance(f, str) else f[0] for f in QUERY_FIELDS]
+    if query_ok(smi, candidates):
+        return candidates
+    fields: List[str] = []
+    for field in QUERY_FIELDS:
+        for name in ((field,) if isinstance(field, str) else field):
+            if query_ok(smi, [name]):
+                fields.append(name)
+                break
+        else:
+            if field in REQUIRED_FIELDS:
+                raise SystemExit(f"{smi} does not support --query-gpu={field}")
+    return fields
+
+def normalize_line(line: str) -> Optional[str]:
+    # "2025/10/14 12:00:00.123, 0, 45, ..." -> "2025-10-14 12:00:00.123,0,45,..."
+    parts = [p.strip() for p in line.split(",")]
+    if len(parts) < 2 or len(parts[0]) < 19:
+        return None
+    parts[0] = parts[0][:10].replace("/", "-") + parts[0][10:]
+    return ",".join(parts)
+
+def log_header(fields: List[str], interval_ms: int) -> str:
+    return (f"{MAGIC}; interval_ms={interval_ms}; started={datetime.now().isoformat(timespec='seconds')}\n"
+            "timestamp," + ",".join(fields[1:]) + "\n")
+
+def open_log(path: str, fields: List[str], interval_ms: int) -> TextIO:
+    # Дописываем в существующий лог, только если набор полей тот же
+    header = "timestamp," + ",".join(fields[1:])
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "r", encoding="utf-8") as f:
+            first, second = f.readline().rstrip("\n"), f.readline().rstrip("\n")
+        if not first.startswith(MAGIC) or second != header:
+            raise SystemExit(f"{path} exists with a different format; choose another output")
+        return open(path, "a", encoding="utf-8")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    f = open(path, "a", encoding="utf-8")
+    f.write(log_header(fields, interval_ms))
+    f.flush()
+    return f
+
+# --- кольцо tsring ---
+
+def ring_fields(fields: List[str]) -> List[Tuple[str, str]]:
+    return [(name, RING_CODES.get(name, "d")) for name in fields[1:]]
+
+def open_ring(path: str, fields: List[str], interval_ms: int, capacity: int = RING_CAPACITY) -> tsring.Ring:
+    try:
+        return tsring.Ring.create(path, "nvidia-smi", ring_fields(fields), capacity,
+                                  meta={"fields": fields, "interval_ms": interval_ms})
+    except tsring.RingError as e:
+        raise SystemExit(str(e))
+
+def _ring_value(name: str, v: str) -> Any:
+    # [N/A], [Not Supported] и т. п. -> пустое значение
+    if not v or v.startswith("["):
+        return None
+    try:
+        if name == "pstate":
+            return int(v.lstrip("P"))
+        if RING_CODES.get(name) == "q":
+            return int(v, 16)
+        return float(v)
+    except ValueError:
+        return None
+
+def parse_ring_row(line: str, fields: List[str]) -> Optional[Tuple[float, List[Any]]]:
+    # Нормализованная строка лога -> (epoch, значения полей кольца)
+    parts = line.split(",")
+    if len(parts) != len(fields):
+        return None
+    try:
+        t = datetime.strptime(parts[0], "%Y-%m-%d %H:%M:%S.%f").timestamp()
+    except ValueError:
+        return None
+    return t, [_ring_value(name, v) for name, v in zip(fields[1:], parts[1:])]
+
+def format_ring_row(row: dict, fields: List[str]) -> str:
+    # Запись кольца (Ring.rows) -> строка лога в формате normalize_line
+    parts = [row["timestamp"].isoformat(sep=" ", timespec="milliseconds")]
+    for name in fields[1:]:
+        v = row[name]
+        if v is None:
+            parts.append("[N/A]")
+        elif name == "pstate":
+            parts.append(f"P{v}")
+        elif RING_CODES.get(name) == "q":
+            parts.append(f"0x{v:016x}")
+        elif isinstance(v, float) and v.is_integer():
+            parts.append(str(int(v)))
+        else:
+            parts.append(str(v))
+    return ",".join(parts)
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def collect(smi: str, fields: List[str], output: Optional[str], interval_ms: int = 1000,
+            duration: Optional[float] = None, pid: Optional[int] = None,
+            flush_every: float = 1.0, ring: Optional[tsring.Ring] = None) -> int:
+    # Возвращает число записанных строк. Останавливается по истечении
+    # duration, после завершения процесса pid, по SIGTERM/SIGINT или когда
+    # сам nvidia-smi завершился. output=None — писать только в ring.
+    stop = False
+
+    def on_signal(signum, frame):
+        nonlocal stop
+        stop = True
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, on_signal)
+
+    log = open_log(output, fields, interval_ms) if output else None
+    proc = subprocess.Popen([smi, f"--query-gpu={','.join(fields)}", "--format=csv,noheader,nounits",
+                             "-lms", str(interval_ms)], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    sel = selectors.DefaultSelector()
+    sel.register(proc.stdout, selectors.EVENT_READ)
+    fd = proc.stdout.fileno()
+    deadline = None if duration is None else time.monotonic() + duration
+    last_flush = time.monotonic()
+    pending = b""
+    written = 0
+    try:
+        while not stop:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            if pid is not None and not pid_alive(pid):
+                break
+            if log is not None and now - last_flush >= flush_every:
+                log.flush()
+                last_flush = now
+            if not sel.select(timeout=min(flush_every, 0.5)):
+                continue
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break  # nvidia-smi завершился
+            # Пишутся только целые строки: хвост без \n ждёт следующего чтения
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for raw in lines:
+                line = normalize_line(raw.decode("utf-8", errors="replace"))
+                if line is None:
+                    continue
+                if log is not None:
+                    log.write(line + "\n")
+                if ring is not None:
+                    parsed = parse_ring_row(line, fields)
+                    if parsed is not None:
+                        ring.append(*parsed)
+                written += 1
+    finally:
+        sel.close()
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        if log is not None:
+            log.close()
+        if ring is not None:
+            ring.close()
+    return written
+
+def default_output() -> str:
+    log_dir = os.path.expanduser(os.environ.get("AUTOTEST_GPU_LOG_DIR", "~/gpu_burn_logs"))
+    stamp = datetime.now().strftime(os.environ.get("AUTOTEST_FORMAT_DATE", "%d-%m-%Y %H:%M:%S"))
+    return os.path.join(log_dir, f"nvidia-smi_{stamp}.csv")
+
+def main():
+    ap = argparse.ArgumentParser(description="Collect GPU metrics with one long-lived nvidia-smi --query-gpu process.")
+    ap.add_argument("-o", "--output", help="CSV log (default: $AUTOTEST_GPU_LOG_DIR/nvidia-smi_<date>.csv)")
+    ap.add_argument("--interval-ms", type=int, default=1000, help="Sampling interval, ms (>= 100)")
+    ap.add_argument("--duration", type=float, help="Stop after N seconds")
+    ap.add_argument("--pid", type=int, help="Stop when this process exits (e.g. gpu_burn)")
+    ap.add_argument("--nvidia-smi", dest="smi", help="nvidia-smi binary (default: $AUTOTEST_NVIDIA_SMI or nvidia-smi)")
+    ap.add_argument("--flush", type=float, default=1.0, help="Flush the log every N seconds")
+    ap.add_argument("--ring", nargs="?", const="", default=None, metavar="PATH",
+                    help="Also append samples to a memory-mapped ring (default: the log path with .ring)")
+    ap.add_argument("--ring-capacity", type=int, default=RING_CAPACITY, help="Records kept in a new ring")
+    ap.add_argument("--no-csv", action="store_true", help="Write only the ring (implies --ring)")
+    args = ap.parse_args()
+
+    if args.interval_ms < 100:
+        ap.error("--interval-ms must be >= 100")
+    smi = nvidia_smi_binary(args.smi)
+    fields = probe_fields(smi)
+    output = args.output or default_output()
+    ring_path = "" if args.no_csv and args.ring is None else args.ring
+    if ring_path == "":
+        ring_path = os.path.splitext(output)[0] + ".ring"
+    ring = open_ring(ring_path, fields, args.interval_ms, args.ring_capacity) if ring_path else None
+    if args.no_csv:
+        output = None
+    targets = ", ".join(p for p in (output, ring_path) if p)
+    print(f"Collecting {len(fields)} fields every {args.interval_ms} ms to {targets}")
+    sys.stdout.flush()
+    n = collect(smi, fields, output, args.interval_ms, args.duration, args.pid, args.flush, ring)
+    print(f"Collected {n} rows to {targets}")
+
+if __name__ == "__main__":
+    main()
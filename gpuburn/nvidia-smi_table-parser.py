@@ -1,17 +1,67 @@
 # nvidia-smi_table-parser.py
-# requirements.txt >> pandas>=2.0.0 openpyxl>=3.1.0
+# requirements.txt >> openpyxl>=3.1.0
 #!/usr/bin/env python3
 import argparse
+import csv
+import glob
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import math
+import mmap
+import os
 import re
-from typing import Dict, Any, List, Optional
-import pandas as pd
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, BinaryIO, Callable, Iterable, Iterator, Tuple
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
 from openpyxl.styles import Alignment
 
+# gzlog.py (корень репозитория): чтение .gz после autotest.sh rotate и
+# блочный .gz с индексом
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import gzlog  # noqa: E402
+import perfstats  # noqa: E402
+
 TIMESTAMP_RE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})$")
 GPU_INFO_RE = re.compile(r"^\|\s+(\d+)\s+\S")
 SEPARATOR_RE = re.compile(r"^\+\-+|\|\=+|\|\s*$")
 
+# Размер куска для параллельного разбора: крупнее — меньше накладных расходов
+# пула, мельче — меньше памяти на куски «в полёте»
+CHUNK_BYTES = 8 * 1024 * 1024
+# Сколько первых строк учитывать при оценке ширины колонок xlsx
+WIDTH_SAMPLE_ROWS = 1000
+# Строк в одном part-файле хранилища (parquet/feather/csv)
+STORE_BATCH_ROWS = 100_000
+# --resume в xlsx: строки всех запусков (JSON на строку) и их колонки/ширины
+# рядом с книгой; книга каждый раз собирается из них потоково
+XLSX_ROWS_SUFFIX = ".rows.jsonl"
+XLSX_META_SUFFIX = ".rows.json"
+# Начало лога, по которому --resume узнаёт copytruncate, даже если новый
+# файл уже дорос до прежнего смещения
+HEAD_BYTES = 4096
+
+METRIC_SUFFIXES = [
+    "temp_c",
+    "power_w",
+    "power_capacity_w",
+    "memory_used_mib",
+    "memory_total_mib",
+    "utilization",
+]
+
 def parse_metrics_line(line: str) -> Dict[str, Optional[int]]:
     parts = [p.strip() for p in line.split("|")]
     metrics: Dict[str, Optional[int]] = {
@@ -47,134 +97,1390 @@ def parse_metrics_line(line: str) -> Dict[str, Optional[int]]:
 
     return metrics
 
-def parse_log(filepath: str) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
+def build_row(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    row: Dict[str, Any] = {"timestamp": snapshot.get("timestamp")}
+    # Переносим все собранные по снапшоту метрики любых GPU
+    for key, metrics in snapshot.items():
+        if not key.startswith("gpu"):
+            continue
+        for suffix in METRIC_SUFFIXES:
+            row[f"{key}_{suffix}"] = metrics.get(suffix)
+    return row
+
+def iter_rows(f: BinaryIO, start: int = 0, final: bool = True,
+              cursor: Optional[Dict[str, int]] = None,
+              end: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    # Разбор лога с байтового смещения start (строка с меткой времени или 0)
+    # до end (тоже начало строки с меткой времени, None — до конца файла).
+    # final=False — хвостовой снапшот может быть недописан: он не выдаётся,
+    # а cursor["offset"] указывает на его строку с меткой времени, чтобы
+    # следующий запуск начал разбор с неё.
     current_ts: Optional[str] = None
     current_snapshot: Dict[str, Any] = {}
     expecting_metrics_for_gpu: Optional[int] = None
+    pos = start
+    snapshot_start = start
 
-    def flush_snapshot():
-        nonlocal current_snapshot
-        if not current_snapshot:
-            return
-        row: Dict[str, Any] = {"timestamp": current_snapshot.get("timestamp")}
-        # Переносим все собранные по снапшоту метрики любых GPU
-        for key, metrics in current_snapshot.items():
-            if not key.startswith("gpu"):
-                continue
-            row[f"{key}_temp_c"] = metrics.get("temp_c")
-            row[f"{key}_power_w"] = metrics.get("power_w")
-            row[f"{key}_power_capacity_w"] = metrics.get("power_capacity_w")
-            row[f"{key}_memory_used_mib"] = metrics.get("memory_used_mib")
-            row[f"{key}_memory_total_mib"] = metrics.get("memory_total_mib")
-            row[f"{key}_utilization"] = metrics.get("utilization")
-        rows.append(row)
-        current_snapshot = {}
-
-    with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
-        for raw in f:
-            line = raw.rstrip("\n")
-
-            m_ts = TIMESTAMP_RE.match(line)
-            if m_ts:
-                if current_ts is not None:
-                    flush_snapshot()
-                current_ts = m_ts.group(1)
-                current_snapshot = {"timestamp": current_ts}
+    f.seek(start)
+    for raw in f:
+        if end is not None and pos >= end:
+            break
+        if not final and not raw.endswith(b"\n"):
+            break  # строка ещё дописывается
+        line_start = pos
+        pos += len(raw)
+        line = raw.decode("utf-8", errors="ignore").rstrip("\r\n")
+
+        m_ts = TIMESTAMP_RE.match(line)
+        if m_ts:
+            if current_ts is not None:
+                yield build_row(current_snapshot)
+            current_ts = m_ts.group(1)
+            current_snapshot = {"timestamp": current_ts}
+            snapshot_start = line_start
+            expecting_metrics_for_gpu = None
+            continue
+
+        m_gpu = GPU_INFO_RE.match(line)
+        if m_gpu:
+            try:
+                expecting_metrics_for_gpu = int(m_gpu.group(1))
+            except ValueError:
                 expecting_metrics_for_gpu = None
-                continue
+            continue
 
-            m_gpu = GPU_INFO_RE.match(line)
-            if m_gpu:
-                try:
-                    expecting_metrics_for_gpu = int(m_gpu.group(1))
-                except ValueError:
-                    expecting_metrics_for_gpu = None
-                continue
+        if SEPARATOR_RE.match(line):
+            continue
 
-            if SEPARATOR_RE.match(line):
-                continue
+        if expecting_metrics_for_gpu is not None:
+            current_snapshot[f"gpu{expecting_metrics_for_gpu}"] = parse_metrics_line(line)
+            expecting_metrics_for_gpu = None
+            continue
 
-            if expecting_metrics_for_gpu is not None:
-                current_snapshot[f"gpu{expecting_metrics_for_gpu}"] = parse_metrics_line(line)
-                expecting_metrics_for_gpu = None
+    if final:
+        if current_ts is not None and current_snapshot:
+            yield build_row(current_snapshot)
+        resume_at = pos
+    else:
+        resume_at = snapshot_start if current_ts is not None else pos
+    if cursor is not None:
+        cursor["offset"] = resume_at
+
+def parse_log(filepath: str) -> List[Dict[str, Any]]:
+    with gzlog.open_log(filepath) as f:
+        return list(iter_rows(f))
+
+# --- Быстрый движок (--engine fast) ---
+# Файл отображается в память (mmap). Состояние разбора меняют только строки
+# с меткой времени, строки GPU и первая строка после строки GPU, поэтому
+# одно многострочное регулярное выражение (findall по окну ~1 МиБ) находит
+# сразу их: пара «строка GPU + строка метрик» разбирается одним совпадением
+# с шестью группами, остальные строки таблицы в Python не попадают.
+# Значения копятся в типизированных массивах вместо словаря на каждую
+# строку. Строки с не-ASCII байтами разбираются прежним путём построчно,
+# метрики нестандартного вида — через parse_metrics_line, поэтому
+# результат совпадает с --engine regex.
+FAST_WINDOW_BYTES = 1 << 20
+_WS = rb"[\t\x0b-\r\x1c-\x1f ]"  # \s строкового regex в пределах ASCII-строки
+_NWS = rb"[^\t-\r\x1c-\x1f ]"
+# За пробельной серией всегда идёт непробельный символ, поэтому
+# сверхжадные квантификаторы (Python 3.11+) не меняют совпадений, а лишь
+# убирают откат по длинным отступам таблицы
+_WS1, _WS0 = ((_WS + rb"++", _WS + rb"*+") if sys.version_info >= (3, 11)
+              else (_WS + rb"+", _WS + rb"*"))
+_TS = rb"[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}"
+_GPU_HEAD = rb"\|" + _WS1 + rb"[0-9]+" + _WS1 + _NWS
+_SEP = rb"(?:\+-|\|=)[^\n]*|\|" + _WS0 + rb"$"
+_METRICS = (rb"\| *(?:N/A|[0-9]+%) +([0-9]+)C +P[0-9]+ +([0-9]+)W */ *([0-9]+)W *"
+            rb"\| *([0-9]+)MiB */ *([0-9]+)MiB *\| *([0-9]+)%")
+# Построчные шаблоны (строка без \r\n, границы задаются pos/endpos)
+TIMESTAMP_B = re.compile(rb"(" + _TS + rb")$")
+GPU_INFO_B = re.compile(rb"\|" + _WS + rb"+([0-9]+)" + _WS + rb"+" + _NWS)
+SEPARATOR_B = re.compile(rb"\+-+|\|=+|\|" + _WS + rb"*$")
+# События в начале строки (после \n — литеральный префикс позволяет движку
+# regex не пробовать каждую позицию):
+#   1     — метка времени;
+#   2..8  — строка GPU и строка метрик канонического вида;
+#   9, 10 — серия строк GPU (таблица процессов; в повторяемой группе остаётся
+#           номер последней) и разделители за ней: метрики ждутся для
+#           последней. 10 — следующая строка (с \n), которая будет разобрана
+#           как метрики; пусто, если дальше строка GPU, метка времени (они
+#           сбросят ожидание сами) или конец окна.
+# Все ветви серии завершаются успешно без возврата, поэтому поиск линеен.
+EVENT_B = re.compile(
+    rb"\n(?:(" + _TS + rb")\r*$"
+    rb"|\|" + _WS1 + rb"([0-9]+)" + _WS1 + _NWS + rb"[^\n]*\n" + _METRICS +
+    rb"|(?:\|" + _WS1 + rb"([0-9]+)" + _WS1 + _NWS + rb"[^\n]*(?:\n(?=" + _GPU_HEAD + rb")|(?=\n|\Z)))+"
+    rb"(?:\n(?:" + _SEP + rb"))*"
+    rb"(\n(?!" + _GPU_HEAD + rb"|" + _SEP + rb"|" + _TS + rb"\r*$|\Z)[^\n]*)?)",
+    re.M)
+TIMESTAMP_NL_B = re.compile(rb"\n" + _TS + rb"\r*$", re.M)
+NON_ASCII_B = re.compile(rb"[\x80-\xff]")
+
+LINE_OTHER, LINE_TS, LINE_GPU, LINE_SEP = range(4)
+NO_VALUE = -1  # None в типизированных массивах метрик
+
+class SnapshotColumns:
+    # Снапшоты в колоночном виде: метки времени, границы записей снапшота
+    # и по массиву на индекс GPU и каждую метрику.
+    __slots__ = ("timestamps", "starts", "gpu", "metrics")
+
+    def __init__(self):
+        self.timestamps: List[str] = []
+        self.starts = array("l", [0])
+        self.gpu = array("h")
+        self.metrics = [array("l") for _ in METRIC_SUFFIXES]
+
+    def __getstate__(self):
+        return (self.timestamps, self.starts, self.gpu, self.metrics)
+
+    def __setstate__(self, state):
+        self.timestamps, self.starts, self.gpu, self.metrics = state
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def add(self, ts: str, snapshot: Dict[int, Tuple[int, ...]]) -> None:
+        # Значения уже целые, отсутствующие заменены на NO_VALUE
+        self.timestamps.append(ts)
+        if snapshot:
+            self.gpu.extend(snapshot)
+            for column, values in zip(self.metrics, zip(*snapshot.values())):
+                column.extend(values)
+        self.starts.append(len(self.gpu))
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        names: Dict[int, List[str]] = {}
+        starts, gpu, metrics = self.starts, self.gpu, self.metrics
+        for i, ts in enumerate(self.timestamps):
+            row: Dict[str, Any] = {"timestamp": ts}
+            for j in range(starts[i], starts[i + 1]):
+                gid = gpu[j]
+                keys = names.get(gid)
+                if keys is None:
+                    keys = names[gid] = [f"gpu{gid}_{suffix}" for suffix in METRIC_SUFFIXES]
+                for key, column in zip(keys, metrics):
+                    value = column[j]
+                    row[key] = None if value == NO_VALUE else value
+            yield row
+
+def classify_line(line: str) -> Tuple[int, Any]:
+    # Строковый путь с теми же правилами, что и в iter_rows
+    m_ts = TIMESTAMP_RE.match(line)
+    if m_ts:
+        return LINE_TS, m_ts.group(1)
+    m_gpu = GPU_INFO_RE.match(line)
+    if m_gpu:
+        try:
+            return LINE_GPU, int(m_gpu.group(1))
+        except ValueError:
+            return LINE_GPU, None
+    if SEPARATOR_RE.match(line):
+        return LINE_SEP, None
+    return LINE_OTHER, line
+
+def metric_values(line: str) -> Tuple[int, ...]:
+    metrics = parse_metrics_line(line)
+    return tuple(NO_VALUE if metrics[suffix] is None else metrics[suffix]
+                 for suffix in METRIC_SUFFIXES)
+
+def scan_fast(mm, start: int, limit: int, size: int, final: bool) -> Tuple[SnapshotColumns, int]:
+    cols = SnapshotColumns()
+    current_ts: Optional[str] = None
+    snapshot: Dict[int, Tuple[int, ...]] = {}
+    expecting: Optional[int] = None
+    snapshot_start = start
+    ts_window: Optional[Tuple[int, int]] = None  # окно с последней меткой времени
+    if final:
+        # Строка, начатая до limit, разбирается целиком (как в iter_rows)
+        eff = limit
+        if limit < size and mm[limit - 1] != 10:
+            nl = mm.find(b"\n", limit, size)
+            eff = size if nl < 0 else nl + 1
+    else:
+        # Без final недописанная последняя строка (без \n) не разбирается
+        eff = min(limit, max(start, mm.rfind(b"\n", 0, size) + 1))
+
+    def step(p: int) -> int:
+        # Точный построчный разбор одной строки; возвращает начало следующей
+        nonlocal current_ts, snapshot, expecting, snapshot_start, ts_window
+        nl = mm.find(b"\n", p, size)
+        nxt = nl + 1
+        if nl < 0:
+            nl = nxt = size
+        end = nl
+        while end > p and mm[end - 1] == 13:  # \r
+            end -= 1
+        line: Optional[str] = None
+        if NON_ASCII_B.search(mm, p, nl):
+            kind, value = classify_line(mm[p:nl].decode("utf-8", errors="ignore").rstrip("\r\n"))
+            if kind == LINE_OTHER:
+                line, value = value, None
+        else:
+            kind, value = LINE_OTHER, None
+            m = TIMESTAMP_B.match(mm, p, end)
+            if m:
+                kind, value = LINE_TS, m.group(1).decode("ascii")
+            else:
+                m = GPU_INFO_B.match(mm, p, end)
+                if m:
+                    kind, value = LINE_GPU, int(m.group(1))
+                elif SEPARATOR_B.match(mm, p, end):
+                    kind = LINE_SEP
+
+        if kind == LINE_TS:
+            if current_ts is not None:
+                cols.add(current_ts, snapshot)
+            current_ts = value
+            snapshot = {}
+            snapshot_start = p
+            ts_window = None
+            expecting = None
+        elif kind == LINE_GPU:
+            expecting = value
+        elif kind == LINE_OTHER and expecting is not None:
+            snapshot[expecting] = metric_values(mm[p:end].decode("ascii") if line is None else line)
+            expecting = None
+        return nxt
+
+    find = mm.find
+    findall = EVENT_B.findall
+    add = cols.add
+    pos = start
+    dense = False
+    while pos < eff:
+        if pos == 0 or expecting is not None:
+            # первая строка файла (перед ней нет \n) или строка после серии
+            # GPU на границе окна
+            pos = step(pos)
+            continue
+        # Окно до ~FAST_WINDOW_BYTES целых строк; поиск начинается с \n,
+        # завершающего предыдущую строку
+        nl = find(b"\n", pos + FAST_WINDOW_BYTES, eff)
+        window_end = eff if nl < 0 else nl + 1
+        # Проверка окна на ASCII: isascii() по срезу быстрее поиска regex, но
+        # после найденной не-ASCII строки следующая вероятно рядом — там regex
+        na = None
+        if dense or not mm[pos:window_end].isascii():
+            na = NON_ASCII_B.search(mm, pos, window_end)
+        dense = na is not None
+        if na is not None:
+            # окно обрезается по строке с не-ASCII байтами, она — построчно
+            window_end = mm.rfind(b"\n", 0, na.start()) + 1
+            if window_end <= pos:
+                pos = step(pos)
                 continue
+        found = findall(mm, pos - 1, window_end)
+        for ts, gid, temp, power, cap, used, total, util, last, other in found:
+            if gid:
+                snapshot[int(gid)] = (int(temp), int(power), int(cap), int(used), int(total), int(util))
+            elif ts:
+                if current_ts is not None:
+                    add(current_ts, snapshot)
+                current_ts = ts.decode("ascii")
+                snapshot = {}
+                ts_window = (pos - 1, window_end)
+            elif other:
+                snapshot[int(last)] = metric_values(other[1:].decode("ascii").rstrip("\r"))
+        if found and found[-1][8] and not found[-1][9]:
+            # серия GPU в конце окна: строка метрик (если она будет) — в следующем
+            expecting = int(found[-1][8])
+        pos = window_end
 
-    if current_ts is not None and current_snapshot:
-        flush_snapshot()
+    if final:
+        if current_ts is not None:
+            add(current_ts, snapshot)
+        return cols, pos
+    if current_ts is None:
+        return cols, pos
+    if ts_window is not None:
+        # позиции findall не отдаёт: ищем последнюю метку в её окне
+        for m in TIMESTAMP_NL_B.finditer(mm, *ts_window):
+            snapshot_start = m.start() + 1
+    return cols, snapshot_start
 
-    return rows
+def parse_range_fast(filepath: str, start: int = 0, end: Optional[int] = None,
+                     final: bool = True) -> Tuple[SnapshotColumns, int]:
+    # Аналог iter_rows для быстрого движка: (снапшоты, смещение для продолжения)
+    with open(filepath, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        limit = size if end is None else min(end, size)
+        if limit <= start:
+            return SnapshotColumns(), start
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return scan_fast(mm, start, limit, size, final)
 
-def main():
-    ap = argparse.ArgumentParser(description="Parse nvidia-smi log to Excel for any number of GPUs.")
-    ap.add_argument("input", help="Path to nvidia_smi.log")
-    ap.add_argument("-o", "--output", default="gpu_metrics.xlsx", help="Output .xlsx file")
-    ap.add_argument("--sheet", default="metrics", help="Sheet name")
-    args = ap.parse_args()
+# --- CSV-лог сборщика (nvidia-smi_collector.py) ---
+# Первая строка — метка формата, вторая — заголовок с именами полей
+# --query-gpu, далее строка на GPU в каждом замере:
+#   2025-10-14 12:00:00.123,0,45,245.67,400.00,1024,81920,100,1410,1593,P0,0x0000000000000004,0,0
+# Замер (снапшот) — подряд идущие строки разных GPU: повтор индекса GPU
+# начинает следующий замер.
+QUERY_MAGIC = b"# autotest nvidia-smi query log"
 
-    rows = parse_log(args.input)
-    if not rows:
-        print("No data parsed.")
-        return
+# Поля, которых нет в табличном выводе nvidia-smi
+EXTRA_SUFFIXES = [
+    "sm_clock_mhz",
+    "mem_clock_mhz",
+    "pstate",
+    "throttle_reasons",
+    "ecc_corrected",
+    "ecc_uncorrected",
+]
+
+def _int_value(v: str) -> int:
+    return int(round(float(v)))
+
+QUERY_FIELDS = {
+    "temperature.gpu": ("temp_c", _int_value),
+    "power.draw": ("power_w", _int_value),
+    "power.limit": ("power_capacity_w", _int_value),
+    "memory.used": ("memory_used_mib", _int_value),
+    "memory.total": ("memory_total_mib", _int_value),
+    "utilization.gpu": ("utilization", _int_value),
+    "clocks.sm": ("sm_clock_mhz", _int_value),
+    "clocks.mem": ("mem_clock_mhz", _int_value),
+    "pstate": ("pstate", lambda v: int(v.lstrip("P"))),
+    "clocks_event_reasons.active": ("throttle_reasons", lambda v: int(v, 16)),
+    "clocks_throttle_reasons.active": ("throttle_reasons", lambda v: int(v, 16)),
+    "ecc.errors.corrected.volatile.total": ("ecc_corrected", _int_value),
+    "ecc.errors.uncorrected.volatile.total": ("ecc_uncorrected", _int_value),
+}
 
-    df = pd.DataFrame(rows)
+def is_query_log(filepath: str) -> bool:
+    with gzlog.open_log(filepath) as f:
+        return f.read(len(QUERY_MAGIC)) == QUERY_MAGIC
+
+def iter_query_rows(f: BinaryIO, start: int = 0, final: bool = True,
+                    cursor: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+    # Аналог iter_rows для CSV-лога сборщика; start — 0 или начало строки
+    # замера. Значения [N/A], [Not Supported] и т. п. -> None.
+    f.seek(0)
+    f.readline()  # метка формата
+    header = f.readline()
+    if not header.endswith(b"\n"):
+        if cursor is not None:
+            cursor["offset"] = start
+        return
+    names = header.decode("utf-8", errors="ignore").strip().split(",")
+    try:
+        gid_at = names.index("index")
+    except ValueError:
+        raise SystemExit(f"Malformed collector log header (no index column): {header!r}")
+    fields = [(i, *QUERY_FIELDS[n]) for i, n in enumerate(names) if n in QUERY_FIELDS]
 
-    # Динамическое формирование колонок под N GPU
-    # Находим все встреченные индексы GPU из имен колонок вида gpu{N}_metric
-    gpu_ids: List[int] = []
-    for col in df.columns:
-        if col.startswith("gpu") and "_" in col:
+    pos = max(start, f.tell())
+    snapshot_start = pos
+    row: Optional[Dict[str, Any]] = None
+    seen: set = set()
+    f.seek(pos)
+    for raw in f:
+        if not final and not raw.endswith(b"\n"):
+            break  # строка ещё дописывается
+        line_start = pos
+        pos += len(raw)
+        parts = raw.decode("utf-8", errors="ignore").rstrip("\r\n").split(",")
+        if len(parts) != len(names):
+            continue  # оборванная или испорченная строка
+        try:
+            gid = int(parts[gid_at])
+        except ValueError:
+            continue
+        if row is None or gid in seen:
+            if row is not None:
+                yield row
+            row = {"timestamp": parts[0]}
+            seen = set()
+            snapshot_start = line_start
+        seen.add(gid)
+        for i, suffix, conv in fields:
             try:
-                idx = int(col[3:col.index("_")])
-                if idx not in gpu_ids:
-                    gpu_ids.append(idx)
-            except Exception:
-                pass
-    gpu_ids.sort()
-
-    metric_suffixes = [
-        "temp_c",
-        "power_w",
-        "power_capacity_w",
-        "memory_used_mib",
-        "memory_total_mib",
-        "utilization",
-    ]
+                row[f"gpu{gid}_{suffix}"] = conv(parts[i])
+            except ValueError:
+                row[f"gpu{gid}_{suffix}"] = None
+        for suffix in METRIC_SUFFIXES:
+            row.setdefault(f"gpu{gid}_{suffix}", None)
+
+    if final:
+        if row is not None:
+            yield row
+        resume_at = pos
+    else:
+        # последний замер может быть неполным (не все GPU дописаны)
+        resume_at = snapshot_start if row is not None else pos
+    if cursor is not None:
+        cursor["offset"] = resume_at
+
+def expand_inputs(spec: str) -> List[str]:
+    # Файл, каталог (все nvidia-smi_*.log и CSV-логи сборщика nvidia-smi_*.csv
+    # внутри, в том числе сжатые rotate в .gz) или glob-шаблон
+    if os.path.isdir(spec):
+        return sorted(p for pattern in ("nvidia-smi_*.log", "nvidia-smi_*.csv",
+                                        "nvidia-smi_*.log.gz", "nvidia-smi_*.csv.gz")
+                      for p in glob.glob(os.path.join(spec, pattern)))
+    if glob.has_magic(spec):
+        return sorted(p for p in glob.glob(spec) if os.path.isfile(p))
+    return [spec]
+
+def split_chunks(filepath: str, chunk_bytes: int = CHUNK_BYTES) -> List[Tuple[int, int]]:
+    # Делит файл на байтовые диапазоны ~chunk_bytes, границы которых выровнены
+    # по строкам с меткой времени: каждый кусок начинается с нового снапшота и
+    # разбирается независимо с тем же результатом, что и последовательный проход.
+    size = os.path.getsize(filepath)
+    bounds = [0]
+    with open(filepath, "rb") as f:
+        while bounds[-1] + chunk_bytes < size:
+            pos = bounds[-1] + chunk_bytes
+            f.seek(pos)
+            pos += len(f.readline())  # дочитываем строку, в которую попали
+            for raw in f:
+                if TIMESTAMP_RE.match(raw.decode("utf-8", errors="ignore").rstrip("\r\n")):
+                    break
+                pos += len(raw)
+            if pos >= size:
+                break
+            bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def pack_rows(rows: Iterable[Dict[str, Any]]) -> Tuple[List[Tuple[str, ...]], List[Tuple[int, Tuple[Any, ...]]]]:
+    # Строки для передачи из дочернего процесса: наборы ключей передаются
+    # один раз, сами строки — кортежами значений (дешевле pickle)
+    keysets: Dict[Tuple[str, ...], int] = {}
+    packed: List[Tuple[int, Tuple[Any, ...]]] = []
+    for row in rows:
+        keys = tuple(row)
+        idx = keysets.setdefault(keys, len(keysets))
+        packed.append((idx, tuple(row.values())))
+    return list(keysets), packed
+
+def parse_chunk(filepath: str, start: int, end: int) -> Tuple[List[Tuple[str, ...]], List[Tuple[int, Tuple[Any, ...]]]]:
+    # Выполняется в дочернем процессе
+    with open(filepath, "rb") as f:
+        return pack_rows(iter_rows(f, start=start, end=end))
+
+def parse_block(filepath: str, block: "gzlog.Block", fast: bool) -> Any:
+    # Блок блочного .gz (начинается со снапшота) распаковывается и
+    # разбирается целиком в дочернем процессе; результат — как у
+    # parse_range_fast / parse_chunk
+    data = gzlog.read_block(filepath, block)
+    if fast:
+        return scan_fast(data, 0, len(data), len(data), True)
+    return pack_rows(iter_rows(io.BytesIO(data)))
+
+def iter_gzip_fast(f: BinaryIO) -> Iterator[Dict[str, Any]]:
+    # Быстрый движок по потоку .gz без индекса: распакованные куски
+    # разбираются как недописанный лог, хвостовой снапшот переносится в
+    # следующий кусок
+    buf = b""
+    for data in iter(lambda: f.read(CHUNK_BYTES), b""):
+        buf += data
+        cols, offset = scan_fast(buf, 0, len(buf), len(buf), False)
+        yield from cols.rows()
+        buf = buf[offset:]
+    yield from scan_fast(buf, 0, len(buf), len(buf), True)[0].rows()
+
+def iter_results(pool: ProcessPoolExecutor, task: Callable, tasks: Iterable[Tuple[Any, ...]],
+                 window: int, fast: bool) -> Iterator[Dict[str, Any]]:
+    # В работе не больше window кусков: память не растёт с длиной лога,
+    # а строки выдаются в порядке файла по мере готовности кусков.
+    # Быстрый движок возвращает из процесса колонки SnapshotColumns.
+    tasks = iter(tasks)
+    pending = deque(pool.submit(task, *args) for args in itertools.islice(tasks, window))
+    while pending:
+        result = pending.popleft().result()
+        nxt = next(tasks, None)
+        if nxt is not None:
+            pending.append(pool.submit(task, *nxt))
+        if fast:
+            yield from result[0].rows()
+            continue
+        keysets, packed = result
+        for idx, values in packed:
+            yield dict(zip(keysets[idx], values))
+
+def iter_gzip(filepath: str, pool: Optional[ProcessPoolExecutor] = None, window: int = 1,
+              fast: bool = False, since: Optional[str] = None,
+              until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    # .gz после rotate. Блочный .gz с индексом (gzlog.py compress): читаются
+    # только блоки интервала [since, until], в пуле — параллельно, каждый
+    # процесс распаковывает свой блок. Обычный .gz — последовательно потоком.
+    blocks = gzlog.load_index(filepath)
+    if blocks is not None and all(b.snapshot or b.raw_offset == 0 for b in blocks):
+        tasks = ((filepath, b, fast) for b in gzlog.select_blocks(blocks, since, until))
+        if pool is not None:
+            yield from iter_results(pool, parse_block, tasks, window, fast)
+            return
+        for args in tasks:
+            result = parse_block(*args)
+            if fast:
+                yield from result[0].rows()
+            else:
+                keysets, packed = result
+                for idx, values in packed:
+                    yield dict(zip(keysets[idx], values))
+        return
+    with gzlog.open_log(filepath) as f:
+        yield from iter_gzip_fast(f) if fast else iter_rows(f)
+
+def until_bound(until: Optional[str]) -> Optional[str]:
+    # Дата без времени в --until — конец этого дня (как catalog.parse_when)
+    if until is not None and len(until) == 10:
+        return until + " 23:59:59.999"
+    return until
+
+def in_range(rows: Iterable[Dict[str, Any]], since: Optional[str], until: Optional[str]) -> Iterator[Dict[str, Any]]:
+    # Метки "YYYY-MM-DD HH:MM:SS[.mmm]" сравниваются как строки;
+    # since/until — "YYYY-MM-DD[ HH:MM:SS]", как у --query
+    for row in rows:
+        ts = row.get("timestamp") or ""
+        if since is not None and ts < since:
+            continue
+        if until is not None and ts > until:
+            continue
+        yield row
 
+def iter_file(filepath: str, pool: Optional[ProcessPoolExecutor] = None,
+              window: int = 1, engine: str = "regex", since: Optional[str] = None,
+              until: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    until = until_bound(until)
+    rows = _iter_file(filepath, pool, window, engine == "fast", since, until)
+    if since is not None or until is not None:
+        rows = in_range(rows, since, until)
+    yield from rows
+
+def _iter_file(filepath: str, pool: Optional[ProcessPoolExecutor], window: int, fast: bool,
+               since: Optional[str], until: Optional[str]) -> Iterator[Dict[str, Any]]:
+    if is_query_log(filepath):
+        # CSV-лог сборщика разбирается последовательно: он в разы компактнее таблиц
+        with gzlog.open_log(filepath) as f:
+            yield from iter_query_rows(f)
+        return
+    if gzlog.is_gzip(filepath):
+        yield from iter_gzip(filepath, pool, window, fast, since, until)
+        return
+    if pool is None:
+        if fast:
+            # кусками, чтобы колонки не росли с длиной лога
+            for start, end in split_chunks(filepath):
+                yield from parse_range_fast(filepath, start, end)[0].rows()
+            return
+        with open(filepath, "rb") as f:
+            yield from iter_rows(f)
+        return
+    task = parse_range_fast if fast else parse_chunk
+    yield from iter_results(pool, task, ((filepath, start, end) for start, end in split_chunks(filepath)),
+                            window, fast)
+
+def merge_streams(streams: List[Iterator[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    # Строки одного файла идут в порядке файла; потоки разных файлов сливаются
+    # по метке времени (при равенстве — в порядке файлов).
+    if len(streams) == 1:
+        return streams[0]
+    return heapq.merge(*streams, key=lambda r: r.get("timestamp") or "")
+
+def iter_inputs(paths: List[str], jobs: int = 1, engine: str = "regex", since: Optional[str] = None,
+                until: Optional[str] = None,
+                observe: Optional[Callable[[str, Iterator[Dict[str, Any]]], Iterator[Dict[str, Any]]]] = None
+                ) -> Iterator[Dict[str, Any]]:
+    # Несколько логов и/или крупные логи разбираются кусками в пуле процессов;
+    # observe(path, rows) оборачивает поток каждого лога до слияния
+    observe = observe or (lambda path, rows: rows)
+    if jobs <= 1:
+        yield from merge_streams([observe(p, iter_file(p, engine=engine, since=since, until=until)) for p in paths])
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from merge_streams([observe(p, iter_file(p, pool, window=2 * jobs, engine=engine, since=since,
+                                                      until=until))
+                                  for p in paths])
+
+def parse_inputs(paths: List[str], jobs: int = 1, engine: str = "regex", since: Optional[str] = None,
+                 until: Optional[str] = None) -> List[Dict[str, Any]]:
+    return list(iter_inputs(paths, jobs, engine, since, until))
+
+def gpu_id_of(col: str) -> Optional[int]:
+    # gpu{N}_metric -> N
+    if not (col.startswith("gpu") and "_" in col):
+        return None
+    try:
+        return int(col[3:col.index("_")])
+    except ValueError:
+        return None
+
+def build_columns(keys) -> List[str]:
+    # Динамическое формирование колонок под N GPU; дополнительные поля
+    # CSV-лога сборщика — только если они есть в данных
+    keys = list(keys)
+    gpu_ids = sorted({gid for gid in map(gpu_id_of, keys) if gid is not None})
+    present = {k[k.index("_") + 1:] for k in keys if gpu_id_of(k) is not None}
+    suffixes = METRIC_SUFFIXES + [s for s in EXTRA_SUFFIXES if s in present]
     columns = ["timestamp"]
     for gid in gpu_ids:
-        for suffix in metric_suffixes:
-            cname = f"gpu{gid}_{suffix}"
-            if cname not in df.columns:
-                df[cname] = None
-            columns.append(cname)
+        for suffix in suffixes:
+            columns.append(f"gpu{gid}_{suffix}")
+    return columns
+
+def format_timestamp(ts: Optional[str]) -> Optional[str]:
+    # Формат времени: DD-MM-YYYY HH:mm:ss[.fff] (вход гарантирован TIMESTAMP_RE
+    # или сборщиком, поэтому достаточно переставить поля без разбора даты)
+    if ts is None or len(ts) < 19:
+        return ts
+    return f"{ts[8:10]}-{ts[5:7]}-{ts[0:4]}{ts[10:]}"
+
+def spool_rows(rows: Iterable[Dict[str, Any]], spool, keys: Dict[str, None], widths: Dict[str, int],
+               seen: int = 0) -> int:
+    # Строки — JSON в spool; keys и widths дополняются, seen — строк уже в нём
+    count = 0
+    with perfstats.stage("xlsx.spool"):
+        for row in rows:
+            if seen + count < WIDTH_SAMPLE_ROWS:
+                # ширина колонок оценивается по первым строкам
+                for k, v in row.items():
+                    widths[k] = max(widths.get(k, 0), len("" if v is None else str(v)))
+            keys.update(dict.fromkeys(row))
+            spool.write(json.dumps(row))
+            spool.write("\n")
+            count += 1
+    perfstats.tally("xlsx.spool", count)
+    return count
+
+def write_xlsx(rows: Iterable[Dict[str, Any]], output: str, sheet: str) -> int:
+    # Потоковая выгрузка: строки сбрасываются во временный файл (набор GPU,
+    # а значит и колонки, известен только после разбора), затем пишутся в
+    # write-only книгу. Память не зависит от длины лога.
+    keys: Dict[str, None] = {}
+    widths: Dict[str, int] = {}
+    out_dir = os.path.dirname(os.path.abspath(output))
+    with tempfile.TemporaryFile("w+", encoding="utf-8", dir=out_dir) as spool:
+        count = spool_rows(rows, spool, keys, widths)
+        if not count:
+            return 0
+        build_xlsx(spool, count, keys, widths, output, sheet)
+    return count
+
+def build_xlsx(spool, count: int, keys: Iterable[str], widths: Dict[str, int], output: str, sheet: str) -> None:
+    # write-only книга из строк spool (файл, открытый на чтение)
+    columns = build_columns(keys)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet)
+    # Перенос строк (для автовысоты) задаётся стилем колонки, а не ячейки
+    wrap = Alignment(wrap_text=True)
+    for col_idx, col_name in enumerate(columns, start=1):
+        dim = ws.column_dimensions[get_column_letter(col_idx)]
+        # небольшой запас + ограничитель ширины
+        dim.width = min(max(len(col_name), widths.get(col_name, 0)) + 2, 60)
+        dim.alignment = wrap
+
+    header = []
+    for col_name in columns:
+        cell = WriteOnlyCell(ws, value=col_name)
+        cell.alignment = wrap
+        header.append(cell)
+    ws.append(header)
+
+    spool.seek(0)
+    with perfstats.stage("xlsx.rows", count):
+        for line in spool:
+            row = json.loads(line)
+            ws.append([format_timestamp(row.get("timestamp"))] + [row.get(c) for c in columns[1:]])
+    with perfstats.stage("xlsx.save", count):
+        wb.save(output + ".tmp")
+    os.replace(output + ".tmp", output)
+
+def append_xlsx(rows: List[Dict[str, Any]], output: str, sheet: str, reset: bool = False) -> int:
+    # --resume: новые строки дописываются в <xlsx>.rows.jsonl (O(новых)), а
+    # книга каждый раз переписывается целиком из него потоково — O(всех
+    # строк) по времени, но без load_workbook: дописать строки в zip-архив
+    # xlsx на месте нельзя. reset — первый запуск: прежние строки отбрасываются.
+    meta_path = output + XLSX_META_SUFFIX
+    meta = {} if reset else load_checkpoint(meta_path)
+    if not reset and not meta and os.path.exists(output):
+        raise SystemExit(f"{output}: {meta_path} is missing; rerun without --resume to rebuild the workbook")
+    keys = dict.fromkeys(meta.get("keys", []))
+    widths = meta.get("widths", {})
+    seen = int(meta.get("rows", 0))
+    with open(output + XLSX_ROWS_SUFFIX, "w" if reset else "a", encoding="utf-8") as spool:
+        added = spool_rows(rows, spool, keys, widths, seen)
+    with open(output + XLSX_ROWS_SUFFIX, "r", encoding="utf-8") as spool:
+        build_xlsx(spool, seen + added, keys, widths, output, sheet)
+    save_checkpoint(meta_path, {"keys": list(keys), "widths": widths, "rows": seen + added})
+    return added
 
-    df = df[columns]
+# Длинная (tidy) схема хранилища: одна строка на GPU в снапшоте.
+# run_id и date — hive-партиции (run_id=<id>/date=<YYYY-MM-DD>/part-*.ext).
+# Метки времени — с миллисекундами (сборщик пишет замеры чаще раза в секунду).
+STORE_TYPES = [
+    ("gpu", "int16"),
+    ("temp_c", "int16"),
+    ("power_w", "int16"),
+    ("power_capacity_w", "int16"),
+    ("memory_used_mib", "int32"),
+    ("memory_total_mib", "int32"),
+    ("utilization", "int16"),
+    # только в CSV-логах сборщика, в остальных прогонах — null
+    ("sm_clock_mhz", "int16"),
+    ("mem_clock_mhz", "int16"),
+    ("pstate", "int8"),
+    ("throttle_reasons", "int64"),
+    ("ecc_corrected", "int64"),
+    ("ecc_uncorrected", "int64"),
+]
+STORE_EXT = {"parquet": "parquet", "feather": "feather", "csv": "csv"}
 
-    # Формат времени: DD-MM-YYYY HH:mm:ss
+def require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.dataset
+    except ImportError:
+        raise SystemExit("pyarrow is required for parquet/feather output and queries: pip install pyarrow")
+    return pyarrow
+
+def run_id_for(filepath: str) -> str:
+    # nvidia-smi_14-10-2025 12:00:00.log -> 14-10-2025_12_00_00
+    stem = os.path.basename(filepath)
+    for suffix in (".gz", ".log", ".csv"):
+        if stem.endswith(suffix):
+            stem = stem[:-len(suffix)]
+    if stem.startswith("nvidia-smi_"):
+        stem = stem[len("nvidia-smi_"):]
+    return re.sub(r"[^\w.-]+", "_", stem) or "run"
+
+def iter_long(rows: Iterable[Dict[str, Any]]) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+    # gpu{N}_metric-колонки широкой строки -> (timestamp, N, {metric: value})
+    for row in rows:
+        per_gpu: Dict[int, Dict[str, Any]] = {}
+        for key, value in row.items():
+            gid = gpu_id_of(key)
+            if gid is not None:
+                per_gpu.setdefault(gid, {})[key[key.index("_") + 1:]] = value
+        for gid, metrics in per_gpu.items():
+            yield row["timestamp"], gid, metrics
+
+def write_store_part(path: str, fmt: str, batch: Dict[str, List[Any]], host: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    if fmt == "csv":
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["timestamp", "host"] + [name for name, _ in STORE_TYPES])
+            for i, ts in enumerate(batch["timestamp"]):
+                w.writerow([ts, host] + ["" if batch[name][i] is None else batch[name][i] for name, _ in STORE_TYPES])
+    else:
+        pa = require_pyarrow()
+        n = len(batch["timestamp"])
+        columns = {
+            "timestamp": pa.array(batch["timestamp"], pa.string()).cast(pa.timestamp("ms")),
+            "host": pa.array([host] * n, pa.string()).dictionary_encode(),
+        }
+        for name, dtype in STORE_TYPES:
+            columns[name] = pa.array(batch[name], type=getattr(pa, dtype)())
+        table = pa.table(columns)
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(table, tmp, compression="zstd")
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(table, tmp, compression="zstd")
+    # part-файл появляется атомарно: читатели не видят полузаписанных файлов
+    os.replace(tmp, path)
+
+def write_store(rows: Iterable[Dict[str, Any]], root: str, fmt: str, host: str, run_id: str,
+                replace: bool = True) -> int:
+    # replace=True — повторный полный разбор прогона заменяет его партицию,
+    # replace=False (--resume) — новые строки дописываются отдельными part-файлами
+    run_dir = os.path.join(root, f"run_id={run_id}")
+    if replace and os.path.isdir(run_dir):
+        shutil.rmtree(run_dir)
+
+    names = ["timestamp"] + [name for name, _ in STORE_TYPES]
+    batch: Dict[str, List[Any]] = {name: [] for name in names}
+    batch_date: Optional[str] = None
+    count = 0
+
+    def flush():
+        nonlocal batch
+        if not batch["timestamp"]:
+            return
+        part = f"part-{time.time_ns()}.{STORE_EXT[fmt]}"
+        with perfstats.stage(f"store.{fmt}", len(batch["timestamp"])):
+            write_store_part(os.path.join(run_dir, f"date={batch_date}", part), fmt, batch, host)
+        batch = {name: [] for name in names}
+
+    for ts, gid, metrics in iter_long(rows):
+        date = ts[:10]
+        if date != batch_date or len(batch["timestamp"]) >= STORE_BATCH_ROWS:
+            flush()
+            batch_date = date
+        batch["timestamp"].append(ts)
+        batch["gpu"].append(gid)
+        for name, _ in STORE_TYPES[1:]:
+            batch[name].append(metrics.get(name))
+        count += 1
+    flush()
+    return count
+
+def load_store(root: str, fmt: str = "parquet", run_id: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               gpus: Optional[List[int]] = None):
+    # Чтение хранилища с фильтрами: партиции run_id/date отсекаются по пути,
+    # остальное проталкивается в сканер pyarrow (predicate pushdown).
+    pa = require_pyarrow()
+    ds = pa.dataset
+    partitioning = ds.partitioning(pa.schema([("run_id", pa.string()), ("date", pa.string())]), flavor="hive")
+    if fmt == "csv":
+        import pyarrow.csv as pacsv
+        types = {"timestamp": pa.timestamp("ms"), "host": pa.string()}
+        types.update({name: getattr(pa, dtype)() for name, dtype in STORE_TYPES})
+        file_format = ds.CsvFileFormat(convert_options=pacsv.ConvertOptions(
+            column_types=types, timestamp_parsers=[pacsv.ISO8601]))
+    else:
+        file_format = "ipc" if fmt == "feather" else fmt
+    # Явная схема: part-файлы старых версий (секунды, без полей сборщика)
+    # приводятся к ней, недостающие колонки читаются как null
+    schema = pa.schema([("timestamp", pa.timestamp("ms")), ("host", pa.dictionary(pa.int32(), pa.string()))] +
+                       [(name, getattr(pa, dtype)()) for name, dtype in STORE_TYPES] +
+                       [("run_id", pa.string()), ("date", pa.string())])
+    dataset = ds.dataset(root, format=file_format, partitioning=partitioning, schema=schema)
+
+    expr = None
+    def add(cond):
+        nonlocal expr
+        expr = cond if expr is None else expr & cond
+    if run_id:
+        add(ds.field("run_id") == run_id)
+    if since:
+        add(ds.field("date") >= since[:10])
+        add(ds.field("timestamp") >= pa.scalar(datetime.fromisoformat(since), pa.timestamp("ms")))
+    if until:
+        until = until_bound(until)
+        add(ds.field("date") <= until[:10])
+        add(ds.field("timestamp") <= pa.scalar(datetime.fromisoformat(until), pa.timestamp("ms")))
+    if gpus:
+        add(ds.field("gpu").isin(gpus))
+    return dataset.to_table(filter=expr)
+
+# --- Сводка прогона (--summary) ---
+# Считается на лету по потоку строк за тот же проход: по каждой GPU и минуте
+# и по прогону целиком min/max/mean/p95 метрик, плюс эпизоды упора в предел
+# мощности и провалов загрузки. Память не зависит от длины прогона: на
+# метрику — счётчики и скетч квантилей с ограниченным числом корзин.
+SUMMARY_METRICS = ["temp_c", "power_w", "utilization", "memory_used_mib"]
+SUMMARY_QUANTILE = 0.95
+# Относительная ошибка квантиля скетча
+SKETCH_ALPHA = 0.01
+
+class QuantileSketch:
+    # Логарифмические корзины (DDSketch): значение v > 0 попадает в корзину
+    # ceil(log_gamma(v)), квантиль — середина корзины с относительной ошибкой
+    # не больше SKETCH_ALPHA. Корзин не больше, чем log_gamma(max/min), т. е.
+    # несколько сотен для любых метрик GPU, сколько бы ни было замеров.
+    GAMMA = (1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA)
+    LOG_GAMMA = math.log(GAMMA)
+    _keys: Dict[Any, int] = {}  # кеш корзин: метрики целочисленные
+
+    __slots__ = ("buckets", "zero", "count")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+
+    def add(self, v) -> None:
+        self.count += 1
+        if v <= 0:
+            self.zero += 1
+            return
+        key = self._keys.get(v)
+        if key is None:
+            key = self._keys[v] = math.ceil(math.log(v) / self.LOG_GAMMA)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                return 2 * self.GAMMA ** key / (self.GAMMA + 1)
+        return None
+
+class MetricStats:
+    __slots__ = ("min", "max", "sum", "count", "sketch")
+
+    def __init__(self):
+        self.min = self.max = None
+        self.sum = 0
+        self.count = 0
+        self.sketch = QuantileSketch()
+
+    def add(self, v) -> None:
+        if self.count:
+            if v < self.min:
+                self.min = v
+            elif v > self.max:
+                self.max = v
+        else:
+            self.min = self.max = v
+        self.sum += v
+        self.count += 1
+        self.sketch.add(v)
+
+    def columns(self, prefix: str) -> Dict[str, Any]:
+        if not self.count:
+            return dict.fromkeys((f"{prefix}_min", f"{prefix}_max", f"{prefix}_mean", f"{prefix}_p95"))
+        # оценку скетча не выпускаем за фактические min/max
+        p95 = min(max(self.sketch.quantile(SUMMARY_QUANTILE), self.min), self.max)
+        return {f"{prefix}_min": self.min, f"{prefix}_max": self.max,
+                f"{prefix}_mean": round(self.sum / self.count, 2), f"{prefix}_p95": round(p95, 1)}
+
+class Episodes:
+    # Эпизоды состояния (упор в предел мощности, провал загрузки): число
+    # входов в состояние и суммарная длительность по меткам времени замеров.
+    # Эпизод начинается только после замера вне состояния, поэтому простой
+    # GPU до начала нагрузки провалом не считается.
+    __slots__ = ("count", "seconds", "active", "since", "primed")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.active = False
+        self.since = 0.0
+        self.primed = False
+
+    def update(self, state: bool, t: float) -> None:
+        if state and not self.active and self.primed:
+            self.count += 1
+            self.active = True
+            self.since = t
+        elif not state:
+            if self.active:
+                self.seconds += t - self.since
+                self.active = False
+            self.primed = True
+
+    def close(self, t: float) -> Tuple[int, float]:
+        return self.count, round(self.seconds + (t - self.since if self.active else 0.0), 1)
+
+class GpuSummary:
+    __slots__ = ("run", "minute", "power_cap", "util_drop", "throttle", "has_throttle",
+                 "first", "last", "samples")
+
+    def __init__(self):
+        self.run = {m: MetricStats() for m in SUMMARY_METRICS}
+        self.minute = {m: MetricStats() for m in SUMMARY_METRICS}
+        self.power_cap = Episodes()
+        self.util_drop = Episodes()
+        self.throttle = Episodes()
+        self.has_throttle = False
+        self.first = self.last = None
+        self.samples = 0
+
+class RunSummary:
+    # observe() пропускает строки дальше без изменений и попутно считает
+    # сводку; минутные строки отдаются в emit_minute по мере закрытия минут.
+    # Каждый лог — свой прогон (run): GPU, минуты и время считаются по
+    # прогонам отдельно, даже если строки логов перемежаются по времени.
+    def __init__(self, emit_minute: Callable[[Dict[str, Any]], None],
+                 power_cap_ratio: float = 0.98, util_drop_below: int = 90):
+        self.emit_minute = emit_minute
+        self.power_cap_ratio = power_cap_ratio
+        self.util_drop_below = util_drop_below
+        self.gpus: Dict[Tuple[str, int], GpuSummary] = {}
+        self.minute: Dict[str, str] = {}
+        self.t: Dict[str, float] = {}
+
+    def observe(self, rows: Iterable[Dict[str, Any]], run: str = "") -> Iterator[Dict[str, Any]]:
+        for row in rows:
+            self.add(row, run)
+            yield row
+        self.flush_minute(run)
+
+    def add(self, row: Dict[str, Any], run: str = "") -> None:
+        ts = row.get("timestamp")
+        if not ts:
+            return
+        if ts[:16] != self.minute.get(run):
+            self.flush_minute(run)
+            self.minute[run] = ts[:16]
+        try:
+            self.t[run] = t = datetime.fromisoformat(ts).timestamp()
+        except ValueError:
+            t = self.t.get(run, 0.0)
+        per_gpu: Dict[int, Dict[str, Any]] = {}
+        for key, value in row.items():
+            gid = gpu_id_of(key)
+            if gid is not None:
+                per_gpu.setdefault(gid, {})[key[key.index("_") + 1:]] = value
+        for gid, metrics in per_gpu.items():
+            g = self.gpus.get((run, gid))
+            if g is None:
+                g = self.gpus[(run, gid)] = GpuSummary()
+                g.first = ts
+            g.last = ts
+            g.samples += 1
+            for m in SUMMARY_METRICS:
+                v = metrics.get(m)
+                if v is not None:
+                    g.run[m].add(v)
+                    g.minute[m].add(v)
+            power, cap, util = metrics.get("power_w"), metrics.get("power_capacity_w"), metrics.get("utilization")
+            if power is not None and cap:
+                g.power_cap.update(power >= cap * self.power_cap_ratio, t)
+            if util is not None:
+                g.util_drop.update(util < self.util_drop_below, t)
+            reasons = metrics.get("throttle_reasons")
+            if reasons is not None:
+                # бит 0x1 — простой GPU, это не троттлинг
+                g.has_throttle = True
+                g.throttle.update(bool(reasons & ~0x1), t)
+
+    def flush_minute(self, run: str = "") -> None:
+        minute = self.minute.pop(run, None)
+        if minute is None:
+            return
+        for key in sorted(k for k in self.gpus if k[0] == run):
+            g = self.gpus[key]
+            if not any(s.count for s in g.minute.values()):
+                continue
+            out: Dict[str, Any] = {"run": run, "minute": minute, "gpu": key[1],
+                                   "samples": max(s.count for s in g.minute.values())}
+            for m in SUMMARY_METRICS:
+                out.update(g.minute[m].columns(m))
+            self.emit_minute(out)
+            g.minute = {m: MetricStats() for m in SUMMARY_METRICS}
+
+    def run_rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        for run, gid in sorted(self.gpus):
+            g = self.gpus[(run, gid)]
+            t = self.t.get(run, 0.0)
+            out: Dict[str, Any] = {"run": run, "gpu": gid, "first": g.first, "last": g.last, "samples": g.samples}
+            for m in SUMMARY_METRICS:
+                out.update(g.run[m].columns(m))
+            out["power_cap_periods"], out["power_cap_s"] = g.power_cap.close(t)
+            out["util_drop_periods"], out["util_drop_s"] = g.util_drop.close(t)
+            if g.has_throttle:
+                out["throttle_periods"], out["throttle_s"] = g.throttle.close(t)
+            rows.append(out)
+        return rows
+
+def summary_columns(kind: str) -> List[str]:
+    head = ["run", "minute", "gpu", "samples"] if kind == "minute" else ["run", "gpu", "first", "last", "samples"]
+    cols = head + [f"{m}_{s}" for m in SUMMARY_METRICS for s in ("min", "max", "mean", "p95")]
+    if kind == "run":
+        cols += ["power_cap_periods", "power_cap_s", "util_drop_periods", "util_drop_s",
+                 "throttle_periods", "throttle_s"]
+    return cols
+
+def open_summary(path: str, power_cap_ratio: float = 0.98,
+                 util_drop_below: int = 90) -> Tuple[RunSummary, Callable[[], int]]:
+    # Сводка пишется в .xlsx (листы per_run и per_minute) или .json. Минутные
+    # строки уходят в файл сразу (write-only книга / поток JSON), в памяти
+    # остаётся только текущая минута. Возвращает (сводка, close) — close()
+    # дописывает итог по прогону и возвращает число GPU в нём.
+    minute_cols = summary_columns("minute")
+    if path.endswith(".json"):
+        f = open(path + ".tmp", "w", encoding="utf-8")
+        f.write('{"per_minute": [')
+        first = [True]
+
+        def emit(row):
+            f.write(("\n" if first[0] else ",\n") + json.dumps(row))
+            first[0] = False
+
+        summary = RunSummary(emit, power_cap_ratio, util_drop_below)
+
+        def close():
+            rows = summary.run_rows()
+            f.write('\n], "per_run": ' + json.dumps(rows, indent=1) + "}\n")
+            f.close()
+            os.replace(path + ".tmp", path)
+            return len(rows)
+        return summary, close
+
+    wb = Workbook(write_only=True)
+    # per_run — первым листом, хотя заполняется в конце: листы write-only книги
+    # пишутся в отдельные временные файлы независимо
+    ws_run = wb.create_sheet("per_run")
+    ws_minute = wb.create_sheet("per_minute")
+    ws_minute.append(minute_cols)
+
+    def emit(row):
+        row["minute"] = format_timestamp(row["minute"] + ":00")[:16]
+        ws_minute.append([row.get(c) for c in minute_cols])
+
+    summary = RunSummary(emit, power_cap_ratio, util_drop_below)
+
+    def close():
+        rows = summary.run_rows()
+        run_cols = summary_columns("run")
+        ws_run.append(run_cols)
+        for row in rows:
+            row["first"], row["last"] = format_timestamp(row["first"]), format_timestamp(row["last"])
+            ws_run.append([row.get(c) for c in run_cols])
+        wb.save(path)
+        return len(rows)
+    return summary, close
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    # Атомарная запись: чекпоинт не должен остаться полузаписанным
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+def head_digest(filepath: str, length: int) -> str:
+    with open(filepath, "rb") as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+def resume_log(filepath: str, checkpoint: str, write: Callable[[List[Dict[str, Any]], bool], int],
+               final: bool = False, engine: str = "regex") -> int:
+    # Инкрементальный разбор: только байты, дописанные после чекпоинта.
+    # Чекпоинт хранит начало последнего (возможно недописанного) снапшота,
+    # inode файла, хеш его первых HEAD_BYTES байт (copytruncate оставляет
+    # inode, а файл до следующего опроса может дорасти до прежнего
+    # смещения) и метку времени последней выгруженной строки.
+    # write(rows, append) выгружает строки в выбранный формат.
+    st = os.stat(filepath)
+    state = load_checkpoint(checkpoint)
+    offset = int(state.get("offset", 0))
+    last_ts = state.get("last_ts")
+    head_len = int(state.get("head_len", 0))
+    rotated = bool(state) and (state.get("inode") != st.st_ino or offset > st.st_size or head_len > st.st_size
+                               or bool(head_len) and head_digest(filepath, head_len) != state.get("head"))
+    if rotated:
+        print(f"Log rotated or truncated, restarting from offset 0: {filepath}")
+        offset = 0
+
+    cursor: Dict[str, int] = {}
+    if is_query_log(filepath):
+        with gzlog.open_log(filepath) as f:
+            rows = list(iter_query_rows(f, start=offset, final=final, cursor=cursor))
+    elif gzlog.is_gzip(filepath):
+        # сжатый rotate лог уже не дописывается; смещения — в распакованных данных
+        with gzlog.open_log(filepath) as f:
+            rows = list(iter_rows(f, start=offset, final=True, cursor=cursor))
+    elif engine == "fast":
+        cols, cursor["offset"] = parse_range_fast(filepath, start=offset, final=final)
+        rows = list(cols.rows())
+    else:
+        with open(filepath, "rb") as f:
+            rows = list(iter_rows(f, start=offset, final=final, cursor=cursor))
+    if rotated and last_ts:
+        # при copytruncate новый файл может повторять уже выгруженные снапшоты
+        rows = [r for r in rows if (r.get("timestamp") or "") > last_ts]
+
+    if rows:
+        write(rows, bool(state))
+        last_ts = rows[-1].get("timestamp")
+
+    head_len = min(HEAD_BYTES, st.st_size)
+    save_checkpoint(checkpoint, {
+        "path": os.path.abspath(filepath),
+        "inode": st.st_ino,
+        "offset": cursor.get("offset", offset),
+        "head_len": head_len,
+        "head": head_digest(filepath, head_len),
+        "last_ts": last_ts,
+    })
+    return len(rows)
+
+def profile_path(args) -> str:
+    # Профиль — рядом с логами прогона (для --query — рядом с выгрузкой)
+    if args.query:
+        return (args.output or "gpu_metrics_query") + ".profile.json"
+    inputs = expand_inputs(args.input)
+    if len(inputs) == 1:
+        return inputs[0] + ".profile.json"
+    base = args.input if os.path.isdir(args.input) else os.path.dirname(inputs[0]) if inputs else "."
+    return os.path.join(base, "nvidia-smi_parse.profile.json")
+
+def count_lines(path: str) -> int:
+    n = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            n += block.count(b"\n")
+    return n
+
+def run(ap: argparse.ArgumentParser, args) -> None:
+    if args.query:
+        fmt = "parquet" if args.format == "xlsx" else args.format
+        with perfstats.stage("query.load"):
+            table = load_store(args.input, fmt, run_id=args.run_id, since=args.since, until=args.until,
+                               gpus=args.gpu)
+        perfstats.tally("query.load", table.num_rows)
+        import pyarrow.csv as pacsv
+        with perfstats.stage("query.write", table.num_rows):
+            pacsv.write_csv(table.sort_by([("timestamp", "ascending"), ("gpu", "ascending")]),
+                            args.output or sys.stdout.buffer)
+        if args.output:
+            print(f"Saved {table.num_rows} rows to {args.output}")
+        return
+
+    store = args.format != "xlsx"
+    output = args.output or ("gpu_metrics_store" if store else "gpu_metrics.xlsx")
+    if store and args.format != "csv":
+        require_pyarrow()
+
+    inputs = expand_inputs(args.input)
+    if not inputs:
+        print(f"No nvidia-smi logs found: {args.input}")
+        return
+
+    if args.resume or args.follow:
+        if len(inputs) > 1:
+            ap.error("--resume/--follow work with a single log file")
+        if args.summary or args.summary_only:
+            ap.error("--summary needs a full pass over the log (not --resume/--follow)")
+        run_id = args.run_id or run_id_for(args.input)
+        if store:
+            checkpoint = args.checkpoint or os.path.join(output, "_checkpoints", f"{run_id}.json")
+            os.makedirs(os.path.dirname(checkpoint), exist_ok=True)
+            def write(rows, append):
+                return write_store(rows, output, args.format, args.host, run_id, replace=not append)
+        else:
+            checkpoint = args.checkpoint or output + ".ckpt.json"
+            def write(rows, append):
+                return append_xlsx(rows, output, args.sheet, reset=not append)
+        try:
+            while True:
+                try:
+                    with perfstats.stage("resume"):
+                        added = resume_log(args.input, checkpoint, write, final=args.final, engine=args.engine)
+                    perfstats.tally("resume", added)
+                    print(f"Appended {added} rows to {output}")
+                except FileNotFoundError:
+                    print(f"Log not found (yet): {args.input}")
+                    if not args.follow:
+                        return
+                if not args.follow:
+                    return
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            return
+
+    summary = None
+    if args.summary or args.summary_only:
+        summary_path = args.summary or "gpu_summary.xlsx"
+        summary, close_summary = open_summary(summary_path, args.power_cap_ratio, args.util_drop_below)
+
+    # сводка — по прогону на каждый лог (колонка run); имя прогона — как в
+    # хранилище, для логов с одинаковым именем прогона — имя файла
+    runs: Dict[str, str] = {}
+    for path in inputs:
+        run_id = run_id_for(path)
+        runs[path] = os.path.basename(path) if run_id in runs.values() else run_id
+
+    def observe(path, rows):
+        rows = perfstats.iterate("parse", rows)
+        return perfstats.iterate("summary", summary.observe(rows, runs[path])) if summary is not None else rows
+
+    def stream(paths):
+        return iter_inputs(paths, jobs=args.jobs, engine=args.engine, since=args.since, until=args.until,
+                           observe=observe)
+
+    if args.summary_only:
+        saved = sum(1 for _ in stream(inputs))
+    elif store:
+        # В хранилище каждый лог — отдельный прогон (партиция run_id); с
+        # --run-id все логи идут в одну партицию: она заменяется один раз,
+        # первым логом, остальные дописываются
+        saved = 0
+        replaced = set()
+        for path in inputs:
+            run_id = args.run_id or run_id_for(path)
+            with perfstats.stage("write"):
+                saved += write_store(stream([path]), output, args.format, args.host, run_id,
+                                     replace=run_id not in replaced)
+            replaced.add(run_id)
+    else:
+        with perfstats.stage("write"):
+            saved = write_xlsx(stream(inputs), output, args.sheet)
+    if summary is not None:
+        with perfstats.stage("summary.save"):
+            gpus = close_summary()
+        print(f"Saved summary of {saved} snapshots ({gpus} GPU) to {summary_path}")
+    if not saved:
+        print("No data parsed.")
+        return
+    if not args.summary_only:
+        print(f"Saved {saved} rows to {output}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Parse nvidia-smi log to Excel or a columnar store for any number of GPUs.")
+    ap.add_argument("input", help="Path to nvidia_smi.log, a directory with nvidia-smi_*.log or a glob "
+                                  "(with --query: store root)")
+    ap.add_argument("-o", "--output",
+                    help="Output .xlsx file (default: gpu_metrics.xlsx) or store root (default: gpu_metrics_store)")
+    ap.add_argument("--format", choices=["xlsx", "parquet", "feather", "csv"], default="xlsx",
+                    help="xlsx: wide sheet; parquet/feather/csv: long schema partitioned by run_id/date")
+    ap.add_argument("--sheet", default="metrics", help="Sheet name")
+    ap.add_argument("--host", default=socket.gethostname(), help="Host name stored with the rows")
+    ap.add_argument("--run-id", help="Run id partition (default: derived from the log file name)")
+    ap.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                    help="Worker processes for chunked parsing (1 = serial)")
+    ap.add_argument("--engine", choices=["regex", "fast"], default="regex",
+                    help="Parser backend: regex (line by line) or fast (mmap + typed arrays, same rows)")
+    ap.add_argument("--resume", action="store_true",
+                    help="Parse only bytes appended since the last checkpoint and append rows to output")
+    ap.add_argument("--follow", action="store_true", help="Like --resume, repeated every --interval seconds")
+    ap.add_argument("--interval", type=float, default=60.0, help="Poll interval for --follow (sec)")
+    ap.add_argument("--checkpoint", help="Checkpoint file (default: <output>.ckpt.json, "
+                                         "for stores <output>/_checkpoints/<run_id>.json)")
+    ap.add_argument("--final", action="store_true",
+                    help="With --resume: also flush the trailing snapshot (run has finished)")
+    ap.add_argument("--query", action="store_true",
+                    help="Load rows from the store at input (filters: --run-id --since --until --gpu) and write CSV")
+    ap.add_argument("--since", help="Only rows from 'YYYY-MM-DD[ HH:MM:SS]' (with --query: store filter; "
+                                    "indexed .gz logs skip blocks outside the range)")
+    ap.add_argument("--until", help="Only rows until 'YYYY-MM-DD[ HH:MM:SS]'")
+    ap.add_argument("--gpu", type=int, action="append", help="Query: GPU index (repeatable)")
+    ap.add_argument("--summary", help="Also write per-GPU per-minute and per-run min/max/mean/p95 and "
+                                      "power-cap/utilization-drop episodes to .xlsx or .json (same pass)")
+    ap.add_argument("--summary-only", action="store_true",
+                    help="Write only the summary (default gpu_summary.xlsx), skip raw rows")
+    ap.add_argument("--power-cap-ratio", type=float, default=0.98,
+                    help="Summary: power_w >= ratio * power_capacity_w counts as sitting at the cap")
+    ap.add_argument("--util-drop-below", type=int, default=90,
+                    help="Summary: utilization below this (after being at or above it) counts as a drop")
+    ap.add_argument("--profile", action="store_true", default=os.environ.get("AUTOTEST_PROFILE") == "1",
+                    help="Record per-stage wall/CPU time, rows/s, peak RSS and GC to a JSON file "
+                         "(default: <log>.profile.json; also AUTOTEST_PROFILE=1)")
+    ap.add_argument("--profile-json", help="Profile JSON path (implies --profile)")
+    ap.add_argument("--profile-stacks",
+                    help="Also write call stacks: *.prof = cProfile stats, otherwise folded stacks for flamegraph")
+    args = ap.parse_args()
+
+    if not (args.profile or args.profile_json or args.profile_stacks):
+        run(ap, args)
+        return
+    prof = perfstats.Profiler("nvidia-smi_table-parser", stacks=args.profile_stacks)
+    perfstats.activate(prof)
     try:
-        dt = pd.to_datetime(df["timestamp"])
-        df["timestamp"] = dt.dt.strftime("%d-%m-%Y %H:%M:%S")
-    except Exception:
-        pass
-
-    with pd.ExcelWriter(args.output, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name=args.sheet)
-        ws = writer.sheets[args.sheet]
-
-        # Автоширина колонок и перенос строк для автовысоты
-        wrap = Alignment(wrap_text=True)
-        for col_idx, col_name in enumerate(df.columns, start=1):
-            values = [str(col_name)] + ["" if v is None else str(v) for v in df[col_name].tolist()]
-            max_len = max(len(v) for v in values)
-            # небольшой запас + ограничитель ширины
-            ws.column_dimensions[get_column_letter(col_idx)].width = min(max_len + 2, 60)
-
-        for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                cell.alignment = wrap  # Excel сам подстроит высоту при переносе
-
-    print(f"Saved {len(df)} rows to {args.output}")
+        run(ap, args)
+    finally:
+        perfstats.activate(None)
+        prof.stop()
+        path = args.profile_json or profile_path(args)
+        # строки входа считаются после замера, отдельным проходом
+        for p in [] if args.query else expand_inputs(args.input):
+            prof.count("input_bytes", os.path.getsize(p))
+            if not gzlog.is_gzip(p):
+                prof.count("input_lines", count_lines(p))
+        print(perfstats.format_report(prof.write(path)))
+        print(f"Profile saved to {path}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
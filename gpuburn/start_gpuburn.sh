@@ -32,8 +32,13 @@ NVIDIA_SMI_LOGFILE="$LOGDIR/nvidia-smi_$(date +"${AUTOTEST_FORMAT_DATE:-%d-%m-%Y
 # Формат даты и времени
 DATE_FORMAT="+%d-%m-%Y %H:%M:%S"
 
-# Интервал логирования
+# Интервал логирования (табличный вывод nvidia-smi, сек)
 INTERVAL=10
+# Шаг сборщика nvidia-smi --query-gpu (мс); LOG_FORMAT=table — прежний
+# табличный лог раз в INTERVAL секунд
+SAMPLE_MS="${AUTOTEST_GPU_SAMPLE_MS:-1000}"
+LOG_FORMAT="${AUTOTEST_GPU_LOG_FORMAT:-query}"
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
 # Проверка наличия gpu_burn
 if ! command -v ./gpu_burn &> /dev/null; then
@@ -71,12 +76,18 @@ echo $GPU_BURN_PID > "$LOGDIR/gpu_burn.pid"
 echo -e "${GREEN}Запущен gpu_burn с PID $GPU_BURN_PID${NC}"
 
 # Логирование nvidia-smi
-(
-    while kill -0 $GPU_BURN_PID 2>/dev/null; do
-        nvidia-smi
-        sleep $INTERVAL
-    done
-) >> "$NVIDIA_SMI_LOGFILE" 2>&1 &
+if [ "$LOG_FORMAT" != "table" ] && command -v python3 &> /dev/null; then
+    NVIDIA_SMI_LOGFILE="${NVIDIA_SMI_LOGFILE%.log}.csv"
+    nohup python3 "$SCRIPT_DIR/nvidia-smi_collector.py" -o "$NVIDIA_SMI_LOGFILE" \
+        --interval-ms "$SAMPLE_MS" --pid "$GPU_BURN_PID" > "$LOGDIR/nvidia-smi_collector.log" 2>&1 &
+else
+    (
+        while kill -0 $GPU_BURN_PID 2>/dev/null; do
+            nvidia-smi
+            sleep $INTERVAL
+        done
+    ) >> "$NVIDIA_SMI_LOGFILE" 2>&1 &
+fi
 NVIDIA_SMI_PID=$!
 echo -e "${GREEN}Запущено логирование nvidia-smi с PID $NVIDIA_SMI_PID${NC}"
 
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# gzlog.py — чтение логов .gz как обычных и блочное сжатие с индексом.
+# open_log() отдаёт поток байтов (или текста) и для обычного файла, и для
+# .gz, поэтому логи после autotest.sh rotate читаются без распаковки на диск.
+# compress() пишет .gz из независимо сжатых блоков (~4 МиБ исходных данных,
+# каждый — отдельный gzip-член; gzip/zcat читают такой файл как обычный).
+# Блок начинается с новой строки, по возможности со строки-метки времени
+# (начало снапшота nvidia-smi), поэтому каждый блок разбирается отдельно.
+# Рядом пишется индекс <file>.gz.idx: смещения блоков в сжатом и исходном
+# файле и первая метка времени блока — запрос по интервалу времени читает
+# только нужные блоки, а блоки распаковываются параллельно. Сжатие с append
+# дописывает в .gz новый сегмент (первый блок и mtime исходного лога), и
+# trim() убирает из начала файла сегменты старше срока хранения.
+#   gzlog.py compress -j 8 nvidia-smi_14-10-2025.log
+#   gzlog.py cat --since "2025-10-14 12:00" --until "2025-10-14 13:00" nvidia-smi_14-10-2025.log.gz
+
+import argparse
+import gzip
+import io
+import itertools
+import json
+import os
+import re
+import shutil
+import sys
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Any, Dict, Iterator, List, NamedTuple, Optional
+
+GZIP_MAGIC = b"\x1f\x8b"
+INDEX_SUFFIX = ".idx"
+INDEX_VERSION = 1
+# Исходных байт на блок: крупнее — лучше сжатие, мельче — точнее переход
+# по времени и больше блоков для параллельной распаковки
+BLOCK_BYTES = 4 * 1024 * 1024
+# Насколько дальше размера блока искать строку-метку времени для границы
+# блока: не больше четверти блока, иначе мелкие блоки вырастают в разы
+BOUNDARY_SEARCH_BYTES = 1024 * 1024
+# Строка-метка времени (начало снапшота таблицы nvidia-smi)
+SNAPSHOT_LINE_B = re.compile(rb"\n([0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2})\r?\n")
+# Первая сортируемая метка времени в начале строки (таблицы и CSV сборщика)
+LINE_TS_B = re.compile(rb"^([0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2})", re.M)
+
+class Block(NamedTuple):
+    offset: int        # смещение gzip-члена в .gz
+    length: int        # его длина
+    raw_offset: int    # смещение данных блока в исходном файле
+    raw_length: int
+    first_ts: Optional[str]
+    snapshot: bool     # блок начинается со строки-метки времени
+
+def is_gzip(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(2) == GZIP_MAGIC
+    except OSError:
+        return False
+
+def open_log(path: str, mode: str = "rb") -> IO:
+    # Лог или его .gz (по сигнатуре, а не по имени); режимы "rb" и "r"
+    # (текст UTF-8, битые байты заменяются)
+    f = gzip.open(path, "rb") if is_gzip(path) else open(path, "rb")
+    if mode == "rb":
+        return f
+    return io.TextIOWrapper(f, encoding="utf-8", errors="replace")
+
+def index_path(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+def read_index(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(index_path(path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        size = os.path.getsize(path)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != INDEX_VERSION or data.get("size") != size:
+        return None
+    return data
+
+def write_index(path: str, block_bytes: int, blocks: List[List[Any]], segments: List[List[int]]) -> None:
+    with open(index_path(path) + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "size": os.path.getsize(path), "block_bytes": block_bytes,
+                   "blocks": blocks, "segments": segments}, f)
+    os.replace(index_path(path) + ".tmp", index_path(path))
+
+def load_index(path: str) -> Optional[List[Block]]:
+    # Индекс блоков или None, если его нет или он не от этого файла
+    data = read_index(path)
+    return None if data is None else [Block(*b) for b in data["blocks"]]
+
+def load_segments(path: str, data: Optional[Dict[str, Any]] = None) -> Optional[List[List[int]]]:
+    # [первый блок, mtime_ns исходного лога] каждого сжатия; в индексе без
+    # сегментов весь файл — один сегмент с mtime самого .gz
+    data = read_index(path) if data is None else data
+    if data is None:
+        return None
+    return data.get("segments") or [[0, os.stat(path).st_mtime_ns]]
+
+def read_block(path: str, block: Block, f: Optional[IO] = None) -> bytes:
+    # Распаковка одного блока; zlib отпускает GIL, поэтому блоки можно
+    # распаковывать параллельно в потоках
+    if f is None:
+        with open(path, "rb") as fh:
+            fh.seek(block.offset)
+            data = fh.read(block.length)
+    else:
+        f.seek(block.offset)
+        data = f.read(block.length)
+    return zlib.decompress(data, 31)
+
+def select_blocks(blocks: List[Block], since: Optional[str] = None,
+                  until: Optional[str] = None) -> List[Block]:
+    # Блоки, которые могут содержать записи с меткой в [since, until].
+    # Метки сравниваются как строки "YYYY-MM-DD HH:MM:SS"; блок без метки
+    # относится к интервалу предыдущего.
+    if since is None and until is None:
+        return list(blocks)
+    starts: List[Optional[str]] = []
+    for b in blocks:
+        starts.append(b.first_ts or (starts[-1] if starts else None))
+    nexts: List[Optional[str]] = [None] * len(blocks)
+    for i in range(len(blocks) - 2, -1, -1):
+        nexts[i] = blocks[i + 1].first_ts or nexts[i + 1]
+    out = []
+    for b, start, nxt in zip(blocks, starts, nexts):
+        if until is not None and start is not None and start > until:
+            break
+        if since is not None and nxt is not None and nxt < since:
+            continue
+        out.append(b)
+    return out
+
+def iter_blocks(path: str, blocks: List[Block], jobs: int = 1) -> Iterator[bytes]:
+    # Данные блоков по порядку; при jobs > 1 распаковываются параллельно,
+    # в работе не больше 2 * jobs блоков
+    if jobs <= 1:
+        with open(path, "rb") as f:
+            for b in blocks:
+                yield read_block(path, b, f)
+        return
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        it = iter(blocks)
+        pending = deque(pool.submit(read_block, path, b) for b in itertools.islice(it, 2 * jobs))
+        while pending:
+            data = pending.popleft().result()
+            b = next(it, None)
+            if b is not None:
+                pending.append(pool.submit(read_block, path, b))
+            yield data
+
+# --- сжатие ---
+
+def split_blocks(f: IO, block_bytes: int = BLOCK_BYTES) -> Iterator[bytes]:
+    # Куски исходного потока ~block_bytes, оканчивающиеся переводом строки;
+    # граница по возможности — перед строкой-меткой времени
+    search = max(1, min(BOUNDARY_SEARCH_BYTES, block_bytes // 4))
+    buf = b""
+    eof = False
+    while not eof or buf:
+        while not eof and len(buf) < block_bytes + search:
+            data = f.read(block_bytes)
+            if not data:
+                eof = True
+            buf += data
+        if eof and len(buf) <= block_bytes + search:
+            if buf:
+                yield buf
+            return
+        m = SNAPSHOT_LINE_B.search(buf, block_bytes - 1, block_bytes + search)
+        if m is not None:
+            cut = m.start() + 1
+        else:
+            nl = buf.find(b"\n", block_bytes - 1)
+            cut = len(buf) if nl < 0 else nl + 1
+        yield buf[:cut]
+        buf = buf[cut:]
+
+def compress_block(data: bytes, level: int) -> bytes:
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def block_info(data: bytes) -> Dict[str, Any]:
+    m = LINE_TS_B.search(data, 0, min(len(data), 64 * 1024))
+    return {"first_ts": m.group(1).decode("ascii") if m else None,
+            "snapshot": bool(re.match(rb"[0-9]{4}-[0-9]{2}-[0-9]{2} [0-9]{2}:[0-9]{2}:[0-9]{2}\r?\n", data))}
+
+def compress(src: str, dst: Optional[str] = None, block_bytes: int = BLOCK_BYTES, level: int = 6,
+             jobs: int = 1, keep: bool = False, append: bool = False) -> str:
+    # src (обычный или .gz) -> блочный .gz с индексом; как gzip, исходный файл
+    # удаляется (если не keep) и mtime сохраняется. append — если dst уже
+    # есть (лог пересоздан после прошлого сжатия), блоки дописываются после
+    # его содержимого вместо перезаписи. Возвращает путь к .gz.
+    st = os.stat(src)
+    if dst is None:
+        dst = src if is_gzip(src) else src + ".gz"
+    tmp = dst + ".tmp"
+    blocks: List[List[Any]] = []
+    segments: List[List[int]] = []
+    offset = raw_offset = 0
+    indexed = True
+    with open(tmp, "wb") as fout:
+        if append and dst != src and os.path.exists(dst):
+            # gzip из нескольких членов читается как одно целое; индекс
+            # продолжается, если он был у прежнего .gz
+            old = load_index(dst)
+            segments = load_segments(dst) or []
+            with open(dst, "rb") as f:
+                while True:
+                    chunk = f.read(1 << 20)
+                    if not chunk:
+                        break
+                    fout.write(chunk)
+            offset = fout.tell()
+            if old is None:
+                indexed = False
+            else:
+                blocks = [list(b) for b in old]
+                raw_offset = sum(b.raw_length for b in old)
+    segments.append([len(blocks), st.st_mtime_ns])
+    with open_log(src) as fin, open(tmp, "ab") as fout, ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        pending: deque = deque()
+
+        def drain(limit: int) -> None:
+            nonlocal offset, raw_offset
+            while len(pending) > limit:
+                raw, fut = pending.popleft()
+                member = fut.result()
+                fout.write(member)
+                info = block_info(raw)
+                blocks.append([offset, len(member), raw_offset, len(raw), info["first_ts"], info["snapshot"]])
+                offset += len(member)
+                raw_offset += len(raw)
+
+        for raw in split_blocks(fin, block_bytes):
+            pending.append((raw, pool.submit(compress_block, raw, level)))
+            drain(2 * max(1, jobs))
+        drain(0)
+    os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(tmp, dst)
+    if indexed:
+        write_index(dst, block_bytes, blocks, segments)
+    else:
+        try:
+            os.remove(index_path(dst))
+        except FileNotFoundError:
+            pass
+    if not keep and dst != src:
+        os.remove(src)
+        try:
+            os.remove(index_path(src))
+        except FileNotFoundError:
+            pass
+    return dst
+
+def trim(path: str, before_ns: int, dry_run: bool = False) -> int:
+    # Убирает из начала .gz сегменты, исходный лог которых в последний раз
+    # менялся раньше before_ns: блоки — независимые gzip-члены, поэтому
+    # остаток остаётся целым gzip. Весь файл старше срока не трогается
+    # (его удаляют целиком), .gz без индекса — тоже. Возвращает освобождённые
+    # (при dry_run — освобождаемые) байты.
+    data = read_index(path)
+    if data is None:
+        return 0
+    segments = load_segments(path, data)
+    keep = next((i for i, (_, mtime) in enumerate(segments) if mtime >= before_ns), None)
+    if not keep:
+        return 0
+    blocks = [Block(*b) for b in data["blocks"]]
+    first = segments[keep][0]
+    size = os.path.getsize(path)
+    cut = blocks[first].offset if first < len(blocks) else size
+    if dry_run:
+        return cut
+    raw_cut = blocks[first].raw_offset if first < len(blocks) else sum(b.raw_length for b in blocks)
+    st = os.stat(path)
+    with open(path, "rb") as fin, open(path + ".tmp", "wb") as fout:
+        fin.seek(cut)
+        shutil.copyfileobj(fin, fout, 1 << 20)
+    os.utime(path + ".tmp", ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(path + ".tmp", path)
+    write_index(path, data["block_bytes"],
+                [[b.offset - cut, b.length, b.raw_offset - raw_cut, b.raw_length, b.first_ts, b.snapshot]
+                 for b in blocks[first:]],
+                [[start - first, mtime] for start, mtime in segments[keep:]])
+    return cut
+
+def main():
+    ap = argparse.ArgumentParser(description="Block-indexed gzip for AutoTest logs: compress and read by time range.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("compress", help="Compress logs (or recompress .gz) into indexed blocks, like gzip")
+    c.add_argument("files", nargs="+")
+    c.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Compression threads")
+    c.add_argument("--block-mb", type=float, default=BLOCK_BYTES / 2**20, help="Uncompressed MiB per block")
+    c.add_argument("--level", type=int, default=6, help="gzip level 1-9")
+    c.add_argument("-k", "--keep", action="store_true", help="Keep the source file")
+    r = sub.add_parser("cat", help="Print a log (.gz or plain); with an index only blocks in the time range")
+    r.add_argument("file")
+    r.add_argument("--since", help="From 'YYYY-MM-DD[ HH:MM:SS]' (block granularity)")
+    r.add_argument("--until", help="Until 'YYYY-MM-DD[ HH:MM:SS]' (block granularity)")
+    r.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Decompression threads")
+    i = sub.add_parser("info", help="Show the block index of a .gz")
+    i.add_argument("file")
+    args = ap.parse_args()
+
+    if args.cmd == "compress":
+        failed = 0
+        for path in args.files:
+            try:
+                before = os.path.getsize(path)
+                dst = compress(path, block_bytes=int(args.block_mb * 2**20), level=args.level,
+                               jobs=args.jobs, keep=args.keep)
+                print(f"{path} -> {dst} ({before / 2**20:.1f} -> {os.path.getsize(dst) / 2**20:.1f} MiB)")
+            except (OSError, EOFError, zlib.error) as e:
+                print(f"{path}: {e}", file=sys.stderr)
+                failed += 1
+        sys.exit(1 if failed else 0)
+    elif args.cmd == "cat":
+        out = sys.stdout.buffer
+        blocks = load_index(args.file) if is_gzip(args.file) else None
+        if blocks is None:
+            with open_log(args.file) as f:
+                for data in iter(lambda: f.read(1 << 20), b""):
+                    out.write(data)
+            return
+        for data in iter_blocks(args.file, select_blocks(blocks, args.since, args.until), args.jobs):
+            out.write(data)
+    elif args.cmd == "info":
+        blocks = load_index(args.file)
+        if blocks is None:
+            print("no index (plain or single-stream gzip: read sequentially)")
+            return
+        raw = sum(b.raw_length for b in blocks)
+        print(f"{len(blocks)} blocks, {raw / 2**20:.1f} MiB -> {os.path.getsize(args.file) / 2**20:.1f} MiB")
+        for b in blocks:
+            print(f"{b.offset:>12} {b.length:>10} {b.raw_offset:>12} {b.raw_length:>10}  {b.first_ts or '-'}"
+                  f"{'' if b.snapshot else '  (mid-snapshot)'}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        sys.exit(0)
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+# logarchive.py — архив логов для collect: все корни логов (AUTOTEST_LOG_DIR,
+# AUTOTEST_GPU_LOG_DIR, ~/htop-res, ~/ram_stress_logs) за один проход, сжатие
+# блоками в пуле потоков (zlib и lzma отпускают GIL) и дедупликация по
+# содержимому между архивами.
+# Архив — обычный tar (autotest_logs_<дата>.tar) без общего сжатия: на файл —
+# член <путь от $HOME>.gz из независимо сжатых блоков (как gzlog.py, граница
+# блока — перевод строки), последним — манифест autotest_manifest.json. В
+# манифесте на каждый файл размер, mtime и список блоков: SHA-256 исходных
+# данных блока, архив, в котором лежат его сжатые байты, смещение и длина.
+# Следующий collect берёт за основу манифест прошлого архива: файлы с тем же
+# размером и mtime не читаются вовсе, у изменённых сжимаются и пишутся только
+# блоки с новым хешем (дописанный лог — его новые блоки и последний), прочие
+# ссылаются на прежние архивы. Манифест каждого архива полный, поэтому
+# список и восстановление любого архива идут по одному манифесту: читаются
+# только блоки нужных файлов, без распаковки остального.
+# Полный архив (первый, --full или после --max-chain инкрементальных подряд)
+# распаковывается и обычными tar -xf + gunzip; инкрементальный — этим скриптом.
+#   logarchive.py create -o ~/AutoTest_Archives/autotest_logs_run.tar
+#   logarchive.py list ~/AutoTest_Archives/autotest_logs_run.tar
+#   logarchive.py restore -C /tmp/restore --only 'gpu_burn_logs/*' ~/AutoTest_Archives/autotest_logs_run.tar
+
+import argparse
+import fnmatch
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import socket
+import sys
+import tarfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import catalog
+import gzlog
+
+ARCHIVE_PREFIX = "autotest_logs_"
+MANIFEST_NAME = "autotest_manifest.json"
+MANIFEST_VERSION = 1
+# Инкрементальных архивов подряд до следующего полного: длиннее цепочка —
+# больше архивов нужно для восстановления и нельзя удалять старые
+MAX_CHAIN = 8
+# Уже сжатые файлы (ротация, прошлые архивы) хранятся как есть
+STORED_SUFFIXES = (".gz", ".xz", ".zst", ".bz2", ".tgz", ".zip")
+# кодек -> (расширение члена, сжатие блока, распаковка)
+CODECS: Dict[str, Tuple[str, Callable[[bytes, int], bytes], Callable[[bytes], bytes]]] = {
+    "gzip": (".gz", lambda data, level: gzip.compress(data, compresslevel=level, mtime=0),
+             lambda data: zlib.decompress(data, 31)),
+    "xz": (".xz", lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+    "store": ("", lambda data, level: data, lambda data: data),
+}
+# Блок в манифесте: [архив, смещение в нём, длина, исходная длина, sha256]
+ARCHIVE, OFFSET, LENGTH, RAW_LENGTH, SHA = range(5)
+
+class ArchiveError(Exception):
+    pass
+
+# --- манифест ---
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    # Манифест из архива: по заголовкам tar, без распаковки содержимого
+    try:
+        with tarfile.open(path, "r:") as tar:
+            f = tar.extractfile(tar.getmember(MANIFEST_NAME))
+            data = json.load(f)
+    except KeyError:
+        raise ArchiveError(f"{path}: no {MANIFEST_NAME} (not made by logarchive.py)")
+    except (OSError, tarfile.TarError, ValueError) as e:
+        raise ArchiveError(f"{path}: {e}")
+    if data.get("version") != MANIFEST_VERSION:
+        raise ArchiveError(f"{path}: unsupported manifest version {data.get('version')}")
+    return data
+
+def find_base(archive_dir: str, exclude: str, host: str) -> Optional[str]:
+    # Самый свежий архив этого хоста с манифестом
+    try:
+        names = [n for n in os.listdir(archive_dir) if n.startswith(ARCHIVE_PREFIX) and n.endswith(".tar")]
+    except OSError:
+        return None
+    paths = [os.path.join(archive_dir, n) for n in names]
+    for path in sorted(paths, key=lambda p: os.path.getmtime(p), reverse=True):
+        if os.path.abspath(path) == os.path.abspath(exclude):
+            continue
+        try:
+            if read_manifest(path).get("host") == host:
+                return path
+        except ArchiveError:
+            continue
+    return None
+
+def missing_depends(manifest: Dict[str, Any], archive_dir: str) -> List[str]:
+    return [n for n in manifest["depends"] if n != manifest["archive"]
+            and not os.path.isfile(os.path.join(archive_dir, n))]
+
+# --- запись tar ---
+
+class TarWriter:
+    """tar с членами, размер которых известен только после записи данных.
+
+    Заголовок резервируется до данных и переписывается в end(), поэтому
+    данные пишутся потоком, без буфера на файл. Формат GNU: длина заголовка
+    не зависит от размера члена.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.f = open(path + ".tmp", "wb")
+        self.info: Optional[tarfile.TarInfo] = None
+        self.start = 0
+        self.data_start = 0
+
+    def _header(self, info: tarfile.TarInfo) -> bytes:
+        return info.tobuf(tarfile.GNU_FORMAT, "utf-8", "surrogateescape")
+
+    def begin(self, name: str, mtime: float) -> int:
+        # Возвращает смещение данных члена в файле архива
+        info = tarfile.TarInfo(name)
+        info.mtime = int(mtime)
+        info.mode = 0o644
+        self.info = info
+        self.start = self.f.tell()
+        self.f.write(self._header(info))
+        self.data_start = self.f.tell()
+        return self.data_start
+
+    def write(self, data: bytes) -> int:
+        offset = self.f.tell()
+        self.f.write(data)
+        return offset
+
+    def end(self) -> None:
+        size = self.f.tell() - self.data_start
+        self.f.write(b"\0" * (-size % tarfile.BLOCKSIZE))
+        end = self.f.tell()
+        self.info.size = size
+        header = self._header(self.info)
+        if len(header) != self.data_start - self.start:
+            raise ArchiveError(f"{self.info.name}: tar header size changed")
+        self.f.seek(self.start)
+        self.f.write(header)
+        self.f.seek(end)
+        self.info = None
+
+    def add(self, name: str, data: bytes, mtime: float) -> None:
+        self.begin(name, mtime)
+        self.write(data)
+        self.end()
+
+    def close(self) -> None:
+        self.f.write(b"\0" * (2 * tarfile.BLOCKSIZE))
+        self.f.close()
+        os.replace(self.path + ".tmp", self.path)
+
+    def abort(self) -> None:
+        self.f.close()
+        try:
+            os.remove(self.path + ".tmp")
+        except FileNotFoundError:
+            pass
+
+# --- создание ---
+
+def home_relative(path: str) -> str:
+    # Путь внутри архива: от $HOME, как у прежнего tar -C "$HOME"
+    home = os.path.realpath(os.path.expanduser("~"))
+    real = os.path.realpath(path)
+    if real.startswith(home + os.sep):
+        return os.path.relpath(real, home)
+    return real.lstrip(os.sep)
+
+def log_files(roots: Dict[str, str], skip_dir: str) -> Iterator[Tuple[str, os.stat_result]]:
+    # Файлы всех корней (catalog.walk: без дублей вложенных корней), кроме
+    # каталога архивов, если он лежит внутри корня логов
+    skip = os.path.realpath(skip_dir) + os.sep
+    for _, path, st in catalog.walk(roots):
+        if os.path.realpath(path).startswith(skip) or path.endswith(".tmp"):
+            continue
+        yield path, st
+
+def file_codec(path: str, codec: str) -> str:
+    return "store" if path.endswith(STORED_SUFFIXES) else codec
+
+def pack_block(raw: bytes, known: Dict[str, List[Any]], codec: str, level: int) -> Tuple[str, Optional[bytes]]:
+    # В потоке пула: хеш блока и, если такого блока ещё нет, сжатие
+    sha = hashlib.sha256(raw).hexdigest()
+    if sha + codec in known:
+        return sha, None
+    return sha, CODECS[codec][1](raw, level)
+
+def create(output: str, roots: Dict[str, str], base: Optional[str] = None, codec: str = "gzip",
+           level: int = 6, jobs: int = 1, block_bytes: int = gzlog.BLOCK_BYTES,
+           max_chain: int = MAX_CHAIN) -> Dict[str, Any]:
+    # Архив output; base — манифест-основа (None — полный архив). Возвращает
+    # манифест; stats — сколько файлов и байт прочитано, записано и найдено
+    # в прежних архивах.
+    name = os.path.basename(output)
+    archive_dir = os.path.dirname(os.path.abspath(output))
+    host = socket.gethostname()
+    prev: Dict[str, Dict[str, Any]] = {}
+    known: Dict[str, List[Any]] = {}
+    chain = 0
+    if base is not None:
+        manifest = read_manifest(base)
+        if os.path.dirname(os.path.abspath(base)) != archive_dir:
+            raise ArchiveError(f"{base}: the base archive must be in {archive_dir}")
+        if manifest["chain"] + 1 > max_chain or missing_depends(manifest, archive_dir):
+            base = None  # цепочка слишком длинная или разорвана: полный архив
+        else:
+            chain = manifest["chain"] + 1
+            prev = {e["path"]: e for e in manifest["files"]}
+            for e in manifest["files"]:
+                for b in e["blocks"]:
+                    known.setdefault(b[SHA] + e["codec"], b)
+    # Полный архив не ссылается на блоки, даже внутри себя: у каждого файла
+    # свой член со всеми блоками, и tar -xf + gunzip восстанавливает всё
+    full = base is None
+    stats = {"files": 0, "unchanged": 0, "read": 0, "read_bytes": 0, "raw_bytes": 0,
+             "new_blocks": 0, "dup_blocks": 0, "stored_bytes": 0}
+    entries: List[Dict[str, Any]] = []
+    changed: List[Tuple[str, os.stat_result, Dict[str, Any]]] = []
+    for path, st in log_files(roots, archive_dir):
+        rel = home_relative(path)
+        fc = file_codec(path, codec)
+        stats["files"] += 1
+        stats["raw_bytes"] += st.st_size
+        old = prev.get(rel)
+        if old is not None and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns and old["codec"] == fc:
+            entries.append(old)
+            stats["unchanged"] += 1
+            continue
+        entry = {"path": rel, "size": 0, "mtime_ns": st.st_mtime_ns, "codec": fc, "blocks": []}
+        entries.append(entry)
+        changed.append((path, st, entry))
+
+    writer = TarWriter(output)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            pending: deque = deque()
+            # член tar текущего файла: открыт при первом записанном блоке
+            state = {"entry": None, "open": False}
+
+            def finish_member() -> None:
+                if state["open"]:
+                    writer.end()
+                    state["open"] = False
+
+            def drain(limit: int) -> None:
+                while len(pending) > limit:
+                    entry, raw_len, fut = pending.popleft()
+                    if entry is not state["entry"]:
+                        finish_member()
+                        state["entry"] = entry
+                    sha, packed = fut.result()
+                    key = sha + entry["codec"]
+                    if not full and key in known:
+                        # блок есть в прежнем архиве или уже записан в этот
+                        entry["blocks"].append(known[key])
+                        stats["dup_blocks"] += 1
+                        continue
+                    if not state["open"]:
+                        writer.begin(entry["path"] + CODECS[entry["codec"]][0], entry["mtime_ns"] / 1e9)
+                        state["open"] = True
+                    block = [name, writer.write(packed), len(packed), raw_len, sha]
+                    known[key] = block
+                    entry["blocks"].append(block)
+                    stats["new_blocks"] += 1
+                    stats["stored_bytes"] += len(packed)
+
+            def submit(entry: Dict[str, Any], raw: bytes) -> None:
+                pending.append((entry, len(raw), pool.submit(pack_block, raw, {} if full else known,
+                                                             entry["codec"], level)))
+                drain(2 * max(1, jobs))
+
+            for path, st, entry in changed:
+                try:
+                    f = open(path, "rb")
+                except OSError as e:
+                    print(f"{path}: {e}", file=sys.stderr)
+                    entries.remove(entry)
+                    continue
+                with f:
+                    stats["read"] += 1
+                    for raw in gzlog.split_blocks(f, block_bytes):
+                        entry["size"] += len(raw)
+                        stats["read_bytes"] += len(raw)
+                        submit(entry, raw)
+                if full and not entry["size"]:
+                    # пустой файл — член из одного пустого блока
+                    submit(entry, b"")
+            drain(0)
+            finish_member()
+        depends = sorted({b[ARCHIVE] for e in entries for b in e["blocks"]} - {name})
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "archive": name,
+            "host": host,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "base": os.path.basename(base) if base else None,
+            "chain": chain,
+            "codec": codec,
+            "block_bytes": block_bytes,
+            "roots": {label: home_relative(p) for label, p in roots.items() if p and os.path.isdir(p)},
+            "depends": depends,
+            "stats": stats,
+            "files": sorted(entries, key=lambda e: e["path"]),
+        }
+        writer.add(MANIFEST_NAME, json.dumps(manifest, separators=(",", ":")).encode("utf-8"), datetime.now().timestamp())
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    return manifest
+
+# --- чтение ---
+
+def select(manifest: Dict[str, Any], only: Optional[List[str]]) -> List[Dict[str, Any]]:
+    if not only:
+        return manifest["files"]
+    return [e for e in manifest["files"] if any(fnmatch.fnmatch(e["path"], p) for p in only)]
+
+def restore(archive: str, dest: Optional[str], only: Optional[List[str]] = None, jobs: int = 1) -> Tuple[int, int]:
+    # Файлы манифеста (или отобранные шаблонами only) в dest; dest=None —
+    # только проверка хешей. Блоки читаются pread из архивов цепочки и
+    # распаковываются в пуле. Возвращает (файлов, байт).
+    manifest = read_manifest(archive)
+    archive_dir = os.path.dirname(os.path.abspath(archive))
+    missing = missing_depends(manifest, archive_dir)
+    if missing:
+        raise ArchiveError(f"{archive} needs missing archives in {archive_dir}: {', '.join(missing)}")
+    files = select(manifest, only)
+    fds: Dict[str, int] = {}
+    for n in {b[ARCHIVE] for e in files for b in e["blocks"]}:
+        fds[n] = os.open(os.path.join(archive_dir, n), os.O_RDONLY)
+
+    def unpack(codec: str, block: List[Any]) -> bytes:
+        data = CODECS[codec][2](os.pread(fds[block[ARCHIVE]], block[LENGTH], block[OFFSET]))
+        if len(data) != block[RAW_LENGTH] or hashlib.sha256(data).hexdigest() != block[SHA]:
+            raise ArchiveError(f"{block[ARCHIVE]}@{block[OFFSET]}: block checksum mismatch")
+        return data
+
+    total = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            for e in files:
+                out = None
+                if dest is not None:
+                    target = os.path.join(dest, e["path"])
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    out = open(target + ".tmp", "wb")
+                try:
+                    pending: deque = deque()
+                    blocks = iter(e["blocks"])
+                    for b in blocks:
+                        pending.append(pool.submit(unpack, e["codec"], b))
+                        if len(pending) >= 2 * max(1, jobs):
+                            break
+                    while pending:
+                        data = pending.popleft().result()
+                        b = next(blocks, None)
+                        if b is not None:
+                            pending.append(pool.submit(unpack, e["codec"], b))
+                        if out is not None:
+                            out.write(data)
+                        total += len(data)
+                except BaseException:
+                    if out is not None:
+                        out.close()
+                        os.remove(target + ".tmp")
+                    raise
+                if out is not None:
+                    out.close()
+                    os.utime(target + ".tmp", ns=(e["mtime_ns"], e["mtime_ns"]))
+                    os.replace(target + ".tmp", target)
+    finally:
+        for fd in fds.values():
+            os.close(fd)
+    return len(files), total
+
+def stored_in(entry: Dict[str, Any], name: str) -> str:
+    where = {b[ARCHIVE] for b in entry["blocks"]}
+    if not where or where == {name}:
+        return "here"
+    if name in where:
+        return f"here + {len(where) - 1} older"
+    return ", ".join(sorted(where))
+
+def main():
+    ap = argparse.ArgumentParser(description="Deduplicating, incremental, multithreaded log archives for collect.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("create", help="Archive all log roots (incremental on top of the newest archive)")
+    c.add_argument("-o", "--output", help="Archive path (default: <archive-dir>/autotest_logs_<date>.tar)")
+    c.add_argument("--log-dir", default=os.environ.get("AUTOTEST_LOG_DIR", os.path.expanduser("~/AutoTest_Logs")))
+    c.add_argument("--gpu-log-dir", default=os.environ.get("AUTOTEST_GPU_LOG_DIR", os.path.expanduser("~/gpu_burn_logs")))
+    c.add_argument("--archive-dir", default=os.environ.get("AUTOTEST_ARCHIVE_DIR",
+                                                           os.path.expanduser("~/AutoTest_Archives")))
+    c.add_argument("--full", action="store_true", help="Store every file, do not reference older archives")
+    c.add_argument("--base", help="Base archive (default: the newest archive of this host in the archive dir)")
+    c.add_argument("--max-chain", type=int, default=MAX_CHAIN,
+                   help="Incremental archives in a row before a full one")
+    c.add_argument("--codec", choices=["gzip", "xz"], default="gzip")
+    c.add_argument("--level", type=int, default=6, help="gzip level 1-9 / xz preset 0-9")
+    c.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Compression threads")
+    c.add_argument("--block-mb", type=float, default=gzlog.BLOCK_BYTES / 2**20, help="Uncompressed MiB per block")
+    for cmd, text in (("list", "List files of an archive from its manifest"),
+                      ("info", "Show archive summary and the archives it references")):
+        p = sub.add_parser(cmd, help=text)
+        p.add_argument("archive")
+    for cmd, text in (("restore", "Restore files (incremental archives: from the whole chain)"),
+                      ("verify", "Decompress and check block hashes without writing")):
+        p = sub.add_parser(cmd, help=text)
+        p.add_argument("archive")
+        p.add_argument("--only", action="append", metavar="GLOB", help="Only paths matching GLOB (repeatable)")
+        p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Decompression threads")
+        if cmd == "restore":
+            p.add_argument("-C", "--directory", default=".", help="Destination (paths are relative to $HOME)")
+    args = ap.parse_args()
+
+    try:
+        if args.cmd == "create":
+            output = args.output
+            if output is None:
+                stamp = datetime.now().strftime(os.environ.get("AUTOTEST_FORMAT_DATE", "%d-%m-%Y %H:%M:%S"))
+                output = os.path.join(args.archive_dir, f"{ARCHIVE_PREFIX}{stamp}.tar")
+            os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+            base = None
+            if not args.full:
+                base = args.base or find_base(os.path.dirname(os.path.abspath(output)), output, socket.gethostname())
+            roots = catalog.default_roots()
+            roots.pop("archive")
+            roots.update({"log": args.log_dir, "gpu": args.gpu_log_dir})
+            m = create(output, roots, base, args.codec, args.level, args.jobs, int(args.block_mb * 2**20),
+                       args.max_chain)
+            s = m["stats"]
+            kind = f"incremental on {m['base']} (chain {m['chain']})" if m["base"] else "full"
+            print(f"{output}: {kind}; {s['files']} files, {s['raw_bytes'] / 2**20:.1f} MiB; "
+                  f"{s['unchanged']} unchanged, {s['read']} read ({s['read_bytes'] / 2**20:.1f} MiB); "
+                  f"{s['new_blocks']} new blocks ({s['stored_bytes'] / 2**20:.1f} MiB stored), "
+                  f"{s['dup_blocks']} already archived")
+        elif args.cmd == "list":
+            m = read_manifest(args.archive)
+            for e in m["files"]:
+                mtime = datetime.fromtimestamp(e["mtime_ns"] / 1e9).isoformat(sep=" ", timespec="seconds")
+                print(f"{e['size']:>12}  {mtime}  {e['path']}  [{stored_in(e, m['archive'])}]")
+        elif args.cmd == "info":
+            m = read_manifest(args.archive)
+            s = m["stats"]
+            print(f"{m['archive']}: {m['host']}, {m['created']}, "
+                  + (f"incremental on {m['base']} (chain {m['chain']})" if m["base"] else "full"))
+            print(f"  {len(m['files'])} files, {sum(e['size'] for e in m['files']) / 2**20:.1f} MiB; "
+                  f"stored here {s['stored_bytes'] / 2**20:.1f} MiB in {s['new_blocks']} blocks, "
+                  f"{s['dup_blocks']} blocks referenced, codec {m['codec']}")
+            missing = set(missing_depends(m, os.path.dirname(os.path.abspath(args.archive))))
+            for n in m["depends"]:
+                print(f"  needs {n}" + (" (MISSING)" if n in missing else ""))
+        else:
+            dest = os.path.expanduser(args.directory) if args.cmd == "restore" else None
+            n, size = restore(args.archive, dest, args.only, args.jobs)
+            print(f"{'Restored' if dest is not None else 'Verified'} {n} files, {size / 2**20:.1f} MiB"
+                  + (f" to {dest}" if dest is not None else ""))
+    except ArchiveError as e:
+        raise SystemExit(str(e))
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        sys.exit(0)
@@ -71,7 +71,7 @@ nvme_temp="N/A"; nvme_err="N/A"
 if command -v nvme >/dev/null 2>&1; then
   nvme_dev=$(ls /dev/nvme*n1 2>/dev/null | head -n1)
   if [ -n "$nvme_dev" ]; then
-    nvme_temp=$(nvme smart-log "$nvme_dev" 2>/dev/null | awk -F':' '/^temperature/ {gsub(/[^0-9]/, "", $2); print $2" C"; exit}')
+    nvme_temp=$(nvme smart-log "$nvme_dev" 2>/dev/null | awk -F':' '/^temperature/ {match($2, /[0-9]+/); print substr($2, RSTART, RLENGTH)" C"; exit}')
     [ -z "$nvme_temp" ] && nvme_temp="N/A"
     nvme_err=$(nvme smart-log "$nvme_dev" 2>/dev/null | awk -F':' '/media_errors/ {gsub(/[^0-9]/, "", $2); print $2; exit}')
     [ -z "$nvme_err" ] && nvme_err="N/A"
@@ -90,4 +90,4 @@ fi
 
 # Запись строки в лог
 printf "%-19s | %-12s | %-8s | %-8s | %-8s | %-8s | %-8s | %-10s | %-10s | %-8s | %-6s | %-8s | %-7s | %-7s | %-9s | %-8s | %-10s\n" \
-  "$timestamp" "$top_process" "$cpu_freq" "$cpu_temp" "$cpu_load" "$gpu_freq" "$gpu_temp" "$gpu_mem_clock" "$gpu_mem_used" "$gpu_mem_total" "$net_if" "$net_link" "$rx_b" "$tx_b" "$nvme_temp" "$nvme_err" "$disk_health" >> "$LOGFILE"
+  "$timestamp" "$top_process" "$cpu_freq" "$cpu_temp" "$cpu_load" "$gpu_freq" "$gpu_temp" "$mem_used" "$mem_total" "$mem_free" "$net_if" "$net_link" "$rx_b" "$tx_b" "$nvme_temp" "$nvme_err" "$disk_health" >> "$LOGFILE"
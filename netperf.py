@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# netperf.py — прогон iperf3 на несколько хостов сразу с разбором --json
+# (замена цикла с разбором текстового вывода в autotest.sh net-iperf3-client).
+# Каждая цель host[:port] — отдельная корутина asyncio: её прогоны и
+# направления идут по очереди (сервер iperf3 на порту обслуживает один тест
+# за раз), а разные цели работают одновременно. Из JSON берутся скорость на
+# стороне получателя, ретрансмиты отправителя, RTT по потокам, для UDP —
+# jitter и потери, и скорость по интервалам. По каждой цели и направлению
+# считаются среднее/мин/макс/стандартное отклонение скорости по прогонам и по
+# интервалам, сумма ретрансмитов; всё пишется в один JSON-файл результатов.
+#   netperf.py -t 10 -n 10 192.168.10.18 192.168.10.19:5202
+#   netperf.py -P 4 --direction both 192.168.10.18,192.168.10.19
+#   netperf.py --udp -b 900M --direction bidir 192.168.10.18
+# Без сети — с заглушкой: AUTOTEST_IPERF3=bench/stub_iperf3.py python3 netperf.py -t 2 host1 host2
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PORT = 5201
+RESULT_VERSION = 1
+# Запас сверх -t на подключение и обмен итогами; дольше — прогон снимается
+TIMEOUT_SLACK_S = 15
+# Направления: up — клиент передаёт, down — принимает (-R), both — up и down
+# отдельными прогонами, bidir — оба сразу (--bidir, iperf3 3.7+)
+DIRECTIONS = ("up", "down", "both", "bidir")
+
+def parse_target(text: str) -> Tuple[str, int]:
+    # host, host:port, [v6addr]:port; голый IPv6 — без порта
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        return host, int(rest[1:]) if rest.startswith(":") else DEFAULT_PORT
+    if text.count(":") == 1:
+        host, port = text.split(":")
+        return host, int(port)
+    return text, DEFAULT_PORT
+
+def summarize(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    return {"n": len(values), "mean": statistics.fmean(values), "min": min(values), "max": max(values),
+            "stddev": statistics.stdev(values) if len(values) > 1 else 0.0}
+
+def iperf3_args(args: argparse.Namespace, host: str, port: int, mode: str) -> List[str]:
+    cmd = [args.iperf3, "-c", host, "-p", str(port), "-t", str(args.duration), "-P", str(args.parallel), "--json"]
+    if mode == "down":
+        cmd.append("-R")
+    elif mode == "bidir":
+        cmd.append("--bidir")
+    if args.udp:
+        cmd += ["-u", "-b", args.bitrate]
+    elif args.bitrate:
+        cmd += ["-b", args.bitrate]
+    if args.omit:
+        cmd += ["-O", str(args.omit)]
+    return cmd
+
+def parse_direction(data: Dict[str, Any], suffix: str, sender: Optional[bool], udp: bool) -> Dict[str, Any]:
+    # Итог одного направления прогона; suffix "_bidir_reverse" — обратный
+    # поток --bidir, sender — какие потоки end.streams к нему относятся
+    end = data.get("end") or {}
+    sent = end.get("sum_sent" + suffix) or {}
+    received = end.get("sum_received" + suffix) or end.get("sum" + suffix) or {}
+    rec: Dict[str, Any] = {"ok": "bits_per_second" in received}
+    if not rec["ok"]:
+        rec["error"] = data.get("error") or "no summary in iperf3 output"
+        return rec
+    rec["mbps"] = received["bits_per_second"] / 1e6
+    rec["sent_mbps"] = sent["bits_per_second"] / 1e6 if "bits_per_second" in sent else None
+    rec["interval_mbps"] = [round(i["sum" + suffix]["bits_per_second"] / 1e6, 3)
+                            for i in data.get("intervals") or []
+                            if "sum" + suffix in i and not i["sum" + suffix].get("omitted")]
+    if udp:
+        total = end.get("sum" + suffix) or received
+        rec["jitter_ms"] = total.get("jitter_ms")
+        rec["lost_percent"] = total.get("lost_percent")
+    else:
+        rec["retransmits"] = sent.get("retransmits")
+    streams = []
+    for s in end.get("streams") or []:
+        snd, rcv = s.get("sender") or {}, s.get("receiver") or {}
+        if sender is not None and snd.get("sender", True) != sender:
+            continue
+        st: Dict[str, Any] = {"mbps": rcv.get("bits_per_second", 0) / 1e6}
+        if "retransmits" in snd:
+            st["retransmits"] = snd["retransmits"]
+        if "mean_rtt" in snd:
+            st["rtt_ms"] = snd["mean_rtt"] / 1000  # iperf3 отдаёт RTT в мкс
+        streams.append(st)
+    rec["streams"] = streams
+    return rec
+
+def parse_run(data: Dict[str, Any], mode: str) -> List[Tuple[str, Dict[str, Any]]]:
+    # (направление, итог) для прогона в режиме mode: bidir даёт два итога
+    udp = ((data.get("start") or {}).get("test_start") or {}).get("protocol") == "UDP"
+    if mode == "bidir":
+        return [("bidir-up", parse_direction(data, "", True, udp)),
+                ("bidir-down", parse_direction(data, "_bidir_reverse", False, udp))]
+    return [(mode, parse_direction(data, "", None, udp))]
+
+def summarize_runs(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    ok = [r for r in records if r["ok"]]
+    out: Dict[str, Any] = {
+        "runs": len(records),
+        "failed": len(records) - len(ok),
+        "mbps": summarize([r["mbps"] for r in ok]),
+        "interval_mbps": summarize([v for r in ok for v in r.get("interval_mbps") or []]),
+    }
+    retrans = [r["retransmits"] for r in ok if r.get("retransmits") is not None]
+    if retrans:
+        out["retransmits"] = sum(retrans)
+    rtts = [s["rtt_ms"] for r in ok for s in r.get("streams") or [] if "rtt_ms" in s]
+    if rtts:
+        out["rtt_ms"] = statistics.fmean(rtts)
+    for key in ("jitter_ms", "lost_percent"):
+        vals = [r[key] for r in ok if r.get(key) is not None]
+        if vals:
+            out[key] = statistics.fmean(vals)
+    return out
+
+def run_line(label: str, run: int, runs: int, rec: Dict[str, Any]) -> str:
+    if not rec["ok"]:
+        return f"{label} run {run}/{runs}: failed: {rec['error']}"
+    extra = ""
+    if rec.get("retransmits") is not None:
+        extra = f" (retr {rec['retransmits']})"
+    elif rec.get("jitter_ms") is not None:
+        extra = f" (jitter {rec['jitter_ms']:.3f} ms, lost {rec.get('lost_percent') or 0:.2f}%)"
+    return f"{label} run {run}/{runs}: {rec['mbps']:.2f} Mbps{extra}"
+
+async def run_iperf3(cmd: List[str], timeout: float) -> Tuple[Optional[Dict[str, Any]], str]:
+    # (JSON или None, текст ошибки); процесс, не уложившийся в timeout, убивается
+    try:
+        proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.PIPE)
+    except OSError as e:
+        return None, str(e)
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return None, f"timed out after {timeout:.0f}s"
+    try:
+        data = json.loads(out)
+    except ValueError:
+        text = (err or out).decode("utf-8", errors="replace").strip()
+        return None, text.splitlines()[-1] if text else f"exit code {proc.returncode}"
+    # при ошибке iperf3 --json тоже печатает JSON, с ключом "error"
+    return data, data.get("error") or ""
+
+async def run_target(args: argparse.Namespace, host: str, port: int, limit: asyncio.Semaphore,
+                     results: Dict[str, List[Dict[str, Any]]]) -> None:
+    modes = ["up", "down"] if args.direction == "both" else [args.direction]
+    timeout = args.duration + args.omit + TIMEOUT_SLACK_S
+    target = f"{host}:{port}"
+    for run in range(1, args.runs + 1):
+        for mode in modes:
+            async with limit:
+                started = datetime.now()
+                data, error = await run_iperf3(iperf3_args(args, host, port, mode), timeout)
+            if data is None:
+                parsed = [(d, {"ok": False, "error": error})
+                          for d in (["bidir-up", "bidir-down"] if mode == "bidir" else [mode])]
+            else:
+                parsed = parse_run(data, mode)
+            for direction, rec in parsed:
+                rec = dict(rec, run=run, started=started.isoformat(sep=" ", timespec="seconds"))
+                if args.keep_raw and data is not None:
+                    rec["raw"] = data
+                results.setdefault(f"{target} {direction}", []).append(rec)
+                print(run_line(f"{target} {direction}", run, args.runs, rec), flush=True)
+
+async def run_all(args: argparse.Namespace, targets: List[Tuple[str, int]]) -> Dict[str, List[Dict[str, Any]]]:
+    limit = asyncio.Semaphore(args.max_concurrent or len(targets))
+    results: Dict[str, List[Dict[str, Any]]] = {}
+    await asyncio.gather(*(run_target(args, host, port, limit, results) for host, port in targets))
+    return results
+
+def main():
+    ap = argparse.ArgumentParser(description="Run iperf3 --json against several hosts concurrently and "
+                                             "aggregate throughput, retransmits, jitter and loss.")
+    ap.add_argument("targets", nargs="+", help="host[:port] (default port 5201), also comma-separated")
+    ap.add_argument("-t", "--duration", type=int, default=10, help="Seconds per run (iperf3 -t)")
+    ap.add_argument("-n", "--runs", type=int, default=10, help="Runs per target and direction")
+    ap.add_argument("-P", "--parallel", type=int, default=1, help="Parallel streams per run (iperf3 -P)")
+    ap.add_argument("--direction", choices=DIRECTIONS, default="up",
+                    help="up: client sends; down: server sends (-R); both: up and down runs; bidir: --bidir")
+    ap.add_argument("-u", "--udp", action="store_true", help="UDP test (set the rate with -b)")
+    ap.add_argument("-b", "--bitrate", help="Target bitrate, e.g. 900M (UDP default: 1M, like iperf3)")
+    ap.add_argument("-O", "--omit", type=int, default=0, help="Omit the first N seconds (TCP slow start)")
+    ap.add_argument("--max-concurrent", type=int, default=0, help="Tests running at once (default: all targets)")
+    ap.add_argument("--iperf3", default=os.environ.get("AUTOTEST_IPERF3", "iperf3"), help="iperf3 binary")
+    ap.add_argument("-o", "--output", help="Result JSON (default: <log-dir>/iperf3_<date>.json)")
+    ap.add_argument("--log-dir", default=os.environ.get("AUTOTEST_LOG_DIR", os.path.expanduser("~/AutoTest_Logs")))
+    ap.add_argument("--keep-raw", action="store_true", help="Store the full iperf3 JSON of every run")
+    args = ap.parse_args()
+    if args.udp and not args.bitrate:
+        args.bitrate = "1M"
+
+    targets: List[Tuple[str, int]] = []
+    for item in args.targets:
+        for text in filter(None, item.split(",")):
+            try:
+                target = parse_target(text.strip())
+            except ValueError:
+                ap.error(f"bad target: {text}")
+            if target not in targets:
+                targets.append(target)
+    if not targets:
+        ap.error("no targets")
+
+    path = args.output
+    if path is None:
+        stamp = datetime.now().strftime(os.environ.get("AUTOTEST_FORMAT_DATE", "%d-%m-%Y %H:%M:%S"))
+        path = os.path.join(args.log_dir, f"iperf3_{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    for host, port in targets:
+        print(f"iperf3 to {host}:{port}, duration={args.duration}s, runs={args.runs}, streams={args.parallel}, "
+              f"direction={args.direction}{', udp ' + args.bitrate if args.udp else ''}", flush=True)
+    started = datetime.now()
+    t0 = time.monotonic()
+    try:
+        results = asyncio.run(run_all(args, targets))
+    except KeyboardInterrupt:
+        print("Interrupted", file=sys.stderr)
+        sys.exit(130)
+
+    summary = []
+    for key, records in results.items():
+        target, direction = key.split(" ")
+        records.sort(key=lambda r: r["run"])
+        summary.append({"target": target, "direction": direction, "summary": summarize_runs(records),
+                        "runs": records})
+    summary.sort(key=lambda t: (t["target"], t["direction"]))
+    doc = {
+        "version": RESULT_VERSION,
+        "host": socket.gethostname(),
+        "started": started.isoformat(sep=" ", timespec="seconds"),
+        "elapsed_s": round(time.monotonic() - t0, 3),
+        "config": {"duration": args.duration, "runs": args.runs, "parallel": args.parallel,
+                   "direction": args.direction, "udp": args.udp, "bitrate": args.bitrate, "omit": args.omit},
+        "targets": summary,
+    }
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+    for t in summary:
+        s = t["summary"]
+        label = f"{t['target']} {t['direction']}"
+        st = s["mbps"]
+        if st is None:
+            print(f"{label}: no successful runs ({s['failed']} failed)")
+            continue
+        extra = f", retransmits {s['retransmits']}" if "retransmits" in s else ""
+        if s.get("jitter_ms") is not None:
+            extra += f", jitter {s['jitter_ms']:.3f} ms"
+        if s.get("lost_percent") is not None:
+            extra += f", lost {s['lost_percent']:.2f}%"
+        if s["failed"]:
+            extra += f", {s['failed']} failed"
+        print(f"{label}: average over {st['n']} runs: {st['mean']:.2f} Mbps (min {st['min']:.2f}, "
+              f"max {st['max']:.2f}, stddev {st['stddev']:.2f}){extra}")
+    print(f"Results: {path}")
+    # ошибка, если хоть одна цель не дала ни одного успешного прогона
+    sys.exit(1 if any(t["summary"]["mbps"] is None for t in summary) else 0)
+
+if __name__ == "__main__":
+    main()
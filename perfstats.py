@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# perfstats.py — замер горячих участков парсера и GUI без внешних профилировщиков.
+# Profiler копит по этапам (stage) время стены и CPU потока, число вызовов и
+# обработанных единиц (строк, снапшотов): время вложенного этапа вычитается из
+# объемлющего, поэтому «write» не включает разбор, который идёт внутри
+# потребления итератора строк. Дополнительно — пик RSS (своего процесса и
+# дочерних: пул разбора), сборки мусора по поколениям и их паузы.
+# Итог — JSON (report()/write()), коротко — format_report().
+# Стек вызовов можно снять для flamegraph:
+#   *.prof   — cProfile основного потока (snakeviz, flameprof, python -m pstats)
+#   иначе    — выборка стеков всех потоков (~200 Гц) в свёрнутом формате
+#              «поток;функция;... N» (flamegraph.pl, speedscope, inferno)
+# Модульные stage()/iterate() работают с активным профайлером (activate())
+# и ничего не стоят, пока профилирование выключено.
+#   python3 perfstats.py show gpu_metrics.xlsx.profile.json
+
+import argparse
+import cProfile
+import gc
+import json
+import os
+import resource
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+PROFILE_VERSION = 1
+SAMPLE_INTERVAL_S = 0.005
+# Глубина стека в выборке: глубже обрезается со стороны корня
+SAMPLE_MAX_DEPTH = 64
+
+_active: Optional["Profiler"] = None
+
+class _Stage:
+    __slots__ = ("calls", "wall", "cpu", "count", "unit")
+
+    def __init__(self, unit: str):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.count = 0
+        self.unit = unit
+
+class StackSampler(threading.Thread):
+    # Периодически снимает стеки всех потоков процесса (кроме своего)
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL_S):
+        super().__init__(name="perfstats-sampler", daemon=True)
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.halt = threading.Event()
+
+    def run(self):
+        while not self.halt.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < SAMPLE_MAX_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self, path: str) -> int:
+        self.halt.set()
+        self.join()
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            for stack, n in self.samples.most_common():
+                f.write(f"{stack} {n}\n")
+        os.replace(path + ".tmp", path)
+        return sum(self.samples.values())
+
+class Profiler:
+    # Время и CPU по этапам, пик памяти и GC одного прогона
+
+    def __init__(self, tool: str, stacks: Optional[str] = None):
+        self.tool = tool
+        self.stacks = stacks
+        self.stages: Dict[str, _Stage] = {}
+        self.counters: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started = datetime.now()
+        self.t0 = time.perf_counter()
+        self.c0 = time.process_time()
+        self.gc_counts = [0, 0, 0]
+        self.gc_collected = 0
+        self.gc_uncollectable = 0
+        self.gc_pause = 0.0
+        self.gc_t: Optional[float] = None
+        self.elapsed: Optional[float] = None
+        gc.callbacks.append(self._on_gc)
+        self.cprofile: Optional[cProfile.Profile] = None
+        self.sampler: Optional[StackSampler] = None
+        if stacks and stacks.endswith(".prof"):
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        elif stacks:
+            self.sampler = StackSampler()
+            self.sampler.start()
+
+    def _on_gc(self, phase: str, info: Dict[str, int]) -> None:
+        if phase == "start":
+            self.gc_t = time.perf_counter()
+            return
+        self.gc_counts[info["generation"]] += 1
+        self.gc_collected += info.get("collected", 0)
+        self.gc_uncollectable += info.get("uncollectable", 0)
+        if self.gc_t is not None:
+            self.gc_pause += time.perf_counter() - self.gc_t
+            self.gc_t = None
+
+    def _stack(self) -> List[List[float]]:
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def _add(self, name: str, wall: float, cpu: float, count: int, unit: str, calls: int = 1) -> None:
+        with self.lock:
+            s = self.stages.get(name)
+            if s is None:
+                s = self.stages[name] = _Stage(unit)
+            s.calls += calls
+            s.wall += wall
+            s.cpu += cpu
+            s.count += count
+
+    @contextmanager
+    def stage(self, name: str, count: int = 0, unit: str = "rows"):
+        # Время и CPU этапа без вложенных этапов; count — сколько единиц он обработал
+        stack = self._stack()
+        stack.append([0.0, 0.0])
+        w0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - w0, time.thread_time() - c0
+            child_wall, child_cpu = stack.pop()
+            if stack:
+                stack[-1][0] += wall
+                stack[-1][1] += cpu
+            self._add(name, wall - child_wall, cpu - child_cpu, count, unit)
+
+    def iterate(self, name: str, items: Iterable[Any], unit: str = "rows") -> Iterator[Any]:
+        # Время внутри next() источника идёт этапу name и вычитается из этапа
+        # потребителя; элементы считаются
+        it = iter(items)
+        stack = self._stack()
+        wall = cpu = 0.0
+        n = 0
+        try:
+            while True:
+                stack.append([0.0, 0.0])
+                w0, c0 = time.perf_counter(), time.thread_time()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+                finally:
+                    w, c = time.perf_counter() - w0, time.thread_time() - c0
+                    child_wall, child_cpu = stack.pop()
+                    if stack:
+                        stack[-1][0] += w
+                        stack[-1][1] += c
+                    wall += w - child_wall
+                    cpu += c - child_cpu
+                n += 1
+                yield item
+        finally:
+            self._add(name, wall, cpu, n, unit)
+
+    def tally(self, name: str, n: int, unit: str = "rows") -> None:
+        # Единицы этапа, число которых известно только после его конца
+        self._add(name, 0.0, 0.0, n, unit, calls=0)
+
+    def count(self, name: str, n: int) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def stop(self) -> None:
+        if self.elapsed is not None:
+            return
+        self.elapsed = time.perf_counter() - self.t0
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.stacks)
+        elif self.sampler is not None:
+            self.count("stack_samples", self.sampler.stop(self.stacks))
+
+    def report(self) -> Dict[str, Any]:
+        wall = self.elapsed if self.elapsed is not None else time.perf_counter() - self.t0
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        with self.lock:
+            stages = [{"name": name, "calls": s.calls, "wall_s": round(s.wall, 6), "cpu_s": round(s.cpu, 6),
+                       "count": s.count, "unit": s.unit,
+                       "per_s": round(s.count / s.wall, 1) if s.count and s.wall > 0 else None}
+                      for name, s in self.stages.items()]
+            counters = dict(self.counters)
+        return {
+            "version": PROFILE_VERSION,
+            "tool": self.tool,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "argv": sys.argv,
+            "started": self.started.isoformat(sep=" ", timespec="seconds"),
+            "wall_s": round(wall, 6),
+            "cpu_s": round(time.process_time() - self.c0, 6),
+            # дочерние процессы (пул разбора) — после их завершения
+            "children_cpu_s": round(children.ru_utime + children.ru_stime, 6),
+            # ru_maxrss в Linux — КиБ
+            "peak_rss_mib": round(own.ru_maxrss / 1024, 1),
+            "children_peak_rss_mib": round(children.ru_maxrss / 1024, 1),
+            "gc": {"collections": list(self.gc_counts), "collected": self.gc_collected,
+                   "uncollectable": self.gc_uncollectable, "pause_s": round(self.gc_pause, 6)},
+            "stages": stages,
+            "counters": counters,
+            # счётчики (байты и строки входа) в секунду за весь прогон
+            "rates": {f"{name}_per_s": round(n / wall, 1) for name, n in counters.items() if wall > 0},
+            "stacks": self.stacks,
+        }
+
+    def write(self, path: str) -> Dict[str, Any]:
+        data = self.report()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(path + ".tmp", path)
+        return data
+
+def activate(profiler: Optional[Profiler]) -> Optional[Profiler]:
+    global _active
+    previous, _active = _active, profiler
+    return previous
+
+def active() -> Optional[Profiler]:
+    return _active
+
+def stage(name: str, count: int = 0, unit: str = "rows"):
+    return _active.stage(name, count, unit) if _active is not None else nullcontext()
+
+def iterate(name: str, items: Iterable[Any], unit: str = "rows") -> Iterable[Any]:
+    return _active.iterate(name, items, unit) if _active is not None else items
+
+def tally(name: str, n: int, unit: str = "rows") -> None:
+    if _active is not None:
+        _active.tally(name, n, unit)
+
+def format_report(data: Dict[str, Any]) -> str:
+    gcs = data["gc"]
+    lines = [f"Profile {data['tool']}: {data['wall_s']:.2f}s wall, {data['cpu_s']:.2f}s CPU"
+             + (f" (+{data['children_cpu_s']:.2f}s children)" if data["children_cpu_s"] else "")
+             + f", peak RSS {data['peak_rss_mib']:.1f} MiB"
+             + (f" (children {data['children_peak_rss_mib']:.1f} MiB)" if data["children_peak_rss_mib"] else "")
+             + f", GC {'/'.join(map(str, gcs['collections']))} ({gcs['pause_s']:.3f}s)"]
+    width = max([5] + [len(s["name"]) for s in data["stages"]])
+    for s in sorted(data["stages"], key=lambda s: -s["wall_s"]):
+        share = 100 * s["wall_s"] / data["wall_s"] if data["wall_s"] else 0
+        rate = f"  {s['count']:>12,} {s['unit']}  {s['per_s']:>12,.0f} {s['unit']}/s" if s["per_s"] else ""
+        lines.append(f"  {s['name']:<{width}}  {s['wall_s']:9.3f}s {share:5.1f}%  cpu {s['cpu_s']:9.3f}s"
+                     f"  x{s['calls']}{rate}")
+    for name, n in sorted(data["counters"].items()):
+        rate = data.get("rates", {}).get(f"{name}_per_s")
+        lines.append(f"  {name}: {n:,}" + (f" ({rate:,.0f}/s)" if rate else ""))
+    if data.get("stacks"):
+        lines.append(f"  stacks: {data['stacks']}")
+    return "\n".join(lines)
+
+def main():
+    ap = argparse.ArgumentParser(description="Show profile JSON files written by --profile.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("show", help="Print profile summaries")
+    p.add_argument("files", nargs="+")
+    args = ap.parse_args()
+    for path in args.files:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        print(f"{path} ({data['started']}, {' '.join(data['argv'])})")
+        print(format_report(data))
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        sys.exit(0)
@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+# report.py — HTML-отчёт по всем логам прогона (autotest.sh report).
+# Каждый лог сворачивается в сводку (digest): пики и средние температур,
+# загрузки, памяти, скорости диска, итоги gpu_burn/stress-ng/fio/iperf3.
+# Сводки кешируются в <archive>/.report_digests.json с ключом
+# (путь, inode, размер, mtime): повторный отчёт по логам за месяц разбирает
+# только новые и изменившиеся файлы. Логи .gz (после rotate) читаются
+# без распаковки на диск. Список файлов берётся из каталога
+# catalog.py (--since/--until/--run сужают отчёт до интервала или прогона);
+# без каталога (--no-catalog) каталоги обходятся glob'ом.
+
+import argparse
+import csv
+import fnmatch
+import glob
+import html
+import importlib.util
+import json
+import os
+import platform
+import re
+import socket
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import gzlog
+
+# Меняется при изменении формата сводок: старый кеш тогда не используется
+DIGEST_VERSION = 1
+CACHE_NAME = ".report_digests.json"
+PARSER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gpuburn", "nvidia-smi_table-parser.py")
+
+NUM_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+# --- статистика ---
+
+def stat_add(stats: Dict[str, Dict[str, float]], name: str, value: Optional[float]) -> None:
+    # min/max/sum/n: из них собирается и сводка по файлу, и итог по всем файлам
+    if value is None:
+        return
+    s = stats.get(name)
+    if s is None:
+        stats[name] = {"min": value, "max": value, "sum": value, "n": 1}
+        return
+    if value < s["min"]:
+        s["min"] = value
+    if value > s["max"]:
+        s["max"] = value
+    s["sum"] += value
+    s["n"] += 1
+
+def stat_merge(stats: Iterable[Optional[Dict[str, float]]]) -> Optional[Dict[str, float]]:
+    out: Optional[Dict[str, float]] = None
+    for s in stats:
+        if not s:
+            continue
+        if out is None:
+            out = dict(s)
+            continue
+        out["min"] = min(out["min"], s["min"])
+        out["max"] = max(out["max"], s["max"])
+        out["sum"] += s["sum"]
+        out["n"] += s["n"]
+    return out
+
+def mean(s: Optional[Dict[str, float]]) -> Optional[float]:
+    return s["sum"] / s["n"] if s and s["n"] else None
+
+def number(text: str) -> Optional[float]:
+    m = NUM_RE.search(text)
+    return float(m.group()) if m else None
+
+# --- разбор логов: path -> digest (словарь, сериализуемый в JSON) ---
+
+def digest_sysmonitor(path: str) -> Dict[str, Any]:
+    # Колонки monitor.sh / sysmonitor.py; значения N/A пропускаются
+    stats: Dict[str, Dict[str, float]] = {}
+    first = last = None
+    rx = tx = None
+    health: Dict[str, int] = {}
+    rows = 0
+    with gzlog.open_log(path, "r") as f:
+        for line in f:
+            parts = [p.strip() for p in line.split("|")]
+            if len(parts) < 17 or parts[0] == "Timestamp" or parts[0].startswith("---"):
+                continue
+            rows += 1
+            first = first or parts[0]
+            last = parts[0]
+            stat_add(stats, "cpu_temp", number(parts[3]))
+            stat_add(stats, "cpu_load", number(parts[4]))
+            stat_add(stats, "gpu_temp", number(parts[6]))
+            stat_add(stats, "ram_used", number(parts[7]))
+            stat_add(stats, "nvme_temp", number(parts[14]))
+            stat_add(stats, "nvme_err", number(parts[15]))
+            r, t = number(parts[12]), number(parts[13])
+            if r is not None:
+                rx = (rx[0] if rx else r, r)
+            if t is not None:
+                tx = (tx[0] if tx else t, t)
+            if parts[16] not in ("", "N/A"):
+                health[parts[16]] = health.get(parts[16], 0) + 1
+    return {"rows": rows, "first": first, "last": last, "stats": stats,
+            "rx_bytes": rx[1] - rx[0] if rx else None, "tx_bytes": tx[1] - tx[0] if tx else None,
+            "disk_health": health}
+
+def digest_iostat(path: str) -> Dict[str, Any]:
+    stats: Dict[str, Dict[str, float]] = {}
+    first = last = None
+    with gzlog.open_log(path, "r") as f:
+        for line in f:
+            parts = line.strip().split(",")
+            if len(parts) != 3 or parts[0] == "Timestamp":
+                continue
+            first = first or parts[0]
+            last = parts[0]
+            stat_add(stats, "read", number(parts[1]))
+            stat_add(stats, "write", number(parts[2]))
+    return {"device": os.path.basename(path).split("_iostat.csv")[0], "first": first, "last": last, "stats": stats}
+
+DISKSTATS_FIELDS = ["r_iops", "w_iops", "r_mb_s", "w_mb_s", "r_await_ms", "w_await_ms", "util_pct", "queue"]
+
+def digest_diskstats(path: str) -> Dict[str, Any]:
+    # CSV disksampler.py: строка на устройство в каждом замере
+    devices: Dict[str, Dict[str, Any]] = {}
+    with gzlog.open_log(path, "r") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            dev = row.get("device")
+            if not dev:
+                continue
+            d = devices.get(dev)
+            if d is None:
+                d = devices[dev] = {"first": row["timestamp"], "stats": {}}
+            d["last"] = row["timestamp"]
+            for field in DISKSTATS_FIELDS:
+                try:
+                    stat_add(d["stats"], field, float(row[field]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+    # простаивавшие весь замер устройства в сводку не попадают
+    return {"devices": {k: v for k, v in sorted(devices.items())
+                        if any((v["stats"].get(f) or {}).get("max") for f in ("r_iops", "w_iops"))}}
+
+_parser_module = None
+
+def load_parser():
+    # Табличный/CSV лог nvidia-smi разбирает gpuburn/nvidia-smi_table-parser.py
+    # (нужен openpyxl, как для parse-nvidia)
+    global _parser_module
+    if _parser_module is None:
+        spec = importlib.util.spec_from_file_location("nvidia_smi_table_parser", PARSER)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _parser_module = module
+    return _parser_module
+
+def digest_nvidia(path: str) -> Dict[str, Any]:
+    parser = load_parser()
+    summary = parser.RunSummary(lambda row: None)
+    for row in parser.iter_file(path, engine="fast"):
+        summary.add(row)
+    gpus = summary.run_rows()
+    return {"gpus": gpus, "first": min((g["first"] for g in gpus), default=None),
+            "last": max((g["last"] for g in gpus), default=None)}
+
+GPU_BURN_PROGRESS = re.compile(r"proc'd:\s*(.*?)\s+errors:\s*(.*?)\s+temps:\s*(.*)$")
+GPU_BURN_RESULT = re.compile(r"GPU\s+(\d+):\s*(OK|FAULTY)")
+
+def digest_gpu_burn(path: str) -> Dict[str, Any]:
+    # Строки прогресса: "50.0%  proc'd: 123 (4567 Gflop/s) - ...   errors: 0 - 0   temps: 65 C - 66 C"
+    gpus: Dict[int, Dict[str, Any]] = {}
+    with gzlog.open_log(path, "r") as f:
+        text = f.read()
+    for line in re.split(r"[\r\n]+", text):
+        m = GPU_BURN_PROGRESS.search(line)
+        if m:
+            procs = m.group(1).split(" - ")
+            errors = m.group(2).split(" - ")
+            temps = m.group(3).split(" - ")
+            for i, chunk in enumerate(procs):
+                g = gpus.setdefault(i, {"stats": {}, "errors": 0, "result": None})
+                gf = re.search(r"\(([\d.]+)\s*Gflop/s\)", chunk)
+                stat_add(g["stats"], "gflops", float(gf.group(1)) if gf else None)
+                if i < len(temps):
+                    stat_add(g["stats"], "temp", number(temps[i]))
+                if i < len(errors):
+                    e = number(errors[i])
+                    if e is not None:
+                        g["errors"] = max(g["errors"], int(e))
+            continue
+        m = GPU_BURN_RESULT.search(line)
+        if m:
+            g = gpus.setdefault(int(m.group(1)), {"stats": {}, "errors": 0, "result": None})
+            g["result"] = m.group(2)
+    return {"gpus": {str(k): v for k, v in sorted(gpus.items())}}
+
+STRESS_METRIC = re.compile(r"stress-ng:\s*\w+:\s*\[\d+\]\s+([A-Za-z][\w-]*)\s+(\d+)\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)"
+                           r"\s+([\d.]+)\s+([\d.]+)")
+
+def digest_stress(path: str) -> Dict[str, Any]:
+    # --metrics-brief: "stress-ng: metrc: [1] cpu  12345  60.00  479.00  0.50  205.75  25.75"
+    stressors = []
+    result = None
+    with gzlog.open_log(path, "r") as f:
+        for line in f:
+            m = STRESS_METRIC.search(line)
+            if m and m.group(1) != "stressor":
+                stressors.append({"stressor": m.group(1), "bogo_ops": int(m.group(2)),
+                                  "real_s": float(m.group(3)), "bogo_ops_s": float(m.group(6))})
+            elif "successful run completed" in line:
+                result = "unsuccessful" if "unsuccessful" in line else "successful"
+            elif "failed" in line and "stress-ng" in line and result is None:
+                result = "failed"
+    return {"stressors": stressors, "result": result}
+
+FIO_DIR = re.compile(r"^\s*(read|write)\s*:\s*IOPS=([\d.]+)([kM]?),\s*BW=([\d.]+)([KMG]i?B)/s")
+FIO_LAT = re.compile(r"^\s*(clat|lat)\s*\((nsec|usec|msec)\):.*?avg=\s*([\d.]+)")
+FIO_PCT = re.compile(r"^\s*clat percentiles\s*\((nsec|usec|msec)\)")
+FIO_P99 = re.compile(r"99\.00th=\[\s*(\d+)\]")
+FIO_ERR = re.compile(r"err=\s*(\d+)")
+UNIT_MS = {"nsec": 1e-6, "usec": 1e-3, "msec": 1.0}
+UNIT_MIB = {"KiB": 1 / 1024, "KB": 1000 / 1024 ** 2, "MiB": 1.0, "MB": 1e6 / 1024 ** 2, "GiB": 1024.0, "GB": 1e9 / 1024 ** 2}
+
+def digest_fio(path: str) -> Dict[str, Any]:
+    dirs: Dict[str, Dict[str, Any]] = {}
+    cur: Optional[Dict[str, Any]] = None
+    pct_unit = None
+    err = None
+    with gzlog.open_log(path, "r") as f:
+        for line in f:
+            m = FIO_ERR.search(line)
+            if m and "groupid=" in line:
+                err = int(m.group(1))
+            m = FIO_DIR.match(line)
+            if m:
+                iops = float(m.group(2)) * {"": 1, "k": 1e3, "M": 1e6}[m.group(3)]
+                cur = dirs[m.group(1)] = {"iops": iops, "bw_mib_s": float(m.group(4)) * UNIT_MIB.get(m.group(5), 1.0),
+                                          "lat_avg_ms": None, "clat_p99_ms": None}
+                pct_unit = None
+                continue
+            if cur is None:
+                continue
+            m = FIO_LAT.match(line)
+            if m and (m.group(1) == "lat" or cur["lat_avg_ms"] is None):
+                cur["lat_avg_ms"] = float(m.group(3)) * UNIT_MS[m.group(2)]
+                continue
+            m = FIO_PCT.match(line)
+            if m:
+                pct_unit = m.group(1)
+                continue
+            if pct_unit:
+                m = FIO_P99.search(line)
+                if m:
+                    cur["clat_p99_ms"] = int(m.group(1)) * UNIT_MS[pct_unit]
+                    pct_unit = None
+    return {"directions": dirs, "err": err}
+
+def digest_iperf3(path: str) -> Dict[str, Any]:
+    # Строки cmd_net_iperf3_client: "iperf3 to HOST, ...", "Run N: X Mbps", "Run N: could not parse"
+    runs: Dict[str, Dict[str, float]] = {}
+    failed = 0
+    host = None
+    with gzlog.open_log(path, "r") as f:
+        for line in f:
+            m = re.match(r"iperf3 to (\S+?),", line)
+            if m:
+                host = m.group(1)
+            m = re.match(r"Run \d+: ([\d.]+) Mbps", line)
+            if m:
+                stat_add(runs, "mbps", float(m.group(1)))
+            elif re.match(r"Run \d+: could not parse", line):
+                failed += 1
+    return {"host": host, "stats": runs, "failed": failed}
+
+def digest_iperf3_json(path: str) -> Dict[str, Any]:
+    # Файл результатов netperf.py: строка на цель и направление
+    with gzlog.open_log(path, "r") as f:
+        data = json.load(f)
+    targets = []
+    for t in data.get("targets") or []:
+        runs: Dict[str, Dict[str, float]] = {}
+        for r in t.get("runs") or []:
+            if r.get("ok"):
+                stat_add(runs, "mbps", r.get("mbps"))
+        s = t.get("summary") or {}
+        targets.append({"host": t.get("target"), "direction": t.get("direction"), "stats": runs,
+                        "failed": s.get("failed", 0), "stddev": (s.get("mbps") or {}).get("stddev"),
+                        "retransmits": s.get("retransmits"), "jitter_ms": s.get("jitter_ms"),
+                        "lost_percent": s.get("lost_percent")})
+    return {"host": data.get("host"), "config": data.get("config"), "targets": targets}
+
+# (вид, каталог-ключ конфигурации, шаблон, функция разбора)
+SOURCES: List[Tuple[str, str, str, Callable[[str], Dict[str, Any]]]] = [
+    ("sysmonitor", "sysmon_dir", "sysmonitor.log", digest_sysmonitor),
+    ("iostat", "log_dir", "*_iostat.csv", digest_iostat),
+    ("diskstats", "log_dir", "diskstats_*.csv", digest_diskstats),
+    ("nvidia", "gpu_dir", "nvidia-smi_*.log", digest_nvidia),
+    ("nvidia", "gpu_dir", "nvidia-smi_*.csv", digest_nvidia),
+    ("gpu_burn", "gpu_dir", "gpu_burn_*.log", digest_gpu_burn),
+    ("cpu_stress", "log_dir", "cpu_stress_*.log", digest_stress),
+    ("ram_stress", "ram_dir", "ram_stress_*.log", digest_stress),
+    ("fio", "log_dir", "fio_*.log", digest_fio),
+    ("iperf3", "log_dir", "iperf3_*.log", digest_iperf3),
+    ("iperf3", "log_dir", "iperf3_*.json", digest_iperf3_json),
+]
+
+# --- кеш сводок ---
+
+def file_key(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+def load_cache(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != DIGEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+def save_cache(path: str, files: Dict[str, Any]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": DIGEST_VERSION, "files": files}, f)
+    os.replace(tmp, path)
+
+def glob_files(base: str, pattern: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(base, pattern)))
+
+def catalog_lister(paths: Iterable[str]) -> Callable[[str, str], List[str]]:
+    # Отбор из списка путей каталога вместо обхода файловой системы
+    by_dir: Dict[str, List[str]] = {}
+    for path in paths:
+        by_dir.setdefault(os.path.dirname(os.path.realpath(path)), []).append(path)
+
+    def lister(base: str, pattern: str) -> List[str]:
+        found = by_dir.get(os.path.realpath(base), [])
+        return sorted(p for p in found if fnmatch.fnmatch(os.path.basename(p), pattern))
+    return lister
+
+def collect_digests(dirs: Dict[str, str], cache_path: Optional[str], sources=SOURCES,
+                    log: Callable[[str], None] = print,
+                    lister: Callable[[str, str], List[str]] = glob_files) -> Dict[str, List[Dict[str, Any]]]:
+    # Возвращает {вид: [digest, ...]} по всем найденным файлам; разбираются
+    # только файлы, которых нет в кеше с тем же (inode, size, mtime).
+    # Записи кеша для файлов вне выборки сохраняются.
+    cached = load_cache(cache_path) if cache_path else {}
+    fresh: Dict[str, Any] = {}
+    out: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind, _, _, _ in sources}
+    parsed = reused = 0
+    for kind, dir_key, pattern, func in sources:
+        base = dirs.get(dir_key)
+        if not base:
+            continue
+        # логи, сжатые autotest.sh rotate, читаются через gzlog
+        for path in lister(base, pattern) + lister(base, pattern + ".gz"):
+            path = os.path.abspath(path)
+            key = file_key(path)
+            if key is None:
+                continue
+            entry = cached.get(path)
+            if entry is not None and entry.get("key") == key and entry.get("kind") == kind:
+                reused += 1
+            else:
+                try:
+                    digest = func(path)
+                except Exception as e:  # битый лог не должен ронять отчёт
+                    digest = {"error": f"{type(e).__name__}: {e}"}
+                entry = {"kind": kind, "key": key, "digest": digest}
+                parsed += 1
+            fresh[path] = entry
+            out[kind].append(dict(entry["digest"], path=path, mtime=key[2] / 1e9, size=key[1]))
+    if cache_path:
+        for path, entry in cached.items():
+            if path not in fresh and os.path.exists(path):
+                fresh[path] = entry
+        save_cache(cache_path, fresh)
+    log(f"Digests: {parsed} parsed, {reused} from cache")
+    return out
+
+# --- HTML ---
+
+STYLE = ("body{font-family:Segoe UI,Arial,sans-serif;margin:20px}h1,h2{margin:8px 0}"
+         "pre{background:#111;color:#eee;padding:10px;overflow:auto} .kv{font-family:monospace}"
+         " .ok{color:#2ecc71}.fail{color:#e74c3c}.warn{color:#f1c40f} table{border-collapse:collapse;margin:6px 0 14px}"
+         " td,th{border:1px solid #ddd;padding:4px 8px;text-align:right} th{background:#f4f6f7}"
+         " td:first-child,th:first-child{text-align:left} tr.total td{font-weight:bold;background:#fbfcfc}")
+
+def fmt(v: Any, digits: int = 1) -> str:
+    if v is None:
+        return "—"
+    if isinstance(v, float):
+        return f"{v:,.{digits}f}".replace(",", " ")
+    if isinstance(v, int):
+        return f"{v:,}".replace(",", " ")
+    return str(v)
+
+class Markup(str):
+    # Готовый HTML в ячейке таблицы (не экранируется)
+    pass
+
+def table(headers: List[str], rows: List[List[Any]], total: Optional[List[Any]] = None) -> str:
+    out = ["<table><tr>" + "".join(f"<th>{html.escape(h)}</th>" for h in headers) + "</tr>"]
+    for row in rows:
+        out.append("<tr>" + "".join(f"<td>{c if isinstance(c, Markup) else html.escape(fmt(c))}</td>" for c in row) + "</tr>")
+    if total is not None:
+        out.append("<tr class=total>" + "".join(f"<td>{html.escape(fmt(c))}</td>" for c in total) + "</tr>")
+    out.append("</table>")
+    return "\n".join(out)
+
+def status(text: Optional[str], good: Iterable[str]) -> Markup:
+    if text is None:
+        return Markup("<span class=warn>—</span>")
+    cls = "ok" if text in good else "fail"
+    return Markup(f"<span class={cls}>{html.escape(text)}</span>")
+
+def name(d: Dict[str, Any]) -> Markup:
+    title = html.escape(d["path"])
+    text = html.escape(os.path.basename(d["path"]))
+    if d.get("error"):
+        return Markup(f"<span class=fail title=\"{title}\">{text}: {html.escape(d['error'])}</span>")
+    return Markup(f"<span title=\"{title}\">{text}</span>")
+
+def section_sysmonitor(items: List[Dict[str, Any]]) -> str:
+    cols = ["File", "Rows", "First", "Last", "CPU °C max", "CPU °C avg", "CPU load % avg", "CPU load % max",
+            "GPU °C max", "RAM MB max", "NVMe °C max", "NVMe err max", "RX GB", "TX GB", "Disk health"]
+
+    rows = []
+    for d in items:
+        st = d.get("stats", {})
+        peak = lambda k, f="max": (st.get(k) or {}).get(f)
+        health = d.get("disk_health") or {}
+        rows.append([name(d), d.get("rows"), d.get("first"), d.get("last"), peak("cpu_temp"), mean(st.get("cpu_temp")),
+                     mean(st.get("cpu_load")), peak("cpu_load"), peak("gpu_temp"), peak("ram_used"),
+                     peak("nvme_temp"), peak("nvme_err"),
+                     None if d.get("rx_bytes") is None else d["rx_bytes"] / 1e9,
+                     None if d.get("tx_bytes") is None else d["tx_bytes"] / 1e9,
+                     ", ".join(f"{k}×{v}" for k, v in sorted(health.items())) or None])
+    return table(cols, rows)
+
+def section_iostat(items: List[Dict[str, Any]]) -> str:
+    cols = ["File", "Device", "First", "Last", "Samples", "Read MB/s avg", "Read MB/s max", "Write MB/s avg", "Write MB/s max"]
+    rows = []
+    for d in items:
+        st = d.get("stats", {})
+        rows.append([name(d), d.get("device"), d.get("first"), d.get("last"), (st.get("read") or {}).get("n"),
+                     mean(st.get("read")), (st.get("read") or {}).get("max"), mean(st.get("write")),
+                     (st.get("write") or {}).get("max")])
+    return table(cols, rows)
+
+def section_nvidia(items: List[Dict[str, Any]]) -> str:
+    cols = ["File", "GPU", "First", "Last", "Samples", "Temp °C max", "Temp °C p95", "Power W max", "Power W mean",
+            "Util % mean", "Mem MiB max", "At power cap, s", "Util drop, s", "Throttled, s"]
+    rows = []
+    for d in items:
+        if d.get("error"):
+            rows.append([name(d)] + [None] * (len(cols) - 1))
+            continue
+        for g in d.get("gpus", []):
+            rows.append([name(d), g["gpu"], g.get("first"), g.get("last"), g.get("samples"), g.get("temp_c_max"),
+                         g.get("temp_c_p95"), g.get("power_w_max"), g.get("power_w_mean"), g.get("utilization_mean"),
+                         g.get("memory_used_mib_max"), g.get("power_cap_s"), g.get("util_drop_s"), g.get("throttle_s")])
+    return table(cols, rows)
+
+def section_gpu_burn(items: List[Dict[str, Any]]) -> str:
+    cols = ["File", "GPU", "Result", "Errors", "Gflop/s max", "Gflop/s avg", "Temp °C max"]
+    rows = []
+    for d in items:
+        gpus = d.get("gpus") or {}
+        if not gpus:
+            rows.append([name(d), None, status(None, ()), None, None, None, None])
+        for gid, g in gpus.items():
+            st = g.get("stats", {})
+            rows.append([name(d), int(gid), status(g.get("result"), ("OK",)), g.get("errors"),
+                         (st.get("gflops") or {}).get("max"), mean(st.get("gflops")), (st.get("temp") or {}).get("max")])
+    return table(cols, rows)
+
+def section_stress(items: List[Dict[str, Any]]) -> str:
+    cols = ["File", "Result", "Stressor", "Bogo ops", "Real time, s", "Bogo ops/s"]
+    rows = []
+    for d in items:
+        res = status(d.get("result"), ("successful",))
+        for s in d.get("stressors") or [{}]:
+            rows.append([name(d), res, s.get("stressor"), s.get("bogo_ops"), s.get("real_s"), s.get("bogo_ops_s")])
+    return table(cols, rows)
+
+def section_fio(items: List[Dict[str, Any]]) -> str:
+    cols = ["File", "err", "Direction", "IOPS", "BW MiB/s", "Lat avg, ms", "clat p99, ms"]
+    rows = []
+    for d in items:
+        err = d.get("err")
+        err_cell = status(None if err is None else str(err), ("0",))
+        for direction, v in sorted((d.get("directions") or {"—": {}}).items()):
+            rows.append([name(d), err_cell, direction, v.get("iops"), v.get("bw_mib_s"), v.get("lat_avg_ms"),
+                         v.get("clat_p99_ms")])
+    return table(cols, rows)
+
+def section_diskstats(items: List[Dict[str, Any]]) -> str:
+    cols = ["File", "Device", "First", "Last", "Samples", "Read IOPS avg", "Read IOPS max", "Write IOPS avg",
+            "Write IOPS max", "Read MB/s max", "Write MB/s max", "Read await ms max", "Write await ms max",
+            "Util % avg", "Queue avg", "Queue max"]
+    rows = []
+    for d in items:
+        for dev, v in (d.get("devices") or {}).items():
+            st = v.get("stats", {})
+            rows.append([name(d), dev, v.get("first"), v.get("last"), (st.get("r_iops") or {}).get("n"),
+                         mean(st.get("r_iops")), (st.get("r_iops") or {}).get("max"), mean(st.get("w_iops")),
+                         (st.get("w_iops") or {}).get("max"), (st.get("r_mb_s") or {}).get("max"),
+                         (st.get("w_mb_s") or {}).get("max"), (st.get("r_await_ms") or {}).get("max"),
+                         (st.get("w_await_ms") or {}).get("max"), mean(st.get("util_pct")), mean(st.get("queue")),
+                         (st.get("queue") or {}).get("max")])
+    return table(cols, rows)
+
+def section_iperf3(items: List[Dict[str, Any]]) -> str:
+    # Лог net-iperf3-client — одна строка; результаты netperf.py — строка
+    # на цель и направление
+    cols = ["File", "Host", "Direction", "Runs", "Failed", "Mbps min", "Mbps avg", "Mbps max", "Mbps stddev",
+            "Retransmits", "Jitter ms", "Loss %"]
+    rows = []
+    parts = [(d, t) for d in items for t in (d.get("targets") or [d])]
+    for d, t in parts:
+        st = (t.get("stats") or {}).get("mbps")
+        jitter = t.get("jitter_ms")
+        rows.append([name(d), t.get("host"), t.get("direction"), st["n"] if st else 0, t.get("failed"),
+                     st and st["min"], mean(st), st and st["max"], t.get("stddev"), t.get("retransmits"),
+                     None if jitter is None else f"{jitter:.3f}", t.get("lost_percent")])
+    total = stat_merge((t.get("stats") or {}).get("mbps") for _, t in parts)
+    retrans = [t["retransmits"] for _, t in parts if t.get("retransmits") is not None]
+    return table(cols, rows, ["All", None, None, total and total["n"], sum(t.get("failed") or 0 for _, t in parts),
+                              total and total["min"], mean(total), total and total["max"], None,
+                              sum(retrans) if retrans else None, None, None] if len(parts) > 1 else None)
+
+SECTIONS = [
+    ("sysmonitor", "System monitor (sysmonitor.log)", section_sysmonitor),
+    ("nvidia", "GPU metrics (nvidia-smi)", section_nvidia),
+    ("gpu_burn", "GPU burn", section_gpu_burn),
+    ("cpu_stress", "CPU stress (stress-ng)", section_stress),
+    ("ram_stress", "RAM stress (stress-ng)", section_stress),
+    ("fio", "Disk (fio)", section_fio),
+    ("diskstats", "Block devices (diskstats)", section_diskstats),
+    ("iostat", "IOStat", section_iostat),
+    ("iperf3", "Network (iperf3)", section_iperf3),
+]
+
+def environment() -> str:
+    lines = [f"Host: {socket.gethostname()}", " ".join(platform.uname())]
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8", errors="replace") as f:
+            models = [l.split(":", 1)[1].strip() for l in f if l.startswith("model name")]
+        if models:
+            lines.append(f"CPU: {models[0]} × {len(models)}")
+    except OSError:
+        pass
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            lines.append("RAM: " + f.readline().split(":", 1)[1].strip())
+    except (OSError, IndexError):
+        pass
+    return "\n".join(lines)
+
+def render(digests: Dict[str, List[Dict[str, Any]]], dirs: Dict[str, str], generated: str,
+           newest_htop: Optional[str] = None) -> str:
+    out = [f"<html><head><meta charset=\"utf-8\"><title>AutoTest Report {html.escape(generated)}</title>",
+           f"<style>{STYLE}</style></head><body>",
+           f"<h1>AutoTest Report</h1><div class=kv>Generated: {html.escape(generated)}</div>",
+           f"<h2>Environment</h2><pre>{html.escape(environment())}</pre>",
+           "<h2>Configuration</h2><pre>" + html.escape("\n".join(f"{k}={v}" for k, v in dirs.items())) + "</pre>"]
+    for kind, title, func in SECTIONS:
+        items = sorted(digests.get(kind, []), key=lambda d: d["mtime"])
+        out.append(f"<h2>{html.escape(title)}</h2>")
+        if items:
+            out.append(func(items))
+        else:
+            out.append(f"<div class=warn>No {html.escape(kind)} logs found</div>")
+    if newest_htop:
+        out.append(f"<h2>HTOP snapshot</h2><div class=kv><a href=\"file://{html.escape(newest_htop)}\">"
+                   f"{html.escape(newest_htop)}</a></div>")
+    out.append("</body></html>")
+    return "\n".join(out)
+
+def main():
+    home = os.path.expanduser("~")
+    ap = argparse.ArgumentParser(description="Summarise all AutoTest logs into an HTML report (cached per-file digests).")
+    ap.add_argument("-o", "--output", help="HTML file (default: <archive-dir>/report_<date>.html)")
+    ap.add_argument("--log-dir", default=os.environ.get("AUTOTEST_LOG_DIR", os.path.join(home, "AutoTest_Logs")))
+    ap.add_argument("--gpu-log-dir", default=os.environ.get("AUTOTEST_GPU_LOG_DIR", os.path.join(home, "gpu_burn_logs")))
+    ap.add_argument("--sysmon-dir", default=os.path.join(home, "AutoTest_Logs", "sysmonitor"))
+    ap.add_argument("--ram-log-dir", default=os.path.join(home, "ram_stress_logs"))
+    ap.add_argument("--htop-dir", default=os.path.join(home, "htop-res"))
+    ap.add_argument("--archive-dir", default=os.environ.get("AUTOTEST_ARCHIVE_DIR", os.path.join(home, "AutoTest_Archives")))
+    ap.add_argument("--no-cache", action="store_true", help="Re-parse every log and do not update the cache")
+    ap.add_argument("--no-catalog", action="store_true", help="Scan the log directories instead of using catalog.py")
+    ap.add_argument("--since", help="Only logs written after this time (YYYY-MM-DD[ HH:MM] or AUTOTEST_FORMAT_DATE)")
+    ap.add_argument("--until", help="Only logs started before this time")
+    ap.add_argument("--run", type=int, help="Only logs of this run (catalog.py runs)")
+    args = ap.parse_args()
+
+    generated = datetime.now().strftime(os.environ.get("AUTOTEST_FORMAT_DATE", "%d-%m-%Y %H:%M:%S"))
+    os.makedirs(args.archive_dir, exist_ok=True)
+    output = args.output or os.path.join(args.archive_dir, f"report_{generated}.html")
+    dirs = {"log_dir": args.log_dir, "gpu_dir": args.gpu_log_dir, "sysmon_dir": args.sysmon_dir,
+            "ram_dir": args.ram_log_dir}
+    sources = SOURCES
+    if importlib.util.find_spec("openpyxl") is None:
+        # парсер nvidia-smi импортирует openpyxl; остальные логи разбираются и без него
+        print("openpyxl not installed: nvidia-smi logs are skipped (pip install openpyxl)", file=sys.stderr)
+        sources = [src for src in SOURCES if src[0] != "nvidia"]
+    started = time.monotonic()
+    lister = glob_files
+    newest_htop = None
+    if not args.no_catalog:
+        import catalog
+        roots = {"log": args.log_dir, "sysmon": args.sysmon_dir, "gpu": args.gpu_log_dir, "htop": args.htop_dir,
+                 "ram": args.ram_log_dir, "archive": args.archive_dir}
+        conn = catalog.open_catalog(catalog.default_path(roots))
+        catalog.update(conn, roots)
+        since, until = catalog.parse_when(args.since), catalog.parse_when(args.until, end=True)
+        rows = catalog.query(conn, since=since, until=until, run_id=args.run)
+        lister = catalog_lister(r["path"] for r in rows)
+        htops = [r for r in catalog.query(conn, roots=["htop"], until=until) if r["path"].endswith(".html")]
+        newest_htop = max(htops, key=lambda r: r["end"])["path"] if htops else None
+        conn.close()
+    elif args.since or args.until or args.run is not None:
+        ap.error("--since/--until/--run need the catalog")
+    else:
+        htops = glob.glob(os.path.join(args.htop_dir, "*.html"))
+        newest_htop = max(htops, key=os.path.getmtime) if htops else None
+    digests = collect_digests(dirs, None if args.no_cache else os.path.join(args.archive_dir, CACHE_NAME), sources,
+                              lister=lister)
+    config = {"LOG_DIR": args.log_dir, "GPU_LOG_DIR": args.gpu_log_dir, "ARCHIVE_DIR": args.archive_dir,
+              "RETENTION_DAYS": os.environ.get("AUTOTEST_RETENTION_DAYS", "14")}
+    tmp = output + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render(digests, config, generated, newest_htop))
+    os.replace(tmp, output)
+    print(f"Report saved: {output} ({time.monotonic() - started:.1f}s)")
+
+if __name__ == "__main__":
+    main()
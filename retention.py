@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# retention.py — хранение логов по политикам за один обход: все корни логов
+# (AUTOTEST_LOG_DIR, AUTOTEST_GPU_LOG_DIR, ~/htop-res, ~/ram_stress_logs,
+# AUTOTEST_ARCHIVE_DIR) обходятся один раз os.scandir (catalog.walk), вид
+# файла — по имени (catalog.classify), и по политике вида решается:
+#   max_age_days — удалить прогоны, не менявшиеся дольше N суток;
+#   keep_runs    — оставить N последних прогонов вида в каталоге;
+#   compress_mb  — сжать (gzlog.py, блочный .gz с индексом) файлы больше N МиБ;
+# и по каталогу — max_dir_mb: удалять самые старые прогоны, пока каталог не
+# уложится в бюджет. Прогон — файлы одного вида с одной меткой времени в
+# имени (nvidia-smi_<дата>.csv, .ring, .csv.gz и индекс .gz.idx) — удаляется
+# целиком; логи без метки (sysmonitor.log, *_iostat.csv) — каждый файл сам
+# по себе: живой лог не держит свою сжатую историю (.log.gz), а из истории,
+# которую сжатие дописывает сегментами, срезаются сегменты старше
+# max_age_days (gzlog.trim). Не трогаются: файлы, изменённые за последние
+# --settle-min минут, кольца, занятые писателем, архивы collect, на которые
+# ссылаются оставшиеся (logarchive.py), и неизвестные файлы (вид other: их
+# можно только сжать).
+# Сжатие идёт после удалений в пуле из --jobs потоков с пониженным
+# приоритетом CPU и ввода-вывода (nice 19, ionice idle), чтобы не мешать
+# идущим тестам; повторный запуск, пока идёт прошлый, сразу выходит (flock),
+# поэтому скрипт можно ставить в cron/systemd. --dry-run печатает план.
+# --compress-only (autotest.sh rotate) только сжимает, и только в
+# AUTOTEST_LOG_DIR и AUTOTEST_GPU_LOG_DIR.
+# Политики по умолчанию — из окружения (.env): AUTOTEST_RETENTION_DAYS,
+# AUTOTEST_RETENTION_KEEP_RUNS, AUTOTEST_RETENTION_MAX_MB, AUTOTEST_ROTATE_MB;
+# поправки по видам и каталогам — JSON (--policy):
+#   {"default": {"max_age_days": 30}, "kinds": {"nvidia-smi": {"keep_runs": 20}},
+#    "dirs": {"~/gpu_burn_logs": {"max_dir_mb": 50000}}}
+#   retention.py --dry-run
+#   retention.py --compress-only --jobs 2
+
+import argparse
+import fcntl
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import catalog
+import gzlog
+import logarchive
+
+POLICY_KEYS = ("max_age_days", "keep_runs", "compress_mb", "max_dir_mb")
+# Виды, которые не удаляются по умолчанию: отчёты и архивы хранятся, пока их
+# политика не задана явно, неизвестные файлы — никогда
+PROTECTED_KINDS = ("archive", "report", "other")
+# Сжимаются только текстовые логи
+COMPRESS_SUFFIXES = (".log", ".csv", ".html", ".json")
+LOCK_NAME = ".retention.lock"
+SETTLE_MIN = 10
+
+class Policy(NamedTuple):
+    max_age_days: Optional[float]
+    keep_runs: Optional[int]
+    compress_mb: Optional[float]
+    max_dir_mb: Optional[float]
+
+class Action(NamedTuple):
+    op: str        # delete | trim | compress
+    path: str
+    size: int
+    reason: str
+    before: float = 0  # trim: срезать сегменты старше этого времени
+
+def _env_number(name: str, default: Optional[float]) -> Optional[float]:
+    # Пусто или 0 — правило выключено
+    value = os.environ.get(name, "")
+    if not value:
+        return default
+    number = float(value)
+    return number if number > 0 else None
+
+def default_policy() -> Dict[str, Any]:
+    keep = _env_number("AUTOTEST_RETENTION_KEEP_RUNS", None)
+    return {"max_age_days": _env_number("AUTOTEST_RETENTION_DAYS", 14),
+            "keep_runs": int(keep) if keep else None,
+            "compress_mb": _env_number("AUTOTEST_ROTATE_MB", 5),
+            "max_dir_mb": _env_number("AUTOTEST_RETENTION_MAX_MB", None)}
+
+class Policies:
+    """Политика вида и бюджет каталога: умолчания, поверх — файл --policy."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        for key in config:
+            if key not in ("default", "kinds", "dirs"):
+                raise SystemExit(f"Unknown policy section: {key}")
+        self.default = default_policy()
+        self.default.update(self._check(config.get("default", {})))
+        self.kinds = {k: self._check(v) for k, v in config.get("kinds", {}).items()}
+        self.dirs = {os.path.realpath(os.path.expanduser(d)): self._check(v)
+                     for d, v in config.get("dirs", {}).items()}
+
+    @staticmethod
+    def _check(section: Dict[str, Any]) -> Dict[str, Any]:
+        for key in section:
+            if key not in POLICY_KEYS:
+                raise SystemExit(f"Unknown policy key: {key} (known: {', '.join(POLICY_KEYS)})")
+        return section
+
+    def for_kind(self, kind: str, directory: str) -> Policy:
+        merged = dict(self.default)
+        if kind in PROTECTED_KINDS:
+            merged.update(max_age_days=None, keep_runs=None)
+            if kind != "other":
+                merged["compress_mb"] = None
+        merged.update(self.dirs.get(directory, {}))
+        if kind != "other":
+            merged.update(self.kinds.get(kind, {}))
+        return Policy(**merged)
+
+    def dir_budget(self, directory: str) -> Optional[float]:
+        return self.dirs.get(directory, {}).get("max_dir_mb", self.default["max_dir_mb"])
+
+def load_policies(path: Optional[str]) -> Policies:
+    if not path:
+        return Policies()
+    try:
+        with open(os.path.expanduser(path), "r", encoding="utf-8") as f:
+            return Policies(json.load(f))
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"{path}: {e}")
+
+# --- план ---
+
+def run_key(name: str) -> str:
+    # Имя без расширений: nvidia-smi_<дата>.csv.gz, .ring и .gz.idx — один
+    # прогон. У имён без метки времени прогон — сам файл: sysmonitor.log
+    # дописывается всегда, и его .log.gz иначе навсегда остался бы «занятым».
+    stem = name[:-len(gzlog.INDEX_SUFFIX)] if name.endswith(gzlog.INDEX_SUFFIX) else name
+    full = stem
+    changed = True
+    while changed:
+        changed = False
+        for ext in catalog.EXTENSIONS:
+            if stem.endswith(ext):
+                stem, changed = stem[:-len(ext)], True
+    if not catalog.STAMP_PREFIX.match(stem) and not re.match(r"^\d{8}-\d{6}_", stem):
+        return full
+    return stem
+
+def ring_busy(path: str) -> bool:
+    # Кольцо tsring.py, которое держит писатель (flock)
+    try:
+        with open(path, "rb") as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+    except OSError:
+        return False
+    return False
+
+def scan(roots: Dict[str, str]) -> Dict[str, Dict[Tuple[str, str], List[Tuple[str, os.stat_result]]]]:
+    # Один обход: каталог -> (вид, прогон) -> [(путь, stat)]. Индексы .gz.idx
+    # (catalog.walk их пропускает) подбираются к своему .gz при удалении.
+    tree: Dict[str, Dict[Tuple[str, str], List[Tuple[str, os.stat_result]]]] = defaultdict(lambda: defaultdict(list))
+    for _, path, st in catalog.walk(roots):
+        name = os.path.basename(path)
+        if name == LOCK_NAME or name.endswith(".tmp"):
+            continue
+        tree[os.path.realpath(os.path.dirname(path))][(catalog.classify(name), run_key(name))].append((path, st))
+    return tree
+
+def archive_needed(paths: List[str], deleted: set) -> set:
+    # Архивы, на которые ссылаются не удаляемые архивы logarchive.py
+    needed = set()
+    for path in paths:
+        if path in deleted or not path.endswith(".tar"):
+            continue
+        try:
+            manifest = logarchive.read_manifest(path)
+        except logarchive.ArchiveError:
+            continue
+        needed.update(os.path.join(os.path.dirname(path), n) for n in manifest["depends"])
+    return needed
+
+def plan(roots: Dict[str, str], policies: Policies, now: Optional[float] = None,
+         settle_min: float = SETTLE_MIN, compress_only: bool = False) -> Tuple[List[Action], Dict[str, int]]:
+    now = time.time() if now is None else now
+    settle = now - settle_min * 60
+    tree = scan(roots)
+    stats = {"dirs": len(tree), "files": 0, "bytes": 0, "busy": 0}
+    actions: List[Action] = []
+    deleted: set = set()
+    archives: List[str] = []
+
+    def delete(group: List[Tuple[str, os.stat_result]], reason: str) -> None:
+        for path, st in group:
+            if path not in deleted:
+                deleted.add(path)
+                actions.append(Action("delete", path, st.st_size, reason))
+
+    trims: Dict[str, Action] = {}
+    for directory, groups in sorted(tree.items()):
+        by_kind: Dict[str, List[Tuple[float, List[Tuple[str, os.stat_result]]]]] = defaultdict(list)
+        live: set = set()
+        for (kind, _), group in groups.items():
+            stats["files"] += len(group)
+            stats["bytes"] += sum(st.st_size for _, st in group)
+            if kind == "archive":
+                archives += [p for p, _ in group]
+            newest = max(st.st_mtime for _, st in group)
+            if newest > settle or any(p.endswith(".ring") and ring_busy(p) for p, _ in group):
+                stats["busy"] += 1
+                live.add(kind)
+                continue  # прогон ещё пишется
+            by_kind[kind].append((newest, group))
+        if compress_only:
+            continue
+        for kind, runs in by_kind.items():
+            policy = policies.for_kind(kind, directory)
+            runs.sort(key=lambda r: r[0], reverse=True)
+            for i, (mtime, group) in enumerate(runs):
+                if policy.keep_runs and i >= policy.keep_runs:
+                    delete(group, f"{kind}: beyond the last {policy.keep_runs} runs")
+                elif policy.max_age_days and mtime < now - policy.max_age_days * 86400:
+                    delete(group, f"{kind}: {(now - mtime) / 86400:.1f} days old > {policy.max_age_days:g}")
+                elif policy.max_age_days:
+                    # дописанная сжатием история: старые сегменты из начала
+                    for path, _ in group:
+                        if path.endswith(".gz"):
+                            before = now - policy.max_age_days * 86400
+                            cut = gzlog.trim(path, int(before * 1e9), dry_run=True)
+                            if cut:
+                                trims[path] = Action("trim", path, cut, f"{kind}: rotations older than "
+                                                                         f"{policy.max_age_days:g} days", before)
+        budget = policies.dir_budget(directory)
+        if budget:
+            total = sum(st.st_size for group in groups.values() for p, st in group if p not in deleted)
+            total -= sum(trims[p].size for group in groups.values() for p, _ in group if p in trims)
+            # самые старые прогоны удаляемых видов — первыми; последний прогон
+            # вида бюджет не удаляет, если вид не пишется прямо сейчас (тогда
+            # последний — живой лог, а остальное — его история)
+            candidates = sorted((mtime, kind, group) for kind, runs in by_kind.items() if kind not in PROTECTED_KINDS
+                                for mtime, group in runs[0 if kind in live else 1:]
+                                if not any(p in deleted for p, _ in group))
+            for mtime, kind, group in candidates:
+                if total <= budget * 2**20:
+                    break
+                delete(group, f"{kind}: directory over {budget:g} MiB")
+                total -= sum(st.st_size - (trims[p].size if p in trims else 0) for p, st in group)
+    # архивы, нужные оставшимся инкрементальным архивам, не удаляются
+    needed = archive_needed(archives, deleted)
+    if needed:
+        actions = [a for a in actions if not (a.op == "delete" and a.path in needed)]
+        deleted -= needed
+    actions += [a for p, a in trims.items() if p not in deleted]
+    for directory, groups in sorted(tree.items()):
+        for (kind, _), group in groups.items():
+            # отчёты и архивы не сжимаются и в --compress-only
+            policy = policies.for_kind(kind, directory)
+            if not policy.compress_mb:
+                continue
+            for path, st in group:
+                if (path not in deleted and path.endswith(COMPRESS_SUFFIXES) and st.st_mtime <= settle
+                        and st.st_size > policy.compress_mb * 2**20):
+                    actions.append(Action("compress", path, st.st_size,
+                                          f"{kind}: {st.st_size / 2**20:.1f} MiB > {policy.compress_mb:g}"))
+    return actions, stats
+
+# --- выполнение ---
+
+def lower_priority() -> None:
+    # nice 19 и класс ввода-вывода idle для процесса; потоки пула, созданные
+    # позже, наследуют приоритет главного
+    try:
+        os.setpriority(os.PRIO_PROCESS, 0, 19)
+    except OSError:
+        pass
+    try:
+        subprocess.run(["ionice", "-c", "3", "-p", str(os.getpid())], stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+
+def remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    # индекс блочного .gz — вместе с ним
+    try:
+        os.remove(gzlog.index_path(path))
+    except FileNotFoundError:
+        pass
+
+def compress(path: str) -> str:
+    # Файл мог измениться после обхода: пишущийся сейчас не трогаем
+    st = os.stat(path)
+    if st.st_mtime > time.time() - 60:
+        raise OSError(f"{path} is being written")
+    return gzlog.compress(path, append=True)
+
+def apply(actions: List[Action], jobs: int = 2) -> Tuple[int, int, int]:
+    # Возвращает (удалено и обрезано, сжато, ошибок); обрезка — до сжатия,
+    # которое может дописать в тот же .gz
+    deleted = compressed = failed = 0
+    for a in actions:
+        if a.op == "compress":
+            continue
+        try:
+            if a.op == "delete":
+                remove(a.path)
+                print(f"deleted {a.path}")
+            else:
+                freed = gzlog.trim(a.path, int(a.before * 1e9))
+                print(f"trimmed {a.path} (-{freed / 2**20:.1f} MiB)")
+            deleted += 1
+        except OSError as e:
+            print(f"{a.path}: {e}", file=sys.stderr)
+            failed += 1
+    todo = [a for a in actions if a.op == "compress"]
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = [(a, pool.submit(compress, a.path)) for a in todo]
+            for a, fut in futures:
+                try:
+                    dst = fut.result()
+                    compressed += 1
+                    print(f"compressed {a.path} -> {os.path.basename(dst)} "
+                          f"({a.size / 2**20:.1f} -> {os.path.getsize(dst) / 2**20:.1f} MiB)")
+                except (OSError, EOFError, zlib.error) as e:
+                    print(f"{a.path}: {e}", file=sys.stderr)
+                    failed += 1
+    return deleted, compressed, failed
+
+def format_plan(actions: List[Action], stats: Dict[str, int]) -> str:
+    lines = [f"{a.op:<8} {a.size / 2**20:>9.1f} MiB  {a.path}  ({a.reason})" for a in actions]
+    freed = sum(a.size for a in actions if a.op != "compress")
+    packed = sum(a.size for a in actions if a.op == "compress")
+    lines.append(f"Scanned {stats['files']} files in {stats['dirs']} dirs ({stats['bytes'] / 2**20:.1f} MiB), "
+                 f"{stats['busy']} runs still written; delete {sum(a.op == 'delete' for a in actions)} "
+                 f"trim {sum(a.op == 'trim' for a in actions)} ({freed / 2**20:.1f} MiB), compress {sum(a.op == 'compress' for a in actions)} "
+                 f"({packed / 2**20:.1f} MiB)")
+    return "\n".join(lines)
+
+def main():
+    roots = catalog.default_roots()
+    ap = argparse.ArgumentParser(description="Apply retention policies to all AutoTest log roots in one pass.")
+    ap.add_argument("--log-dir", default=roots["log"])
+    ap.add_argument("--gpu-log-dir", default=roots["gpu"])
+    ap.add_argument("--archive-dir", default=roots["archive"])
+    ap.add_argument("--policy", default=os.environ.get("AUTOTEST_RETENTION_POLICY"),
+                    help="JSON with per-kind/per-dir overrides (default: $AUTOTEST_RETENTION_POLICY)")
+    ap.add_argument("--dry-run", action="store_true", help="Print the plan, change nothing")
+    ap.add_argument("--format", choices=["text", "json"], default="text", help="Plan output for --dry-run")
+    ap.add_argument("--compress-only", action="store_true", help="Only compress large logs (autotest.sh rotate)")
+    ap.add_argument("--settle-min", type=float, default=SETTLE_MIN,
+                    help="Skip runs written within the last N minutes")
+    ap.add_argument("-j", "--jobs", type=int, default=min(2, os.cpu_count() or 1), help="Compression threads")
+    ap.add_argument("--no-nice", action="store_true", help="Keep normal CPU and I/O priority")
+    args = ap.parse_args()
+
+    roots.update(log=args.log_dir, gpu=args.gpu_log_dir, archive=args.archive_dir)
+    if args.compress_only:
+        roots = {"log": roots["log"], "gpu": roots["gpu"]}
+    policies = load_policies(args.policy)
+    os.makedirs(roots["log"], exist_ok=True)
+    lock = open(os.path.join(roots["log"], LOCK_NAME), "w")
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        print("Another retention run is in progress", file=sys.stderr)
+        return
+    if not args.no_nice:
+        lower_priority()
+    started = time.monotonic()
+    actions, stats = plan(roots, policies, settle_min=args.settle_min, compress_only=args.compress_only)
+    if args.dry_run:
+        if args.format == "json":
+            print(json.dumps({"stats": stats, "actions": [a._asdict() for a in actions]}, indent=1))
+        else:
+            print(format_plan(actions, stats))
+        return
+    deleted, compressed, failed = apply(actions, args.jobs)
+    print(f"Retention: {stats['files']} files scanned, {deleted} deleted or trimmed, {compressed} compressed"
+          + (f", {failed} failed" if failed else "") + f" ({time.monotonic() - started:.1f}s)")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        sys.exit(0)
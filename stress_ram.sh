@@ -11,7 +11,7 @@ mkdir -p "$LOGDIR"
 LOGFILE="$LOGDIR/ram_stress_$(date +"${AUTOTEST_FORMAT_DATE:-%d-%m-%Y %H:%M:%S}").log"
 
 # Длительность теста (в секундах) — например, 8 часов = 28800
-DURATION=28800
+DURATION="${DURATION:-28800}"
 
 # Определение общего объёма RAM
 TOTAL_RAM=$(free -m | awk '/Mem:/ {print $2}')
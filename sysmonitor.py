@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+# sysmonitor.py — системный мониторинг без порождения процессов на каждый замер
+# (замена monitor.sh для monitor-once / monitor-loop).
+# Метрики читаются напрямую из /proc и /sys: загрузка CPU — по разнице
+# счётчиков /proc/stat между замерами, самый нагруженный процесс — по разнице
+# utime+stime в /proc/<pid>/stat, температуры — из /sys/class/hwmon, частота —
+# из cpufreq, память — /proc/meminfo, сеть — /proc/net/route и
+# /sys/class/net/*/statistics. Внешние команды остаются только там, где без
+# них никак: nvidia-smi (один запрос на все поля, кешируется на --gpu-interval)
+# и SMART (nvme smart-log, smartctl -H — в фоновом потоке раз в
+# --slow-interval). Корень /proc и /sys задаётся --root (проверка на
+# подготовленном дереве файлов).
+# Пишет sysmonitor.log в формате monitor.sh и машиночитаемый sysmonitor.csv,
+# с --ring — ещё и кольцо sysmonitor.ring (tsring.py: замер — запись
+# фиксированного размера без форматирования; --format ring — только кольцо,
+# текст и CSV выгружаются из него по запросу: tsring.py export).
+
+import argparse
+import csv
+import glob
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import tsring
+
+HEADER = (
+    "Timestamp           | Top_Process  | CPU_Freq  | CPU_Temp | CPU_Load | GPU_Freq | GPU_Temp | RAM_Used | "
+    "RAM_Total | RAM_Free | Net_If | Net_Link | Net_RxB | Net_TxB | NVMe_Temp | NVMe_Err | Disk_Health\n"
+    "--------------------+--------------+-----------+----------+----------+----------+----------+----------+"
+    "-----------+---------+--------+----------+---------+---------+-----------+----------+------------\n"
+)
+# Тот же printf, что в monitor.sh
+ROW = ("%-19s | %-12s | %-8s | %-8s | %-8s | %-8s | %-8s | %-10s | %-10s | %-8s | %-6s | %-8s | "
+       "%-7s | %-7s | %-9s | %-8s | %-10s\n")
+# Колонки sysmonitor.csv (пусто — значение недоступно)
+CSV_FIELDS = [
+    "timestamp", "top_process", "top_process_cpu_pct", "cpu_freq_mhz", "cpu_temp_c", "cpu_load_pct",
+    "gpu_freq_mhz", "gpu_temp_c", "gpu_mem_clock_mhz", "gpu_mem_used_mib", "gpu_mem_total_mib",
+    "ram_used_mb", "ram_total_mb", "ram_free_mb", "net_if", "net_link", "net_rx_bytes", "net_tx_bytes",
+    "nvme_temp_c", "nvme_media_errors", "disk_health",
+]
+# Схема кольца: поля CSV_FIELDS (кроме timestamp — время записи) и их struct-типы
+RING_FIELDS = [
+    ("top_process", "16s"), ("top_process_cpu_pct", "d"), ("cpu_freq_mhz", "i"), ("cpu_temp_c", "i"),
+    ("cpu_load_pct", "d"), ("gpu_freq_mhz", "i"), ("gpu_temp_c", "i"), ("gpu_mem_clock_mhz", "i"),
+    ("gpu_mem_used_mib", "i"), ("gpu_mem_total_mib", "i"), ("ram_used_mb", "q"), ("ram_total_mb", "q"),
+    ("ram_free_mb", "q"), ("net_if", "16s"), ("net_link", "8s"), ("net_rx_bytes", "q"), ("net_tx_bytes", "q"),
+    ("nvme_temp_c", "i"), ("nvme_media_errors", "q"), ("disk_health", "16s"),
+]
+GPU_QUERY = "clocks.sm,temperature.gpu,clocks.mem,memory.used,memory.total"
+
+# Датчики температуры CPU в порядке предпочтения: (имя hwmon, метка)
+CPU_SENSORS = [("coretemp", "Package id 0"), ("coretemp", "Core 0"), ("k10temp", "Tctl"),
+               ("k10temp", "Tdie"), ("zenpower", "Tdie"), ("cpu_thermal", None)]
+
+def run_quiet(cmd: List[str], timeout: float = 10) -> Optional[str]:
+    try:
+        res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return res.stdout if res.returncode == 0 else None
+
+class SystemSampler:
+    def __init__(self, root: str = "/", gpu: bool = True, smart: bool = True,
+                 gpu_interval: float = 5.0, top_interval: float = 5.0, slow_interval: float = 300.0,
+                 nvidia_smi: Optional[str] = None):
+        self.root = root
+        self.gpu = gpu
+        self.smart = smart
+        self.gpu_interval = gpu_interval
+        self.top_interval = top_interval
+        self.slow_interval = slow_interval
+        self.nvidia_smi = nvidia_smi or os.environ.get("AUTOTEST_NVIDIA_SMI") or "nvidia-smi"
+        self._fds: Dict[str, int] = {}
+        self._cpu_prev: Optional[Tuple[int, int]] = None
+        self._proc_prev: Dict[int, Tuple[str, int]] = {}
+        self._proc_prev_t = 0.0
+        self._top: Tuple[Optional[str], Optional[float]] = (None, None)
+        self._top_at = float("-inf")
+        self._gpu: Dict[str, Any] = {}
+        self._gpu_at = float("-inf")
+        self._slow: Dict[str, Any] = {}
+        self._slow_at = float("-inf")
+        self._slow_thread: Optional[threading.Thread] = None
+        self._sensors_at = float("-inf")
+        self._cpu_temp_path: Optional[str] = None
+        self._amd_gpu_temp_path: Optional[str] = None
+        self._nvme_temp_path: Optional[str] = None
+        self._freq_paths: List[str] = []
+
+    # --- чтение файлов ---
+
+    def path(self, rel: str) -> str:
+        return os.path.join(self.root, rel.lstrip("/"))
+
+    def read(self, rel: str) -> Optional[str]:
+        # Часто читаемые файлы держим открытыми: pread с нуля отдаёт свежее
+        # содержимое /proc и /sys без open/close на каждый замер
+        fd = self._fds.get(rel)
+        try:
+            if fd is None:
+                fd = self._fds[rel] = os.open(self.path(rel), os.O_RDONLY)
+            return os.pread(fd, 1 << 16, 0).decode("utf-8", errors="replace")
+        except OSError:
+            if fd is not None:
+                os.close(fd)
+                self._fds.pop(rel, None)
+            return None
+
+    def read_once(self, rel: str) -> Optional[str]:
+        try:
+            with open(self.path(rel), "r", encoding="utf-8", errors="replace") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def close(self) -> None:
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+    # --- датчики (поиск путей раз в slow_interval) ---
+
+    def discover_sensors(self) -> None:
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+        hwmon: Dict[str, List[str]] = {}
+        for d in sorted(glob.glob(self.path("sys/class/hwmon/hwmon*"))):
+            name = (self.read_once(os.path.relpath(os.path.join(d, "name"), self.root)) or "").strip()
+            hwmon.setdefault(name, []).append(os.path.relpath(d, self.root))
+
+        def temp_input(name: str, label: Optional[str]) -> Optional[str]:
+            for d in hwmon.get(name, []):
+                inputs = sorted(glob.glob(self.path(os.path.join(d, "temp*_input"))))
+                for inp in inputs:
+                    rel = os.path.relpath(inp, self.root)
+                    if label is None:
+                        return rel
+                    lab = self.read_once(rel[:-len("_input")] + "_label")
+                    if lab is not None and lab.strip() == label:
+                        return rel
+            return None
+
+        self._cpu_temp_path = next((p for p in (temp_input(n, l) for n, l in CPU_SENSORS) if p), None)
+        self._amd_gpu_temp_path = temp_input("amdgpu", "edge")
+        self._nvme_temp_path = temp_input("nvme", "Composite") or temp_input("nvme", None)
+        self._freq_paths = [os.path.relpath(p, self.root) for p in
+                            sorted(glob.glob(self.path("sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq")))]
+
+    # --- метрики ---
+
+    def cpu_times(self) -> Optional[Tuple[int, int]]:
+        # (idle, total) из строки cpu в /proc/stat; idle — как id в top
+        text = self.read("proc/stat")
+        if not text or not text.startswith("cpu "):
+            return None
+        values = [int(v) for v in text[4:text.index("\n")].split()]
+        # guest/guest_nice уже учтены в user/nice
+        return values[3], sum(values[:8])
+
+    def cpu_load(self, times: Optional[Tuple[int, int]]) -> Optional[float]:
+        prev, self._cpu_prev = self._cpu_prev, times
+        if prev is None or times is None or times[1] <= prev[1]:
+            return None
+        idle = (times[0] - prev[0]) / (times[1] - prev[1])
+        return round(100 * (1 - idle), 1)
+
+    def proc_ticks(self) -> Dict[int, Tuple[str, int]]:
+        ticks: Dict[int, Tuple[str, int]] = {}
+        try:
+            pids = os.listdir(self.path("proc"))
+        except OSError:
+            return ticks
+        for pid in pids:
+            if not pid.isdigit():
+                continue
+            text = self.read_once(f"proc/{pid}/stat")
+            if not text:
+                continue
+            l, r = text.find("("), text.rfind(")")
+            fields = text[r + 2:].split()
+            try:
+                ticks[int(pid)] = (text[l + 1:r], int(fields[11]) + int(fields[12]))
+            except (IndexError, ValueError):
+                continue
+        return ticks
+
+    def top_process(self, now: float) -> Tuple[Optional[str], Optional[float]]:
+        # Сканирование /proc/<pid> — самая дорогая часть замера, поэтому
+        # раз в top_interval; между сканами отдаётся прошлый результат
+        if now - self._top_at < self.top_interval:
+            return self._top
+        ticks = self.proc_ticks()
+        prev, dt = self._proc_prev, now - self._proc_prev_t
+        self._proc_prev, self._proc_prev_t, self._top_at = ticks, now, now
+        if not prev or dt <= 0:
+            return self._top
+        best, best_delta = None, -1
+        for pid, (comm, t) in ticks.items():
+            p = prev.get(pid)
+            delta = t - p[1] if p is not None and p[0] == comm else t
+            if delta > best_delta:
+                best, best_delta = comm, delta
+        hz = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._top = (best, round(100 * best_delta / hz / dt, 1))
+        return self._top
+
+    def cpu_freq(self) -> Optional[int]:
+        values = []
+        for rel in self._freq_paths:
+            text = self.read(rel)
+            if text and text.strip().isdigit():
+                values.append(int(text))
+        if values:
+            return round(sum(values) / len(values) / 1000)
+        text = self.read("proc/cpuinfo")
+        m = re.search(r"^cpu MHz\s*:\s*([0-9.]+)", text or "", re.M)
+        return int(float(m.group(1))) if m else None
+
+    def temp(self, rel: Optional[str]) -> Optional[int]:
+        text = self.read(rel) if rel else None
+        try:
+            return int(text) // 1000 if text else None
+        except ValueError:
+            return None
+
+    def memory(self) -> Dict[str, Optional[int]]:
+        # Как free -m: used = total - available (procps-ng 4)
+        info: Dict[str, int] = {}
+        for line in (self.read("proc/meminfo") or "").splitlines():
+            key, _, rest = line.partition(":")
+            if key in ("MemTotal", "MemFree", "MemAvailable"):
+                info[key] = int(rest.split()[0]) // 1024
+        total = info.get("MemTotal")
+        avail = info.get("MemAvailable", info.get("MemFree"))
+        return {"ram_total_mb": total, "ram_free_mb": info.get("MemFree"),
+                "ram_used_mb": total - avail if total is not None and avail is not None else None}
+
+    def network(self) -> Dict[str, Any]:
+        # Интерфейс маршрута по умолчанию с наименьшей метрикой (как ip route get)
+        best: Optional[Tuple[int, str]] = None
+        for line in (self.read("proc/net/route") or "").splitlines()[1:]:
+            f = line.split()
+            if len(f) > 6 and f[1] == "00000000" and f[7] == "00000000":
+                metric = int(f[6])
+                if best is None or metric < best[0]:
+                    best = (metric, f[0])
+        out: Dict[str, Any] = {"net_if": None, "net_link": None, "net_rx_bytes": None, "net_tx_bytes": None}
+        if best is None or not os.path.isdir(self.path(f"sys/class/net/{best[1]}")):
+            return out
+        iface = best[1]
+        carrier = (self.read(f"sys/class/net/{iface}/carrier") or "").strip()
+        out["net_if"] = iface
+        out["net_link"] = "UP" if carrier == "1" else "DOWN"
+        for key, name in (("net_rx_bytes", "rx_bytes"), ("net_tx_bytes", "tx_bytes")):
+            text = self.read(f"sys/class/net/{iface}/statistics/{name}")
+            out[key] = int(text) if text and text.strip().isdigit() else None
+        return out
+
+    def gpu_metrics(self, now: float) -> Dict[str, Any]:
+        # Один запрос nvidia-smi на все поля, результат кешируется на gpu_interval
+        if not self.gpu or now - self._gpu_at < self.gpu_interval:
+            return self._gpu
+        self._gpu_at = now
+        out = run_quiet([self.nvidia_smi, f"--query-gpu={GPU_QUERY}", "--format=csv,noheader,nounits"])
+        values: Dict[str, Any] = {}
+        if out:
+            parts = [p.strip() for p in out.splitlines()[0].split(",")]
+            for key, v in zip(("gpu_freq_mhz", "gpu_temp_c", "gpu_mem_clock_mhz", "gpu_mem_used_mib",
+                               "gpu_mem_total_mib"), parts):
+                values[key] = int(float(v)) if re.fullmatch(r"[0-9.]+", v) else None
+        elif self._amd_gpu_temp_path:
+            values["gpu_temp_c"] = self.temp(self._amd_gpu_temp_path)
+        else:
+            self.gpu = False  # nvidia-smi нет — больше не пробуем
+        self._gpu = values
+        return values
+
+    def slow_probes(self) -> Dict[str, Any]:
+        # nvme smart-log / smartctl -H: секунды на вызов, поэтому в фоне;
+        # замер берёт последний готовый результат
+        values: Dict[str, Any] = {}
+        nvme = sorted(glob.glob(self.path("dev/nvme*n1")))
+        if nvme:
+            out = run_quiet(["nvme", "smart-log", nvme[0]])
+            m = re.search(r"^media_errors\s*:\s*([0-9,]+)", out or "", re.M)
+            if m:
+                values["nvme_media_errors"] = int(m.group(1).replace(",", ""))
+            m = re.search(r"^temperature\s*:\s*([0-9]+)", out or "", re.M)
+            if m:
+                values["nvme_smart_temp_c"] = int(m.group(1))
+        # первый диск, как lsblk -d TYPE=disk
+        disk = None
+        for d in sorted(glob.glob(self.path("sys/block/*"))):
+            name = os.path.basename(d)
+            if not re.match(r"(loop|ram|zram|dm-|md|sr|nbd)", name):
+                disk = f"/dev/{name}"
+                break
+        if disk:
+            out = run_quiet(["smartctl", "-H", disk], timeout=30)
+            m = re.search(r"overall-health[^:]*:\s*(\S+)", out or "")
+            values["disk_health"] = m.group(1) if m else ("PASSED" if out and "PASSED" in out.upper() else "UNKNOWN")
+        return values
+
+    def _refresh_slow(self, now: float) -> None:
+        if not self.smart or now - self._slow_at < self.slow_interval:
+            return
+        if self._slow_thread is not None and self._slow_thread.is_alive():
+            return
+        self._slow_at = now
+
+        def work():
+            self._slow = self.slow_probes()
+
+        self._slow_thread = threading.Thread(target=work, daemon=True)
+        self._slow_thread.start()
+
+    def prime(self) -> None:
+        # Загрузке CPU и процессам нужна разница счётчиков: базовая точка
+        # за 0.1 с до первого замера (top -d делает так же)
+        self._cpu_prev = self.cpu_times()
+        self.top_process(time.monotonic())
+        self._top_at = float("-inf")
+        time.sleep(0.1)
+
+    def sample(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        if now - self._sensors_at >= self.slow_interval:
+            self.discover_sensors()
+            self._sensors_at = now
+        if self._cpu_prev is None:
+            self.prime()
+            now = time.monotonic()
+        self._refresh_slow(now)
+        top, top_pct = self.top_process(now)
+        row: Dict[str, Any] = {
+            "timestamp": datetime.now(),
+            "top_process": top,
+            "top_process_cpu_pct": top_pct,
+            "cpu_freq_mhz": self.cpu_freq(),
+            "cpu_temp_c": self.temp(self._cpu_temp_path),
+            "cpu_load_pct": self.cpu_load(self.cpu_times()),
+        }
+        row.update(self.gpu_metrics(now))
+        row.update(self.memory())
+        row.update(self.network())
+        nvme_temp = self.temp(self._nvme_temp_path)
+        row["nvme_temp_c"] = nvme_temp if nvme_temp is not None else self._slow.get("nvme_smart_temp_c")
+        row["nvme_media_errors"] = self._slow.get("nvme_media_errors")
+        row["disk_health"] = self._slow.get("disk_health")
+        return row
+
+def _fmt(v: Any, unit: str = "") -> str:
+    return "N/A" if v is None else f"{v}{unit}"
+
+def format_row(row: Dict[str, Any], date_format: str) -> str:
+    # Строка sysmonitor.log с теми же значениями и единицами, что у monitor.sh
+    return ROW % (
+        row["timestamp"].strftime(date_format), row.get("top_process") or "N/A",
+        _fmt(row.get("cpu_freq_mhz"), " MHz"), _fmt(row.get("cpu_temp_c"), "°C"),
+        _fmt(None if row.get("cpu_load_pct") is None else f"{row['cpu_load_pct']:g}", "%"),
+        _fmt(row.get("gpu_freq_mhz"), " MHz"), _fmt(row.get("gpu_temp_c"), "°C"),
+        _fmt(row.get("ram_used_mb"), " MB"), _fmt(row.get("ram_total_mb"), " MB"), _fmt(row.get("ram_free_mb"), " MB"),
+        _fmt(row.get("net_if")), _fmt(row.get("net_link")), _fmt(row.get("net_rx_bytes")),
+        _fmt(row.get("net_tx_bytes")), _fmt(row.get("nvme_temp_c"), " C"), _fmt(row.get("nvme_media_errors")),
+        _fmt(row.get("disk_health")))
+
+def csv_values(row: Dict[str, Any]) -> List[Any]:
+    # Строка sysmonitor.csv (метка времени с миллисекундами, пусто — нет значения)
+    values = dict(row, timestamp=row["timestamp"].isoformat(sep=" ", timespec="milliseconds"))
+    return ["" if values.get(k) is None else values[k] for k in CSV_FIELDS]
+
+class SysmonitorWriter:
+    # sysmonitor.log (таблица monitor.sh) и/или sysmonitor.csv; файлы открыты
+    # всё время работы, строка сбрасывается на диск сразу. ring — путь кольца
+    def __init__(self, log_dir: str, fmt: str = "both", date_format: str = "%d-%m-%Y %H:%M:%S",
+                 ring: Optional[str] = None, ring_capacity: int = tsring.DEFAULT_CAPACITY):
+        os.makedirs(log_dir, exist_ok=True)
+        self.date_format = date_format
+        self.text = self.csv = None
+        self.csv_writer = None
+        self.ring = None
+        if ring:
+            try:
+                self.ring = tsring.Ring.create(ring, "sysmonitor", RING_FIELDS, ring_capacity)
+            except (tsring.RingError, OSError) as e:
+                # кольцо держит monitor-loop: разовый замер пишет только текст
+                print(f"sysmonitor: ring not written: {e}", file=sys.stderr)
+        if fmt in ("text", "both"):
+            path = os.path.join(log_dir, "sysmonitor.log")
+            new = not os.path.exists(path)
+            self.text = open(path, "a", encoding="utf-8")
+            if new:
+                self.text.write(HEADER)
+        if fmt in ("csv", "both"):
+            path = os.path.join(log_dir, "sysmonitor.csv")
+            new = not os.path.exists(path) or os.path.getsize(path) == 0
+            self.csv = open(path, "a", encoding="utf-8", newline="")
+            self.csv_writer = csv.writer(self.csv)
+            if new:
+                self.csv_writer.writerow(CSV_FIELDS)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self.text is not None:
+            self.text.write(format_row(row, self.date_format))
+            self.text.flush()
+        if self.csv_writer is not None:
+            self.csv_writer.writerow(csv_values(row))
+            self.csv.flush()
+        if self.ring is not None:
+            self.ring.append_row(row["timestamp"].timestamp(), row)
+
+    def close(self) -> None:
+        for f in (self.text, self.csv, self.ring):
+            if f is not None:
+                f.close()
+
+def main():
+    ap = argparse.ArgumentParser(description="Sample CPU/GPU/RAM/network/disk metrics from /proc and /sys "
+                                             "into sysmonitor.log (monitor.sh format) and sysmonitor.csv.")
+    ap.add_argument("--interval", type=float, default=0,
+                    help="Seconds between samples (fractions allowed); 0 = one sample and exit")
+    ap.add_argument("--count", type=int, help="Stop after N samples")
+    ap.add_argument("--duration", type=float, help="Stop after N seconds")
+    ap.add_argument("--log-dir", default=os.path.expanduser("~/AutoTest_Logs/sysmonitor"),
+                    help="Output directory (same as monitor.sh)")
+    ap.add_argument("--format", choices=["text", "csv", "both", "ring"], default="both",
+                    help="sysmonitor.log (table), sysmonitor.csv (machine-readable), both, or only the ring")
+    ap.add_argument("--ring", nargs="?", const="", default=None, metavar="PATH",
+                    help="Also append to a memory-mapped ring (default path: <log-dir>/sysmonitor.ring)")
+    ap.add_argument("--ring-capacity", type=int, default=tsring.DEFAULT_CAPACITY, help="Records kept in a new ring")
+    ap.add_argument("--root", default="/", help="Root of the proc/sys tree (tests)")
+    ap.add_argument("--gpu-interval", type=float, default=5.0, help="Seconds between nvidia-smi queries")
+    ap.add_argument("--top-interval", type=float, default=5.0, help="Seconds between /proc/<pid> scans")
+    ap.add_argument("--slow-interval", type=float, default=300.0,
+                    help="Seconds between SMART/NVMe probes and hwmon rediscovery")
+    ap.add_argument("--no-gpu", action="store_true", help="Do not call nvidia-smi")
+    ap.add_argument("--no-smart", action="store_true", help="Do not call nvme/smartctl")
+    ap.add_argument("--stdout", action="store_true", help="Print rows instead of writing files")
+    args = ap.parse_args()
+
+    sampler = SystemSampler(args.root, gpu=not args.no_gpu, smart=not args.no_smart,
+                            gpu_interval=args.gpu_interval, top_interval=args.top_interval,
+                            slow_interval=args.slow_interval)
+    date_format = os.environ.get("AUTOTEST_FORMAT_DATE", "%d-%m-%Y %H:%M:%S")
+    ring = args.ring
+    if args.format == "ring" and ring is None:
+        ring = ""
+    if ring == "":
+        ring = os.path.join(args.log_dir, "sysmonitor.ring")
+    writer = None if args.stdout else SysmonitorWriter(args.log_dir, args.format, date_format, ring,
+                                                       args.ring_capacity)
+    once = args.interval <= 0
+    if once and sampler.smart:
+        # разовый замер: SMART сразу, а не в фоне
+        sampler._slow = sampler.slow_probes()
+        sampler.smart = False
+    sampler.prime()
+    start = time.monotonic()
+    n = 0
+    try:
+        while True:
+            row = sampler.sample()
+            if writer is None:
+                print(format_row(row, date_format), end="", flush=True)
+            else:
+                writer.write(row)
+            n += 1
+            if once or (args.count and n >= args.count):
+                break
+            # шаг без накопления сдвига: следующий замер — на сетке interval
+            elapsed = time.monotonic() - start
+            if args.duration is not None and elapsed >= args.duration:
+                break
+            time.sleep(max(0.0, args.interval - elapsed % args.interval))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.close()
+        if writer is not None:
+            writer.close()
+
+if __name__ == "__main__":
+    main()
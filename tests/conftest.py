@@ -0,0 +1,27 @@
+# Общие фикстуры тестов: корень репозитория и bench/ в sys.path (модули
+# лежат в корне, заглушки и генератор логов — в bench/), загрузка парсера
+# nvidia-smi (дефис в имени файла не позволяет импортировать его обычно).
+#   python3 -m pytest -q
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH = os.path.join(REPO, "bench")
+for path in (REPO, BENCH):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+PARSER = os.path.join(REPO, "gpuburn", "nvidia-smi_table-parser.py")
+
+@pytest.fixture(scope="session")
+def parser():
+    spec = importlib.util.spec_from_file_location("nvidia_smi_table_parser", PARSER)
+    module = importlib.util.module_from_spec(spec)
+    # под своим именем в sys.modules: задачи пула (-j) передаются в дочерние процессы по имени модуля
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
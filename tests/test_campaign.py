@@ -0,0 +1,117 @@
+# campaign.py с поддельным autotest.sh: этапы на разных ресурсах идут
+# одновременно, на общем — по очереди, зависимые от проваленного
+# пропускаются, после остановки продолжаются только незавершённые этапы.
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from conftest import REPO
+
+# Поддельный autotest.sh: <задача> <id этапа> [секунды]; начало и конец этапа
+# пишутся в $FAKE_EVENTS. hold ждёт файла $FAKE_RELEASE и не реагирует на SIGTERM
+FAKE_AUTOTEST = """\
+task=$1; id=$2
+echo "start $id $(date +%s.%N)" >> "$FAKE_EVENTS"
+case $task in
+  sleep) sleep "$3" ;;
+  fail) exit 1 ;;
+  hold) trap '' TERM; while [ ! -e "$FAKE_RELEASE" ]; do sleep 0.1; done ;;
+esac
+echo "end $id $(date +%s.%N)" >> "$FAKE_EVENTS"
+"""
+
+def stage(sid, task, resources, *args, after=()):
+    return {"id": sid, "task": task, "args": [sid, *args], "duration": "1m", "resources": list(resources),
+            "after": list(after)}
+
+class Campaign:
+    def __init__(self, tmp_path, stages):
+        self.tmp = tmp_path
+        self.definition = tmp_path / "test.json"
+        self.definition.write_text(json.dumps({"description": "test", "stages": stages}))
+        self.autotest = tmp_path / "autotest.sh"
+        self.autotest.write_text(FAKE_AUTOTEST)
+        self.events = tmp_path / "events"
+        self.release = tmp_path / "release"
+        self.env = dict(os.environ, FAKE_EVENTS=str(self.events), FAKE_RELEASE=str(self.release))
+
+    def argv(self, *args):
+        return [sys.executable, os.path.join(REPO, "campaign.py"), "--log-dir", str(self.tmp / "logs"),
+                "--autotest", str(self.autotest), *args]
+
+    def run(self, *args):
+        return subprocess.run(self.argv(*args), env=self.env, capture_output=True, text=True, timeout=60)
+
+    def spans(self):
+        # id этапа -> [[начало, конец или None], ...] по запускам
+        out = {}
+        if not self.events.exists():
+            return out
+        for line in self.events.read_text().splitlines():
+            kind, sid, t = line.split()
+            if kind == "start":
+                out.setdefault(sid, []).append([float(t), None])
+            else:
+                out[sid][-1][1] = float(t)
+        return out
+
+    def state(self):
+        with open(self.tmp / "logs" / "campaigns" / "test.state.json", encoding="utf-8") as f:
+            return json.load(f)
+
+    def statuses(self):
+        return {sid: s["status"] for sid, s in self.state()["status"].items()}
+
+def test_resources_parallel_and_serialized(tmp_path):
+    c = Campaign(tmp_path, [stage("a", "sleep", ["cpu"], "1"), stage("b", "sleep", ["gpu"], "1"),
+                            stage("c", "sleep", ["cpu", "ram"], "0.2")])
+    proc = c.run("run", str(c.definition))
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    spans = c.spans()
+    (a0, a1), (b0, b1), (c0, _) = spans["a"][0], spans["b"][0], spans["c"][0]
+    assert b0 < a1 and a0 < b1  # cpu и gpu одновременно
+    assert c0 >= a1  # cpu занят этапом a
+    assert c.statuses() == {"a": "done", "b": "done", "c": "done"}
+
+def test_failed_dependency_skips_dependents(tmp_path):
+    c = Campaign(tmp_path, [stage("a", "fail", ["cpu"]), stage("b", "sleep", ["cpu"], "0", after=["a"]),
+                            stage("c", "sleep", ["ram"], "0", after=["b"]), stage("d", "sleep", ["gpu"], "0")])
+    proc = c.run("run", str(c.definition))
+    assert proc.returncode == 1, proc.stdout + proc.stderr
+    assert c.statuses() == {"a": "failed", "b": "skipped", "c": "skipped", "d": "done"}
+    assert sorted(c.spans()) == ["a", "d"]
+
+def test_interrupt_then_resume_restarts_unfinished(tmp_path):
+    c = Campaign(tmp_path, [stage("a", "sleep", ["cpu"], "0"), stage("b", "hold", ["gpu"]),
+                            stage("c", "sleep", ["disk"], "0", after=["b"])])
+    proc = subprocess.Popen(c.argv("run", str(c.definition)), env=c.env, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, text=True, start_new_session=True)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if c.statuses()["a"] == "done" and "b" in c.spans():
+                break
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.1)
+    # как timeout: сигнал всей группе, затем ещё один, пока этапы останавливаются
+    os.killpg(proc.pid, signal.SIGTERM)
+    time.sleep(0.5)
+    os.killpg(proc.pid, signal.SIGTERM)
+    out, err = proc.communicate(timeout=60)
+    assert proc.returncode == 130, out + err
+    assert "Traceback" not in err
+    state = c.state()
+    assert state["pid"] is None
+    assert c.statuses() == {"a": "done", "b": "pending", "c": "pending"}
+
+    c.release.touch()
+    proc = c.run("resume", "test")
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    spans = c.spans()
+    assert len(spans["a"]) == 1 and len(spans["b"]) == 2 and len(spans["c"]) == 1
+    assert c.statuses() == {"a": "done", "b": "done", "c": "done"}
@@ -0,0 +1,61 @@
+# catalog.py: прогоны из файлов с меткой времени в имени; постоянно
+# дописываемые логи мониторинга их не склеивают; номера прогонов не меняются
+# от обновления к обновлению.
+
+import os
+from datetime import datetime
+
+import catalog
+
+FMT = "%d-%m-%Y %H:%M:%S"
+
+def put(path, start, end):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"{datetime.fromtimestamp(start).strftime(FMT)}|cpu 1\n")
+    os.utime(path, (end, end))
+
+def test_monitoring_logs_do_not_merge_runs(tmp_path):
+    day1 = datetime(2025, 10, 14, 12, 0, 0).timestamp()
+    day2 = datetime(2025, 10, 16, 12, 0, 0).timestamp()
+    logs = tmp_path / "AutoTest_Logs"
+    put(logs / "cpu_stress_14-10-2025 12:00:00.log", day1, day1 + 3600)
+    put(logs / "cpu_stress_16-10-2025 12:00:00.log", day2, day2 + 3600)
+    put(logs / "sysmonitor.log", day1 - 600, day2 + 7200)
+    put(logs / "sda_iostat.csv", day1 - 600, day2 + 7200)
+    put(logs / "monitor-once.log", day1 - 600, day2 + 7200)
+    conn = catalog.open_catalog(str(tmp_path / "catalog.sqlite"))
+    catalog.update(conn, {"log": str(logs)}, host="h", fmt=FMT)
+    runs = catalog.runs(conn)
+    assert [(r["start"], r["end"], r["files"]) for r in runs] == [(day1, day1 + 3600, 1), (day2, day2 + 3600, 1)]
+    # логи мониторинга — в каждом прогоне по времени
+    for r in runs:
+        names = sorted(os.path.basename(f["path"]) for f in catalog.query(conn, run_id=r["id"]))
+        assert names[1:] == ["sda_iostat.csv", "sysmonitor.log"] and names[0].startswith("cpu_stress_")
+
+def test_run_ids_survive_later_updates(tmp_path):
+    days = [datetime(2025, 10, d, 12, 0, 0).timestamp() for d in (12, 14, 16, 18)]
+    logs = tmp_path / "AutoTest_Logs"
+    conn = catalog.open_catalog(str(tmp_path / "catalog.sqlite"))
+
+    def ids():
+        catalog.update(conn, {"log": str(logs)}, host="h", fmt=FMT)
+        return {r["start"]: r["id"] for r in catalog.runs(conn)}
+
+    def name(t):
+        return logs / f"cpu_stress_{datetime.fromtimestamp(t).strftime(FMT)}.log"
+
+    put(name(days[1]), days[1], days[1] + 3600)
+    put(name(days[2]), days[2], days[2] + 3600)
+    first = ids()
+    # более ранний прогон не сдвигает номера, дописанный лог сохраняет свой
+    put(name(days[0]), days[0], days[0] + 3600)
+    put(name(days[2]), days[2], days[2] + 7200)
+    second = ids()
+    assert {t: second[t] for t in first} == first and second[days[0]] > max(first.values())
+    # номер удалённого прогона не достаётся новому
+    name(days[2]).unlink()
+    put(name(days[3]), days[3], days[3] + 3600)
+    third = ids()
+    assert days[2] not in third and third[days[3]] > max(second.values())
+    assert third[days[1]] == first[days[1]] and third[days[0]] == second[days[0]]
+    assert [f["run_id"] for f in catalog.query(conn, run_id=first[days[1]])] == [first[days[1]]]
@@ -0,0 +1,55 @@
+# gpuburn/nvidia-smi_collector.py против заглушки bench/stub_nvidia_smi.py:
+# несколько замеров в CSV-лог и кольцо, подбор полей под драйвер, разбор
+# лога парсером nvidia-smi.
+
+import csv
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+import tsring
+from conftest import BENCH, REPO
+
+COLLECTOR = os.path.join(REPO, "gpuburn", "nvidia-smi_collector.py")
+STUB = os.path.join(BENCH, "stub_nvidia_smi.py")
+GPUS = 2
+
+def collect(tmp_path, *args, **env):
+    out = tmp_path / "nvidia-smi_run.csv"
+    proc = subprocess.run([sys.executable, COLLECTOR, "--nvidia-smi", STUB, "-o", str(out), "--interval-ms", "100",
+                           "--duration", "1.5", *args],
+                          env=dict(os.environ, STUB_GPUS=str(GPUS), **env), check=True, capture_output=True,
+                          text=True, timeout=60)
+    with open(out, encoding="utf-8", newline="") as f:
+        magic = f.readline()
+        rows = list(csv.DictReader(f))
+    return out, proc.stdout, magic, rows
+
+def test_collects_intervals(tmp_path, parser):
+    out, stdout, magic, rows = collect(tmp_path, "--ring")
+    assert magic.startswith("# autotest nvidia-smi query log v1; interval_ms=100;")
+    assert f"Collected {len(rows)} rows" in stdout
+    # строка на GPU в каждом замере, замеров — несколько
+    assert len(rows) >= 5 * GPUS and len(rows) % GPUS == 0
+    assert [r["index"] for r in rows[:4]] == ["0", "1", "0", "1"]
+    stamps = [datetime.strptime(r["timestamp"], "%Y-%m-%d %H:%M:%S.%f") for r in rows[::GPUS]]
+    assert stamps == sorted(stamps) and len(set(stamps)) == len(stamps)
+    assert all(r["clocks_event_reasons.active"].startswith("0x") and r["pstate"] == "P0" for r in rows)
+    assert all(float(r["power.draw"]) > 0 and int(r["memory.total"]) == 81920 for r in rows)
+
+    parsed = parser.parse_inputs([str(out)])
+    assert len(parsed) == len(rows) // GPUS
+    assert parsed[0]["timestamp"] == rows[0]["timestamp"]
+    assert parsed[0]["gpu1_memory_total_mib"] == 81920 and parsed[0]["gpu0_pstate"] == 0
+    with tsring.Ring.open(str(out.with_suffix(".ring"))) as ring:
+        assert ring.kind == "nvidia-smi" and ring.cursor == len(rows)
+
+def test_probes_fields_the_driver_supports(tmp_path):
+    _, _, _, rows = collect(tmp_path, STUB_VARIANT="geforce",
+                            STUB_UNSUPPORTED="clocks_event_reasons.active,ecc.errors.corrected.volatile.total")
+    fields = list(rows[0])
+    # старое имя причин троттлинга вместо нового, неподдерживаемое поле пропущено
+    assert "clocks_throttle_reasons.active" in fields and "clocks_event_reasons.active" not in fields
+    assert "ecc.errors.corrected.volatile.total" not in fields
+    assert all(r["ecc.errors.uncorrected.volatile.total"] == "[N/A]" for r in rows)
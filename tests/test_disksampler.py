@@ -0,0 +1,73 @@
+# disksampler.py на синтетическом /proc/diskstats и /sys/block (--root):
+# разности счётчиков за интервал, отбор устройств, CSV.
+
+import csv
+import io
+import os
+import subprocess
+import sys
+
+import pytest
+
+import disksampler
+from conftest import REPO
+
+def diskstats(devices):
+    # devices: имя -> (reads, sectors read, ms reading, writes, sectors written, ms writing, inflight, io_ms, weighted ms)
+    lines = []
+    for i, (name, c) in enumerate(devices.items()):
+        r, rs, rms, w, ws, wms, inflight, io_ms, q = c
+        lines.append(f"   8 {i:7d} {name} {r} 0 {rs} {rms} {w} 0 {ws} {wms} {inflight} {io_ms} {q} 0 0 0 0")
+    return "\n".join(lines) + "\n"
+
+@pytest.fixture
+def root(tmp_path):
+    for dev in ("sda", "nvme0n1", "loop0"):
+        (tmp_path / "sys" / "block" / dev).mkdir(parents=True)
+    (tmp_path / "proc").mkdir()
+    return tmp_path
+
+def write_stats(root, devices):
+    # на месте, как ядро: открытый дескриптор сэмплера видит новое содержимое
+    with open(root / "proc" / "diskstats", "w") as f:
+        f.write(diskstats(devices))
+
+IDLE = (0, 0, 0, 0, 0, 0, 0, 0, 0)
+
+def test_deltas_over_interval(root, monkeypatch):
+    write_stats(root, {"sda": (100, 800, 50, 10, 80, 20, 0, 100, 200), "sda1": IDLE, "nvme0n1": IDLE,
+                       "loop0": IDLE})
+    clock = iter([10.0, 12.0])
+    monkeypatch.setattr(disksampler.time, "monotonic", lambda: next(clock))
+    sampler = disksampler.DiskSampler(str(root))
+    sampler.prime()
+    # за 2 с: 200 чтений по 8 секторов за 400 мс, 50 записей, занят 1 с,
+    # суммарное ожидание в очереди 3 с, 4 операции в работе
+    write_stats(root, {"sda": (300, 2400, 450, 60, 80 + 2048, 70, 4, 1100, 3200), "sda1": IDLE,
+                       "nvme0n1": IDLE, "loop0": IDLE})
+    rows = {r["device"]: r for r in sampler.sample()}
+    sampler.close()
+    assert sorted(rows) == ["nvme0n1", "sda"]  # разделы и loop — только с --all
+    sda = rows["sda"]
+    assert sda["r_iops"] == 100 and sda["w_iops"] == 25
+    assert sda["r_mb_s"] == pytest.approx(1600 * 512 / 2**20 / 2)
+    assert sda["w_mb_s"] == pytest.approx(0.5)
+    assert sda["r_await_ms"] == 2 and sda["w_await_ms"] == 1
+    assert sda["util_pct"] == 50 and sda["queue"] == 1.5 and sda["inflight"] == 4
+    assert disksampler.is_idle(rows["nvme0n1"])
+
+def test_counter_wrap_is_an_empty_interval():
+    prev = disksampler.Counters(2**32 - 10, 100, 10, 5, 50, 5, 0, 100, 100)
+    cur = disksampler.Counters(5, 100, 10, 5, 50, 5, 0, 100, 100)
+    row = disksampler.delta_row(prev, cur, 1.0)
+    assert row["r_iops"] == 0 and row["r_await_ms"] == 0
+
+def test_cli_stdout(root):
+    write_stats(root, {"sda": IDLE, "sda1": IDLE, "nvme0n1": IDLE, "loop0": IDLE})
+    out = subprocess.run([sys.executable, os.path.join(REPO, "disksampler.py"), "--root", str(root),
+                          "--interval", "0.1", "--count", "3", "--stdout", "--all"],
+                         check=True, capture_output=True, text=True, timeout=30).stdout
+    rows = list(csv.DictReader(io.StringIO(out)))
+    assert list(rows[0]) == disksampler.CSV_FIELDS
+    assert len(rows) == 3 * 4 and {r["device"] for r in rows} == {"sda", "sda1", "nvme0n1", "loop0"}
+    assert all(r["r_iops"] == "0" for r in rows)
@@ -0,0 +1,76 @@
+# fleet.py --transport local: каждый «хост» — свой HOME с логами и архивом,
+# архив collect забирается в <out>/<хост>/.
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import tarfile
+import time
+
+import pytest
+
+import fleet
+from conftest import REPO
+
+def test_parse_host():
+    h = fleet.parse_host("root@10.0.0.11:2222 name=node01 dir=/opt/ls config=/opt/ls/.env")
+    assert h == fleet.Host("node01", "root@10.0.0.11", 2222, "ssh", "/opt/ls", "/opt/ls/.env")
+    assert fleet.parse_host("local:sim1").transport == "local"
+    with pytest.raises(TypeError):
+        fleet.Transport(h, None)
+
+def test_local_transport_run_and_collect(tmp_path):
+    out = tmp_path / "out"
+    shared = tmp_path / "shared"
+    env = dict(os.environ, AUTOTEST_LOG_DIR=str(shared / "logs"), AUTOTEST_GPU_LOG_DIR=str(shared / "gpu"),
+               AUTOTEST_ARCHIVE_DIR=str(shared / "archives"))
+    # конфигурация без каталогов логов: autotest.sh берёт их из окружения
+    config = tmp_path / "host.env"
+    config.write_text("AUTOTEST_RETENTION_DAYS=7\n")
+    inventory = tmp_path / "hosts.txt"
+    inventory.write_text(f"local:sim1 config={config}\nlocal:sim2 config={config}\n")
+    proc = subprocess.run([sys.executable, os.path.join(REPO, "fleet.py"), "-i", str(inventory),
+                           "-o", str(out), "--collect", "--", "monitor-once"],
+                          env=env, cwd=str(tmp_path), capture_output=True, text=True, timeout=300)
+    assert proc.returncode == 0, proc.stdout + proc.stderr
+    # каталоги логов родителя не общие для «хостов»
+    assert not shared.exists()
+    with open(out / "summary.json", encoding="utf-8") as f:
+        summary = json.load(f)
+    assert summary["totals"]["status"] == {"ok": 2}
+    for h in summary["hosts"]:
+        home = out / "hosts" / h["host"]
+        assert (home / "AutoTest_Logs" / "sysmonitor" / "sysmonitor.log").is_file()
+        assert h["archive"]["remote"].startswith(str(home / "AutoTest_Archives"))
+        local = h["archive"]["local"]
+        assert os.path.dirname(local) == str(out / h["host"]) and os.path.getsize(local) == h["archive"]["bytes"]
+        with tarfile.open(local) as tar:
+            assert any("sysmonitor.log" in n for n in tar.getnames())
+        with open(h["log"], encoding="utf-8") as f:
+            assert "Monitor once" in f.read()
+
+def test_interrupt_skips_remaining_steps(tmp_path):
+    # поддельный autotest.sh (dir=): команда висит, Ctrl+C не должен
+    # запускать после неё collect на хостах
+    fake = tmp_path / "fake"
+    fake.mkdir()
+    calls = tmp_path / "calls"
+    (fake / "autotest.sh").write_text('echo "$*" >> "$FAKE_CALLS"\n'
+                                      'case $1 in hang) echo started; sleep 60 ;; config-show) echo "LOG_DIR=$HOME" ;; '
+                                      'collect) echo "Saved: $HOME/a.tar.gz" ;; esac\n')
+    inventory = tmp_path / "hosts.txt"
+    inventory.write_text(f"local:sim1 dir={fake}\nlocal:sim2 dir={fake}\n")
+    proc = subprocess.Popen([sys.executable, os.path.join(REPO, "fleet.py"), "-i", str(inventory),
+                             "-o", str(tmp_path / "out"), "--collect", "--", "hang"],
+                            env=dict(os.environ, FAKE_CALLS=str(calls)), stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, text=True)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and (not calls.exists() or len(calls.read_text().splitlines()) < 2):
+        time.sleep(0.1)
+    time.sleep(0.2)
+    proc.send_signal(signal.SIGINT)
+    out, _ = proc.communicate(timeout=30)
+    assert proc.returncode == 130, out
+    assert calls.read_text().splitlines() == ["hang", "hang"]
@@ -0,0 +1,66 @@
+# gzlog.py: блочный .gz с индексом читается gzip/zcat как обычный, блоки
+# близки к заданному размеру и начинаются со снапшота; выборка блоков по
+# времени и разбор индексированного .gz парсером с --since/--until дают те
+# же строки, что полный разбор.
+
+import gzip
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import gen_logs
+import gzlog
+from conftest import REPO
+
+GPUS = 4
+BLOCK = 64 * 1024
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "nvidia-smi_a.log"
+    with open(path, "w", encoding="utf-8") as f:
+        gen_logs.write_nvidia_smi(f, GPUS, 8000, 10, tail="truncated")
+    return path
+
+def test_compress_round_trip_and_index(log):
+    raw = log.read_bytes()
+    gz = gzlog.compress(str(log), block_bytes=BLOCK, jobs=4, keep=True)
+    assert gz == str(log) + ".gz" and log.exists()
+    assert os.stat(gz).st_mtime_ns == os.stat(log).st_mtime_ns
+    with gzip.open(gz, "rb") as f:
+        assert f.read() == raw
+    if shutil.which("zcat"):
+        assert subprocess.run(["zcat", gz], check=True, capture_output=True).stdout == raw
+    blocks = gzlog.load_index(gz)
+    assert len(blocks) > 10
+    assert sum(b.length for b in blocks) == os.path.getsize(gz)
+    assert [b.raw_offset for b in blocks] == [sum(b.raw_length for b in blocks[:i]) for i in range(len(blocks))]
+    # граница ищется не дальше четверти блока: ни один блок, и последний
+    # тоже, не больше заданного размера в разы
+    assert max(b.raw_length for b in blocks) <= BLOCK * 5 // 4
+    assert all(b.snapshot and b.first_ts for b in blocks)
+    assert b"".join(gzlog.iter_blocks(gz, blocks, jobs=3)) == raw
+
+def test_cli_block_mb(log, tmp_path):
+    subprocess.run([sys.executable, os.path.join(REPO, "gzlog.py"), "compress", "--block-mb", "0.25", str(log)],
+                   check=True, capture_output=True)
+    assert not log.exists()
+    blocks = gzlog.load_index(str(log) + ".gz")
+    assert max(b.raw_length for b in blocks) <= 2**20 // 4 * 5 // 4
+
+@pytest.mark.parametrize("engine,jobs", [("regex", 1), ("fast", 1), ("regex", 2)])
+def test_time_range_select_matches_full_parse(log, parser, engine, jobs):
+    full = parser.parse_inputs([str(log)])
+    since, until = full[200]["timestamp"], full[260]["timestamp"]
+    gz = gzlog.compress(str(log), block_bytes=BLOCK, keep=True)
+    blocks = gzlog.load_index(gz)
+    selected = gzlog.select_blocks(blocks, since, until)
+    assert 0 < len(selected) < len(blocks) // 4
+    text = b"".join(gzlog.iter_blocks(gz, selected)).decode()
+    assert f"\n{since}\n" in text and f"\n{until}\n" in text
+    rows = parser.parse_inputs([gz], jobs, engine, since, until)
+    assert rows == [r for r in full if since <= r["timestamp"] <= until]
+    assert len(rows) == 61
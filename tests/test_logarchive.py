@@ -0,0 +1,93 @@
+# logarchive.py: полный архив распаковывается tar + gunzip, инкрементальный
+# хранит только новые блоки и восстанавливается по цепочке.
+
+import gzip
+import os
+import tarfile
+
+import pytest
+
+import logarchive
+
+BLOCK = 64 * 1024
+
+def files_under(root):
+    out = {}
+    for d, _, names in os.walk(root):
+        for n in names:
+            path = os.path.join(d, n)
+            with open(path, "rb") as f:
+                out[os.path.relpath(path, root)] = f.read()
+    return out
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    home = tmp_path / "home"
+    monkeypatch.setenv("HOME", str(home))
+    logs = {
+        "AutoTest_Logs/sysmonitor.log": b"".join(b"2025-10-14 12:00:%02d cpu %d\n" % (i % 60, i) for i in range(80000)),
+        "htop-res/h1.txt": b"\n".join(b"%d" % i for i in range(30000)),
+        "ram_stress_logs/empty.log": b"",
+        "gpu_burn_logs/old.log.gz": gzip.compress(b"rotated\n" * 1000),
+    }
+    logs["htop-res/h2.txt"] = logs["htop-res/h1.txt"]
+    for rel, data in logs.items():
+        path = home / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    roots = {"log": str(home / "AutoTest_Logs"), "gpu": str(home / "gpu_burn_logs"),
+             "htop": str(home / "htop-res"), "ram": str(home / "ram_stress_logs")}
+    return home, roots, str(home / "AutoTest_Archives")
+
+def logs_of(home):
+    return {k: v for k, v in files_under(home).items() if not k.startswith("AutoTest_Archives")}
+
+def test_full_archive_extracts_with_tar(tree, tmp_path):
+    home, roots, archives = tree
+    out = os.path.join(archives, "autotest_logs_1.tar")
+    os.makedirs(archives)
+    m = logarchive.create(out, roots, block_bytes=BLOCK)
+    assert m["base"] is None and m["depends"] == []
+    dest = tmp_path / "x"
+    with tarfile.open(out) as tar:
+        tar.extractall(dest)
+    members = files_under(dest)
+    assert len(members) == len(m["files"]) + 1
+    extracted = {}
+    for e in m["files"]:
+        data = members[e["path"] + logarchive.CODECS[e["codec"]][0]]
+        extracted[e["path"]] = gzip.decompress(data) if e["codec"] == "gzip" else data
+    # одинаковые файлы и пустой файл — отдельными членами
+    assert extracted == logs_of(home)
+
+def test_incremental_round_trip(tree, tmp_path):
+    home, roots, archives = tree
+    os.makedirs(archives)
+    full = os.path.join(archives, "autotest_logs_1.tar")
+    logarchive.create(full, roots, block_bytes=BLOCK)
+
+    with open(home / "AutoTest_Logs/sysmonitor.log", "ab") as f:
+        f.write(b"2025-10-14 13:00:00 cpu appended\n" * 100)
+    (home / "htop-res/h3.txt").write_bytes((home / "htop-res/h1.txt").read_bytes())
+    inc = os.path.join(archives, "autotest_logs_2.tar")
+    m = logarchive.create(inc, roots, base=full, block_bytes=BLOCK)
+    assert m["base"] == "autotest_logs_1.tar" and m["chain"] == 1
+    assert m["depends"] == ["autotest_logs_1.tar"]
+    s = m["stats"]
+    assert s["unchanged"] == 4 and s["read"] == 2
+    # дописанный лог — только его последний блок; копия — только ссылки
+    assert s["new_blocks"] == 1 and s["dup_blocks"] >= 2
+    assert s["stored_bytes"] < os.path.getsize(full) / 2
+
+    dest = tmp_path / "restore"
+    n, size = logarchive.restore(inc, str(dest), jobs=2)
+    assert files_under(dest) == logs_of(home)
+    assert n == len(logs_of(home))
+    assert logarchive.restore(inc, None)[1] == size
+    only = tmp_path / "only"
+    logarchive.restore(inc, str(only), only=["htop-res/*"])
+    assert sorted(files_under(only)) == ["htop-res/h1.txt", "htop-res/h2.txt", "htop-res/h3.txt"]
+
+    os.remove(full)
+    with pytest.raises(logarchive.ArchiveError, match="missing archives"):
+        logarchive.restore(inc, str(tmp_path / "broken"))
@@ -0,0 +1,58 @@
+# netperf.py против заглушки bench/stub_iperf3.py: несколько целей сразу,
+# TCP и UDP --bidir, неудачная цель, итог без jitter.
+
+import json
+import os
+import subprocess
+import sys
+
+from conftest import BENCH, REPO
+
+STUB = os.path.join(BENCH, "stub_iperf3.py")
+
+def netperf(tmp_path, *args, iperf3=STUB, fail=""):
+    out = str(tmp_path / "iperf3.json")
+    env = dict(os.environ, STUB_IPERF_SLEEP="0", STUB_IPERF_FAIL=fail)
+    proc = subprocess.run([sys.executable, os.path.join(REPO, "netperf.py"), "--iperf3", iperf3, "-o", out, *args],
+                          env=env, capture_output=True, text=True, timeout=60)
+    with open(out, encoding="utf-8") as f:
+        return proc, json.load(f)
+
+def test_tcp_targets_and_failed_target(tmp_path):
+    proc, doc = netperf(tmp_path, "-t", "3", "-n", "2", "--direction", "both", "h1", "h2:5202,h3",
+                        fail="h3")
+    assert proc.returncode == 1, proc.stderr
+    summary = {(t["target"], t["direction"]): t["summary"] for t in doc["targets"]}
+    assert sorted(summary) == [(h, d) for h in ("h1:5201", "h2:5202", "h3:5201") for d in ("down", "up")]
+    for target in ("h1:5201", "h2:5202"):
+        s = summary[(target, "up")]
+        assert s["runs"] == 2 and s["failed"] == 0 and s["mbps"]["n"] == 2
+        assert s["interval_mbps"]["n"] == 6 and "retransmits" in s and "rtt_ms" in s
+    assert summary[("h3:5201", "up")]["mbps"] is None
+    assert "h3:5201 up: no successful runs (2 failed)" in proc.stdout
+
+def test_udp_bidir(tmp_path):
+    proc, doc = netperf(tmp_path, "-t", "2", "-n", "2", "-u", "-b", "500M", "--direction", "bidir", "h1")
+    assert proc.returncode == 0, proc.stderr
+    assert [t["direction"] for t in doc["targets"]] == ["bidir-down", "bidir-up"]
+    for t in doc["targets"]:
+        s = t["summary"]
+        assert s["mbps"]["max"] <= 500 * 1.05 and "jitter_ms" in s and "lost_percent" in s
+        assert "retransmits" not in s
+
+def test_udp_summary_without_jitter(tmp_path):
+    # iperf3, не приславший jitter_ms: потери печатаются, jitter — нет
+    wrapper = tmp_path / "iperf3"
+    wrapper.write_text(f"#!{sys.executable}\n"
+                       "import json, subprocess, sys\n"
+                       f"data = json.loads(subprocess.run([{sys.executable!r}, {STUB!r}, *sys.argv[1:]],"
+                       " capture_output=True, text=True).stdout)\n"
+                       "data['end']['sum'].pop('jitter_ms')\n"
+                       "print(json.dumps(data))\n")
+    wrapper.chmod(0o755)
+    proc, doc = netperf(tmp_path, "-t", "2", "-n", "1", "-u", "h1", iperf3=str(wrapper))
+    assert proc.returncode == 0, proc.stderr
+    s = doc["targets"][0]["summary"]
+    assert "jitter_ms" not in s and "lost_percent" in s
+    line = proc.stdout.splitlines()[-2]
+    assert "lost" in line and "jitter" not in line
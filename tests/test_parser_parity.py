@@ -0,0 +1,55 @@
+# Разбор логов nvidia-smi кусками в пуле процессов (-j), быстрым движком
+# (--engine fast) и из .gz даёт те же строки, что последовательный проход
+# регулярными выражениями: разные драйверы, оборванный хвост.
+
+import gzip
+import shutil
+
+import pandas as pd
+import pytest
+
+import gen_logs
+
+GPUS = 4
+# мелкие куски: лог делится на десятки диапазонов
+CHUNK_BYTES = 64 * 1024
+
+@pytest.fixture
+def small_chunks(parser, monkeypatch):
+    split = parser.split_chunks
+    monkeypatch.setattr(parser, "split_chunks", lambda path, chunk_bytes=CHUNK_BYTES: split(path, chunk_bytes))
+    monkeypatch.setattr(parser, "CHUNK_BYTES", CHUNK_BYTES)
+
+def write_log(path, variant, tail):
+    with open(path, "w", encoding="utf-8") as f:
+        return gen_logs.write_nvidia_smi(f, GPUS, 6000, 10, variant=variant, tail=tail)
+
+def frame(parser, path, **kwargs):
+    return pd.DataFrame(parser.parse_inputs([str(path)], **kwargs))
+
+@pytest.mark.parametrize("variant,tail", [("550", "truncated"), ("470", "corrupt"), ("geforce", "clean")])
+def test_chunked_parallel_and_gz_match_serial(tmp_path, parser, small_chunks, variant, tail):
+    log = tmp_path / "nvidia-smi_a.log"
+    snapshots = write_log(log, variant, tail)
+    assert len(parser.split_chunks(str(log))) > 10
+    serial = frame(parser, log)
+    # оборванный последний снапшот даёт строку с тем, что успело записаться
+    assert len(serial) == snapshots + (tail != "clean")
+    assert serial.columns[0] == "timestamp" and serial.notna().any().all()
+    gz = tmp_path / "nvidia-smi_a.log.gz"
+    with open(log, "rb") as src, gzip.open(gz, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    for path in (log, gz):
+        for engine in ("regex", "fast"):
+            for jobs in (1, 3):
+                pd.testing.assert_frame_equal(frame(parser, path, jobs=jobs, engine=engine), serial)
+
+def test_several_inputs_parallel_match_serial(tmp_path, parser, small_chunks):
+    paths = []
+    for name, variant in (("a", "550"), ("b", "geforce")):
+        paths.append(str(tmp_path / f"nvidia-smi_{name}.log"))
+        write_log(paths[-1], variant, "truncated")
+    serial = pd.DataFrame(parser.parse_inputs(paths))
+    for engine in ("regex", "fast"):
+        for jobs in (1, 3):
+            pd.testing.assert_frame_equal(pd.DataFrame(parser.parse_inputs(paths, jobs, engine)), serial)
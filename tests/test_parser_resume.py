@@ -0,0 +1,74 @@
+# --resume/--follow парсера nvidia-smi: книга xlsx переписывается из
+# накопленных строк всех запусков и совпадает с полной выгрузкой;
+# copytruncate, после которого лог дорос до прежнего смещения.
+
+import datetime
+import os
+
+from openpyxl import load_workbook
+
+import gen_logs
+
+GPUS = 2
+
+def snapshots(start, seconds):
+    return list(gen_logs.iter_nvidia_smi(GPUS, seconds, 10, start=start))
+
+def sheet_rows(path):
+    wb = load_workbook(path, read_only=True)
+    rows = [list(r) for r in wb.active.iter_rows(values_only=True)]
+    wb.close()
+    return rows
+
+def test_xlsx_resume_rebuilds_book_from_row_spool(tmp_path, parser):
+    log = tmp_path / "nvidia-smi_a.log"
+    out = str(tmp_path / "gpu.xlsx")
+    ckpt = str(tmp_path / "gpu.ckpt.json")
+    snaps = snapshots(datetime.datetime(2025, 10, 14, 12, 0, 0), 600)
+
+    def write(rows, append):
+        return parser.append_xlsx(rows, out, "metrics", reset=not append)
+
+    total = 0
+    for lo, hi in ((0, 20), (20, 40), (40, len(snaps))):
+        with open(log, "a", encoding="utf-8") as f:
+            f.writelines(snaps[lo:hi])
+        total += parser.resume_log(str(log), ckpt, write, final=hi == len(snaps))
+        # после каждого запуска в книге все строки, накопленные в .rows.jsonl
+        with open(out + parser.XLSX_ROWS_SUFFIX, encoding="utf-8") as f:
+            spooled = sum(1 for _ in f)
+        assert spooled == total and len(sheet_rows(out)) == total + 1
+    assert total == len(snaps)
+    rows = sheet_rows(out)
+    assert rows[0][:4] == ["timestamp", "gpu0_temp_c", "gpu0_power_w", "gpu0_power_capacity_w"]
+    assert len(rows[0]) == 1 + 6 * GPUS
+    assert rows[1][0] == "14-10-2025 12:00:00" and rows[-1][0] == "14-10-2025 12:09:50"
+    assert [r[0] for r in rows[1:]] == sorted({r[0] for r in rows[1:]})
+    assert all(r[5] == 81920 and r[6] == 100 for r in rows[1:])
+    full = str(tmp_path / "full.xlsx")
+    parser.write_xlsx(parser.parse_log(str(log)), full, "metrics")
+    assert rows == sheet_rows(full)
+
+def test_resume_detects_copytruncate_grown_past_offset(tmp_path, parser):
+    log = tmp_path / "nvidia-smi_a.log"
+    ckpt = str(tmp_path / "ckpt.json")
+    got = []
+
+    def write(rows, append):
+        got.extend(rows)
+        return len(rows)
+
+    old = snapshots(datetime.datetime(2025, 10, 14, 12, 0, 0), 300)
+    log.write_text("".join(old), encoding="utf-8")
+    parser.resume_log(str(log), ckpt, write, final=True)
+    offset = parser.load_checkpoint(ckpt)["offset"]
+    # copytruncate: тот же inode, новый лог к опросу длиннее прежнего
+    new = snapshots(datetime.datetime(2025, 10, 14, 13, 0, 0), 600)
+    with open(log, "r+", encoding="utf-8") as f:
+        f.truncate(0)
+        f.write("".join(new))
+    assert os.path.getsize(log) > offset
+    got.clear()
+    parser.resume_log(str(log), ckpt, write, final=True)
+    assert len(got) == len(new)
+    assert got[0]["timestamp"].startswith("2025-10-14 13:00")
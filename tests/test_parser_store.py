@@ -0,0 +1,81 @@
+# Хранилище парсера nvidia-smi (--format csv|parquet): запись через CLI,
+# чтение --query / load_store.
+
+import datetime
+import glob
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import PARSER
+import gen_logs
+
+GPUS = 2
+
+def write_log(path, start, seconds=300, interval=10):
+    with open(path, "w", encoding="utf-8") as f:
+        for snap in gen_logs.iter_nvidia_smi(GPUS, seconds, interval, start=start):
+            f.write(snap)
+    return seconds // interval * GPUS
+
+def parse(*args):
+    return subprocess.run([sys.executable, PARSER, *args, "-j", "1"], check=True,
+                          capture_output=True, text=True).stdout
+
+def csv_rows(root):
+    n = 0
+    for part in glob.glob(os.path.join(root, "run_id=*", "date=*", "part-*.csv")):
+        with open(part, encoding="utf-8") as f:
+            n += sum(1 for _ in f) - 1
+    return n
+
+@pytest.fixture
+def logs(tmp_path):
+    d = tmp_path / "logs"
+    d.mkdir()
+    n1 = write_log(d / "nvidia-smi_a.log", datetime.datetime(2025, 10, 14, 12, 0, 0))
+    n2 = write_log(d / "nvidia-smi_b.log", datetime.datetime(2025, 10, 15, 12, 0, 0))
+    return d, n1, n2
+
+def test_store_run_per_log(logs, tmp_path):
+    d, n1, n2 = logs
+    store = str(tmp_path / "store")
+    out = parse(str(d), "--format", "csv", "-o", store)
+    assert f"Saved {n1 + n2} rows" in out
+    assert sorted(os.listdir(store)) == ["run_id=a", "run_id=b"]
+    assert csv_rows(store) == n1 + n2
+
+def test_store_one_run_id_keeps_every_input(logs, tmp_path):
+    d, n1, n2 = logs
+    store = str(tmp_path / "store")
+    parse(str(d), "--format", "csv", "-o", store, "--run-id", "burn")
+    assert os.listdir(store) == ["run_id=burn"]
+    assert csv_rows(store) == n1 + n2
+    # повторный разбор заменяет партицию, а не дописывает в неё
+    parse(str(d), "--format", "csv", "-o", store, "--run-id", "burn")
+    assert csv_rows(store) == n1 + n2
+
+def test_store_query_round_trip(logs, tmp_path, parser):
+    pytest.importorskip("pyarrow")
+    d, n1, n2 = logs
+    store = str(tmp_path / "store")
+    parse(str(d), "--format", "parquet", "-o", store)
+    table = parser.load_store(store, "parquet")
+    assert table.num_rows == n1 + n2
+    assert sorted(set(table.column("gpu").to_pylist())) == list(range(GPUS))
+    assert parser.load_store(store, "parquet", run_id="a", gpus=[1]).num_rows == n1 // GPUS
+    # дата без времени в --until — весь этот день
+    assert parser.load_store(store, "parquet", until="2025-10-14").num_rows == n1
+    assert parser.load_store(store, "parquet", since="2025-10-15").num_rows == n2
+    out = tmp_path / "q.csv"
+    parse(store, "--query", "--format", "parquet", "--until", "2025-10-14", "-o", str(out))
+    with open(out, encoding="utf-8") as f:
+        assert sum(1 for _ in f) - 1 == n1
+
+def test_until_date_covers_whole_day(logs, parser):
+    d, n1, _ = logs
+    rows = parser.parse_inputs([str(d / "nvidia-smi_a.log"), str(d / "nvidia-smi_b.log")], until="2025-10-14")
+    assert len(rows) == n1 // GPUS
+    assert all(r["timestamp"].startswith("2025-10-14") for r in rows)
@@ -0,0 +1,40 @@
+# --summary парсера nvidia-smi: по логу на прогон, даже когда логи
+# перекрываются по времени и сливаются в один поток строк.
+
+import datetime
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import PARSER
+import gen_logs
+
+GPUS = 2
+
+def write_log(path, start, seconds, variant="550"):
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(gen_logs.iter_nvidia_smi(GPUS, seconds, 10, variant=variant, start=start))
+    return seconds // 10
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_summary_per_input_run(tmp_path, jobs):
+    start = datetime.datetime(2025, 10, 14, 12, 0, 0)
+    n1 = write_log(tmp_path / "nvidia-smi_a.log", start, 300)
+    # второй прогон идёт одновременно с первым (другой хост)
+    n2 = write_log(tmp_path / "nvidia-smi_b.log", start + datetime.timedelta(seconds=60), 600)
+    out = tmp_path / "summary.json"
+    subprocess.run([sys.executable, PARSER, str(tmp_path), "--summary-only", "--summary", str(out), "-j", jobs],
+                   check=True, capture_output=True, text=True)
+    with open(out, encoding="utf-8") as f:
+        doc = json.load(f)
+    per_run = {(r["run"], r["gpu"]): r for r in doc["per_run"]}
+    assert sorted(per_run) == [(run, gpu) for run in ("a", "b") for gpu in range(GPUS)]
+    assert per_run[("a", 0)]["samples"] == n1 and per_run[("b", 0)]["samples"] == n2
+    assert per_run[("a", 0)]["first"] == "2025-10-14 12:00:00"
+    assert per_run[("b", 1)]["first"] == "2025-10-14 12:01:00"
+    # минуты тоже по прогонам: в каждой минуте — строка на GPU каждого идущего прогона
+    minutes = [(r["run"], r["minute"], r["gpu"]) for r in doc["per_minute"]]
+    assert len(minutes) == len(set(minutes))
+    assert sum(r["samples"] for r in doc["per_minute"] if r["run"] == "b" and r["gpu"] == 0) == n2
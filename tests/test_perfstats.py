@@ -0,0 +1,84 @@
+# perfstats.py: время и CPU по этапам без вложенных, строки в секунду, пик RSS,
+# сборки мусора, выборка стеков; --profile парсера nvidia-smi.
+
+import datetime
+import gc
+import json
+import subprocess
+import sys
+
+import perfstats
+from conftest import PARSER
+import gen_logs
+
+def busy(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+def produce(n):
+    for i in range(n):
+        busy(2000)
+        yield i
+
+def test_stages_exclude_nested_time(tmp_path):
+    folded = str(tmp_path / "run.folded")
+    prof = perfstats.Profiler("test", stacks=folded)
+    perfstats.activate(prof)
+    try:
+        with perfstats.stage("write"):
+            rows = sum(1 for _ in perfstats.iterate("parse", produce(1000)))
+            gc.collect()
+        perfstats.tally("write", rows)
+    finally:
+        perfstats.activate(None)
+        prof.stop()
+    path = str(tmp_path / "run.profile.json")
+    prof.write(path)
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    assert {"tool", "wall_s", "cpu_s", "peak_rss_mib", "children_peak_rss_mib", "gc", "stages",
+            "counters", "rates"} <= set(data)
+    assert data["tool"] == "test" and data["peak_rss_mib"] > 0 and data["cpu_s"] > 0
+    assert len(data["gc"]["collections"]) == 3 and data["gc"]["collections"][2] >= 1
+    assert data["gc"]["pause_s"] >= 0
+    stages = {s["name"]: s for s in data["stages"]}
+    parse, write = stages["parse"], stages["write"]
+    assert parse["count"] == 1000 and parse["unit"] == "rows" and parse["per_s"] > 0
+    assert write["calls"] == 1 and write["count"] == 1000
+    # разбор идёт внутри потребления итератора, но считается своему этапу
+    assert parse["wall_s"] > write["wall_s"] and parse["cpu_s"] > write["cpu_s"]
+    assert parse["wall_s"] + write["wall_s"] <= data["wall_s"]
+    assert data["counters"]["stack_samples"] > 0
+    with open(folded, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert any("busy (test_perfstats.py" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    report = perfstats.format_report(data)
+    assert "parse" in report and "rows/s" in report
+
+def test_disabled_stages_cost_nothing():
+    assert perfstats.active() is None
+    items = [1, 2, 3]
+    assert perfstats.iterate("parse", items) is items
+    with perfstats.stage("write"):
+        perfstats.tally("write", 3)
+
+def test_parser_profile_json(tmp_path):
+    log = tmp_path / "nvidia-smi_a.log"
+    with open(log, "w", encoding="utf-8") as f:
+        f.writelines(gen_logs.iter_nvidia_smi(2, 600, 10, start=datetime.datetime(2025, 10, 14, 12, 0, 0)))
+    prof = tmp_path / "parse.profile.json"
+    proc = subprocess.run([sys.executable, PARSER, str(log), "--summary-only", "--summary", str(tmp_path / "s.json"),
+                           "--profile-json", str(prof)], check=True, capture_output=True, text=True)
+    assert "Profile saved to" in proc.stdout
+    with open(prof, encoding="utf-8") as f:
+        data = json.load(f)
+    stages = {s["name"]: s for s in data["stages"]}
+    # строка — снапшот со всеми GPU
+    assert stages["parse"]["count"] == 60 and stages["summary"]["count"] == 60
+    assert "summary.save" in stages
+    assert data["counters"]["input_bytes"] == log.stat().st_size
+    assert data["counters"]["input_lines"] == len(log.read_text(encoding="utf-8").splitlines())
+    assert data["rates"]["input_lines_per_s"] > 0
@@ -0,0 +1,92 @@
+# retention.py: план на синтетическом дереве логов (возраст, последние
+# прогоны, бюджет каталога, --compress-only) и обрезка сжатой истории.
+
+import gzip
+import os
+import time
+
+import pytest
+
+import gzlog
+import retention
+
+DAY = 86400
+NOW = time.time()
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    for name in ("AUTOTEST_RETENTION_DAYS", "AUTOTEST_RETENTION_KEEP_RUNS", "AUTOTEST_RETENTION_MAX_MB",
+                 "AUTOTEST_LOG_DIR", "AUTOTEST_GPU_LOG_DIR", "AUTOTEST_ARCHIVE_DIR"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("AUTOTEST_ROTATE_MB", "0.01")
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+def put(home, rel, days, size=1024):
+    path = home / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"".join(b"line %d\n" % i for i in range(size // 8))[:size])
+    os.utime(path, (NOW - days * DAY, NOW - days * DAY))
+    return str(path)
+
+def roots(home):
+    return {"log": str(home / "AutoTest_Logs"), "gpu": str(home / "gpu_burn_logs"),
+            "archive": str(home / "AutoTest_Archives")}
+
+def ops(actions):
+    return {(a.op, os.path.basename(a.path)) for a in actions}
+
+def test_age_and_keep_runs_delete_whole_runs(home):
+    put(home, "gpu_burn_logs/nvidia-smi_01-09-2025_10-00-00.csv", 40)
+    put(home, "gpu_burn_logs/nvidia-smi_01-09-2025_10-00-00.ring", 40)
+    put(home, "gpu_burn_logs/nvidia-smi_01-10-2025_10-00-00.csv", 5)
+    put(home, "gpu_burn_logs/nvidia-smi_02-10-2025_10-00-00.csv", 2)
+    put(home, "AutoTest_Logs/report_01-09-2025.html", 40)
+    policies = retention.Policies({"kinds": {"nvidia-smi": {"keep_runs": 2}}})
+    actions, stats = retention.plan(roots(home), policies, now=NOW)
+    assert {a for a in ops(actions) if a[0] == "delete"} == {
+        ("delete", "nvidia-smi_01-09-2025_10-00-00.csv"), ("delete", "nvidia-smi_01-09-2025_10-00-00.ring")}
+    assert stats["files"] == 5
+
+def test_live_log_does_not_hold_its_history(home):
+    put(home, "AutoTest_Logs/sysmonitor.log", 0)
+    put(home, "AutoTest_Logs/sysmonitor.log.gz", 40)
+    put(home, "AutoTest_Logs/sda_iostat.csv", 0)
+    put(home, "AutoTest_Logs/sda_iostat.csv.gz", 3, size=64 * 1024)
+    policies = retention.Policies({"default": {"max_dir_mb": 0.03}})
+    actions, stats = retention.plan(roots(home), policies, now=NOW)
+    deleted = {name for op, name in ops(actions) if op == "delete"}
+    # старая история — по возрасту, свежая — по бюджету; живые логи остаются
+    assert deleted == {"sysmonitor.log.gz", "sda_iostat.csv.gz"}
+    assert stats["busy"] == 2
+
+def test_compress_only_keeps_protected_kinds(home):
+    put(home, "AutoTest_Logs/report_01-09-2025.html", 40, size=64 * 1024)
+    put(home, "AutoTest_Logs/sysmonitor.csv", 1, size=64 * 1024)
+    put(home, "gpu_burn_logs/nvidia-smi_01-09-2025_10-00-00.csv", 40, size=64 * 1024)
+    actions, _ = retention.plan(roots(home), retention.Policies(), now=NOW, compress_only=True)
+    assert ops(actions) == {("compress", "sysmonitor.csv"), ("compress", "nvidia-smi_01-09-2025_10-00-00.csv")}
+
+def test_trim_drops_expired_rotations(home):
+    log = home / "AutoTest_Logs" / "sysmonitor.log"
+    old = b"".join(b"old %d\n" % i for i in range(50000))
+    new = b"".join(b"new %d\n" % i for i in range(50000))
+    log.parent.mkdir()
+    for data, days in ((old, 30), (new, 1)):
+        log.write_bytes(data)
+        os.utime(log, (NOW - days * DAY, NOW - days * DAY))
+        gzlog.compress(str(log), append=True)
+    gz = str(log) + ".gz"
+    assert len(gzlog.load_segments(gz)) == 2
+    actions, _ = retention.plan(roots(home), retention.Policies(), now=NOW)
+    assert [(a.op, a.path) for a in actions] == [("trim", gz)]
+    size = os.path.getsize(gz)
+    assert retention.apply(actions) == (1, 0, 0)
+    assert os.path.getsize(gz) == size - actions[0].size
+    with gzip.open(gz, "rb") as f:
+        assert f.read() == new
+    blocks = gzlog.load_index(gz)
+    assert blocks[0].offset == 0 and blocks[0].raw_offset == 0
+    assert len(gzlog.load_segments(gz)) == 1
+    # срезать больше нечего
+    assert retention.plan(roots(home), retention.Policies(), now=NOW)[0] == []
@@ -0,0 +1,89 @@
+# sysmonitor.py на подготовленном дереве /proc и /sys (--root): загрузка CPU
+# по разнице /proc/stat, память, температура, сеть и колонки sysmonitor.log.
+
+import csv
+import os
+import subprocess
+import sys
+
+import pytest
+
+import sysmonitor
+from conftest import REPO
+
+def put(root, rel, text):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # на месте, как ядро: открытый дескриптор сэмплера видит новое содержимое
+    with open(path, "w") as f:
+        f.write(text)
+
+def cpu_stat(user, system, idle):
+    return f"cpu  {user} 0 {system} {idle} 0 0 0 0 0 0\ncpu0 {user} 0 {system} {idle} 0 0 0 0 0 0\n"
+
+@pytest.fixture
+def root(tmp_path):
+    put(tmp_path, "proc/stat", cpu_stat(100, 100, 800))
+    put(tmp_path, "proc/meminfo", "MemTotal:       16384000 kB\nMemFree:         4096000 kB\n"
+                                  "MemAvailable:    8192000 kB\nBuffers:          100000 kB\n")
+    put(tmp_path, "proc/4242/stat", "4242 (stress-ng) R 1 4242 4242 0 -1 0 0 0 0 0 500 100 0 0 20 0 1 0\n")
+    put(tmp_path, "proc/net/route", "Iface\tDestination\tGateway\tFlags\tRefCnt\tUse\tMetric\tMask\n"
+                                    "eth0\t00000000\t0101A8C0\t0003\t0\t0\t100\t00000000\t0\t0\t0\n")
+    put(tmp_path, "sys/class/net/eth0/carrier", "1\n")
+    put(tmp_path, "sys/class/net/eth0/statistics/rx_bytes", "123456\n")
+    put(tmp_path, "sys/class/net/eth0/statistics/tx_bytes", "654321\n")
+    put(tmp_path, "sys/class/hwmon/hwmon0/name", "coretemp\n")
+    put(tmp_path, "sys/class/hwmon/hwmon0/temp1_label", "Package id 0\n")
+    put(tmp_path, "sys/class/hwmon/hwmon0/temp1_input", "55000\n")
+    put(tmp_path, "sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq", "2400000\n")
+    return tmp_path
+
+def log_rows(path):
+    # sysmonitor.log: заголовок, разделитель, строки; колонка -> значение
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    names = [c.strip() for c in lines[0].split("|")]
+    return [dict(zip(names, (c.strip() for c in line.split("|")))) for line in lines[2:]]
+
+def test_two_samples(root, tmp_path):
+    sampler = sysmonitor.SystemSampler(str(root), gpu=False, smart=False)
+    sampler.prime()
+    # за интервал: 300 тиков user, 100 system, 100 idle -> 80% загрузки
+    put(root, "proc/stat", cpu_stat(400, 200, 900))
+    put(root, "proc/4242/stat", "4242 (stress-ng) R 1 4242 4242 0 -1 0 0 0 0 0 900 200 0 0 20 0 1 0\n")
+    row = sampler.sample()
+    sampler.close()
+    assert row["cpu_load_pct"] == 80.0
+    assert row["top_process"] == "stress-ng" and row["top_process_cpu_pct"] > 0
+    assert (row["cpu_freq_mhz"], row["cpu_temp_c"]) == (2400, 55)
+    assert (row["ram_total_mb"], row["ram_free_mb"], row["ram_used_mb"]) == (16000, 4000, 8000)
+    assert [row[k] for k in ("net_if", "net_link", "net_rx_bytes", "net_tx_bytes")] == ["eth0", "UP", 123456, 654321]
+    assert row.get("gpu_temp_c") is None and row["disk_health"] is None
+
+    writer = sysmonitor.SysmonitorWriter(str(tmp_path / "out"))
+    writer.write(row)
+    writer.close()
+    (line,) = log_rows(tmp_path / "out" / "sysmonitor.log")
+    assert line["Top_Process"] == "stress-ng" and line["CPU_Load"] == "80%"
+    assert line["CPU_Freq"] == "2400 MHz" and line["CPU_Temp"] == "55°C"
+    assert line["RAM_Used"] == "8000 MB" and line["RAM_Total"] == "16000 MB" and line["RAM_Free"] == "4000 MB"
+    assert line["Net_If"] == "eth0" and line["Net_Link"] == "UP" and line["Net_RxB"] == "123456"
+    assert line["GPU_Temp"] == "N/A" and line["Disk_Health"] == "N/A"
+    with open(tmp_path / "out" / "sysmonitor.csv", encoding="utf-8") as f:
+        (rec,) = list(csv.DictReader(f))
+    assert rec["cpu_load_pct"] == "80.0" and rec["gpu_temp_c"] == ""
+
+def test_root_without_proc(tmp_path):
+    sampler = sysmonitor.SystemSampler(str(tmp_path), gpu=False, smart=False)
+    row = sampler.sample()
+    sampler.close()
+    assert row["top_process"] is None and row["cpu_load_pct"] is None and row["ram_total_mb"] is None
+
+def test_cli_root(root, tmp_path):
+    out = tmp_path / "out"
+    subprocess.run([sys.executable, os.path.join(REPO, "sysmonitor.py"), "--root", str(root), "--log-dir", str(out),
+                    "--no-gpu", "--no-smart", "--interval", "0.1", "--count", "2"],
+                   check=True, capture_output=True, text=True, timeout=30)
+    rows = log_rows(out / "sysmonitor.log")
+    assert len(rows) == 2
+    assert all(r["RAM_Used"] == "8000 MB" and r["CPU_Temp"] == "55°C" and r["Net_If"] == "eth0" for r in rows)
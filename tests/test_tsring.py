@@ -0,0 +1,127 @@
+# tsring.py: запись и последние N, переход через конец кольца, чужая схема,
+# выгрузка в формат sysmonitor и чтение без блокировок при живом писателе.
+
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+import sysmonitor
+import tsring
+from conftest import REPO
+
+FIELDS = [("n", "q"), ("half", "d"), ("label", "16s"), ("small", "i")]
+
+def values(seq):
+    # значения записи однозначно выводятся из её номера: так видна рваная запись
+    return [seq, seq / 2, f"rec{seq}", None if seq % 3 else seq % 1000]
+
+def check(t, vals):
+    seq = vals[0]
+    assert t == float(seq)
+    assert list(vals) == values(seq)
+
+def test_append_latest_and_wrap(tmp_path):
+    path = str(tmp_path / "test.ring")
+    with tsring.Ring.create(path, "test", FIELDS, capacity=8) as ring:
+        assert ring.latest(5) == []
+        for seq in range(5):
+            assert ring.append(float(seq), values(seq)) == seq
+        assert len(ring) == 5 and [v[0] for _, v in ring.latest(3)] == [2, 3, 4]
+        for seq in range(5, 20):
+            ring.append(float(seq), values(seq))
+        assert ring.cursor == 20 and len(ring) == 8
+    with tsring.Ring.open(path) as ring:
+        assert [seq for seq, _, _ in ring.read()] == list(range(12, 20))
+        assert [seq for seq, _, _ in ring.read(15)] == list(range(15, 20))
+        for t, vals in ring.latest(100):
+            check(t, vals)
+        assert [v[0] for _, v in ring.latest(3)] == [17, 18, 19]
+        rows, cursor = ring.read_since(18)
+        assert [v[0] for _, v in rows] == [18, 19] and cursor == 20
+        # последние 6 записей пересекают конец кольца: два участка отображения
+        parts = ring.view(6)
+        recs = [rec for part in parts for rec in ring.record.iter_unpack(part)]
+        assert len(parts) == 2 and [rec[2] for rec in recs] == list(range(14, 20))
+        for part in parts:
+            part.release()
+
+def test_schema_mismatch_and_second_writer(tmp_path):
+    path = str(tmp_path / "test.ring")
+    writer = tsring.Ring.create(path, "test", FIELDS, capacity=8)
+    with pytest.raises(tsring.RingError, match="another writer"):
+        tsring.Ring.create(path, "test", FIELDS, capacity=8)
+    writer.close()
+    with pytest.raises(tsring.RingError, match="different schema"):
+        tsring.Ring.create(path, "test", FIELDS[:2], capacity=8)
+    with pytest.raises(tsring.RingError, match="different schema"):
+        tsring.Ring.create(path, "other", FIELDS, capacity=8)
+    with tsring.Ring.create(path, "test", FIELDS, capacity=8) as ring:
+        assert ring.capacity == 8
+
+def test_export_matches_sysmonitor_files(tmp_path):
+    out = tmp_path / "out"
+    ring_path = str(out / "sysmonitor.ring")
+    writer = sysmonitor.SysmonitorWriter(str(out), ring=ring_path, ring_capacity=16)
+    for i in range(20):
+        row = {k: None for k in sysmonitor.CSV_FIELDS}
+        row.update(timestamp=datetime(2025, 10, 14, 12, 0, i, 250000), top_process="stress-ng",
+                   top_process_cpu_pct=99.5, cpu_freq_mhz=2400 + i, cpu_temp_c=60, cpu_load_pct=12.5 * (i % 8),
+                   ram_used_mb=8000, ram_total_mb=16000, ram_free_mb=4000, net_if="eth0", net_link="UP",
+                   net_rx_bytes=1000 * i, net_tx_bytes=2000 * i, disk_health="PASSED" if i % 2 else None)
+        writer.write(row)
+    writer.close()
+    tsring_py = os.path.join(REPO, "tsring.py")
+    text = subprocess.run([sys.executable, tsring_py, "export", "--format", "text", ring_path],
+                          check=True, capture_output=True, text=True, timeout=30).stdout
+    csv_path = str(tmp_path / "export.csv")
+    subprocess.run([sys.executable, tsring_py, "export", "-o", csv_path, "--last", "5", ring_path],
+                   check=True, capture_output=True, text=True, timeout=30)
+    with open(out / "sysmonitor.log", encoding="utf-8") as f:
+        log = f.read().splitlines(keepends=True)
+    with open(out / "sysmonitor.csv", encoding="utf-8", newline="") as f:
+        csv_lines = f.read().splitlines(keepends=True)
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        exported = f.read().splitlines(keepends=True)
+    # в кольце — последние 16 записей из 20
+    assert text == "".join(log[:2] + log[-16:])
+    assert exported == csv_lines[:1] + csv_lines[-5:]
+
+WRITER = """
+import sys
+sys.path.insert(0, {repo!r})
+import tsring
+from test_tsring import FIELDS, values
+with tsring.Ring.create({path!r}, "test", FIELDS, capacity=32) as ring:
+    print("ready", flush=True)
+    for seq in range({count}):
+        ring.append(float(seq), values(seq))
+"""
+
+def test_reader_never_sees_torn_records(tmp_path):
+    path = str(tmp_path / "test.ring")
+    count = 300000
+    code = WRITER.format(repo=REPO, path=path, count=count)
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.Popen([sys.executable, "-c", code], env=env, stdout=subprocess.PIPE, text=True)
+    assert proc.stdout.readline() == "ready\n"
+    reads = 0
+    with tsring.Ring.open(path) as ring:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            done = proc.poll() is not None
+            prev = -1
+            for seq, t, vals in ring.read():
+                assert seq > prev and vals[0] == seq
+                check(t, vals)
+                prev = seq
+                reads += 1
+            if done:
+                break
+    assert proc.wait() == 0
+    assert reads > 0
+    with tsring.Ring.open(path) as ring:
+        assert ring.cursor == count and [v[0] for _, v in ring.latest(2)] == [count - 2, count - 1]
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# tsring.py — кольцевое хранилище временных рядов в отображаемых в память
+# файлах: сборщики (sysmonitor.py, disksampler.py, nvidia-smi_collector.py)
+# дописывают замеры записями фиксированного размера без форматирования
+# текста, читатели (GUI, выгрузка) берут последние N замеров прямо из
+# отображения файла, не перечитывая и не разбирая логи.
+# Файл — заголовок (HEADER_SIZE байт: формат, размер записи, ёмкость, курсор
+# записи, схема в JSON) и ёмкость × запись. Запись — штамп (номер записи + 1),
+# время (epoch, float64) и поля схемы (struct: d/f — числа с плавающей
+# точкой, q/i/h/b — целые, Ns — строка до N байт UTF-8). Пустые значения:
+# NaN, минимальное целое, пустая строка.
+# Один писатель (flock на файл), сколько угодно читателей без блокировок:
+# писатель обнуляет штамп слота, пишет запись, ставит штамп и только потом
+# двигает курсор; читатель сверяет штамп до и после копирования записи и
+# пропускает слот, который успели перезаписать.
+#   tsring.py info ~/AutoTest_Logs/sysmonitor/sysmonitor.ring
+#   tsring.py tail -n 20 ~/AutoTest_Logs/sysmonitor/sysmonitor.ring
+#   tsring.py export --format text ~/AutoTest_Logs/sysmonitor/sysmonitor.ring > sysmonitor.log
+#   tsring.py export -o run.csv "$HOME/gpu_burn_logs/nvidia-smi_14-10-2025 12:00:00.ring"
+
+import argparse
+import csv
+import fcntl
+import importlib.util
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MAGIC = b"ATSRING1"
+HEADER_SIZE = 4096
+# magic, размер заголовка, размер записи, ёмкость, курсор записи, время создания, длина схемы
+HEADER = struct.Struct("<8sIIQQdI")
+CURSOR_OFFSET = 24
+STAMP = struct.Struct("<Q")
+DEFAULT_CAPACITY = 1 << 16
+INT_CODES = {"b": 8, "h": 16, "i": 32, "q": 64}
+
+class RingError(Exception):
+    pass
+
+def _null(code: str) -> Any:
+    if code in INT_CODES:
+        return -(1 << (INT_CODES[code] - 1))
+    if code.endswith("s"):
+        return b""
+    return math.nan
+
+def _encoder(code: str) -> Callable[[Any], Any]:
+    null = _null(code)
+    if code.endswith("s"):
+        size = int(code[:-1])
+        return lambda v: null if v is None else str(v).encode("utf-8")[:size]
+    if code in INT_CODES:
+        return lambda v: null if v is None else int(v)
+    return lambda v: null if v is None else float(v)
+
+def _decoder(code: str) -> Callable[[Any], Any]:
+    null = _null(code)
+    if code.endswith("s"):
+        return lambda v: v.rstrip(b"\0").decode("utf-8", errors="ignore") or None
+    if code in INT_CODES:
+        return lambda v: None if v == null else v
+    return lambda v: None if v != v else v
+
+class Ring:
+    # Кольцо фиксированных записей в mmap-файле (один писатель, много читателей)
+
+    def __init__(self, path: str, f, mm: mmap.mmap, writable: bool):
+        self.path = path
+        self.file = f
+        self.mm = mm
+        self.writable = writable
+        magic, header_size, record_size, capacity, _, created, schema_len = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or header_size != HEADER_SIZE:
+            raise RingError(f"{path}: not a ring file")
+        self.record_size = record_size
+        self.capacity = capacity
+        self.created = created
+        self.schema = json.loads(bytes(mm[HEADER.size:HEADER.size + schema_len]).decode("utf-8"))
+        self.kind: str = self.schema["kind"]
+        self.fields: List[Tuple[str, str]] = [tuple(f) for f in self.schema["fields"]]
+        self.names = [name for name, _ in self.fields]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.record = struct.Struct("<Qd" + "".join(code for _, code in self.fields))
+        if self.record.size != record_size:
+            raise RingError(f"{path}: record size mismatch")
+        self.encoders = [_encoder(code) for _, code in self.fields]
+        self.decoders = [_decoder(code) for _, code in self.fields]
+
+    @classmethod
+    def create(cls, path: str, kind: str, fields: Sequence[Tuple[str, str]], capacity: int = DEFAULT_CAPACITY,
+               meta: Optional[Dict[str, Any]] = None) -> "Ring":
+        # Открыть кольцо на запись (создать, если его нет). Файл с другой
+        # схемой или занятый другим писателем не трогается: RingError
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # r+b без O_APPEND (open("a+b") дописал бы заголовок в конец) и без усечения
+        f = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+        try:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise RingError(f"{path} is open by another writer")
+            schema = {"kind": kind, "fields": [list(fld) for fld in fields], "meta": meta or {}}
+            if os.fstat(f.fileno()).st_size == 0:
+                cls._init_file(f, schema, capacity)
+            mm = mmap.mmap(f.fileno(), 0)
+            ring = cls(path, f, mm, True)
+            if ring.kind != kind or ring.fields != [tuple(fld) for fld in fields]:
+                ring.close()
+                raise RingError(f"{path} exists with a different schema; choose another ring path")
+            return ring
+        except BaseException:
+            if not f.closed:
+                f.close()
+            raise
+
+    @staticmethod
+    def _init_file(f, schema: Dict[str, Any], capacity: int) -> None:
+        blob = json.dumps(schema).encode("utf-8")
+        if HEADER.size + len(blob) > HEADER_SIZE:
+            raise RingError("schema does not fit into the ring header")
+        record_size = struct.calcsize("<Qd" + "".join(code for _, code in schema["fields"]))
+        head = bytearray(HEADER_SIZE)
+        HEADER.pack_into(head, 0, b"\0" * 8, HEADER_SIZE, record_size, capacity, 0,
+                         datetime.now().timestamp(), len(blob))
+        head[HEADER.size:HEADER.size + len(blob)] = blob
+        f.truncate(HEADER_SIZE + capacity * record_size)
+        # magic — последним, читатель не примет недописанный заголовок
+        os.pwrite(f.fileno(), bytes(head), 0)
+        os.pwrite(f.fileno(), MAGIC, 0)
+
+    @classmethod
+    def open(cls, path: str) -> "Ring":
+        # Только чтение: без блокировок, писатель может работать
+        f = open(path, "rb")
+        try:
+            if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+                raise RingError(f"{path}: ring is not initialized yet")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return cls(path, f, mm, False)
+        except BaseException:
+            f.close()
+            raise
+
+    def close(self) -> None:
+        self.mm.close()
+        self.file.close()
+
+    def __enter__(self) -> "Ring":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def cursor(self) -> int:
+        # Сколько записей записано за всё время (следующая получит этот номер)
+        return STAMP.unpack_from(self.mm, CURSOR_OFFSET)[0]
+
+    def __len__(self) -> int:
+        return min(self.cursor, self.capacity)
+
+    def _offset(self, seq: int) -> int:
+        return HEADER_SIZE + (seq % self.capacity) * self.record_size
+
+    def append(self, t: float, values: Sequence[Any]) -> int:
+        # values — в порядке полей схемы; None — пустое значение
+        seq = self.cursor
+        off = self._offset(seq)
+        STAMP.pack_into(self.mm, off, 0)
+        self.record.pack_into(self.mm, off, 0, t, *[enc(v) for enc, v in zip(self.encoders, values)])
+        STAMP.pack_into(self.mm, off, seq + 1)
+        STAMP.pack_into(self.mm, CURSOR_OFFSET, seq + 1)
+        return seq
+
+    def append_row(self, t: float, row: Dict[str, Any]) -> int:
+        return self.append(t, [row.get(name) for name in self.names])
+
+    def read(self, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, float, Tuple[Any, ...]]]:
+        # (номер, время, значения) записей start..end-1, ещё не перезаписанных
+        end = self.cursor if end is None else end
+        decoders = self.decoders
+        for seq in range(max(start, end - self.capacity, 0), end):
+            off = self._offset(seq)
+            if STAMP.unpack_from(self.mm, off)[0] != seq + 1:
+                continue
+            rec = self.record.unpack_from(self.mm, off)
+            if STAMP.unpack_from(self.mm, off)[0] != seq + 1:
+                continue  # писатель перезаписал слот во время чтения
+            yield seq, rec[1], tuple(dec(v) for dec, v in zip(decoders, rec[2:]))
+
+    def read_since(self, cursor: int) -> Tuple[List[Tuple[float, Tuple[Any, ...]]], int]:
+        # Новые записи после прошлого чтения и курсор для следующего
+        end = self.cursor
+        return [(t, values) for _, t, values in self.read(cursor, end)], end
+
+    def latest(self, n: int) -> List[Tuple[float, Tuple[Any, ...]]]:
+        end = self.cursor
+        return [(t, values) for _, t, values in self.read(max(0, end - n), end)]
+
+    def rows(self, start: int = 0) -> Iterator[Dict[str, Any]]:
+        # Записи как словари (timestamp — datetime), как строки сборщиков
+        for _, t, values in self.read(start):
+            row = dict(zip(self.names, values))
+            row["timestamp"] = datetime.fromtimestamp(t)
+            yield row
+
+    def view(self, n: int) -> List[memoryview]:
+        # Последние n записей без копирования: один или два (при переходе
+        # через конец кольца) участка отображения; разбор — self.record.
+        # iter_unpack; перезаписанное писателем отсекается по штампу записи.
+        # Участки нужно освободить (release()) до close()
+        end = self.cursor
+        n = min(n, end, self.capacity)
+        if n <= 0:
+            return []
+        first = (end - n) % self.capacity
+        buf = memoryview(self.mm)
+        size = self.record_size
+        if first + n <= self.capacity:
+            return [buf[HEADER_SIZE + first * size:HEADER_SIZE + (first + n) * size]]
+        return [buf[HEADER_SIZE + first * size:HEADER_SIZE + self.capacity * size],
+                buf[HEADER_SIZE:HEADER_SIZE + (first + n - self.capacity) * size]]
+
+# --- выгрузка в текстовые форматы сборщиков ---
+
+def _load(name: str, path: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def export_sysmonitor(ring: Ring, out, fmt: str, rows: Iterator[Dict[str, Any]]) -> int:
+    import sysmonitor
+    n = 0
+    if fmt == "text":
+        date_format = os.environ.get("AUTOTEST_FORMAT_DATE", "%d-%m-%Y %H:%M:%S")
+        out.write(sysmonitor.HEADER)
+        for row in rows:
+            out.write(sysmonitor.format_row(row, date_format))
+            n += 1
+        return n
+    writer = csv.writer(out)
+    writer.writerow(sysmonitor.CSV_FIELDS)
+    for row in rows:
+        writer.writerow(sysmonitor.csv_values(row))
+        n += 1
+    return n
+
+def export_diskstats(ring: Ring, out, fmt: str, rows: Iterator[Dict[str, Any]]) -> int:
+    import disksampler
+    writer = disksampler.DiskstatsWriter(out)
+    n = 0
+    for row in rows:
+        writer.write([row])
+        n += 1
+    return n
+
+def export_nvidia_smi(ring: Ring, out, fmt: str, rows: Iterator[Dict[str, Any]]) -> int:
+    collector = _load("nvidia_smi_collector", os.path.join(HERE, "gpuburn", "nvidia-smi_collector.py"))
+    out.write(collector.log_header(ring.schema["meta"]["fields"], ring.schema["meta"].get("interval_ms", 0)))
+    n = 0
+    for row in rows:
+        out.write(collector.format_ring_row(row, ring.schema["meta"]["fields"]) + "\n")
+        n += 1
+    return n
+
+# kind кольца -> (выгрузка, поддерживаемые форматы)
+EXPORTERS: Dict[str, Tuple[Callable[..., int], Tuple[str, ...]]] = {
+    "sysmonitor": (export_sysmonitor, ("csv", "text")),
+    "diskstats": (export_diskstats, ("csv",)),
+    "nvidia-smi": (export_nvidia_smi, ("csv",)),
+}
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect and export memory-mapped ring time-series files.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("info", help="Schema, capacity and fill of ring files")
+    p.add_argument("rings", nargs="+")
+    p = sub.add_parser("tail", help="Print the latest records")
+    p.add_argument("-n", type=int, default=10)
+    p.add_argument("ring")
+    p = sub.add_parser("export", help="Write records in the collector's text/CSV format")
+    p.add_argument("ring")
+    p.add_argument("-o", "--output", help="Output file (default: stdout)")
+    p.add_argument("--format", choices=["csv", "text"], default="csv",
+                   help="csv: sysmonitor.csv / diskstats CSV / collector log; text: sysmonitor.log table")
+    p.add_argument("--last", type=int, help="Only the latest N records")
+    p.add_argument("--since", help="Only records from 'YYYY-MM-DD[ HH:MM:SS]'")
+    args = ap.parse_args()
+
+    if args.cmd == "info":
+        for path in args.rings:
+            with Ring.open(path) as ring:
+                cursor = ring.cursor
+                first = next(ring.read(), None)
+                last = ring.latest(1)
+                print(f"{path}: {ring.kind}, {len(ring.fields)} fields, record {ring.record_size} B, "
+                      f"{len(ring)}/{ring.capacity} records ({cursor} written)")
+                if first and last:
+                    print(f"  {datetime.fromtimestamp(first[1]).isoformat(sep=' ', timespec='seconds')} .. "
+                          f"{datetime.fromtimestamp(last[0][0]).isoformat(sep=' ', timespec='seconds')}")
+                print("  fields: " + ", ".join(f"{name}:{code}" for name, code in ring.fields))
+        return
+    if args.cmd == "tail":
+        with Ring.open(args.ring) as ring:
+            for t, values in ring.latest(args.n):
+                stamp = datetime.fromtimestamp(t).isoformat(sep=" ", timespec="milliseconds")
+                print(stamp + "  " + "  ".join(f"{k}={v}" for k, v in zip(ring.names, values) if v is not None))
+        return
+
+    with Ring.open(args.ring) as ring:
+        if ring.kind not in EXPORTERS:
+            ap.error(f"no exporter for ring kind {ring.kind!r}")
+        export, formats = EXPORTERS[ring.kind]
+        if args.format not in formats:
+            ap.error(f"{ring.kind} rings export to: {', '.join(formats)}")
+        start = max(0, ring.cursor - args.last) if args.last else 0
+        rows = ring.rows(start)
+        if args.since:
+            since = datetime.fromisoformat(args.since)
+            rows = (r for r in rows if r["timestamp"] >= since)
+        out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        try:
+            n = export(ring, out, args.format, rows)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        if args.output:
+            print(f"Exported {n} records to {args.output}")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        sys.exit(0)